@@ -47,8 +47,23 @@ export interface NetworkData {
   global_metrics: GlobalMetrics;
 }
 
+/** Sliding-window snapshots at one granularity (social-network-timeline.json) */
+export interface NetworkTimelineLevel {
+  labels: string[];
+  window: number;
+  num_nodes: number[];
+  num_edges: number[];
+  persons: Record<string, Record<"pagerank" | "degree" | "betweenness", number[]>>;
+}
+
+export interface NetworkTimeline {
+  month: NetworkTimelineLevel;
+  quarter: NetworkTimelineLevel;
+}
+
 export default function NetworkPage() {
   const [data, setData] = useState<NetworkData | null>(null);
+  const [timeline, setTimeline] = useState<NetworkTimeline | null>(null);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
 
@@ -59,6 +74,9 @@ export default function NetworkPage() {
         if (!res.ok) throw new Error("Kunne ikke hente netværksdata");
         const json: NetworkData = await res.json();
         setData(json);
+        // The per-person time series are optional; the page works without them
+        const timelineRes = await fetch("/data/social-network-timeline.json").catch(() => null);
+        if (timelineRes?.ok) setTimeline(await timelineRes.json());
       } catch (err) {
         setError(err instanceof Error ? err.message : "Ukendt fejl");
       } finally {
@@ -96,7 +114,7 @@ export default function NetworkPage() {
           Personerne i Peters breve og deres forbindelser, 1911–1918
         </p>
       </div>
-      <SocialNetwork data={data} />
+      <SocialNetwork data={data} timeline={timeline} />
     </div>
   );
 }
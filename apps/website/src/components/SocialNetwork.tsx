@@ -1,7 +1,7 @@
 "use client";
 
 import { useState, useMemo, useRef, useEffect } from "react";
-import type { NetworkData } from "@/app/network/page";
+import type { NetworkData, NetworkTimeline } from "@/app/network/page";
 import NetworkGraph from "@/components/NetworkGraph";
 import NetworkStatsPanel from "@/components/NetworkStatsPanel";
 
@@ -19,7 +19,13 @@ const CATEGORY_LABELS: Record<string, string> = {
   unknown: "Ukendt",
 };
 
-export default function SocialNetwork({ data }: { data: NetworkData }) {
+export default function SocialNetwork({
+  data,
+  timeline,
+}: {
+  data: NetworkData;
+  timeline: NetworkTimeline | null;
+}) {
   const [selectedYear, setSelectedYear] = useState<number | null>(null);
   const [selectedNodeId, setSelectedNodeId] = useState<string | null>(null);
   const [isPlaying, setIsPlaying] = useState(false);
@@ -173,6 +179,8 @@ export default function SocialNetwork({ data }: { data: NetworkData }) {
               nodes={data.nodes}
               categoryColors={CATEGORY_COLORS}
               categoryLabels={CATEGORY_LABELS}
+              timeline={timeline}
+              selectedYear={selectedYear}
               onClose={() => setSelectedNodeId(null)}
             />
           ) : (
@@ -194,6 +202,8 @@ interface NodeDetailProps {
   nodes: NetworkData["nodes"];
   categoryColors: Record<string, string>;
   categoryLabels: Record<string, string>;
+  timeline: NetworkTimeline | null;
+  selectedYear: number | null;
   onClose: () => void;
 }
 
@@ -203,6 +213,8 @@ function NodeDetailPanel({
   nodes,
   categoryColors,
   categoryLabels,
+  timeline,
+  selectedYear,
   onClose,
 }: NodeDetailProps) {
   const connections = edges.filter(
@@ -272,6 +284,15 @@ function NodeDetailPanel({
         <dd className="text-ink font-medium">{node.last_mention}</dd>
       </dl>
 
+      {timeline?.quarter.persons[node.id] && (
+        <PageRankSparkline
+          labels={timeline.quarter.labels}
+          values={timeline.quarter.persons[node.id].pagerank}
+          window={timeline.quarter.window}
+          selectedYear={selectedYear}
+        />
+      )}
+
       {connectedNames.length > 0 && (
         <div>
           <h4 className="text-sm font-ui text-faded mb-1">
@@ -297,3 +318,49 @@ function NodeDetailPanel({
     </div>
   );
 }
+
+/* ------ PageRank over time ------ */
+interface PageRankSparklineProps {
+  labels: string[];
+  values: number[];
+  window: number;
+  selectedYear: number | null;
+}
+
+/** The person's PageRank per sliding-window snapshot; the selected year's quarters are highlighted */
+function PageRankSparkline({ labels, values, window, selectedYear }: PageRankSparklineProps) {
+  const width = 280;
+  const height = 48;
+  const max = Math.max(...values, 1e-9);
+  const step = width / Math.max(values.length - 1, 1);
+  const x = (i: number) => i * step;
+  const y = (v: number) => height - (v / max) * (height - 4) - 2;
+  const points = values.map((v, i) => `${x(i).toFixed(1)},${y(v).toFixed(1)}`).join(" ");
+  const highlighted = labels
+    .map((label, i) => (selectedYear && label.startsWith(`${selectedYear}-`) ? i : -1))
+    .filter((i) => i >= 0);
+
+  return (
+    <div>
+      <h4 className="text-sm font-ui text-faded mb-1">
+        PageRank pr. kvartal ({window} kvartalers vindue)
+      </h4>
+      <svg viewBox={`0 0 ${width} ${height}`} className="w-full h-12" role="img">
+        {highlighted.length > 0 && (
+          <rect
+            x={x(highlighted[0]) - step / 2}
+            y={0}
+            width={step * highlighted.length}
+            height={height}
+            className="fill-parchment-dark"
+          />
+        )}
+        <polyline points={points} fill="none" stroke="#C2583A" strokeWidth={1.5} />
+      </svg>
+      <div className="flex justify-between text-xs text-faded font-ui">
+        <span>{labels[0]}</span>
+        <span>{labels[labels.length - 1]}</span>
+      </div>
+    </div>
+  );
+}
@@ -98,15 +98,14 @@ export async function getPersonPages(): Promise<PersonPage[]> {
   return readJsonFile<PersonPage[]>('person-pages.json', []);
 }
 
-/** Get a single person page by id */
+/** Get a single person page by id, from its own shard (person-pages/{id}.json) */
 export async function getPersonPage(id: string): Promise<PersonPage | undefined> {
-  const pages = await getPersonPages();
-  return pages.find(p => p.id === id);
+  return readJsonFile<PersonPage | undefined>(path.join('person-pages', `${id}.json`), undefined);
 }
 
 /** Get all person IDs for generateStaticParams */
 export function getAllPersonIds(): string[] {
-  return readJsonFile<PersonPage[]>('person-pages.json', []).map(p => p.id);
+  return readJsonFile<PersonPage[]>(path.join('person-pages', 'index.json'), []).map(p => p.id);
 }
 
 /** Get all place pages */
@@ -52,6 +52,7 @@ export const DATA = {
   relatedLetters: "/data/related-letters.json",
   personRegistry: "/data/person-registry.json",
   personPages: "/data/person-pages.json",
+  personPagesIndex: "/data/person-pages/index.json",
   placesJson: "/data/places.json",
   placePages: "/data/place-pages.json",
   socialNetwork: "/data/social-network.json",
@@ -60,3 +61,8 @@ export const DATA = {
   sentimentOverview: "/data/sentiment-overview.json",
   narrativeArcs: "/data/letter-narrative-arcs.json",
 } as const;
+
+/** Path of one person's page shard (page record plus its neighbourhood) */
+export function personPageShard(id: string): string {
+  return `/data/person-pages/${encodeURIComponent(id)}.json`;
+}
@@ -12,7 +12,7 @@ import {
   LetterAnalysis,
   NetworkNode,
 } from "../types";
-import { getData, stripHtml, DATA } from "../data-loader";
+import { getData, stripHtml, DATA, personPageShard } from "../data-loader";
 
 // ============================================================================
 // Shared Data Interfaces
@@ -270,15 +270,18 @@ const getPersonTool: WebMCPToolRegistration = {
     const includeLetters = (input.include_letters as boolean | undefined) ?? true;
     const includeNetwork = input.include_network as boolean | undefined;
 
-    const personPages = await getData<PersonPage[]>(DATA.personPages);
-    const person = personPages.find(
+    // The index resolves canonical names; the person's shard holds the rest
+    const index = await getData<Pick<PersonPage, "id" | "canonical">[]>(DATA.personPagesIndex);
+    const entry = index.find(
       (p) => p.id === personId || p.canonical === personId
     );
 
-    if (!person) {
+    if (!entry) {
       throw new Error(`Person ${personId} not found`);
     }
 
+    const person = await getData<PersonPage>(personPageShard(entry.id));
+
     const registry = await getData<RegistryEntry[]>(DATA.personRegistry);
     const registryEntry = registry.find(
       (r) => r.id === person.id || r.canonical === person.canonical
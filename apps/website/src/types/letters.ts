@@ -138,6 +138,13 @@ export interface PersonConnection {
   person_id: string;
   full_name: string;
   weight: number;
+  /** Letters mentioning both persons (only in per-person shards) */
+  shared_letters?: number[];
+}
+
+export interface PersonEgoNetwork {
+  nodes: { person_id: string; full_name: string; hops: number }[];
+  edges: { source: string; target: string; weight: number }[];
 }
 
 export interface PersonPage {
@@ -155,6 +162,8 @@ export interface PersonPage {
   letter_count: number;
   first_mention: string;
   last_mention: string;
+  /** 2-hop co-mention network (only in per-person shards) */
+  ego_network?: PersonEgoNetwork;
 }
 
 export interface PlacePhoto {
@@ -0,0 +1,207 @@
+"""
+Alias resolver: maps entity strings or raw text to person (or place) IDs.
+
+One Aho–Corasick automaton over every alias finds all alias occurrences in a
+text in a single pass, and exact-match tables answer "which IDs does this
+entity string name?" with one dict lookup. Both are available case-sensitive
+or case-folded:
+
+    from alias_resolver import load_registry_resolver
+
+    resolver = load_registry_resolver()      # aliases + canonical names
+    resolver.resolve("Trine")                # ["trine"] (exact entity match)
+    resolver.resolve("trine", ignore_case=True)
+    resolver.ids_in_text(page_text)          # IDs whose alias occurs anywhere
+
+IDs are always returned in the order they were given to the resolver (for
+the registry: person-registry.json order), so "first match wins" callers keep
+their old tie-breaking.
+
+The registry resolver is cached in data/.cache/ keyed by the SHA-256 of
+person-registry.json and only rebuilt when the registry changes.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from collections import deque
+from pathlib import Path
+
+from file_lock import file_lock, tmp_path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DATA_DIR = SCRIPT_DIR.parent / "data"
+PERSON_REGISTRY = DATA_DIR / "person-registry.json"
+CACHE_PATH = DATA_DIR / ".cache" / "alias-resolver.pickle"
+
+# Bump when the pickled layout of AliasResolver changes.
+CACHE_VERSION = 1
+
+
+class _Automaton:
+    """Aho–Corasick automaton over a fixed list of patterns."""
+
+    def __init__(self, patterns: list[str]):
+        self.patterns = patterns
+        goto: list[dict[str, int]] = [{}]
+        out: list[list[int]] = [[]]
+        for idx, pattern in enumerate(patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                state = nxt
+            out[state].append(idx)
+
+        # Breadth-first failure links; each state's outputs include those of
+        # its failure state so matching never has to walk the chain.
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                if state:
+                    f = fail[state]
+                    while f and ch not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+        self.goto, self.fail, self.out = goto, fail, out
+
+    def iter_matches(self, text: str):
+        """Yield (end_index, pattern_index) for every occurrence in text."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in out[state]:
+                yield i + 1, idx
+
+
+class AliasResolver:
+    """Exact and in-text alias lookup for a {id: [aliases]} mapping."""
+
+    def __init__(self, aliases_by_id: dict[str, list[str]]):
+        self.ids = list(aliases_by_id)
+        self._rank = {pid: i for i, pid in enumerate(self.ids)}
+        self._exact: dict[str, list[str]] = {}
+        self._folded: dict[str, list[str]] = {}
+        for pid, aliases in aliases_by_id.items():
+            for alias in aliases:
+                if not alias:
+                    continue
+                for table, key in ((self._exact, alias), (self._folded, alias.lower())):
+                    ids = table.setdefault(key, [])
+                    if pid not in ids:
+                        ids.append(pid)
+        self._automata: dict[bool, _Automaton] = {}
+
+    # -- exact entity strings -------------------------------------------------
+
+    def resolve(self, name: str, ignore_case: bool = False) -> list[str]:
+        """IDs that have ``name`` as an alias (whole-string match)."""
+        if ignore_case:
+            return self._folded.get(name.lower(), [])
+        return self._exact.get(name, [])
+
+    def first(self, name: str, ignore_case: bool = False) -> str | None:
+        ids = self.resolve(name, ignore_case)
+        return ids[0] if ids else None
+
+    # -- raw text -------------------------------------------------------------
+
+    def _automaton(self, ignore_case: bool) -> _Automaton:
+        if ignore_case not in self._automata:
+            table = self._folded if ignore_case else self._exact
+            self._automata[ignore_case] = _Automaton(list(table))
+        return self._automata[ignore_case]
+
+    def find(self, text: str, ignore_case: bool = False):
+        """Yield (start, end, alias, ids) for every alias occurrence in text.
+
+        Occurrences may overlap (both "Peter" and "Peter Mærsk" are reported).
+        """
+        automaton = self._automaton(ignore_case)
+        table = self._folded if ignore_case else self._exact
+        haystack = text.lower() if ignore_case else text
+        for end, idx in automaton.iter_matches(haystack):
+            alias = automaton.patterns[idx]
+            yield end - len(alias), end, alias, table[alias]
+
+    def ids_in_text(self, text: str, ignore_case: bool = False) -> list[str]:
+        """IDs with at least one alias occurring in text, in resolver order."""
+        found = set()
+        for _, _, _, ids in self.find(text, ignore_case):
+            found.update(ids)
+        return sorted(found, key=self._rank.__getitem__)
+
+
+# ---------------------------------------------------------------------------
+# Person registry
+# ---------------------------------------------------------------------------
+
+def registry_aliases(persons: list[dict]) -> dict[str, list[str]]:
+    """{person_id: aliases + canonical name} in registry order."""
+    return {
+        p["id"]: list(p.get("aliases", [])) + [p.get("canonical", "")]
+        for p in persons
+    }
+
+
+def _registry_hash(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+_RESOLVERS: dict[str, AliasResolver] = {}
+
+
+def _read_cache(digest: str) -> AliasResolver | None:
+    """The cached resolver, if it was built from a registry with this digest."""
+    if not CACHE_PATH.exists():
+        return None
+    try:
+        with open(CACHE_PATH, "rb") as f:
+            cached = pickle.load(f)
+    except (pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+        return None
+    if cached.get("version") == CACHE_VERSION and cached.get("hash") == digest:
+        return cached["resolver"]
+    return None
+
+
+def load_registry_resolver(path: Path = PERSON_REGISTRY) -> AliasResolver:
+    """Resolver over person-registry.json, rebuilt only when the file changes."""
+    digest = _registry_hash(path)
+    if digest in _RESOLVERS:
+        return _RESOLVERS[digest]
+
+    resolver = _read_cache(digest)
+    if resolver is None:
+        # Stages running in parallel build the cache once, under its lock
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with file_lock(CACHE_PATH):
+            resolver = _read_cache(digest)
+            if resolver is None:
+                with open(path, "r", encoding="utf-8") as f:
+                    resolver = AliasResolver(registry_aliases(json.load(f)))
+                # Build both automata now so the cached copy is ready to match.
+                resolver._automaton(False)
+                resolver._automaton(True)
+                tmp = tmp_path(CACHE_PATH)
+                with open(tmp, "wb") as f:
+                    pickle.dump({"version": CACHE_VERSION, "hash": digest, "resolver": resolver}, f)
+                os.replace(tmp, CACHE_PATH)
+
+    _RESOLVERS[digest] = resolver
+    return resolver
@@ -21,7 +21,6 @@ Outputs:
 
 import argparse
 import csv
-import hashlib
 import json
 import math
 import os
@@ -33,6 +32,9 @@ import numpy as np
 from scipy.spatial.distance import jensenshannon
 from scipy.stats import wasserstein_distance
 
+from fingerprint import file_hash, meta_is_current
+from temporal_index import TemporalIndex
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -49,21 +51,13 @@ def resolve(path: str) -> str:
 # Skip logic (ADR-029)
 # ---------------------------------------------------------------------------
 
-def compute_file_hash(path: str) -> str:
-    return hashlib.sha256(open(path, "rb").read()).hexdigest()
-
-
 def should_skip(input_paths: list[str], meta_path: str) -> bool:
     """Check whether output is up to date based on input file hashes."""
-    current = {"script_hash": compute_file_hash(__file__)}
+    current = {"script_hash": file_hash(__file__)}
     for p in input_paths:
         key = os.path.basename(p) + "_hash"
-        current[key] = compute_file_hash(p)
-    if not os.path.exists(meta_path):
-        return False
-    with open(meta_path, "r", encoding="utf-8") as f:
-        existing = json.load(f)
-    return all(existing.get(k) == v for k, v in current.items())
+        current[key] = file_hash(p)
+    return meta_is_current(meta_path, current)
 
 
 # ---------------------------------------------------------------------------
@@ -81,20 +75,6 @@ def classify_recipient(recipient: str) -> str:
         return "unknown"
 
 
-# ---------------------------------------------------------------------------
-# Quarter helpers
-# ---------------------------------------------------------------------------
-
-def date_to_quarter(date_str: str) -> str:
-    """Convert ISO date string to quarter label, e.g. '1914-Q3'."""
-    try:
-        dt = datetime.strptime(date_str, "%Y-%m-%d")
-    except ValueError:
-        return "unknown"
-    q = (dt.month - 1) // 3 + 1
-    return f"{dt.year}-Q{q}"
-
-
 # ---------------------------------------------------------------------------
 # Word frequency divergence
 # ---------------------------------------------------------------------------
@@ -189,7 +169,6 @@ def load_letters(csv_path: str) -> list[dict]:
                 "recipient": row.get("recipient", "").strip(),
                 "audience": audience,
                 "text": row.get("text", ""),
-                "quarter": date_to_quarter(row.get("date", "").strip()),
             })
     return letters
 
@@ -200,18 +179,16 @@ def compute_quarterly_divergence(
     psycho_metrics: dict | None,
 ) -> list[dict]:
     """Compute divergence metrics per quarter."""
-    # Group by quarter and audience
-    quarters: dict[str, dict[str, list[dict]]] = defaultdict(lambda: defaultdict(list))
-    for letter in letters:
-        q = letter["quarter"]
-        a = letter["audience"]
-        if q == "unknown" or a == "unknown":
-            continue
-        quarters[q][a].append(letter)
+    # Quarters are contiguous slices of the date index; undated letters
+    # never appear in a bucket.
+    letters_by_id = {l["id"]: l for l in letters}
+    index = TemporalIndex(list(letters_by_id), [l["date"] for l in letters_by_id.values()])
 
     results = []
-    for quarter in sorted(quarters.keys()):
-        groups = quarters[quarter]
+    for quarter, letter_ids in index.buckets("quarter"):
+        groups: dict[str, list[dict]] = defaultdict(list)
+        for lid in letter_ids:
+            groups[letters_by_id[lid]["audience"]].append(letters_by_id[lid])
         trine_letters = groups.get("trine", [])
         parent_letters = groups.get("parents", [])
 
@@ -518,11 +495,11 @@ def main() -> None:
     # Write skip-logic meta
     meta: dict = {
         "generated": datetime.now(timezone.utc).isoformat(),
-        "script_hash": compute_file_hash(__file__),
+        "script_hash": file_hash(__file__),
     }
     for p in input_paths:
         key = os.path.basename(p) + "_hash"
-        meta[key] = compute_file_hash(p)
+        meta[key] = file_hash(p)
     meta["trine_count"] = trine_count
     meta["parent_count"] = parent_count
     meta["quarters_with_both"] = len(quarterly)
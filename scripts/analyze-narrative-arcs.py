@@ -16,7 +16,6 @@ Outputs:
 """
 
 import argparse
-import csv
 import json
 import os
 import sys
@@ -24,6 +23,9 @@ from collections import defaultdict
 
 import numpy as np
 
+from corpus import load_corpus
+from record_stream import iter_records, records_exist
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -40,13 +42,15 @@ def resolve(path: str) -> str:
 # Data loading
 # ---------------------------------------------------------------------------
 
-def load_sentence_scores(path: str) -> list[dict]:
-    with open(path, "r", encoding="utf-8") as f:
-        sentences = json.load(f)
-    assert len(sentences) >= 5000, (
-        f"Expected >= 5000 sentences, got {len(sentences)}"
+def load_sentence_scores(path: str):
+    """Stream sentence score records (JSON or JSONL) one at a time."""
+    count = 0
+    for rec in iter_records(path):
+        count += 1
+        yield rec
+    assert count >= 5000, (
+        f"Expected >= 5000 sentences, got {count}"
     )
-    return sentences
 
 
 def load_letter_scores(path: str) -> dict:
@@ -54,18 +58,9 @@ def load_letter_scores(path: str) -> dict:
         return json.load(f)
 
 
-def load_letters_csv(path: str) -> dict[str, dict]:
+def load_letters_csv() -> dict[str, dict]:
     """Return dict keyed by letter ID string with date and other metadata."""
-    letters = {}
-    with open(path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            letters[row["id"]] = {
-                "date": row["date"],
-                "sender": row["sender"],
-                "recipient": row["recipient"],
-            }
-    return letters
+    return load_corpus().metadata()
 
 
 # ---------------------------------------------------------------------------
@@ -108,27 +103,28 @@ def classify_arc(scores: list[float]) -> str:
     return "flat"
 
 
-def analyze_within_letter(sentences: list[dict]) -> dict:
+def analyze_within_letter(sentences) -> dict:
     """Analyze the emotional arc within each letter.
 
     Groups sentences by letter_id, filters to substantive (non-formulaic)
-    sentences, and classifies the arc shape.
+    sentences, and classifies the arc shape. Only (index, score,
+    is_formulaic) is kept per sentence, so the input can be a stream.
     """
-    by_letter: dict[int, list[dict]] = defaultdict(list)
+    by_letter: dict[int, list[tuple]] = defaultdict(list)
     for s in sentences:
-        by_letter[s["letter_id"]].append(s)
+        by_letter[s["letter_id"]].append((s["index"], s["score"], s["is_formulaic"]))
 
     results = {}
     for letter_id, sents in sorted(by_letter.items()):
         # Sort by sentence index within the letter
-        sents.sort(key=lambda x: x["index"])
+        sents.sort(key=lambda x: x[0])
 
         # Filter to substantive sentences
-        substantive = [s for s in sents if not s["is_formulaic"]]
+        substantive = [s for s in sents if not s[2]]
         if not substantive:
             substantive = sents
 
-        scores = [s["score"] for s in substantive]
+        scores = [s[1] for s in substantive]
         n = len(scores)
 
         if n == 0:
@@ -345,7 +341,7 @@ def main() -> None:
         ("Letter scores", letter_path),
         ("Letters CSV", csv_path),
     ]:
-        if not os.path.exists(path):
+        if not records_exist(path):
             print(f"Error: {label} not found at {path}", file=sys.stderr)
             sys.exit(1)
 
@@ -356,13 +352,12 @@ def main() -> None:
 
     # Load data
     print("Loading data...")
-    sentences = load_sentence_scores(sentence_path)
     letter_scores = load_letter_scores(letter_path)
-    letters_meta = load_letters_csv(csv_path)
+    letters_meta = load_letters_csv()
 
-    # Within-letter analysis
+    # Within-letter analysis (streams the sentence scores)
     print("Analyzing within-letter arcs...")
-    within = analyze_within_letter(sentences)
+    within = analyze_within_letter(load_sentence_scores(sentence_path))
 
     # Arc type distribution
     distribution: dict[str, int] = defaultdict(int)
@@ -21,7 +21,6 @@ Outputs:
 
 import argparse
 import gzip
-import hashlib
 import json
 import math
 import os
@@ -30,7 +29,12 @@ import sys
 from collections import Counter, defaultdict
 from datetime import datetime, timezone
 
-import pandas as pd
+from corpus import load_corpus
+from fingerprint import file_hash, meta_is_current
+from letter_map import add_workers_argument, map_letters
+from model_store import load_spacy_model
+from profiling import counted, phase
+from record_stream import iter_records, resolve_records_path
 
 # ---------------------------------------------------------------------------
 # Paths
@@ -48,23 +52,15 @@ def resolve(path: str) -> str:
 # Skip logic (ADR-029)
 # ---------------------------------------------------------------------------
 
-def compute_file_hash(path: str) -> str:
-    return hashlib.sha256(open(path, "rb").read()).hexdigest()
-
-
 def should_skip(letters_path: str, sentences_path: str, csv_path: str,
                 meta_path: str) -> bool:
     current = {
-        "letters_hash": compute_file_hash(letters_path),
-        "sentences_hash": compute_file_hash(sentences_path),
-        "csv_hash": compute_file_hash(csv_path),
-        "script_hash": compute_file_hash(__file__),
+        "letters_hash": file_hash(letters_path),
+        "sentences_hash": file_hash(sentences_path),
+        "csv_hash": file_hash(csv_path),
+        "script_hash": file_hash(__file__),
     }
-    if not os.path.exists(meta_path):
-        return False
-    with open(meta_path, "r", encoding="utf-8") as f:
-        existing = json.load(f)
-    return all(existing.get(k) == v for k, v in current.items())
+    return meta_is_current(meta_path, current)
 
 
 # ---------------------------------------------------------------------------
@@ -74,16 +70,14 @@ def should_skip(letters_path: str, sentences_path: str, csv_path: str,
 def load_nlp_model():
     """Load DaCy transformer model, falling back to spaCy if unavailable."""
     try:
-        import dacy
-        nlp = dacy.load("large")
+        nlp = load_spacy_model("large")
         print("Using DaCy large")
         return nlp
     except (ImportError, OSError):
         pass
 
     try:
-        import spacy
-        nlp = spacy.load("da_core_news_lg")
+        nlp = load_spacy_model("da_core_news_lg")
         print("DaCy not available, falling back to spaCy da_core_news_lg")
         return nlp
     except OSError:
@@ -162,6 +156,7 @@ GERMAN_VARIANTS = _build_german_variants()
 # A. Lexical Metrics
 # ---------------------------------------------------------------------------
 
+@counted
 def compute_lexical_metrics(text: str) -> dict:
     """Compute lexical richness metrics using the lexicalrichness library."""
     from lexicalrichness import LexicalRichness
@@ -216,6 +211,7 @@ def compute_lexical_metrics(text: str) -> dict:
 # B. Syntactic Metrics
 # ---------------------------------------------------------------------------
 
+@counted
 def _get_tree_depth(token, depth: int = 0) -> int:
     """Recursively compute depth of a token's subtree."""
     children_depths = [_get_tree_depth(c, depth + 1) for c in token.children]
@@ -432,26 +428,31 @@ def load_letters(path: str) -> list[dict]:
 
 
 def load_sentence_scores(path: str) -> dict[int, list[dict]]:
-    """Load CVP sentence scores, grouped by letter_id."""
-    with open(path, "r", encoding="utf-8") as f:
-        sentences = json.load(f)
+    """Stream CVP sentence scores, grouped by letter_id.
+
+    Only the fields compute_embedding_metrics() needs are kept.
+    """
     by_letter: dict[int, list[dict]] = defaultdict(list)
-    for s in sentences:
-        by_letter[s["letter_id"]].append(s)
-    print(f"Loaded {len(sentences)} sentence scores across {len(by_letter)} letters")
+    count = 0
+    for s in iter_records(path):
+        by_letter[s["letter_id"]].append(
+            {"score": s["score"], "is_formulaic": s["is_formulaic"]}
+        )
+        count += 1
+    print(f"Loaded {count} sentence scores across {len(by_letter)} letters")
     return by_letter
 
 
-def load_letter_metadata(path: str) -> dict[int, dict]:
-    """Load letter metadata (date, recipient) from CSV."""
-    df = pd.read_csv(path)
-    meta = {}
-    for _, row in df.iterrows():
-        meta[int(row["id"])] = {
-            "date": str(row["date"]) if pd.notna(row["date"]) else None,
-            "recipient": str(row["recipient"]) if pd.notna(row["recipient"]) else None,
-        }
-    print(f"Loaded metadata for {len(meta)} letters from CSV")
+def load_letter_metadata() -> dict[int, dict]:
+    """Load letter metadata (date, recipient) from the corpus store."""
+    corpus = load_corpus()
+    meta = {
+        lid: {"date": date or None, "recipient": recipient or None}
+        for lid, date, recipient in zip(
+            corpus.ids.tolist(), corpus.date_strings(), corpus.recipients
+        )
+    }
+    print(f"Loaded metadata for {len(meta)} letters from the corpus store")
     return meta
 
 
@@ -459,10 +460,31 @@ def load_letter_metadata(path: str) -> dict[int, dict]:
 # Main Processing
 # ---------------------------------------------------------------------------
 
+def text_metrics(item: tuple[int, str]) -> tuple[dict, dict, dict]:
+    """Lexical, code-switching and information-theoretic metrics of one (ID, text)."""
+    _, text = item
+    return compute_lexical_metrics(text), compute_code_switching(text), compute_info_theoretic(text)
+
+
+def compute_text_metrics(letters: list[dict], workers: int | None = None) -> dict[int, tuple[dict, dict, dict]]:
+    """text_metrics() for every non-empty letter, over a process pool (letter_map.py).
+
+    A, D and E need only the text, not the parse. Run this before the NLP
+    model is loaded, so the workers fork from a small process.
+    """
+    items = [(letter["id"], letter["text_normalized"].strip()) for letter in letters
+             if (letter.get("text_normalized") or "").strip()]
+    mapped = map_letters(text_metrics, items, workers=workers, key=lambda item: item[0],
+                         desc="Text metrics")
+    mapped.exit_on_failure()
+    return {lid: metrics for (lid, _), metrics in zip(items, mapped.results)}
+
+
 def process_letters(letters: list[dict], nlp,
                     sentence_scores_by_letter: dict[int, list[dict]],
-                    metadata: dict[int, dict]) -> dict:
-    """Process all letters through the NLP pipeline and compute metrics."""
+                    metadata: dict[int, dict],
+                    text_metrics_by_letter: dict[int, tuple[dict, dict, dict]]) -> dict:
+    """Process all letters through the NLP pipeline and combine them with their text metrics."""
     results = {}
 
     # Prepare texts and IDs for batch processing
@@ -493,8 +515,9 @@ def process_letters(letters: list[dict], nlp,
         text = letter_map[lid]
         meta = metadata.get(lid, {})
 
-        # A. Lexical metrics
-        lexical = compute_lexical_metrics(text)
+        # A. Lexical, D. Code-switching, E. Information-theoretic (compute_text_metrics)
+        lexical, codesw, info = text_metrics_by_letter[lid]
+        lexical = dict(lexical)
 
         # B. Syntactic metrics
         syntactic = compute_syntactic_metrics(doc)
@@ -505,12 +528,6 @@ def process_letters(letters: list[dict], nlp,
         # Overwrite lexical_density from the POS-based computation
         lexical["lexical_density"] = psych.pop("lexical_density")
 
-        # D. Code-switching
-        codesw = compute_code_switching(text)
-
-        # E. Information-theoretic
-        info = compute_info_theoretic(text)
-
         # F. Embedding-derived metrics
         sent_scores = sentence_scores_by_letter.get(lid, [])
         embedding = compute_embedding_metrics(sent_scores)
@@ -625,10 +642,11 @@ def main() -> None:
         "--dry-run", action="store_true",
         help="Compute and print stats but do not write output",
     )
+    add_workers_argument(parser)
     args = parser.parse_args()
 
     letters_path = resolve("normalized-letters.json")
-    sentences_path = resolve("cvp-sentence-scores.json")
+    sentences_path = resolve_records_path(resolve("cvp-sentence-scores.json"))
     csv_path = resolve("letters.csv")
     meta_path = resolve("psycholinguistics-meta.json")
     output_path = resolve("letter-psycholinguistics.json")
@@ -650,16 +668,23 @@ def main() -> None:
         sys.exit(0)
 
     # Load inputs
-    letters = load_letters(letters_path)
-    sentence_scores = load_sentence_scores(sentences_path)
-    metadata = load_letter_metadata(csv_path)
+    with phase("load"):
+        letters = load_letters(letters_path)
+        sentence_scores = load_sentence_scores(sentences_path)
+        metadata = load_letter_metadata()
+
+    # Text-only metrics first, over the process pool
+    with phase("text metrics"):
+        text_metrics_by_letter = compute_text_metrics(letters, args.workers)
 
     # Load NLP model
     print("Loading NLP model...")
-    nlp = load_nlp_model()
+    with phase("model"):
+        nlp = load_nlp_model()
 
     # Process
-    results = process_letters(letters, nlp, sentence_scores, metadata)
+    with phase("compute"):
+        results = process_letters(letters, nlp, sentence_scores, metadata, text_metrics_by_letter)
 
     # Summary
     print_summary(results)
@@ -670,16 +695,17 @@ def main() -> None:
 
     # Write output
     print("Writing output...")
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
+    with phase("write"):
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
 
     # Write skip-logic meta
     meta = {
         "generated": datetime.now(timezone.utc).isoformat(),
-        "letters_hash": compute_file_hash(letters_path),
-        "sentences_hash": compute_file_hash(sentences_path),
-        "csv_hash": compute_file_hash(csv_path),
-        "script_hash": compute_file_hash(__file__),
+        "letters_hash": file_hash(letters_path),
+        "sentences_hash": file_hash(sentences_path),
+        "csv_hash": file_hash(csv_path),
+        "script_hash": file_hash(__file__),
         "letter_count": len(results),
         "non_empty_count": sum(1 for v in results.values() if v["word_count"] > 0),
         "metric_categories": [
@@ -11,7 +11,7 @@ Correction tiers:
   C — Review only (flag in corrections[], do NOT modify text_corrected)
 
 Usage:
-    python scripts/apply-corrections.py [--dry-run]
+    python scripts/apply-corrections.py [--dry-run] [--workers N]
 """
 
 import argparse
@@ -22,6 +22,8 @@ import re
 import sys
 from pathlib import Path
 
+from letter_map import add_workers_argument, map_letters
+
 # Windows UTF-8 output
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
 
@@ -542,7 +544,59 @@ def _annotate_abbreviations(text: str, lexicon: list[dict]) -> list[dict]:
 # Main processing
 # ---------------------------------------------------------------------------
 
-def process_letters(dry_run: bool = False) -> list[dict]:
+def correct_letter(row: dict, lexicon: dict) -> tuple[dict, int, list[str]]:
+    """One CSV row -> (corrected letter object, corrections applied, their categories)."""
+    letter_id = int(row["id"])
+    raw_text = row.get("text", "")
+
+    # Convert <PARA> to \n\n for text_source
+    text_source = raw_text.replace("<PARA>", "\n\n")
+
+    # Gather all correction candidates
+    candidates: list[dict] = []
+    candidates.extend(_find_tier_a(letter_id, text_source))
+    candidates.extend(_find_tier_b(letter_id, text_source))
+    candidates.extend(_find_tier_c(letter_id, text_source))
+
+    # Apply corrections (Tier C items have _apply=False)
+    text_corrected, corrections_out = _apply_corrections(text_source, candidates)
+
+    # Count applied corrections
+    applied_count = sum(1 for c in candidates if c.get("_apply"))
+    categories = [c.get("category", "unknown") for c in corrections_out if c.get("corrected") is not None]
+
+    # Annotate abbreviations
+    abbreviations = _annotate_abbreviations(text_corrected, lexicon)
+
+    # Strip internal '_apply' key already done in _apply_corrections
+    # Build output corrections list with only schema fields
+    schema_corrections = []
+    for c in corrections_out:
+        schema_corrections.append({
+            "position": c["position"],
+            "original": c["original"],
+            "corrected": c["corrected"],
+            "category": c["category"],
+            "confidence": c["confidence"],
+            "method": c["method"],
+            "rationale": c["rationale"],
+        })
+
+    letter_obj = {
+        "id": letter_id,
+        "date": row.get("date", ""),
+        "sender": row.get("sender", ""),
+        "recipient": row.get("recipient", ""),
+        "place": row.get("place", ""),
+        "text_source": text_source,
+        "text_corrected": text_corrected,
+        "corrections": schema_corrections,
+        "abbreviations": abbreviations,
+    }
+    return letter_obj, applied_count, categories
+
+
+def process_letters(dry_run: bool = False, workers: int | None = None) -> list[dict]:
     """Read CSV, apply corrections, return list of corrected letter objects."""
     if not INPUT_CSV.exists():
         print(f"ERROR: Input file not found: {INPUT_CSV}", file=sys.stderr)
@@ -554,65 +608,21 @@ def process_letters(dry_run: bool = False) -> list[dict]:
     else:
         print("No abbreviation lexicon found — abbreviations will be empty []")
 
+    with INPUT_CSV.open(encoding="utf-8", newline="") as csvfile:
+        rows = list(csv.DictReader(csvfile))
+
+    # One letter per map call; the reduce below runs in CSV order
+    mapped = map_letters(correct_letter, rows, workers=workers, context=lexicon, desc="Correcting")
+    mapped.exit_on_failure()
+
     results = []
     total_corrections_applied = 0
     corrections_by_category: dict[str, int] = {}
-
-    with INPUT_CSV.open(encoding="utf-8", newline="") as csvfile:
-        reader = csv.DictReader(csvfile)
-        for row in reader:
-            letter_id = int(row["id"])
-            raw_text = row.get("text", "")
-
-            # Convert <PARA> to \n\n for text_source
-            text_source = raw_text.replace("<PARA>", "\n\n")
-
-            # Gather all correction candidates
-            candidates: list[dict] = []
-            candidates.extend(_find_tier_a(letter_id, text_source))
-            candidates.extend(_find_tier_b(letter_id, text_source))
-            candidates.extend(_find_tier_c(letter_id, text_source))
-
-            # Apply corrections (Tier C items have _apply=False)
-            text_corrected, corrections_out = _apply_corrections(text_source, candidates)
-
-            # Count applied corrections
-            applied_count = sum(1 for c in candidates if c.get("_apply"))
-            total_corrections_applied += applied_count
-            for c in corrections_out:
-                if c.get("corrected") is not None:
-                    cat = c.get("category", "unknown")
-                    corrections_by_category[cat] = corrections_by_category.get(cat, 0) + 1
-
-            # Annotate abbreviations
-            abbreviations = _annotate_abbreviations(text_corrected, lexicon)
-
-            # Strip internal '_apply' key already done in _apply_corrections
-            # Build output corrections list with only schema fields
-            schema_corrections = []
-            for c in corrections_out:
-                schema_corrections.append({
-                    "position": c["position"],
-                    "original": c["original"],
-                    "corrected": c["corrected"],
-                    "category": c["category"],
-                    "confidence": c["confidence"],
-                    "method": c["method"],
-                    "rationale": c["rationale"],
-                })
-
-            letter_obj = {
-                "id": letter_id,
-                "date": row.get("date", ""),
-                "sender": row.get("sender", ""),
-                "recipient": row.get("recipient", ""),
-                "place": row.get("place", ""),
-                "text_source": text_source,
-                "text_corrected": text_corrected,
-                "corrections": schema_corrections,
-                "abbreviations": abbreviations,
-            }
-            results.append(letter_obj)
+    for letter_obj, applied_count, categories in mapped.values():
+        total_corrections_applied += applied_count
+        for cat in categories:
+            corrections_by_category[cat] = corrections_by_category.get(cat, 0) + 1
+        results.append(letter_obj)
 
     # Summary
     print(f"\nSummary:")
@@ -634,9 +644,10 @@ def main() -> None:
         action="store_true",
         help="Process and print summary without writing output file.",
     )
+    add_workers_argument(parser)
     args = parser.parse_args()
 
-    corrected = process_letters(dry_run=args.dry_run)
+    corrected = process_letters(dry_run=args.dry_run, workers=args.workers)
 
     if args.dry_run:
         print("\n[dry-run] Output file not written.")
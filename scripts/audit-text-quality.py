@@ -8,8 +8,15 @@ Detection tiers:
   A — encoding artifacts (high confidence)
   B — known typing/OCR error patterns (medium confidence, context-dependent)
   C — statistical anomalies / hapax legomena (low confidence, review only)
+
+Tiers A and B are per letter and run on a process pool (letter_map.py);
+tier C compares letters against the whole corpus and runs afterwards.
+
+Usage:
+    python scripts/audit-text-quality.py [--workers N]
 """
 
+import argparse
 import csv
 import io
 import json
@@ -18,6 +25,9 @@ import sys
 from collections import Counter, defaultdict
 from pathlib import Path
 
+from letter_map import add_workers_argument, map_letters
+from profiling import counted
+
 # Windows UTF-8 output
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
 
@@ -33,10 +43,12 @@ OUTPUT_JSON = OUTPUT_DIR / "error-inventory.json"
 try:
     import Levenshtein as _lev  # type: ignore
 
+    @counted
     def levenshtein(a: str, b: str) -> int:
         return _lev.distance(a, b)
 
 except ImportError:
+    @counted
     def levenshtein(a: str, b: str) -> int:
         """Simple DP edit distance."""
         if len(a) < len(b):
@@ -409,7 +421,17 @@ def scan_tier_c(letters: list[dict]) -> list[dict]:
 # Main
 # ---------------------------------------------------------------------------
 
+def scan_letter(row: dict) -> tuple[list[dict], list[dict]]:
+    """Tier A and tier B findings for one letter."""
+    letter_id = int(row["id"])
+    return scan_tier_a(letter_id, row["text"]), scan_tier_b(letter_id, row["text"])
+
+
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Data quality audit of data/letters.csv")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
     OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
     with open(INPUT_CSV, encoding="utf-8", newline="") as fh:
@@ -422,17 +444,14 @@ def main() -> None:
     for row in letters:
         row["text"] = row["text"].replace("<PARA>", "\n\n")
 
+    mapped = map_letters(scan_letter, letters, workers=args.workers, desc="Scanning tiers A/B")
+    mapped.exit_on_failure()
+
     all_findings: list[dict] = []
     tier_a_count = 0
     tier_b_count = 0
 
-    for row in letters:
-        letter_id = int(row["id"])
-        text = row["text"]
-
-        a = scan_tier_a(letter_id, text)
-        b = scan_tier_b(letter_id, text)
-
+    for a, b in mapped.values():
         tier_a_count += len(a)
         tier_b_count += len(b)
         all_findings.extend(a)
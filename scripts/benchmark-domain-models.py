@@ -0,0 +1,80 @@
+"""
+Compare plain-dict letter rows with the slotted domain records.
+
+Measures, for the 665 letter summaries (metadata only, no text):
+  - memory retained per record (tracemalloc, after construction)
+  - construction time (best of --repeat runs)
+
+"dict (csv)" is what the scripts used to build from csv.DictReader rows;
+"LetterSummary" is Corpus.letter_summaries() from the columnar store.
+
+Usage:
+  python scripts/benchmark-domain-models.py [--repeat 20]
+"""
+
+import argparse
+import csv
+import gc
+import time
+import tracemalloc
+
+from corpus import LETTERS_CSV, load_corpus
+
+
+def dict_rows() -> list[dict]:
+    with open(LETTERS_CSV, "r", encoding="utf-8") as f:
+        return [
+            {
+                "id": int(row["id"]),
+                "date": row["date"],
+                "place": row["place"],
+                "sender": row["sender"],
+                "recipient": row["recipient"],
+                "year": int(row["date"][:4]) if row["date"] else None,
+            }
+            for row in csv.DictReader(f)
+        ]
+
+
+def measure(build, repeat: int) -> tuple[float, float, int]:
+    """Return (bytes per record, best seconds, record count)."""
+    build()  # warm caches (corpus store, intern tables)
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = build()
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build()
+        best = min(best, time.perf_counter() - start)
+    return retained / len(records), best, len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="Timing runs (best is reported)")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    candidates = [
+        ("dict (csv)", dict_rows),
+        ("LetterSummary", corpus.letter_summaries),
+    ]
+    print(f"{'':16s} {'bytes/record':>12s} {'build ms':>10s}")
+    results = {}
+    for name, build in candidates:
+        per_record, best, n = measure(build, args.repeat)
+        results[name] = (per_record, best)
+        print(f"{name:16s} {per_record:12.0f} {best * 1000:10.2f}   ({n} records)")
+
+    (base_mem, base_t), (new_mem, new_t) = results.values()
+    print(f"\nMemory: {100 * (1 - new_mem / base_mem):.0f}% less per record; "
+          f"construction: {base_t / new_t:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Compare the networkx and sparse centrality backends on synthetic graphs.
+
+For each size, builds a Barabási–Albert graph (preferential attachment,
+m=3 edges per new node, like a co-mention network's few hubs and long
+tail) with random integer co-mention weights 1..5, then reports:
+  - PageRank: networkx vs network_metrics.pagerank (time, max abs diff)
+  - betweenness: exact networkx, exact sparse and k-sample approximate
+    (time, sources used, error bound, max abs error and top-10 overlap
+    against the exact scores where an exact run was affordable)
+
+Exact betweenness is O(n·m log n): networkx is only run up to
+--exact-max-networkx nodes and the exact sparse version up to
+--exact-max-sparse. Larger graphs report the approximation alone.
+
+Usage:
+  python scripts/benchmark-network-metrics.py [--sizes 1000 10000 100000]
+      [--epsilon 0.05] [--time-budget 30] [--seed 0]
+"""
+
+import argparse
+import time
+
+import networkx as nx
+import numpy as np
+from scipy import sparse
+
+import network_metrics
+
+
+def synthetic_graph(n: int, seed: int) -> tuple[nx.Graph, sparse.csr_matrix]:
+    G = nx.barabasi_albert_graph(n, 3, seed=seed)
+    rng = np.random.default_rng(seed)
+    for (u, v), w in zip(G.edges, rng.integers(1, 6, G.number_of_edges()).tolist()):
+        G[u][v]["weight"] = w
+    A = nx.to_scipy_sparse_array(G, nodelist=range(n), weight="weight", format="csr")
+    return G, A.astype(float)
+
+
+def timed(fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def top_overlap(a: np.ndarray, b: np.ndarray, k: int = 10) -> int:
+    return len(set(np.argsort(-a)[:k].tolist()) & set(np.argsort(-b)[:k].tolist()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--epsilon", type=float, default=0.05,
+                        help="Target betweenness error for the approximation")
+    parser.add_argument("--time-budget", type=float, default=30.0,
+                        help="Seconds allowed for approximate betweenness")
+    parser.add_argument("--exact-max-networkx", type=int, default=2000)
+    parser.add_argument("--exact-max-sparse", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for n in args.sizes:
+        G, A = synthetic_graph(n, args.seed)
+        print(f"\n== n={n:,} nodes, {G.number_of_edges():,} edges ==")
+
+        pr_nx, t_nx = timed(nx.pagerank, G, weight="weight")
+        (pr_sp, iterations), t_sp = timed(network_metrics.pagerank, A)
+        diff = np.abs(np.array([pr_nx[i] for i in range(n)]) - pr_sp).max()
+        print(f"PageRank     networkx {t_nx:8.2f} s   sparse {t_sp:8.2f} s "
+              f"({iterations} iterations)   max |diff| {diff:.1e}")
+
+        exact = None
+        if n <= args.exact_max_networkx:
+            bc_nx, t = timed(nx.betweenness_centrality, G, weight="weight")
+            exact = np.array([bc_nx[i] for i in range(n)])
+            print(f"Betweenness  networkx exact {t:8.2f} s")
+        if n <= args.exact_max_sparse:
+            bc_sp, t = timed(network_metrics.betweenness, A)
+            note = "" if exact is None else f"   max |diff| {np.abs(bc_sp - exact).max():.1e}"
+            print(f"Betweenness  sparse exact   {t:8.2f} s{note}")
+            exact = bc_sp if exact is None else exact
+
+        (bc_ap, used, bound), t = timed(
+            network_metrics.approximate_betweenness,
+            A, epsilon=args.epsilon, time_budget=args.time_budget, seed=args.seed,
+        )
+        wanted = min(n, network_metrics.sample_size(n, args.epsilon))
+        line = (f"Betweenness  sparse approx  {t:8.2f} s   {used}/{wanted} sources, "
+                f"bound {bound:.3f}")
+        if exact is not None:
+            line += (f"   max |err| {np.abs(bc_ap - exact).max():.1e}, "
+                     f"top-10 overlap {top_overlap(bc_ap, exact)}/10")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -605,6 +605,7 @@ function main() {
     "pca-dimensions.json",
     // Social network analysis (ADR-016)
     "social-network.json",
+    "social-network-timeline.json",
     "person-registry.json",
   ];
   for (const filename of analysisFiles) {
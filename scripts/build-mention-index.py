@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Build the entity mention index (persons/places → letters, offsets, dates).
+
+Reads:
+  - data/letter-entities.json (NER entities with character offsets)
+  - data/person-registry.json (aliases for person resolution)
+
+Outputs:
+  - data/mention-index.npz (see mention_index.py for the layout and queries)
+
+Consumers call mention_index.load_mention_index(), which also rebuilds the
+index when a source has changed; this stage builds it up front and prints
+a summary.
+"""
+
+import argparse
+
+import numpy as np
+
+from file_lock import file_lock
+from mention_index import (
+    ENTITY_TYPES,
+    LETTER_ENTITIES,
+    MENTION_INDEX,
+    PERSON_REGISTRY,
+    MentionIndex,
+    build_mention_index,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build data/mention-index.npz")
+    parser.add_argument("--force", action="store_true", help="Rebuild even if up to date")
+    args = parser.parse_args()
+
+    with file_lock(MENTION_INDEX):
+        existing = MentionIndex.load(MENTION_INDEX)
+        if not args.force and existing is not None and existing.is_current(LETTER_ENTITIES, PERSON_REGISTRY):
+            print(f"{MENTION_INDEX} is up to date (use --force to rebuild)")
+            return
+
+        index = build_mention_index()
+        index.save(MENTION_INDEX)
+
+    a = index.arrays
+    types = np.bincount(a["mention_type"], minlength=len(ENTITY_TYPES))
+    mentioned = int((np.diff(a["person_indptr"]) > 0).sum())
+    exact_first = int((a["posting_exact_rank"] == 0).sum())
+    print(f"Letters:            {len(index.letter_ids)}")
+    print("Mentions:           " + ", ".join(
+        f"{t} {n}" for t, n in zip(ENTITY_TYPES, types.tolist())
+    ))
+    print(f"Distinct surfaces:  {len(index.surfaces)}")
+    print(f"Person postings:    {len(a['posting_person'])} "
+          f"({exact_first} case-exact first matches)")
+    print(f"Persons mentioned:  {mentioned} of {len(index.persons)}")
+    print(f"Written: {MENTION_INDEX} ({MENTION_INDEX.stat().st_size / 1024:.1f} KB)")
+
+
+if __name__ == "__main__":
+    main()
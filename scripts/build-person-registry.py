@@ -15,11 +15,12 @@ Outputs:
 """
 
 import json
-import csv
 import sys
 from pathlib import Path
 from collections import defaultdict
 
+from corpus import load_corpus
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 
@@ -218,12 +219,7 @@ def load_letter_entities():
 
 def load_letters_csv():
     """Load letter metadata for dates."""
-    letters = {}
-    with open(DATA_DIR / "letters.csv", "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            letters[str(row["id"])] = row
-    return letters
+    return load_corpus().metadata()
 
 
 def build_alias_to_canonical_map(known_persons):
@@ -1,20 +1,34 @@
 """
 ADR-016 Task C1+C2: Build social network graph from person registry
 and letter-entity mapping, compute network metrics, output data/social-network.json.
+
+Also writes data/social-network-timeline.json: monthly and quarterly
+sliding-window snapshots with per-person PageRank, degree and betweenness
+series, computed incrementally on sparse matrices (see network_metrics.py).
 """
 
-import csv
+import argparse
 import json
 from collections import defaultdict
 from datetime import date
-from itertools import combinations
 from pathlib import Path
 
 import networkx as nx
+import numpy as np
+from scipy import sparse
+
+import network_metrics
+from cooccurrence import IncidenceMatrix, named_pairs
+from corpus import load_corpus
+from temporal_index import LEVELS, TemporalIndex, label_range
 
 ROOT = Path(__file__).resolve().parent.parent
 DATA = ROOT / "data"
 
+MIN_WEIGHT = 2
+# Peter and Trine co-occur in most letters; their edge would dominate the graph
+EXCLUDED_PAIR = ("peter", "trine")
+
 
 def load_person_registry():
     with open(DATA / "person-registry.json", encoding="utf-8") as f:
@@ -28,12 +42,7 @@ def load_letter_entities():
 
 def load_letters_csv():
     """Return dict mapping letter id (str) -> {'date': ..., ...}."""
-    letters = {}
-    with open(DATA / "letters.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            letters[str(row["id"])] = row
-    return letters
+    return load_corpus().metadata()
 
 
 def build_alias_lookup(registry):
@@ -59,58 +68,122 @@ def resolve_persons_in_letter(person_names, alias_lookup):
     return resolved
 
 
-def build_network(registry, letter_entities, letters_csv):
-    """Build the co-mention network and temporal slices."""
+def _pair_mask(inc, pairs):
+    """Sparse upper-triangular 0/1 matrix marking the given name pairs."""
+    rows, cols = [], []
+    for a, b in pairs:
+        i, j = sorted((inc.col_of[a], inc.col_of[b]))
+        rows.append(i)
+        cols.append(j)
+    n = len(inc.columns)
+    return sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n, n))
+
+
+def _density(n_nodes, n_edges):
+    """Undirected graph density, computed as networkx.density() does
+    (including its int 0 for an edgeless graph)."""
+    if n_nodes <= 1:
+        return 0.0
+    if n_edges == 0:
+        return 0
+    d = n_edges / (n_nodes * (n_nodes - 1))
+    return d * 2
+
+
+def build_incidence(registry, letter_entities, letters_csv):
+    """Letters × persons incidence matrix, and each row's letter date."""
     alias_lookup = build_alias_lookup(registry)
-    registry_by_id = {p["id"]: p for p in registry}
 
-    # Per-letter: resolved person ids
-    letter_persons = {}  # letter_id -> set of person ids
-    letter_year = {}     # letter_id -> year (int)
+    # Per-letter: resolved person ids, as incidence-matrix rows
+    letter_ids = list(letter_entities)
+    letter_persons = [
+        resolve_persons_in_letter(letter_entities[lid].get("persons", []), alias_lookup)
+        for lid in letter_ids
+    ]
+    inc = IncidenceMatrix(letter_ids, letter_persons, [p["id"] for p in registry])
+    letter_dates = [letters_csv[lid]["date"] if lid in letters_csv else None for lid in letter_ids]
+    return inc, letter_dates
+
+
+def compute_centrality(G, backend="networkx", samples=None, epsilon=None, time_budget=None):
+    """Degree, betweenness and PageRank dicts keyed by node, plus run info.
+
+    "networkx" is exact. "sparse" runs the scipy.sparse implementations in
+    network_metrics.py: power-iteration PageRank, and betweenness that is
+    exact unless samples, epsilon or time_budget ask for a k-source
+    approximation.
+    """
+    if backend == "networkx":
+        return (
+            nx.degree_centrality(G),
+            nx.betweenness_centrality(G, weight="weight"),
+            nx.pagerank(G, weight="weight"),
+            {"backend": "networkx"},
+        )
 
-    for lid, entities in letter_entities.items():
-        persons = resolve_persons_in_letter(entities.get("persons", []), alias_lookup)
-        letter_persons[lid] = persons
+    nodes = list(G)
+    A = nx.to_scipy_sparse_array(G, nodelist=nodes, weight="weight", format="csr")
+    A = A.astype(float)
+    pr, iterations = network_metrics.pagerank(A)
+    bc, sources, bound = network_metrics.approximate_betweenness(
+        A, samples=samples, epsilon=epsilon, time_budget=time_budget
+    )
+    info = {
+        "backend": "sparse",
+        "pagerank_iterations": iterations,
+        "betweenness_sources": sources,
+        "betweenness_error_bound": round(bound, 4),
+    }
+    return (
+        dict(zip(nodes, network_metrics.degree_centrality(A).tolist())),
+        dict(zip(nodes, bc.tolist())),
+        dict(zip(nodes, pr.tolist())),
+        info,
+    )
 
-        # Get year from CSV
-        if lid in letters_csv and letters_csv[lid]["date"]:
-            try:
-                letter_year[lid] = int(letters_csv[lid]["date"][:4])
-            except (ValueError, IndexError):
-                pass
 
-    # Build edge weights: (person_a, person_b) -> {total_weight, years set}
-    edge_data = defaultdict(lambda: {"weight": 0, "years": set(), "letters": []})
-    peter_trine_raw_weight = 0
+def build_network(registry, letter_entities, letters_csv, slice_level="year", centrality=None):
+    """Build the co-mention network and temporal slices.
 
-    for lid, persons in letter_persons.items():
-        year = letter_year.get(lid)
-        # Generate all pairs
-        for a, b in combinations(sorted(persons), 2):
-            pair = (a, b)
-            # Track peter-trine separately
-            if pair == ("peter", "trine"):
-                peter_trine_raw_weight += 1
-                continue
-            edge_data[pair]["weight"] += 1
-            if year:
-                edge_data[pair]["years"].add(year)
-            edge_data[pair]["letters"].append(lid)
+    Co-mention counts come from a sparse letters × persons incidence
+    matrix (see cooccurrence.py); each temporal slice is a row subset of it.
+    ``centrality`` holds keyword arguments for compute_centrality().
+    """
+    inc, letter_dates = build_incidence(registry, letter_entities, letters_csv)
+    year_rows = inc.slices("year", letter_dates)
+
+    # Co-mention weights: (person_a, person_b) -> count, names sorted
+    C = inc.cooccurrence()
+    coo = C.tocoo()
+    first_letter = inc.first_rows(coo.row, coo.col).tolist()
+    weighted = sorted(
+        (row, pair, w) for (pair, w), row in zip(named_pairs(inc, coo), first_letter)
+    )
+    peter_trine_raw_weight = 0
+    edge_data = {}  # ordered by first co-mentioning letter, as pairs are discovered
+    for _, pair, w in weighted:
+        # Track peter-trine separately
+        if pair == EXCLUDED_PAIR:
+            peter_trine_raw_weight = w
+            continue
+        edge_data[pair] = {"weight": w, "years": set()}
 
     # Filter edges with weight >= 2
-    MIN_WEIGHT = 2
     filtered_edges = {
         pair: data for pair, data in edge_data.items()
         if data["weight"] >= MIN_WEIGHT
     }
+    filtered_mask = _pair_mask(inc, filtered_edges)
 
-    # Track per-person active years
+    # Per-year activity: edge years and per-person active years
     person_years = defaultdict(set)
-    for lid, persons in letter_persons.items():
-        year = letter_year.get(lid)
-        if year:
-            for pid in persons:
-                person_years[pid].add(year)
+    for year_label, rows in year_rows:
+        year = int(year_label)
+        for pair, _ in named_pairs(inc, inc.cooccurrence(rows)):
+            if pair in edge_data:
+                edge_data[pair]["years"].add(year)
+        for col in inc.active_columns(rows).tolist():
+            person_years[inc.columns[col]].add(year)
 
     # Build NetworkX graph
     G = nx.Graph()
@@ -121,9 +194,9 @@ def build_network(registry, letter_entities, letters_csv):
         G.add_edge(a, b, weight=data["weight"], years=sorted(data["years"]))
 
     # Compute metrics
-    degree_cent = nx.degree_centrality(G)
-    betweenness_cent = nx.betweenness_centrality(G, weight="weight")
-    pagerank = nx.pagerank(G, weight="weight")
+    degree_cent, betweenness_cent, pagerank, centrality_info = compute_centrality(
+        G, **(centrality or {})
+    )
 
     # Build nodes output
     nodes = []
@@ -156,54 +229,25 @@ def build_network(registry, letter_entities, letters_csv):
             "years": sorted(data["years"]),
         })
 
-    # Temporal slices
-    all_years = sorted(set(letter_year.values()))
+    # Temporal slices (row subsets of the incidence matrix)
+    slice_rows = year_rows if slice_level == "year" else inc.slices(slice_level, letter_dates)
     temporal_slices = {}
-    first_seen = {}  # person_id -> first year
-
-    for pid, years in person_years.items():
-        if years:
-            first_seen[pid] = min(years)
-
-    for year in all_years:
-        # Letters in this year
-        year_letters = [lid for lid, y in letter_year.items() if y == year]
-        # Active persons this year
-        active_persons = set()
-        for lid in year_letters:
-            active_persons.update(letter_persons.get(lid, set()))
-
-        # Active edges this year (co-mentions in this year's letters only)
-        year_edge_data = defaultdict(int)
-        for lid in year_letters:
-            persons = letter_persons.get(lid, set())
-            for a, b in combinations(sorted(persons), 2):
-                if (a, b) == ("peter", "trine"):
-                    continue
-                year_edge_data[(a, b)] += 1
-
-        # Filter edges with weight >= 2 for this year too? No — show all for the year slice.
-        # But use the global filter for consistency: only edges that pass global threshold
-        year_edges = {
-            pair: w for pair, w in year_edge_data.items()
-            if pair in filtered_edges
-        }
-
-        # Build year subgraph for density
-        Gy = nx.Graph()
-        for pid in active_persons:
-            Gy.add_node(pid)
-        for (a, b), w in year_edges.items():
-            Gy.add_edge(a, b, weight=w)
-
-        new_nodes = sorted([pid for pid in active_persons if first_seen.get(pid) == year])
-
-        n_nodes = len(active_persons)
-        n_edges = Gy.number_of_edges()
-        density = nx.density(Gy) if n_nodes > 1 else 0.0
+    first_seen = {}  # person column -> first slice label
+
+    for label, rows in slice_rows:
+        active = inc.active_columns(rows)
+        for col in active.tolist():
+            first_seen.setdefault(col, label)
+
+        # Co-mentions in this slice's letters, restricted to globally kept edges
+        n_nodes = len(active)
+        n_edges = int(inc.cooccurrence(rows).multiply(filtered_mask).count_nonzero())
+        new_nodes = sorted(
+            inc.columns[col] for col in active.tolist() if first_seen[col] == label
+        )
 
-        temporal_slices[str(year)] = {
-            "density": round(density, 6),
+        temporal_slices[label] = {
+            "density": round(_density(n_nodes, n_edges), 6),
             "num_nodes": n_nodes,
             "num_edges": n_edges,
             "new_nodes": new_nodes,
@@ -226,6 +270,7 @@ def build_network(registry, letter_entities, letters_csv):
             "peter_trine_edge_excluded": True,
             "peter_trine_raw_weight": peter_trine_raw_weight,
             "min_edge_weight": MIN_WEIGHT,
+            "centrality": centrality_info,
         },
         "nodes": nodes,
         "edges": edges,
@@ -242,6 +287,107 @@ def build_network(registry, letter_entities, letters_csv):
     return output, G, pagerank, betweenness_cent, degree_cent, temporal_slices
 
 
+# ---------------------------------------------------------------------------
+# Sliding-window timeline
+# ---------------------------------------------------------------------------
+
+# Snapshot window length, in buckets of each granularity
+TIMELINE_WINDOWS = {"month": 3, "quarter": 2}
+TIMELINE_METRICS = ("pagerank", "degree", "betweenness")
+
+
+def build_timeline(registry, letter_entities, letters_csv, level, window):
+    """Sliding-window network snapshots at one granularity.
+
+    There is one snapshot per bucket from the first to the last dated letter
+    (empty buckets included), covering that bucket and the window - 1 before
+    it. Edges are the globally kept edges (weight >= MIN_WEIGHT, Peter-Trine
+    excluded) weighted by their co-mentions inside the window; nodes are the
+    persons mentioned in the window's letters.
+
+    The window is maintained incrementally: as it slides, the entering
+    bucket's co-mention counts are added and the leaving bucket's subtracted,
+    and PageRank is warm-started from the previous snapshot's scores.
+
+    Returns ({"labels", "window", "num_nodes", "num_edges", "persons"},
+    total PageRank iterations).
+    """
+    inc, letter_dates = build_incidence(registry, letter_entities, letters_csv)
+    kept = [
+        pair for pair, w in named_pairs(inc, inc.cooccurrence())
+        if w >= MIN_WEIGHT and pair != EXCLUDED_PAIR
+    ]
+    kept_mask = _pair_mask(inc, kept)
+
+    index = TemporalIndex(range(len(letter_dates)), letter_dates)
+    rows_of = dict(index.buckets(level))
+    labels = label_range(level, index.days[0], index.days[-1])
+
+    def contribution(label):
+        rows = rows_of.get(label, [])
+        edges = inc.cooccurrence(rows).multiply(kept_mask).tocsr()
+        mentions = np.asarray(inc.select(rows).sum(axis=0)).ravel()
+        return edges, mentions
+
+    n = len(inc.columns)
+    series = {metric: np.zeros((n, len(labels))) for metric in TIMELINE_METRICS}
+    ever_active = np.zeros(n, dtype=bool)
+    num_nodes, num_edges = [], []
+
+    W = sparse.csr_matrix((n, n), dtype=np.int64)  # window co-mentions (upper triangle)
+    mentions = np.zeros(n, dtype=np.int64)          # window mentions per person
+    in_window = {}                                  # label -> its contribution
+    previous = np.full(n, np.nan)                   # last snapshot's PageRank
+    iterations = 0
+
+    for t, label in enumerate(labels):
+        entering = in_window[label] = contribution(label)
+        W = W + entering[0]
+        mentions += entering[1]
+        if t >= window:
+            leaving = in_window.pop(labels[t - window])
+            W = W - leaving[0]
+            W.eliminate_zeros()
+            mentions -= leaving[1]
+
+        active = np.flatnonzero(mentions)
+        ever_active[active] = True
+        upper = W[active][:, active]
+        num_nodes.append(len(active))
+        num_edges.append(int(upper.nnz))
+        if not len(active):
+            previous[:] = np.nan
+            continue
+
+        A = (upper + upper.T).tocsr().astype(float)
+        x0 = previous[active]
+        x0[np.isnan(x0)] = 1.0 / len(active)  # persons new to the window
+        pr, used = network_metrics.pagerank(A, x0=x0)
+        iterations += used
+        previous[:] = np.nan
+        previous[active] = pr
+
+        series["pagerank"][active, t] = pr
+        series["degree"][active, t] = network_metrics.degree_centrality(A)
+        series["betweenness"][active, t] = network_metrics.betweenness(A)
+
+    persons = {
+        inc.columns[col]: {
+            metric: [round(v, 4) for v in series[metric][col].tolist()]
+            for metric in TIMELINE_METRICS
+        }
+        for col in np.flatnonzero(ever_active).tolist()
+    }
+    timeline = {
+        "labels": labels,
+        "window": window,
+        "num_nodes": num_nodes,
+        "num_edges": num_edges,
+        "persons": persons,
+    }
+    return timeline, iterations
+
+
 def print_summary(output, G, pagerank, betweenness, degree, temporal_slices):
     gm = output["global_metrics"]
     md = output["metadata"]
@@ -253,6 +399,15 @@ def print_summary(output, G, pagerank, betweenness, degree, temporal_slices):
     print(f"Letters with entity data: {md['letters_with_entities']}")
     print(f"Peter-Trine raw co-occurrence: {md['peter_trine_raw_weight']} (excluded)")
     print(f"Min edge weight threshold: {md['min_edge_weight']}")
+    ci = md["centrality"]
+    if ci["backend"] == "sparse":
+        print(
+            f"Centrality backend: sparse (PageRank {ci['pagerank_iterations']} iterations, "
+            f"betweenness from {ci['betweenness_sources']} sources, "
+            f"error bound {ci['betweenness_error_bound']})"
+        )
+    else:
+        print("Centrality backend: networkx")
     print()
     print(f"Nodes: {gm['total_nodes']}")
     print(f"Edges: {gm['total_edges']}")
@@ -295,12 +450,64 @@ def print_summary(output, G, pagerank, betweenness, degree, temporal_slices):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Build the social network graph (ADR-016)")
+    parser.add_argument(
+        "--slices",
+        choices=LEVELS,
+        default="year",
+        help="Granularity of temporal_slices (default: year)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=("networkx", "sparse"),
+        default="networkx",
+        help="Centrality implementation (default: networkx)",
+    )
+    parser.add_argument(
+        "--betweenness-samples",
+        type=int,
+        help="Approximate betweenness from this many sampled sources (sparse backend)",
+    )
+    parser.add_argument(
+        "--betweenness-epsilon",
+        type=float,
+        help="Approximate betweenness to within this error at 90%% confidence (sparse backend)",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        help="Stop betweenness sampling after this many seconds (sparse backend)",
+    )
+    for level, window in TIMELINE_WINDOWS.items():
+        parser.add_argument(
+            f"--{level}-window",
+            type=int,
+            default=window,
+            help=f"Timeline snapshot window in {level}s (default: {window})",
+        )
+    parser.add_argument(
+        "--no-timeline",
+        action="store_true",
+        help="Skip the sliding-window timeline (social-network-timeline.json)",
+    )
+    args = parser.parse_args()
+    approximate = (args.betweenness_samples, args.betweenness_epsilon, args.time_budget)
+    if args.backend == "networkx" and any(v is not None for v in approximate):
+        parser.error("--betweenness-samples/--betweenness-epsilon/--time-budget need --backend sparse")
+    centrality = {"backend": args.backend}
+    if args.backend == "sparse":
+        centrality.update(
+            samples=args.betweenness_samples,
+            epsilon=args.betweenness_epsilon,
+            time_budget=args.time_budget,
+        )
+
     registry = load_person_registry()
     letter_entities = load_letter_entities()
     letters_csv = load_letters_csv()
 
     output, G, pagerank, betweenness, degree, temporal_slices = build_network(
-        registry, letter_entities, letters_csv
+        registry, letter_entities, letters_csv, slice_level=args.slices, centrality=centrality
     )
 
     # Write output
@@ -312,6 +519,36 @@ def main():
 
     print_summary(output, G, pagerank, betweenness, degree, temporal_slices)
 
+    if args.no_timeline:
+        return
+
+    timeline = {
+        "metadata": {
+            "generated": date.today().isoformat(),
+            "source": "ADR-016",
+            "min_edge_weight": MIN_WEIGHT,
+            "peter_trine_edge_excluded": True,
+            "metrics": list(TIMELINE_METRICS),
+        },
+    }
+    print("Sliding-window timeline:")
+    for level in TIMELINE_WINDOWS:
+        window = getattr(args, f"{level}_window")
+        timeline[level], iterations = build_timeline(
+            registry, letter_entities, letters_csv, level, window
+        )
+        snapshots = len(timeline[level]["labels"])
+        print(
+            f"  {level:8s} window={window}  snapshots={snapshots}  "
+            f"persons={len(timeline[level]['persons'])}  "
+            f"PageRank iterations={iterations} ({iterations / snapshots:.1f}/snapshot)"
+        )
+
+    out_path = DATA / "social-network-timeline.json"
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(timeline, f, ensure_ascii=False, separators=(",", ":"))
+    print(f"Written: {out_path}")
+
 
 if __name__ == "__main__":
     main()
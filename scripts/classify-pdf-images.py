@@ -23,6 +23,8 @@ import shutil
 import sys
 from pathlib import Path
 
+from alias_resolver import AliasResolver
+
 MANIFEST_PATH = Path("data/images/pdf-presentation/manifest.json")
 PAGE_TEXTS_PATH = Path("data/images/pdf-presentation/page-texts.json")
 UNCATEGORIZED = Path("data/images/pdf-presentation/uncategorized")
@@ -75,26 +77,19 @@ def load_page_texts():
     return {p["page"]: p["text"] for p in pages}
 
 
+# Single-pass substring matchers over the alias lists above
+PERSON_ALIASES = AliasResolver(KNOWN_PERSONS)
+PLACE_ALIASES = AliasResolver(KNOWN_PLACES)
+
+
 def detect_persons(text):
     """Find person IDs mentioned in the page text."""
-    found = []
-    for pid, aliases in KNOWN_PERSONS.items():
-        for alias in aliases:
-            if alias in text:
-                found.append(pid)
-                break
-    return found
+    return PERSON_ALIASES.ids_in_text(text)
 
 
 def detect_places(text):
     """Find place IDs mentioned in the page text."""
-    found = []
-    for plid, aliases in KNOWN_PLACES.items():
-        for alias in aliases:
-            if alias in text:
-                found.append(plid)
-                break
-    return found
+    return PLACE_ALIASES.ids_in_text(text)
 
 
 def auto_classify_entry(entry, page_text):
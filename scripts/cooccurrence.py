@@ -0,0 +1,98 @@
+"""
+Sparse letters × persons incidence matrix and co-occurrence counts.
+
+Row r of the incidence matrix X is a letter, column c a person, and
+X[r, c] = 1 if the person is mentioned in the letter. The co-occurrence
+counts of all person pairs are then one sparse product:
+
+    C = Xᵀ X      C[a, b] = number of letters mentioning both a and b
+
+Time slices (year, quarter, month) are row subsets of X, taken from the
+sorted date column of a TemporalIndex built over row numbers, so a slice
+costs a row selection plus one product over that slice's letters. It never
+enumerates person pairs per letter or re-scans the whole corpus per slice.
+
+    inc = IncidenceMatrix(letter_ids, person_sets, person_ids)
+    C = inc.cooccurrence()                  # upper triangle, int counts
+    for label, rows in inc.slices("quarter", dates):
+        C_q = inc.cooccurrence(rows)
+"""
+
+import numpy as np
+from scipy import sparse
+
+from temporal_index import TemporalIndex
+
+
+class IncidenceMatrix:
+    """Binary letters × persons matrix in CSR form."""
+
+    def __init__(self, row_keys, row_sets, columns):
+        self.row_keys = list(row_keys)
+        self.columns = list(columns)
+        self.col_of = {c: i for i, c in enumerate(self.columns)}
+
+        rows, cols = [], []
+        for r, members in enumerate(row_sets):
+            for m in members:
+                rows.append(r)
+                cols.append(self.col_of[m])
+        data = np.ones(len(rows), dtype=np.int32)
+        self.X = sparse.csr_matrix(
+            (data, (rows, cols)), shape=(len(self.row_keys), len(self.columns))
+        )
+        self.X.sum_duplicates()
+        self.X.data[:] = 1
+
+    def select(self, rows=None) -> sparse.csr_matrix:
+        """Row subset of X (all rows if rows is None)."""
+        return self.X if rows is None else self.X[np.asarray(rows, dtype=np.int64)]
+
+    def cooccurrence(self, rows=None) -> sparse.csr_matrix:
+        """Strict upper triangle of Xᵀ X over the selected rows."""
+        X = self.select(rows)
+        return sparse.triu(X.T @ X, k=1, format="csr")
+
+    def active_columns(self, rows=None) -> np.ndarray:
+        """Indices of columns with at least one nonzero in the selected rows."""
+        return np.unique(self.select(rows).indices)
+
+    def first_rows(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """For each column pair (a[k] < b[k]), the first row containing both.
+
+        Rows with the same number of members are expanded to their column
+        pairs in one vectorized step; np.unique then keeps each pair's first
+        occurrence in row order.
+        """
+        X = self.X.copy()
+        X.sort_indices()
+        n_cols = X.shape[1]
+        counts = np.diff(X.indptr)
+        codes, first = [], []
+        for k in np.unique(counts[counts >= 2]).tolist():
+            rows = np.flatnonzero(counts == k)
+            starts = X.indptr[rows]
+            cols = X.indices[starts[:, None] + np.arange(k)]
+            ii, jj = np.triu_indices(k, 1)
+            codes.append((cols[:, ii].astype(np.int64) * n_cols + cols[:, jj]).ravel())
+            first.append(np.repeat(rows, len(ii)))
+        if not codes:
+            return np.empty(0, dtype=np.int64)
+        codes, first = np.concatenate(codes), np.concatenate(first)
+        order = np.argsort(first, kind="stable")
+        unique_codes, idx = np.unique(codes[order], return_index=True)
+        wanted = np.asarray(a, dtype=np.int64) * n_cols + np.asarray(b, dtype=np.int64)
+        return first[order][idx][np.searchsorted(unique_codes, wanted)]
+
+    def slices(self, level: str, dates) -> list[tuple[str, list[int]]]:
+        """[(bucket label, row numbers)] chronologically; dates align with rows."""
+        index = TemporalIndex(range(len(self.row_keys)), dates)
+        return index.buckets(level)
+
+
+def named_pairs(inc: IncidenceMatrix, C: sparse.csr_matrix):
+    """Yield ((name_a, name_b), count) for nonzero entries, names sorted."""
+    coo = C.tocoo()
+    for i, j, w in zip(coo.row.tolist(), coo.col.tolist(), coo.data.tolist()):
+        a, b = inc.columns[i], inc.columns[j]
+        yield ((a, b) if a < b else (b, a)), w
@@ -0,0 +1,419 @@
+"""
+Columnar, memory-mapped letter store shared by the pipeline scripts.
+
+Most scripts need the same few things from the corpus: letter IDs, dates,
+sender/recipient/place, and one of the text layers. Instead of each script
+re-parsing letters.csv or json.loads-ing a 2-3 MB letters file, they can do:
+
+    from corpus import load_corpus
+
+    corpus = load_corpus()
+    corpus.ids                       # int32 column, memory-mapped
+    corpus.dates                     # datetime64[D] column (NaT if missing)
+    corpus.senders[i]                # decoded categorical value ("" if missing)
+    corpus.text(42, "normalized")    # one letter's text from a lazy layer
+    corpus.metadata()                # {"42": {"date", "sender", ...}} like csv rows
+    corpus.letters("corrected")      # [Letter, ...] slotted, interned records
+
+The store lives in data/.cache/corpus/ as numpy arrays plus UTF-8 string
+blobs with offset arrays. Metadata columns are rebuilt automatically when
+letters.csv changes; each text layer is built the first time it is asked
+for and rebuilt when its own source file changes. Freshness is checked by
+size + mtime first and falls back to a SHA-256 comparison.
+
+Pipeline stages open the store concurrently. Opening a fresh store only
+reads it; a rebuild runs under an exclusive lock on data/.cache/corpus/.lock
+and re-checks freshness once it holds the lock, so only one process builds.
+Every file is written to a per-process temp name and renamed into place.
+"""
+
+import csv
+import hashlib
+import json
+import mmap
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DATA_DIR = SCRIPT_DIR.parent / "data"
+API_DIR = SCRIPT_DIR.parent / "webapp" / "api"
+
+# The domain records live with the API; make them importable from scripts/.
+if str(API_DIR) not in sys.path:
+    sys.path.insert(0, str(API_DIR))
+
+from domain.models import Letter, LetterSummary, intern_str  # noqa: E402
+from file_lock import file_lock, tmp_path  # noqa: E402
+
+STORE_DIR = DATA_DIR / ".cache" / "corpus"
+LETTERS_CSV = DATA_DIR / "letters.csv"
+
+STORE_VERSION = 1
+CATEGORICAL_COLUMNS = ("sender", "recipient", "place")
+
+# layer name -> (source file, JSON field holding the text).
+# "source" is the raw letters.csv text with <PARA> markers.
+TEXT_LAYERS = {
+    "source": ("letters.csv", "text"),
+    "corrected": ("corrected-letters.json", "text_corrected"),
+    "normalized": ("normalized-letters.json", "text_normalized"),
+}
+
+
+# ---------------------------------------------------------------------------
+# Fingerprints
+# ---------------------------------------------------------------------------
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _fingerprint(path: Path) -> dict:
+    st = path.stat()
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": _sha256(path)}
+
+
+def _is_fresh(recorded: dict | None, path: Path) -> bool:
+    """True if path still matches the recorded fingerprint."""
+    if not recorded or not path.exists():
+        return False
+    st = path.stat()
+    if st.st_size == recorded["size"] and st.st_mtime_ns == recorded["mtime_ns"]:
+        return True
+    if st.st_size != recorded["size"]:
+        return False
+    # Touched but possibly unchanged (git checkout, copy): compare content
+    if _sha256(path) == recorded["sha256"]:
+        recorded["mtime_ns"] = st.st_mtime_ns
+        return True
+    return False
+
+
+# ---------------------------------------------------------------------------
+# Store I/O helpers
+# ---------------------------------------------------------------------------
+
+def _save_array(store: Path, name: str, arr: np.ndarray) -> None:
+    path = store / f"{name}.npy"
+    tmp = tmp_path(path)
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+def _load_array(store: Path, name: str) -> np.ndarray:
+    return np.load(store / f"{name}.npy", mmap_mode="r")
+
+
+def _write_blob(store: Path, name: str, strings: list[str]) -> None:
+    """Write strings as one UTF-8 blob plus an (n + 1) offset array."""
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    path = store / f"{name}.bin"
+    tmp = tmp_path(path)
+    with open(tmp, "wb") as f:
+        for b in encoded:
+            f.write(b)
+    os.replace(tmp, path)
+    _save_array(store, f"{name}.offsets", offsets)
+
+
+class _Blob:
+    """Read-only view over a string blob; decodes one entry at a time."""
+
+    def __init__(self, store: Path, name: str):
+        self.offsets = _load_array(store, f"{name}.offsets")
+        path = store / f"{name}.bin"
+        self._f = open(path, "rb")
+        size = os.path.getsize(path)
+        self._buf = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return self._buf[start:end].decode("utf-8")
+
+
+# ---------------------------------------------------------------------------
+# Building
+# ---------------------------------------------------------------------------
+
+def _read_letters_csv(path: Path) -> list[dict]:
+    with open(path, "r", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _build_columns(store: Path, manifest: dict) -> None:
+    rows = _read_letters_csv(LETTERS_CSV)
+    ids = np.array([int(r["id"]) for r in rows], dtype=np.int32)
+    dates = np.array([r["date"] or "NaT" for r in rows], dtype="datetime64[D]")
+    _save_array(store, "id", ids)
+    _save_array(store, "date", dates)
+
+    vocab = {}
+    for col in CATEGORICAL_COLUMNS:
+        values = sorted({r[col] for r in rows if r[col]})
+        code_of = {v: i for i, v in enumerate(values)}
+        codes = np.array([code_of.get(r[col], -1) for r in rows], dtype=np.int32)
+        _save_array(store, col, codes)
+        vocab[col] = values
+
+    manifest["columns"] = {
+        "source": _fingerprint(LETTERS_CSV),
+        "count": len(rows),
+        "vocab": vocab,
+    }
+    # The row order changed, so every text layer has to be re-aligned.
+    manifest["layers"] = {}
+
+
+def _build_layer(store: Path, manifest: dict, layer: str, ids: np.ndarray) -> None:
+    filename, field = TEXT_LAYERS[layer]
+    source = DATA_DIR / filename
+    if source.suffix == ".csv":
+        by_id = {int(r["id"]): r.get(field) or "" for r in _read_letters_csv(source)}
+    else:
+        with open(source, "r", encoding="utf-8") as f:
+            by_id = {int(r["id"]): r.get(field) or "" for r in json.load(f)}
+    _write_blob(store, f"text-{layer}", [by_id.get(int(i), "") for i in ids])
+    manifest["layers"][layer] = {"source": _fingerprint(source)}
+
+
+def _write_manifest(store: Path, manifest: dict) -> None:
+    path = store / "manifest.json"
+    tmp = tmp_path(path)
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _read_manifest(store: Path) -> dict:
+    path = store / "manifest.json"
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    return manifest if manifest.get("version") == STORE_VERSION else {}
+
+
+def _columns_hash(manifest: dict) -> str | None:
+    columns = manifest.get("columns")
+    return columns and columns["source"]["sha256"]
+
+
+def _check(recorded: dict | None, path: Path) -> tuple[bool, bool]:
+    """(fresh, mtime refreshed): _is_fresh(), and whether it updated the recorded mtime."""
+    mtime = recorded and recorded.get("mtime_ns")
+    fresh = _is_fresh(recorded, path)
+    return fresh, fresh and recorded["mtime_ns"] != mtime
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+class Corpus:
+    """Column-oriented, read-only view of the letter corpus."""
+
+    def __init__(self, store: Path = STORE_DIR):
+        self.store = Path(store)
+        self.store.mkdir(parents=True, exist_ok=True)
+        self._layers: dict[str, _Blob] = {}
+        self._row_of: dict[int, int] | None = None
+
+        self._manifest = self._read()
+        if not self._columns_fresh():
+            with file_lock(self.store):
+                # Another process may have rebuilt it while we waited
+                self._manifest = self._read()
+                columns = self._manifest.get("columns")
+                fresh, refreshed = _check(columns and columns["source"], LETTERS_CSV)
+                if not fresh:
+                    print(f"Building corpus store in {self.store} ...")
+                    _build_columns(self.store, self._manifest)
+                if not fresh or refreshed:
+                    _write_manifest(self.store, self._manifest)
+
+        self.ids = _load_array(self.store, "id")
+        self.dates = _load_array(self.store, "date")
+        self.codes = {col: _load_array(self.store, col) for col in CATEGORICAL_COLUMNS}
+        self.vocab = self._manifest["columns"]["vocab"]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _read(self) -> dict:
+        manifest = _read_manifest(self.store)
+        manifest.setdefault("version", STORE_VERSION)
+        manifest.setdefault("layers", {})
+        return manifest
+
+    def _columns_fresh(self) -> bool:
+        """Fresh without a rewrite (a touched-but-equal letters.csv needs its mtime saved)."""
+        columns = self._manifest.get("columns")
+        fresh, refreshed = _check(columns and columns["source"], LETTERS_CSV)
+        return fresh and not refreshed
+
+    # -- rows ---------------------------------------------------------------
+
+    def row(self, letter_id) -> int:
+        """Row index of a letter ID (int or str); KeyError if unknown."""
+        if self._row_of is None:
+            self._row_of = {int(lid): i for i, lid in enumerate(self.ids.tolist())}
+        return self._row_of[int(letter_id)]
+
+    def __contains__(self, letter_id) -> bool:
+        try:
+            self.row(letter_id)
+        except (KeyError, ValueError):
+            return False
+        return True
+
+    # -- categorical columns -----------------------------------------------
+
+    def decode(self, column: str) -> list[str]:
+        """Decode a categorical column to strings ("" where missing)."""
+        vocab = self.vocab[column] + [""]
+        return [vocab[c] for c in self.codes[column].tolist()]
+
+    @property
+    def senders(self) -> list[str]:
+        return self.decode("sender")
+
+    @property
+    def recipients(self) -> list[str]:
+        return self.decode("recipient")
+
+    @property
+    def places(self) -> list[str]:
+        return self.decode("place")
+
+    def date_strings(self) -> list[str]:
+        """ISO dates as in letters.csv ("" where missing)."""
+        return ["" if d == "NaT" else d for d in np.datetime_as_string(self.dates).tolist()]
+
+    def metadata(self) -> dict[str, dict]:
+        """{letter_id_str: {"date", "sender", "recipient", "place"}}.
+
+        Drop-in for the csv.DictReader loops keyed by str(row["id"]);
+        missing values are "" just as in the CSV.
+        """
+        dates = self.date_strings()
+        senders, recipients, places = self.senders, self.recipients, self.places
+        return {
+            str(lid): {
+                "date": dates[i],
+                "sender": senders[i],
+                "recipient": recipients[i],
+                "place": places[i],
+            }
+            for i, lid in enumerate(self.ids.tolist())
+        }
+
+    # -- domain records -----------------------------------------------------
+
+    def _record_columns(self) -> tuple[list, list, list, list]:
+        """(dates, places, senders, recipients) ready for record constructors.
+
+        Vocabularies are interned once here, so each record constructor only
+        hits the intern table instead of hashing a fresh string.
+        """
+        dates = self.dates.astype(object).tolist()  # datetime.date or None
+        cols = []
+        for col, missing in (("place", None), ("sender", ""), ("recipient", "")):
+            vocab = [intern_str(v) for v in self.vocab[col]] + [missing]
+            cols.append([vocab[c] for c in self.codes[col].tolist()])
+        return dates, *cols
+
+    def letter_summaries(self) -> list[LetterSummary]:
+        """One LetterSummary per letter, in corpus order (place None if missing)."""
+        dates, places, senders, recipients = self._record_columns()
+        return [
+            LetterSummary(lid, dates[i], places[i], senders[i], recipients[i])
+            for i, lid in enumerate(self.ids.tolist())
+        ]
+
+    def letters(self, layer: str = "normalized") -> list[Letter]:
+        """One Letter (with the given text layer) per letter, in corpus order."""
+        dates, places, senders, recipients = self._record_columns()
+        blob = self.layer(layer)
+        return [
+            Letter(lid, dates[i], places[i], senders[i], recipients[i], blob[i])
+            for i, lid in enumerate(self.ids.tolist())
+        ]
+
+    # -- text layers --------------------------------------------------------
+
+    def layer(self, name: str) -> _Blob:
+        """Memory-mapped text layer, built (or rebuilt) on first access."""
+        if name in self._layers:
+            return self._layers[name]
+        if name not in TEXT_LAYERS:
+            raise KeyError(f"Unknown text layer {name!r}; expected one of {sorted(TEXT_LAYERS)}")
+        source = DATA_DIR / TEXT_LAYERS[name][0]
+        recorded = self._manifest["layers"].get(name)
+        fresh, refreshed = _check(recorded and recorded["source"], source)
+        if not fresh or refreshed:
+            with file_lock(self.store):
+                # Re-read: another process may have built this layer (or
+                # another one) since this store was opened
+                manifest = self._read()
+                if _columns_hash(manifest) != _columns_hash(self._manifest):
+                    raise RuntimeError(f"Corpus store {self.store} was rebuilt while open; reopen it")
+                self._manifest = manifest
+                recorded = manifest["layers"].get(name)
+                fresh, refreshed = _check(recorded and recorded["source"], source)
+                if not fresh:
+                    print(f"Building corpus text layer '{name}' from {source.name} ...")
+                    _build_layer(self.store, self._manifest, name, self.ids)
+                if not fresh or refreshed:
+                    _write_manifest(self.store, self._manifest)
+        self._layers[name] = _Blob(self.store, f"text-{name}")
+        return self._layers[name]
+
+    def text(self, letter_id, layer: str = "normalized") -> str:
+        return self.layer(layer)[self.row(letter_id)]
+
+    def texts(self, layer: str = "normalized"):
+        """Yield (letter_id, text) in corpus (chronological) order."""
+        blob = self.layer(layer)
+        for i, lid in enumerate(self.ids.tolist()):
+            yield lid, blob[i]
+
+
+_CORPUS: Corpus | None = None
+
+
+def load_corpus() -> Corpus:
+    """Return the process-wide corpus, opening (and refreshing) it once."""
+    global _CORPUS
+    if _CORPUS is None:
+        _CORPUS = Corpus()
+    return _CORPUS
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Build or refresh the corpus store.")
+    parser.add_argument("--layers", nargs="*", default=sorted(TEXT_LAYERS),
+                        help="Text layers to build (default: all)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    c = load_corpus()
+    for name in args.layers:
+        c.layer(name)
+    print(f"Corpus store: {len(c)} letters, layers {', '.join(args.layers)} "
+          f"ready in {time.perf_counter() - start:.2f}s ({c.store})")
@@ -0,0 +1,73 @@
+"""
+In-process builders for the derived page data (pipeline steps 20a-20c).
+
+build-letter-images.py, build-person-pages-data.py and
+build-place-pages-data.py each start an interpreter, import numpy/scipy
+and json.load the same registries and letters. Run in-process instead,
+every shared input is loaded once and handed to each builder:
+
+    from derived_data import in_process_builders
+
+    pipeline.run(stages, builders=in_process_builders())
+
+or `python scripts/rebuild-derived-data.py --in-process`. The builders
+treat these inputs as read-only. None of them writes a file another one
+reads, so loading each input once per run is safe.
+"""
+
+import json
+from functools import cached_property
+from typing import Callable
+
+from corpus import load_corpus
+from letter_images import build_letter_images
+from mention_index import load_mention_index
+from person_pages import CORRECTED_LETTERS, IMAGE_REGISTRY, LETTER_ENTITIES, PERSON_REGISTRY
+from person_pages import build_person_pages
+from place_pages import build_place_pages
+
+
+def _load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class SharedInputs:
+    """Inputs used by more than one builder, each loaded on first use."""
+
+    @cached_property
+    def image_registry(self) -> list:
+        return _load_json(IMAGE_REGISTRY)
+
+    @cached_property
+    def corrected_letters(self) -> list:
+        return _load_json(CORRECTED_LETTERS)
+
+    @cached_property
+    def corpus_letters(self) -> list:
+        return load_corpus().letters("corrected")
+
+    @cached_property
+    def person_registry(self) -> list:
+        return _load_json(PERSON_REGISTRY)
+
+    @cached_property
+    def letter_entities(self) -> list:
+        return _load_json(LETTER_ENTITIES)
+
+    @cached_property
+    def mention_index(self):
+        return load_mention_index()
+
+
+def in_process_builders(shared: SharedInputs | None = None) -> dict[str, Callable[[], None]]:
+    """Pipeline stage name -> builder call using the shared inputs."""
+    shared = shared or SharedInputs()
+    return {
+        "letter-images": lambda: build_letter_images(
+            shared.image_registry, shared.corrected_letters, shared.mention_index),
+        "person-pages": lambda: build_person_pages(
+            shared.person_registry, shared.image_registry, shared.letter_entities,
+            shared.corrected_letters, shared.mention_index),
+        "place-pages": lambda: build_place_pages(shared.image_registry, shared.corpus_letters),
+    }
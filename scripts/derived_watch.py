@@ -0,0 +1,268 @@
+"""
+Watch mode for the derived page data (`rebuild-derived-data.py --watch`).
+
+The admin app rewrites image-registry.json, person-registry.json and
+place-photo-links.json all through a curation session. The watcher keeps
+LetterImages, PersonPages and PlacePages in memory and polls the inputs of
+pipeline steps 20a-20c. Once a changed file has been quiet for DEBOUNCE
+seconds, it is re-read and only the affected records are rebuilt:
+
+  image-registry.json      the letters the changed images can match, the
+                           pages of the persons in them and the places they
+                           are filed under
+  person-registry.json     the changed persons' pages, and every page whose
+                           connections or ego network show them
+  place-photo-links.json   the places whose page differs under the new mapping
+
+An image registry whose unchanged records moved relative to each other
+counts every image as changed. Any other input (letters, entities,
+lookups, overrides, geojson), or a person registry edit that changes IDs
+or aliases (and so the mention index), rebuilds the builders that read
+it in full, still in this process. Outputs are
+replaced atomically (json_output.py). The public copies of letter-images.json
+and image-registry.json are refreshed, plus any newly registered image file.
+The rebuilt stages are then recorded in the pipeline state, so
+run-pipeline.py won't redo them.
+"""
+
+import contextlib
+import io
+import json
+import time
+
+from alias_resolver import registry_aliases
+from derived_data import SharedInputs
+from fingerprint import file_hash
+from json_output import copy_atomic
+from letter_images import LetterImages
+from person_pages import PersonPages
+from pipeline import PUBLIC_DATA, ROOT, Pipeline
+from place_pages import PlacePages, ensure_places_in_geojson, load_data, load_place_mapping
+
+STAGES = ("letter-images", "person-pages", "place-pages")
+IMAGE_REGISTRY = "data/image-registry.json"
+PERSON_REGISTRY = "data/person-registry.json"
+PLACE_PHOTO_LINKS = "data/place-photo-links.json"
+# Inputs the builders themselves (re)write
+SELF_WRITTEN = ("data/mention-index.npz", "data/places.geojson")
+IMAGES_SOURCE = ROOT / "data" / "images"
+IMAGES_PUBLIC = ROOT / "apps" / "website" / "public" / "images" / "letters"
+
+POLL_INTERVAL = 0.1  # seconds between stat() sweeps
+DEBOUNCE = 0.3       # seconds a changed input must be quiet before rebuilding
+
+
+def changed_records(old: list[dict], new: list[dict]) -> tuple[list[dict], list[dict]] | None:
+    """(old versions, new versions) of the records added, removed or edited, by "id".
+
+    None if the two can't be compared record by record: duplicate IDs, or
+    unchanged records that moved relative to each other (which can reorder
+    ties in the builders).
+    """
+    old_by_id = {r.get("id"): r for r in old}
+    new_by_id = {r.get("id"): r for r in new}
+    if len(old_by_id) != len(old) or len(new_by_id) != len(new):
+        return None
+    same = [rid for rid, r in new_by_id.items() if old_by_id.get(rid) == r]
+    same_ids = set(same)
+    if [r.get("id") for r in old if r.get("id") in same_ids] != same:
+        return None
+    return ([r for r in old if r.get("id") not in same_ids],
+            [r for r in new if r.get("id") not in same_ids])
+
+
+def _stamp(path) -> tuple[int, int] | None:
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class DerivedDataWatcher:
+    """In-memory page builders, updated as their inputs change on disk."""
+
+    def __init__(self, shared: SharedInputs | None = None, debounce: float = DEBOUNCE,
+                 poll_interval: float = POLL_INTERVAL):
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        pipeline = Pipeline()
+        self.inputs = sorted({p for name in STAGES for p in pipeline.stages[name].inputs})
+        self.readers = {p: [n for n in STAGES if p in pipeline.stages[n].inputs] for p in self.inputs}
+        self.stamps = {p: _stamp(ROOT / p) for p in self.inputs}
+        self.hashes = {p: file_hash(ROOT / p) if self.stamps[p] else None for p in self.inputs}
+        self.changed_persons = None
+
+        t0 = time.time()
+        shared = shared or SharedInputs()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for name in STAGES:
+                self._build(name, shared)
+        print(f"Loaded {', '.join(STAGES)} in {time.time() - t0:.1f}s")
+
+    # -- building -------------------------------------------------------------
+
+    def _build(self, name: str, shared: SharedInputs) -> None:
+        if name == "letter-images":
+            self.images = shared.image_registry
+            self.letter_images = LetterImages(
+                shared.image_registry, shared.corrected_letters, shared.mention_index)
+        elif name == "person-pages":
+            self.images = shared.image_registry
+            self.persons = shared.person_registry
+            self.person_pages = PersonPages(
+                shared.person_registry, shared.image_registry, shared.letter_entities,
+                shared.corrected_letters, shared.mention_index)
+        else:
+            self.images = shared.image_registry
+            geojson = ensure_places_in_geojson()
+            enriched, place_mapping, images, letters = load_data(shared.image_registry, shared.corpus_letters)
+            self.place_pages = PlacePages(geojson, enriched, place_mapping, images, letters)
+
+    def _write(self, name: str) -> None:
+        if name == "letter-images":
+            self.letter_images.write()
+            if (ROOT / PUBLIC_DATA).exists():
+                copy_atomic(ROOT / "data" / "letter-images.json", ROOT / PUBLIC_DATA / "letter-images.json")
+        elif name == "person-pages":
+            self.person_pages.write(self.changed_persons)
+        else:
+            self.place_pages.write()
+
+    def _publish_images(self, images: list[dict]) -> None:
+        """Public copy of the registry, plus the files of new or edited images."""
+        if not (ROOT / PUBLIC_DATA).exists():
+            return
+        copy_atomic(ROOT / IMAGE_REGISTRY, ROOT / PUBLIC_DATA / "image-registry.json")
+        for img in images:
+            if not img.get("path"):
+                continue
+            src, dst = IMAGES_SOURCE / img["path"], IMAGES_PUBLIC / img["path"]
+            if src.exists() and (not dst.exists() or dst.stat().st_size != src.stat().st_size):
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                copy_atomic(src, dst)
+
+    def apply(self, paths: list[str]) -> dict[str, str]:
+        """Rebuild what ``paths`` affect and write it; returns {stage: what was rebuilt}.
+
+        The new content hashes are only kept once everything is written, so
+        an edit that failed to apply is still an edit next time.
+        """
+        digests = {p: file_hash(ROOT / p) if (ROOT / p).exists() else None for p in paths}
+        paths = [p for p in paths if digests[p] != self.hashes[p]]
+        shared = SharedInputs()
+        full = set()
+        for p in paths:
+            if p not in (IMAGE_REGISTRY, PERSON_REGISTRY, PLACE_PHOTO_LINKS):
+                full.update(self.readers[p])
+
+        # Diff the registries first, so any full rebuild they need is known up front
+        image_changes = person_changes = None
+        if IMAGE_REGISTRY in paths:
+            image_changes = changed_records(self.images, shared.image_registry)
+        if PERSON_REGISTRY in paths:
+            person_changes = changed_records(self.persons, shared.person_registry)
+            if person_changes is None or registry_aliases(self.persons) != registry_aliases(shared.person_registry):
+                full.update(("letter-images", "person-pages"))  # the mention index changes
+                person_changes = None
+
+        for name in STAGES:
+            if name in full:
+                self._build(name, shared)
+
+        # Stage -> rebuilt letter IDs / person IDs / place names
+        rebuilt = {"letter-images": set(), "person-pages": set(), "place-pages": set()}
+        if IMAGE_REGISTRY in paths:
+            # Without a record-by-record diff, every image counts as changed
+            changed = self.images + shared.image_registry if image_changes is None else image_changes[0] + image_changes[1]
+            if "letter-images" not in full and image_changes is None:
+                self.letter_images.set_images(shared.image_registry)
+                rebuilt["letter-images"].update(self.letter_images.contexts)
+            elif "letter-images" not in full:
+                rebuilt["letter-images"].update(self.letter_images.update_images(shared.image_registry, changed))
+            if "person-pages" not in full:
+                rebuilt["person-pages"].update(self.person_pages.update(
+                    all_images=shared.image_registry, changed_images=changed))
+            if "place-pages" not in full:
+                rebuilt["place-pages"].update(self.place_pages.update_images(shared.image_registry, changed))
+        if person_changes is not None:
+            ids = {r["id"] for r in person_changes[0] + person_changes[1]}
+            rebuilt["person-pages"].update(self.person_pages.update(
+                all_persons=shared.person_registry, changed_persons=ids))
+        if PLACE_PHOTO_LINKS in paths and "place-pages" not in full:
+            rebuilt["place-pages"].update(self.place_pages.set_place_mapping(load_place_mapping()))
+
+        units = {"letter-images": "letters", "person-pages": "persons", "place-pages": "places"}
+        done = {name: "all" for name in STAGES if name in full}
+        done.update((name, f"{len(keys)} {units[name]}") for name, keys in rebuilt.items()
+                    if keys and name not in full)
+        self.changed_persons = None if "person-pages" in full else rebuilt["person-pages"]
+
+        if IMAGE_REGISTRY in paths:
+            self.images = shared.image_registry
+        if PERSON_REGISTRY in paths:
+            self.persons = shared.person_registry
+
+        for name in done:
+            self._write(name)
+        if IMAGE_REGISTRY in paths:
+            self._publish_images(image_changes[1] if image_changes else shared.image_registry)
+
+        self.hashes.update(digests)
+        # Rebuilding may rewrite the mention index or places.geojson; that isn't an edit
+        for p in SELF_WRITTEN:
+            self.stamps[p] = _stamp(ROOT / p)
+            self.hashes[p] = file_hash(ROOT / p) if self.stamps[p] else None
+
+        # Every stage reading a changed input is now current, rebuilt or not
+        current = {name for p in paths for name in self.readers[p]}
+        if current:
+            pipeline = Pipeline()
+            for name in STAGES:
+                if name in current:
+                    pipeline.record(pipeline.stages[name], 0.0)
+            pipeline.save_state()
+        return done
+
+    # -- watching -------------------------------------------------------------
+
+    def poll(self) -> dict[str, tuple[int, int] | None]:
+        """{input: stamp} of the inputs whose stamp differs from the last one applied."""
+        stamps = {p: _stamp(ROOT / p) for p in self.inputs}
+        return {p: stamp for p, stamp in stamps.items() if stamp != self.stamps[p]}
+
+    def run(self) -> None:
+        """Poll until interrupted, rebuilding after each quiet period."""
+        print(f"Watching {len(self.inputs)} inputs of {', '.join(STAGES)} (Ctrl-C to stop)")
+        pending: dict[str, tuple[float, tuple | None]] = {}  # input -> (last changed, stamp)
+        failed: dict[str, tuple | None] = {}  # inputs of a failed rebuild, as they were then
+        try:
+            while True:
+                time.sleep(self.poll_interval)
+                now = time.monotonic()
+                for p, stamp in self.poll().items():
+                    if p in failed and failed[p] == stamp:
+                        continue
+                    if p not in pending or pending[p][1] != stamp:
+                        pending[p] = (now, stamp)
+                if not pending or now - max(t for t, _ in pending.values()) < self.debounce:
+                    continue
+                # A failed rebuild's inputs are retried along with the next write
+                stamps = {**failed, **{p: stamp for p, (_, stamp) in pending.items()}}
+                paths = sorted(stamps)
+                pending.clear()
+                t0 = time.time()
+                try:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        done = self.apply(paths)
+                except json.JSONDecodeError as e:  # caught mid-write: the next write retriggers
+                    failed = stamps
+                    print(f"[{time.strftime('%H:%M:%S')}] {', '.join(paths)}: {e}; waiting for the next write")
+                    continue
+                failed = {}
+                self.stamps.update(stamps)
+                names = ", ".join(p.rsplit("/", 1)[-1] for p in paths)
+                summary = ", ".join(f"{name}: {what}" for name, what in done.items()) or "no change"
+                print(f"[{time.strftime('%H:%M:%S')}] {names} -> {summary} ({(time.time() - t0) * 1000:.0f} ms)")
+        except KeyboardInterrupt:
+            print("Stopped watching")
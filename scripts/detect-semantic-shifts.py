@@ -15,7 +15,6 @@ Outputs:
 """
 
 import argparse
-import csv
 import json
 import os
 import re
@@ -24,6 +23,10 @@ from collections import defaultdict
 
 import numpy as np
 
+from profiling import counted
+from record_stream import iter_records, records_exist
+from temporal_index import TemporalIndex
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -49,34 +52,27 @@ TARGET_WORDS = [
 # Data loading
 # ---------------------------------------------------------------------------
 
-def load_sentence_scores(path: str) -> list[dict]:
-    with open(path, "r", encoding="utf-8") as f:
-        sentences = json.load(f)
-    assert len(sentences) >= 5000, (
-        f"Expected >= 5000 sentences, got {len(sentences)}"
+def load_sentence_scores(path: str, follow: bool = False):
+    """Stream sentence score records (JSON or JSONL) one at a time."""
+    count = 0
+    for rec in iter_records(path, follow=follow):
+        count += 1
+        yield rec
+    assert count >= 5000, (
+        f"Expected >= 5000 sentences, got {count}"
     )
-    return sentences
 
 
-def load_letter_dates(path: str) -> dict[int, str]:
-    """Return dict mapping integer letter ID to date string."""
-    dates = {}
-    with open(path, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            dates[int(row["id"])] = row["date"]
-    return dates
+def load_letter_years() -> dict[int, str]:
+    """Return dict mapping integer letter ID to year label (dated letters only)."""
+    return TemporalIndex.from_corpus().labels("year")
 
 
 # ---------------------------------------------------------------------------
 # Analysis
 # ---------------------------------------------------------------------------
 
-def extract_year(date_str: str) -> str:
-    """Extract year from a date string like '1914-08-15'."""
-    return date_str[:4]
-
-
+@counted
 def word_in_text(word: str, text: str) -> bool:
     """Check if word appears in text as a whole word (case-insensitive)."""
     pattern = r"\b" + re.escape(word) + r"\b"
@@ -96,28 +92,37 @@ def fossilization_index(std_by_year: list[float]) -> float:
     return round(float(slope), 6)
 
 
-def analyze_word(
-    word: str,
-    sentences: list[dict],
-    letter_dates: dict[int, str],
-) -> dict:
-    """Analyze a single target word across the full correspondence.
+def collect_word_matches(
+    words: list[str],
+    sentences,
+    letter_years: dict[int, str],
+) -> dict[str, list[dict]]:
+    """Find the sentences containing each word in a single pass.
 
-    Finds all sentences containing the word, groups by year, and computes
-    yearly CVP statistics, drift between consecutive years, and the
-    fossilization index.
+    Returns {word: [{"score", "year"}, ...]} in sentence order, keeping only
+    what analyze_word() needs so the sentences can be streamed.
     """
-    # Find all sentences containing the word
-    matching = []
+    matches: dict[str, list[dict]] = {word: [] for word in words}
     for s in sentences:
-        if word_in_text(word, s["text"]):
-            date = letter_dates.get(s["letter_id"])
-            if date:
-                matching.append({
+        year = letter_years.get(s["letter_id"])
+        if not year:
+            continue
+        for word in words:
+            if word_in_text(word, s["text"]):
+                matches[word].append({
                     "score": s["score"],
-                    "year": extract_year(date),
+                    "year": year,
                 })
+    return matches
+
 
+def analyze_word(word: str, matching: list[dict]) -> dict:
+    """Analyze a single target word across the full correspondence.
+
+    Takes the word's matching sentences (see collect_word_matches), groups
+    them by year, and computes yearly CVP statistics, drift between
+    consecutive years, and the fossilization index.
+    """
     total_occurrences = len(matching)
 
     # Group by year
@@ -229,6 +234,10 @@ def main() -> None:
         "--dry-run", action="store_true",
         help="Compute and print stats but do not write output",
     )
+    parser.add_argument(
+        "--follow", action="store_true",
+        help="Tail a JSONL sentence-score file that is still being written",
+    )
     args = parser.parse_args()
 
     sentence_path = resolve("cvp-sentence-scores.json")
@@ -240,7 +249,7 @@ def main() -> None:
         ("Sentence scores", sentence_path),
         ("Letters CSV", csv_path),
     ]:
-        if not os.path.exists(path):
+        if not records_exist(path, args.follow):
             print(f"Error: {label} not found at {path}", file=sys.stderr)
             sys.exit(1)
 
@@ -251,14 +260,16 @@ def main() -> None:
 
     # Load data
     print("Loading data...")
-    sentences = load_sentence_scores(sentence_path)
-    letter_dates = load_letter_dates(csv_path)
+    letter_years = load_letter_years()
 
-    # Analyze each target word
+    # Analyze each target word (one streaming pass over the sentences)
     print(f"Analyzing {len(TARGET_WORDS)} target words...")
+    matches = collect_word_matches(
+        TARGET_WORDS, load_sentence_scores(sentence_path, args.follow), letter_years,
+    )
     word_results = {}
     for word in TARGET_WORDS:
-        word_results[word] = analyze_word(word, sentences, letter_dates)
+        word_results[word] = analyze_word(word, matches[word])
 
     # Rankings
     most_fossilized, most_shifted = rank_words(word_results)
@@ -15,10 +15,14 @@ Outputs:
 """
 
 import json
-import csv
 from pathlib import Path
 from collections import defaultdict
 
+import numpy as np
+
+from corpus import load_corpus
+from temporal_index import to_ordinal
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 
@@ -54,17 +58,58 @@ def load_letter_entities():
 
 def load_letters_csv():
     """Load letter metadata for dates, sender, recipient."""
-    letters = {}
-    with open(DATA_DIR / "letters.csv", "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            letters[str(row["id"])] = row
-    return letters
+    return load_corpus().metadata()
+
+
+# ---------------------------------------------------------------------------
+# Mention postings
+# ---------------------------------------------------------------------------
 
+NO_DATE = np.iinfo(np.int64).min // 4  # day number for undated letters; never near
 
-def find_alias_matches(person_text, aliases):
-    """Check if a person text matches any of the given aliases."""
-    return person_text in aliases
+
+class MentionPostings:
+    """Per-letter person mentions, indexed once for every conflated group.
+
+    Rows are letters in letter-ID order. Each person string maps to the
+    sorted array of rows whose person list contains it, and each row's date
+    is an ordinal day number, so the group queries below are unions and
+    intersections of row arrays plus vectorized date distances. Adding a
+    conflated group adds queries, not passes over the letters.
+
+    It works on the raw person strings of the entity draft, unlike
+    mention_index.MentionIndex, which holds mentions resolved to person IDs.
+    """
+
+    def __init__(self, letter_entities, letters_csv):
+        self.letter_ids = sorted(letter_entities, key=int)
+        self.persons = [letter_entities[lid].get("persons", []) for lid in self.letter_ids]
+        self.meta = [letters_csv.get(lid, {}) for lid in self.letter_ids]
+        days = [to_ordinal(m.get("date")) for m in self.meta]
+        self.days = np.array([NO_DATE if d is None else d for d in days], dtype=np.int64)
+
+        postings = defaultdict(list)
+        for row, persons in enumerate(self.persons):
+            for person in dict.fromkeys(persons):
+                postings[person].append(row)
+        self._postings = {p: np.array(rows, dtype=np.int64) for p, rows in postings.items()}
+
+    def rows(self, names) -> np.ndarray:
+        """Sorted rows whose person list contains any of the names."""
+        hits = [self._postings[n] for n in names if n in self._postings]
+        return np.unique(np.concatenate(hits)) if hits else np.empty(0, dtype=np.int64)
+
+    def variant_rows(self, surname_variants) -> dict[str, np.ndarray]:
+        return {name: self.rows(aliases) for name, aliases in surname_variants.items()}
+
+    def letter(self, row) -> dict:
+        """letter_id, date and sender of a row, as the evidence records show them."""
+        meta = self.meta[row]
+        return {
+            "letter_id": int(self.letter_ids[row]),
+            "date": meta.get("date", None),
+            "sender": meta.get("sender", None),
+        }
 
 
 def find_variant_in_letter(persons, surname_variants):
@@ -77,59 +122,42 @@ def find_variant_in_letter(persons, surname_variants):
     return found
 
 
-def build_co_occurrence_evidence(letter_entities, letters_csv, group_name,
-                                 group_config):
+def build_co_occurrence_evidence(postings, group_config):
     """
     Find letters where two or more surname variants from the same conflated
     group co-occur, proving they are different people.
     """
-    evidence = []
     surname_variants = group_config["surname_variants"]
+    per_variant = postings.variant_rows(surname_variants).values()
+    rows, counts = np.unique(np.concatenate(list(per_variant)), return_counts=True)
 
-    for letter_id, entities in sorted(letter_entities.items(),
-                                      key=lambda x: int(x[0])):
-        persons = entities.get("persons", [])
-        found = find_variant_in_letter(persons, surname_variants)
-        if len(found) >= 2:
-            date = letters_csv.get(letter_id, {}).get("date", None)
-            sender = letters_csv.get(letter_id, {}).get("sender", None)
-            evidence.append({
-                "letter_id": int(letter_id),
-                "date": date,
-                "sender": sender,
-                "co_occurring_variants": {
-                    k: v for k, v in found.items()
-                },
-                "all_persons_in_letter": persons,
-            })
+    evidence = []
+    for row in rows[counts >= 2].tolist():
+        persons = postings.persons[row]
+        evidence.append({
+            **postings.letter(row),
+            "co_occurring_variants": find_variant_in_letter(persons, surname_variants),
+            "all_persons_in_letter": persons,
+        })
     return evidence
 
 
-def build_temporal_profiles(letter_entities, letters_csv, group_config):
+def build_temporal_profiles(postings, group_config):
     """
     For each surname variant, build a temporal profile: which letters and
     dates it appears in.
     """
     profiles = {}
-    surname_variants = group_config["surname_variants"]
-
-    for variant_name, aliases in surname_variants.items():
-        mentions = []
-        for letter_id, entities in sorted(letter_entities.items(),
-                                          key=lambda x: int(x[0])):
-            persons = entities.get("persons", [])
-            matched_aliases = [p for p in persons if p in aliases]
-            if matched_aliases:
-                date = letters_csv.get(letter_id, {}).get("date", None)
-                sender = letters_csv.get(letter_id, {}).get("sender", None)
-                mentions.append({
-                    "letter_id": int(letter_id),
-                    "date": date,
-                    "sender": sender,
-                    "matched_as": matched_aliases,
-                })
-        dates = [m["date"] for m in mentions if m["date"]]
-        dates.sort()
+    for variant_name, rows in postings.variant_rows(group_config["surname_variants"]).items():
+        aliases = group_config["surname_variants"][variant_name]
+        mentions = [
+            {
+                **postings.letter(row),
+                "matched_as": [p for p in postings.persons[row] if p in aliases],
+            }
+            for row in rows.tolist()
+        ]
+        dates = sorted(m["date"] for m in mentions if m["date"])
         profiles[variant_name] = {
             "mention_count": len(mentions),
             "first_mention": dates[0] if dates else None,
@@ -139,7 +167,7 @@ def build_temporal_profiles(letter_entities, letters_csv, group_config):
     return profiles
 
 
-def assign_bare_names(letter_entities, letters_csv, group_config, profiles):
+def assign_bare_names(postings, group_config, profiles):
     """
     Attempt to assign bare first-name mentions to a specific surname variant
     based on:
@@ -150,24 +178,36 @@ def assign_bare_names(letter_entities, letters_csv, group_config, profiles):
     """
     bare_names = group_config["bare_names"]
     surname_variants = group_config["surname_variants"]
-    assignments = []
-
-    # Build a date->variant map for temporal proximity
-    date_variant_map = defaultdict(set)
-    for variant_name, profile in profiles.items():
+    variant_names = list(profiles)
+    variant_rows = {
+        name: set(rows.tolist()) for name, rows in postings.variant_rows(surname_variants).items()
+    }
+
+    # Dated surname mentions, in profile order (which breaks nearest-date ties)
+    mention_variant, mention_day = [], []
+    for code, profile in enumerate(profiles.values()):
         for mention in profile["mentions"]:
-            if mention["date"]:
-                date_variant_map[mention["date"]].add(variant_name)
+            day = to_ordinal(mention["date"])
+            if day is not None:
+                mention_variant.append(code)
+                mention_day.append(day)
+    mention_variant = np.array(mention_variant, dtype=np.int64)
+
+    # Day distance from every bare-name letter to every surname mention
+    bare_rows = postings.rows(bare_names)
+    bare_days = postings.days[bare_rows]
+    if mention_day:
+        distance = np.abs(bare_days[:, None] - np.array(mention_day, dtype=np.int64)[None, :])
+        nearest = distance.argmin(axis=1)  # first of any ties
+        nearest_distance = distance[np.arange(len(bare_rows)), nearest]
+    dated = bare_days != NO_DATE
 
-    for letter_id, entities in sorted(letter_entities.items(),
-                                      key=lambda x: int(x[0])):
-        persons = entities.get("persons", [])
+    assignments = []
+    for k, row in enumerate(bare_rows.tolist()):
+        persons = postings.persons[row]
         bare_matches = [p for p in persons if p in bare_names]
-        if not bare_matches:
-            continue
-
-        date = letters_csv.get(letter_id, {}).get("date", None)
-        sender = letters_csv.get(letter_id, {}).get("sender", "")
+        date = postings.meta[row].get("date", None)
+        sender = postings.meta[row].get("sender", "")
 
         # Strategy 1: Check if sender name resolves the identity
         assigned_variant = None
@@ -176,49 +216,39 @@ def assign_bare_names(letter_entities, letters_csv, group_config, profiles):
 
         for variant_name, aliases in surname_variants.items():
             # Check if sender contains a surname from this variant
-            for alias in aliases:
-                if alias in sender:
-                    assigned_variant = variant_name
-                    confidence = 0.95
-                    method = "sender_identity"
-                    break
-            if assigned_variant:
+            if any(alias in sender for alias in aliases):
+                assigned_variant = variant_name
+                confidence = 0.95
+                method = "sender_identity"
                 break
 
         # Strategy 2: Check if a surname variant co-occurs in same letter
         if not assigned_variant:
-            found = find_variant_in_letter(persons, surname_variants)
+            found = [name for name, rows in variant_rows.items() if row in rows]
             if len(found) == 1:
-                assigned_variant = list(found.keys())[0]
+                assigned_variant = found[0]
                 confidence = 0.7
                 method = "same_letter_co_occurrence"
 
         # Strategy 3: Temporal proximity — same date has a surname mention
-        if not assigned_variant and date:
-            variants_on_date = date_variant_map.get(date, set())
+        if not assigned_variant and date and dated[k] and mention_day:
+            variants_on_date = set(mention_variant[distance[k] == 0].tolist())
             if len(variants_on_date) == 1:
-                assigned_variant = list(variants_on_date)[0]
+                assigned_variant = variant_names[variants_on_date.pop()]
                 confidence = 0.5
                 method = "temporal_same_date"
 
-        # Strategy 4: Temporal proximity — nearest date with a surname
-        if not assigned_variant and date:
-            best_variant = None
-            best_distance = None
-            for variant_name, profile in profiles.items():
-                for mention in profile["mentions"]:
-                    if mention["date"]:
-                        distance = abs(_date_diff(date, mention["date"]))
-                        if best_distance is None or distance < best_distance:
-                            best_distance = distance
-                            best_variant = variant_name
-            if best_variant and best_distance is not None and best_distance <= 30:
-                assigned_variant = best_variant
+        # Strategy 4: Temporal proximity — nearest date with a surname.
+        # Ties go to the variant listed first, as in the profile order.
+        if not assigned_variant and date and dated[k] and mention_day:
+            best_distance = int(nearest_distance[k])
+            if best_distance <= 30:
+                assigned_variant = variant_names[mention_variant[nearest[k]]]
                 confidence = max(0.3, 0.5 - best_distance * 0.01)
                 method = f"temporal_nearest_{best_distance}d"
 
         assignment = {
-            "letter_id": int(letter_id),
+            "letter_id": int(postings.letter_ids[row]),
             "date": date,
             "sender": sender,
             "bare_name_forms": bare_matches,
@@ -232,18 +262,6 @@ def assign_bare_names(letter_entities, letters_csv, group_config, profiles):
     return assignments
 
 
-def _date_diff(date_a, date_b):
-    """Compute approximate day difference between two ISO date strings."""
-    try:
-        parts_a = date_a.split("-")
-        parts_b = date_b.split("-")
-        days_a = int(parts_a[0]) * 365 + int(parts_a[1]) * 30 + int(parts_a[2])
-        days_b = int(parts_b[0]) * 365 + int(parts_b[1]) * 30 + int(parts_b[2])
-        return days_a - days_b
-    except (IndexError, ValueError):
-        return 9999
-
-
 def main():
     print("=" * 60)
     print("ADR-042: Person Registry Disambiguation")
@@ -255,15 +273,15 @@ def main():
     print(f"Loaded {len(letter_entities)} letters from letter-entities-draft.json")
     print(f"Loaded {len(letters_csv)} letters from letters.csv")
 
+    postings = MentionPostings(letter_entities, letters_csv)
+
     output = {}
 
     for group_name, group_config in CONFLATED_GROUPS.items():
         print(f"\n--- Analyzing conflated group: {group_name} ---")
 
         # Co-occurrence evidence
-        co_occurrences = build_co_occurrence_evidence(
-            letter_entities, letters_csv, group_name, group_config
-        )
+        co_occurrences = build_co_occurrence_evidence(postings, group_config)
         print(f"  Co-occurrence proof: {len(co_occurrences)} letter(s)")
         for co in co_occurrences:
             variants = list(co["co_occurring_variants"].keys())
@@ -271,17 +289,13 @@ def main():
                   f"{' + '.join(variants)}")
 
         # Temporal profiles
-        profiles = build_temporal_profiles(
-            letter_entities, letters_csv, group_config
-        )
+        profiles = build_temporal_profiles(postings, group_config)
         for variant_name, profile in profiles.items():
             print(f"  {variant_name}: {profile['mention_count']} mentions "
                   f"({profile['first_mention']} to {profile['last_mention']})")
 
         # Bare name assignments
-        assignments = assign_bare_names(
-            letter_entities, letters_csv, group_config, profiles
-        )
+        assignments = assign_bare_names(postings, group_config, profiles)
         assigned = [a for a in assignments if not a["is_ambiguous"]]
         ambiguous = [a for a in assignments if a["is_ambiguous"]]
         print(f"  Bare name mentions: {len(assignments)} total")
@@ -28,6 +28,9 @@ from itertools import combinations
 import numpy as np
 import pandas as pd
 
+from model_worker import sentence_encoder
+from record_stream import iter_records, resolve_records_path
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -50,8 +53,7 @@ def resolve(path: str) -> str:
 # ---------------------------------------------------------------------------
 
 def load_sentences(path: str) -> list[dict]:
-    with open(path, "r", encoding="utf-8") as f:
-        sentences = json.load(f)
+    sentences = list(iter_records(path))
     assert len(sentences) >= 5000, (
         f"Expected >= 5000 sentences, got {len(sentences)}"
     )
@@ -95,10 +97,7 @@ def embed_sentences(texts: list[str], force: bool = False) -> np.ndarray:
         print(f"  Cache size mismatch ({embeddings.shape[0]} vs {len(texts)}), "
               "re-embedding...")
 
-    from sentence_transformers import SentenceTransformer
-
-    print(f"Loading model {MODEL_NAME}...")
-    model = SentenceTransformer(MODEL_NAME)
+    model = sentence_encoder(MODEL_NAME)
     print(f"Embedding {len(texts)} sentences...")
     embeddings = model.encode(texts, batch_size=32, show_progress_bar=True)
     embeddings = embeddings.astype(np.float32)
@@ -147,6 +146,7 @@ def find_extreme_sentences(
         return {
             "letter_id": sent["letter_id"],
             "index": sent["index"],
+            "sentence_id": sent["sentence_id"],
             "text": text,
             "score": round(float(scores[idx]), 4),
         }
@@ -297,7 +297,7 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    sentences_path = resolve("normalized-sentences.json")
+    sentences_path = resolve_records_path(resolve("normalized-sentences.json"))
     output_path = resolve("pca-dimensions.json")
 
     # Validate input
@@ -11,7 +11,6 @@ import json
 import os
 import sys
 import time
-import unicodedata
 
 # Fix Windows console encoding for Unicode place names
 if sys.stdout.encoding != "utf-8":
@@ -21,6 +20,7 @@ if sys.stderr.encoding != "utf-8":
 
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, SCRIPT_DIR)
+from place_resolver import normalize_name
 from wikidata_client import WikiDataClient
 
 DATA_DIR = os.path.join(SCRIPT_DIR, os.pardir, "data")
@@ -56,19 +56,6 @@ LIMIT 5
 RATE_LIMIT_SECONDS = 1.5
 
 
-def normalize_name(name):
-    """Normalize a place name for fuzzy comparison.
-
-    Strips diacritics, lowercases, and removes parenthetical suffixes.
-    """
-    # Remove parenthetical parts e.g. "Arys (Orzysz)" -> "arys"
-    base = name.split("(")[0].strip()
-    # Strip diacritics
-    nfkd = unicodedata.normalize("NFKD", base)
-    ascii_name = "".join(c for c in nfkd if not unicodedata.combining(c))
-    return ascii_name.lower().strip()
-
-
 def get_all_name_variants(feature):
     """Return a list of normalized name variants for a GeoJSON feature."""
     props = feature["properties"]
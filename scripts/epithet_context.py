@@ -0,0 +1,96 @@
+"""
+Context-window features for epithet matches (ADR-043).
+
+scan-epithets.py computes these once per match, while it has the letter
+text in hand, and stores them in epithet-inventory.json. resolve-epithets.py
+then classifies each match from the stored counts instead of re-reading
+corrected-letters.json and re-running the keyword regexes:
+
+    features = context_features(text, match.start())
+    # {"male": 2, "female": 0, "family": 1, "military": 3, "community": 0}
+    classify_context(features)    # "military"
+    detect_gender(features)       # "male"
+"""
+
+import re
+
+# Characters on each side of a match that count as its wider context
+WIDER_CONTEXT = 300
+
+# ---------------------------------------------------------------------------
+# Gender signal patterns (Danish)
+# ---------------------------------------------------------------------------
+MALE_PRONOUNS = re.compile(
+    r"\b(han|ham|hans|sin\s+mand|sin\s+far|sin\s+fader)\b", re.IGNORECASE
+)
+FEMALE_PRONOUNS = re.compile(
+    r"\b(hun|hende|hendes|sin\s+kone|sin\s+mor|sin\s+moder)\b", re.IGNORECASE
+)
+
+# ---------------------------------------------------------------------------
+# Context classification keywords
+# ---------------------------------------------------------------------------
+FAMILY_KEYWORDS = re.compile(
+    r"\b(far|faer|mor|moer|moder|fader|hjem|hjemme|hus|gaard|gård|"
+    r"børn|barn|familie|søster|broder|bror|søndag|"
+    r"trine|musse|signe|bodil|roagger|obling)\b",
+    re.IGNORECASE,
+)
+MILITARY_KEYWORDS = re.compile(
+    r"\b(soldat|regiment|regt|kompagni|kaserne|feldt|felt|"
+    r"kommando|løjtnant|leutn|hauptm|feldw|feldv|oberstl|"
+    r"krig|front|skyttegrav|gevær|kanon|batteri|"
+    r"konow|poulsen|petersen|madsen|braunsberg)\b",
+    re.IGNORECASE,
+)
+COMMUNITY_KEYWORDS = re.compile(
+    r"\b(nabo|kirke|præst|marked|marked|fest|bryllup|"
+    r"begravelse|mejeri|skole|forening|møde)\b",
+    re.IGNORECASE,
+)
+
+FEATURE_PATTERNS = {
+    "male": MALE_PRONOUNS,
+    "female": FEMALE_PRONOUNS,
+    "family": FAMILY_KEYWORDS,
+    "military": MILITARY_KEYWORDS,
+    "community": COMMUNITY_KEYWORDS,
+}
+
+# "Far"/"Faer" written out anywhere in the letter (case-sensitive)
+FAR_IN_TEXT = re.compile(r"\b(Far|Faer)\b")
+
+
+def wider_context(text, position, window=WIDER_CONTEXT):
+    """The text within ``window`` characters of position."""
+    return text[max(0, position - window):min(len(text), position + window)]
+
+
+def context_features(text, position, window=WIDER_CONTEXT):
+    """Keyword and pronoun counts in the wider context of a match."""
+    context = wider_context(text, position, window)
+    return {name: len(pattern.findall(context)) for name, pattern in FEATURE_PATTERNS.items()}
+
+
+def classify_context(features):
+    """Classify a match context as family/military/community/ambiguous."""
+    family_score = features["family"]
+    military_score = features["military"]
+    community_score = features["community"]
+
+    if family_score > military_score and family_score > community_score:
+        return "family"
+    if military_score > family_score and military_score > community_score:
+        return "military"
+    if community_score > family_score and community_score > military_score:
+        return "community"
+    return "ambiguous"
+
+
+def detect_gender(features):
+    """Detect grammatical gender clues from a context's pronoun counts."""
+    if features["male"] > features["female"]:
+        return "male"
+    if features["female"] > features["male"]:
+        return "female"
+    return "unknown"
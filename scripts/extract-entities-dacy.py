@@ -25,6 +25,8 @@ import time
 import warnings
 from pathlib import Path
 
+from model_store import load_spacy_model
+
 warnings.filterwarnings("ignore", category=UserWarning)
 
 # Ensure UTF-8 output on Windows
@@ -50,11 +52,9 @@ ENTITY_TYPES = {"PER", "LOC", "ORG"}
 
 def load_dacy_model(model_name: str | None = None):
     """Load DaCy model, trying fallbacks if the requested model is unavailable."""
-    import dacy  # noqa: delayed import so we get a clear error if missing
-
     if model_name:
         print(f"Loading DaCy model '{model_name}'...")
-        nlp = dacy.load(model_name)
+        nlp = load_spacy_model(model_name)
         print(f"Model loaded: {nlp.pipe_names}")
         return nlp
 
@@ -62,7 +62,7 @@ def load_dacy_model(model_name: str | None = None):
     for name in MODEL_PREFERENCE:
         try:
             print(f"Trying DaCy model '{name}'...")
-            nlp = dacy.load(name)
+            nlp = load_spacy_model(name)
             print(f"Model loaded: {nlp.pipe_names}")
             return nlp
         except Exception as e:
@@ -4,21 +4,33 @@ Extract sentences from normalized Danish letter text.
 
 Input:  data/normalized-letters.json
 Output: data/normalized-sentences.json
+        data/normalized-sentence-offsets.json
 
 Uses rule-based sentence splitting (no ML dependencies).
+
+Each sentence carries a stable content-addressed ID (letter ID + text hash)
+and [start, end) offsets into the letter's text_normalized, so downstream
+scores and caches survive re-splitting. The offset index lets consumers
+slice sentences from the letter text directly (see sentence_index.py).
 """
 
 import argparse
+import hashlib
 import json
 import re
 import sys
 from pathlib import Path
 
+from letter_map import add_workers_argument, map_letters
+from record_stream import add_format_argument, write_records
+from sentence_index import assign_sentence_ids, build_offset_index, write_offset_index
+
 # Resolve paths relative to this script's location
 SCRIPT_DIR = Path(__file__).resolve().parent
 DATA_DIR = SCRIPT_DIR.parent / "data"
 INPUT_PATH = DATA_DIR / "normalized-letters.json"
 OUTPUT_PATH = DATA_DIR / "normalized-sentences.json"
+OFFSETS_PATH = DATA_DIR / "normalized-sentence-offsets.json"
 
 # Abbreviations that should NOT trigger sentence breaks.
 ABBREVIATIONS = {
@@ -63,36 +75,75 @@ def _is_abbreviation_boundary(text: str, match: re.Match) -> bool:
     return False
 
 
+_PARAGRAPH_BREAK_RE = re.compile(r"\n\n+")
+_TOKEN_RE = re.compile(r"\S+")
+
+
 def split_sentences(text: str) -> list[str]:
     """Split text into sentences using rule-based approach."""
+    return [sent for _, _, sent in split_sentence_spans(text)]
+
+
+def split_sentence_spans(text: str) -> list[tuple[int, int, str]]:
+    """Split text into sentences, returning (start, end, sentence) tuples.
+
+    start/end are offsets into the original text; the sentence string has
+    its internal whitespace collapsed to single spaces.
+    """
     # Step 1: split into paragraphs on double-newline
-    paragraphs = re.split(r"\n\n+", text)
+    bounds = []
+    para_start = 0
+    for brk in _PARAGRAPH_BREAK_RE.finditer(text):
+        bounds.append((para_start, brk.start()))
+        para_start = brk.end()
+    bounds.append((para_start, len(text)))
 
-    all_sentences = []
-    for para in paragraphs:
-        # Normalize internal whitespace (newlines within a paragraph become spaces)
-        para = re.sub(r"\s+", " ", para).strip()
+    result = []
+    for para_start, para_end in bounds:
+        # Normalize internal whitespace (newlines within a paragraph become
+        # spaces), remembering where each character came from
+        para, origin = _collapse_whitespace(text, para_start, para_end)
         if not para:
             continue
 
         # Step 2: split paragraph into sentences
-        # Use the regex to find split points
-        sentences = _split_paragraph(para)
-        all_sentences.extend(sentences)
-
-    # Step 3: strip whitespace, filter short/empty
-    result = []
-    for s in all_sentences:
-        s = s.strip()
-        if len(s) >= 3:
-            result.append(s)
+        for start, end in _split_paragraph(para):
+            # Step 3: filter short/empty
+            if end - start >= 3:
+                result.append((origin[start], origin[end - 1] + 1, para[start:end]))
 
     return result
 
 
-def _split_paragraph(text: str) -> list[str]:
-    """Split a single paragraph into sentences."""
-    sentences = []
+def _collapse_whitespace(text: str, start: int, end: int) -> tuple[str, list[int]]:
+    """Collapse whitespace runs in text[start:end] to single spaces.
+
+    Returns the collapsed string and, for each of its characters, the
+    offset of the corresponding character in the original text.
+    """
+    parts = []
+    origin: list[int] = []
+    for tok in _TOKEN_RE.finditer(text, start, end):
+        if parts:
+            parts.append(" ")
+            origin.append(tok.start() - 1)
+        parts.append(tok.group())
+        origin.extend(range(tok.start(), tok.end()))
+    return "".join(parts), origin
+
+
+def _strip_span(text: str, start: int, end: int) -> tuple[int, int]:
+    """Shrink [start, end) so text[start:end] has no surrounding whitespace."""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _split_paragraph(text: str) -> list[tuple[int, int]]:
+    """Split a single paragraph into sentence spans."""
+    spans = []
     last_end = 0
 
     for match in _BOUNDARY_RE.finditer(text):
@@ -100,17 +151,17 @@ def _split_paragraph(text: str) -> list[str]:
             continue
         # Split point is right after the punctuation mark
         split_pos = match.start(1) + 1
-        segment = text[last_end:split_pos].strip()
-        if segment:
-            sentences.append(segment)
+        start, end = _strip_span(text, last_end, split_pos)
+        if start < end:
+            spans.append((start, end))
         last_end = split_pos
 
     # Remaining text after the last split
-    tail = text[last_end:].strip()
-    if tail:
-        sentences.append(tail)
+    start, end = _strip_span(text, last_end, len(text))
+    if start < end:
+        spans.append((start, end))
 
-    return sentences
+    return spans
 
 
 # --- Formulaic detection ---
@@ -144,6 +195,25 @@ def is_formulaic(sentence: str) -> bool:
     return False
 
 
+def split_letter(item: tuple[int, str]) -> list[dict]:
+    """Sentence records of one (letter ID, text_normalized)."""
+    letter_id, text = item
+    spans = split_sentence_spans(text)
+    ids = assign_sentence_ids(letter_id, [sent for _, _, sent in spans])
+    return [
+        {
+            "letter_id": letter_id,
+            "index": idx,
+            "sentence_id": sentence_id,
+            "text": sent,
+            "start": start,
+            "end": end,
+            "is_formulaic": is_formulaic(sent),
+        }
+        for idx, ((start, end, sent), sentence_id) in enumerate(zip(spans, ids))
+    ]
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Extract sentences from normalized Danish letters."
@@ -153,32 +223,25 @@ def main():
         action="store_true",
         help="Print statistics but do not write output file.",
     )
+    add_format_argument(parser)
+    add_workers_argument(parser)
     args = parser.parse_args()
 
     # Load input
-    with open(INPUT_PATH, "r", encoding="utf-8") as f:
-        letters = json.load(f)
+    with open(INPUT_PATH, "rb") as f:
+        raw = f.read()
+    source_hash = hashlib.sha256(raw).hexdigest()
+    letters = json.loads(raw)
 
     assert len(letters) > 600, (
         f"Expected more than 600 letters, got {len(letters)}"
     )
 
-    # Extract sentences
-    output = []
-    for letter in letters:
-        letter_id = letter["id"]
-        text = letter.get("text_normalized", "")
-        if not text:
-            continue
-
-        sentences = split_sentences(text)
-        for idx, sent in enumerate(sentences):
-            output.append({
-                "letter_id": letter_id,
-                "index": idx,
-                "text": sent,
-                "is_formulaic": is_formulaic(sent),
-            })
+    # Extract sentences, one letter per map call, concatenated in letter order
+    items = [(letter["id"], letter["text_normalized"]) for letter in letters if letter.get("text_normalized", "")]
+    mapped = map_letters(split_letter, items, workers=args.workers, key=lambda item: item[0], desc="Splitting")
+    mapped.exit_on_failure()
+    output = [sentence for sentences in mapped.values() for sentence in sentences]
 
     # Compute statistics
     total_letters = len(letters)
@@ -200,10 +263,12 @@ def main():
         return
 
     # Write output
-    with open(OUTPUT_PATH, "w", encoding="utf-8") as f:
-        json.dump(output, f, ensure_ascii=False, indent=2)
+    written = write_records(str(OUTPUT_PATH), output, args.format)
+
+    write_offset_index(OFFSETS_PATH, build_offset_index(output, source_hash))
 
-    print(f"\nOutput written to {OUTPUT_PATH}")
+    print(f"\nOutput written to {written}")
+    print(f"Offset index written to {OFFSETS_PATH}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,50 @@
+"""
+Exclusive locks for the caches that concurrent pipeline stages rebuild.
+
+Several stages share a cache that any of them may rebuild on first use
+(the corpus store, the mention index, the alias-resolver cache). A
+rebuild checks freshness, takes the cache's lock, checks again and only
+then builds, so concurrent stages build once and never interleave their
+writes:
+
+    with file_lock(MENTION_INDEX):
+        index = MentionIndex.load()
+        if index is None or not index.is_current():
+            ...
+
+The lock is a flock() on a hidden ``.<name>.lock`` sibling; on systems
+without fcntl it does nothing. Writers still write to a per-process temp
+name (tmp_path()) and rename it into place, so readers that don't lock
+never see half a file.
+"""
+
+import contextlib
+import os
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+def tmp_path(path: Path, suffix: str = "") -> Path:
+    """A hidden per-process sibling of path to write before os.replace()."""
+    path = Path(path)
+    return path.with_name(f".{path.name}.{os.getpid()}.tmp{suffix}")
+
+
+@contextlib.contextmanager
+def file_lock(path: Path):
+    """Hold the exclusive lock for path (a file or directory)."""
+    path = Path(path)
+    if fcntl is None:
+        yield
+        return
+    lock = path / ".lock" if path.is_dir() else path.with_name(f".{path.name}.lock")
+    with open(lock, "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
@@ -20,6 +20,8 @@ import sys
 import warnings
 from pathlib import Path
 
+from model_store import load_spacy_model
+
 warnings.filterwarnings("ignore", category=UserWarning)
 
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8")
@@ -217,8 +219,7 @@ def main() -> None:
 
     # Load DaCy
     print(f"Loading DaCy model '{args.model}'...")
-    import dacy
-    nlp = dacy.load(args.model)
+    nlp = load_spacy_model(args.model)
     print(f"Model loaded: {nlp.pipe_names}")
 
     # Analyze
@@ -0,0 +1,77 @@
+"""
+Content hashes for skip logic (ADR-029) and the pipeline runner.
+
+The ML stages record the SHA-256 of their inputs and of their own script in
+a *-meta.json file next to their output, and skip when nothing changed:
+
+    from fingerprint import file_hash, meta_is_current
+
+    current = {"sentences_hash": file_hash(sentences_path),
+               "script_hash": file_hash(__file__)}
+    if not args.force and meta_is_current(meta_path, current):
+        ...
+
+HashCache does the same for scripts/pipeline.py across every stage. It
+remembers each hash under the file's (size, mtime) so unchanged files,
+including the 300 MB image tree, are not re-read on every run.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+CHUNK_SIZE = 1 << 20
+
+# Hash recorded for a path that does not exist
+MISSING = "missing"
+
+
+def file_hash(path) -> str:
+    """SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def meta_is_current(meta_path, current: dict) -> bool:
+    """True if the meta file records every key/value in ``current``."""
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, "r", encoding="utf-8") as f:
+        existing = json.load(f)
+    return all(existing.get(k) == v for k, v in current.items())
+
+
+class HashCache:
+    """File and directory hashes, reused while a file's size and mtime are unchanged."""
+
+    def __init__(self, entries: dict | None = None):
+        self.entries = entries or {}  # path -> [size, mtime_ns, sha256]
+        self.hashed = 0  # files actually read this session
+
+    def file(self, path: Path) -> str:
+        try:
+            st = path.stat()
+        except FileNotFoundError:
+            return MISSING
+        key = str(path)
+        cached = self.entries.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            return cached[2]
+        digest = file_hash(path)
+        self.entries[key] = [st.st_size, st.st_mtime_ns, digest]
+        self.hashed += 1
+        return digest
+
+    def path(self, path: Path) -> str:
+        """Hash of a file, or of a directory's relative paths and file hashes."""
+        if not path.is_dir():
+            return self.file(path)
+        digest = hashlib.sha256()
+        for child in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(child.relative_to(path).as_posix().encode("utf-8"))
+            digest.update(self.file(child).encode("ascii"))
+        return digest.hexdigest()
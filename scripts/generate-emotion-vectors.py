@@ -44,6 +44,8 @@ import sys
 import numpy as np
 import pandas as pd
 
+from model_worker import sentence_encoder
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -321,11 +323,9 @@ def main() -> None:
     # Load GoEmotions
     all_texts, all_labels = load_goemotions()
 
-    # Load embedding model
-    from sentence_transformers import SentenceTransformer
-
-    print(f"\nLoading model {MODEL_NAME}...")
-    model = SentenceTransformer(MODEL_NAME)
+    # Load embedding model (or use the model worker's)
+    print()
+    model = sentence_encoder(MODEL_NAME)
 
     # Process each emotion
     vectors: dict[str, np.ndarray] = {}
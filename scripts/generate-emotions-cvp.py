@@ -7,6 +7,11 @@ Algorithm:
   3. score = embedding dot concept_vector_normalized (for each emotion)
   4. Aggregate per letter: mean, p10, p90 (excluding formulaic sentences)
 
+Over the soft memory limit (--memory-limit, $PIPELINE_MEMORY_LIMIT_MB)
+once the sentences are loaded, steps 2-3 run STREAM_CHUNK sentences at a
+time and the sentence records are written as they are scored, so neither
+the embeddings nor the records are held for the whole corpus.
+
 Inputs:
   data/cvp-fear-vector.csv             768-dim concept vector
   data/cvp-grief-vector.csv            768-dim concept vector
@@ -27,16 +32,23 @@ Outputs:
 """
 
 import argparse
-import hashlib
 import json
 import os
 import sys
+from array import array
 from collections import defaultdict
 from datetime import datetime, timezone
 
 import numpy as np
 import pandas as pd
 
+from fingerprint import file_hash, meta_is_current
+from model_worker import sentence_encoder
+from profiling import add_memory_limit_argument, memory_limit_mb, over_memory_limit, phase
+from record_stream import (
+    add_format_argument, iter_records, resolve_records_path, write_records,
+)
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -47,6 +59,9 @@ MODEL_NAME = "paraphrase-multilingual-mpnet-base-v2"
 
 EMOTIONS = ["fear", "grief", "hope", "love", "anger", "gratitude", "pride", "remorse", "relief", "desire"]
 
+# Sentences embedded at a time when streaming (a multiple of the batch size)
+STREAM_CHUNK = 2048
+
 
 def resolve(path: str) -> str:
     return os.path.normpath(os.path.join(DATA_DIR, path))
@@ -56,10 +71,6 @@ def resolve(path: str) -> str:
 # Skip logic (ADR-029)
 # ---------------------------------------------------------------------------
 
-def compute_file_hash(path: str) -> str:
-    return hashlib.sha256(open(path, "rb").read()).hexdigest()
-
-
 def should_skip(
     sentences_path: str,
     vector_paths: dict[str, str],
@@ -67,17 +78,13 @@ def should_skip(
 ) -> bool:
     """Check if outputs are up-to-date based on input hashes."""
     current = {
-        "sentences_hash": compute_file_hash(sentences_path),
-        "script_hash": compute_file_hash(__file__),
+        "sentences_hash": file_hash(sentences_path),
+        "script_hash": file_hash(__file__),
     }
     for emotion, vpath in sorted(vector_paths.items()):
-        current[f"vector_hash_{emotion}"] = compute_file_hash(vpath)
+        current[f"vector_hash_{emotion}"] = file_hash(vpath)
 
-    if not os.path.exists(meta_path):
-        return False
-    with open(meta_path, "r", encoding="utf-8") as f:
-        existing = json.load(f)
-    return all(existing.get(k) == v for k, v in current.items())
+    return meta_is_current(meta_path, current)
 
 
 # ---------------------------------------------------------------------------
@@ -108,19 +115,14 @@ def load_concept_vectors(emotions: list[str]) -> dict[str, np.ndarray]:
 
 
 def load_sentences(path: str) -> list[dict]:
-    with open(path, "r", encoding="utf-8") as f:
-        sentences = json.load(f)
+    sentences = list(iter_records(path))
     assert len(sentences) >= 5000, (
         f"Expected >= 5000 sentences, got {len(sentences)}"
     )
     return sentences
 
 
-def embed_sentences(texts: list[str]) -> np.ndarray:
-    from sentence_transformers import SentenceTransformer
-
-    print(f"Loading model {MODEL_NAME}...")
-    model = SentenceTransformer(MODEL_NAME)
+def embed_sentences(model, texts: list[str]) -> np.ndarray:
     print(f"Embedding {len(texts)} sentences...")
     embeddings = model.encode(texts, batch_size=32, show_progress_bar=True)
     return embeddings.astype(np.float32)
@@ -139,32 +141,87 @@ def score_sentences(
     return {e: scores_matrix[:, i] for i, e in enumerate(emotion_names)}
 
 
-def aggregate_letter_scores(
-    sentence_records: list[dict], emotions: list[str]
-) -> dict:
+def build_sentence_records(
+    sentences: list[dict], emotion_scores: dict[str, np.ndarray]
+):
+    """Yield the per-sentence output records."""
+    for i, sent in enumerate(sentences):
+        record = {
+            "letter_id": sent["letter_id"],
+            "index": sent["index"],
+            "sentence_id": sent["sentence_id"],
+            "text": sent["text"],
+            "is_formulaic": sent["is_formulaic"],
+        }
+        for emotion in EMOTIONS:
+            record[emotion] = round(float(emotion_scores[emotion][i]), 4)
+        yield record
+
+
+def stream_sentence_records(
+    model, sentences: list[dict], vectors: dict[str, np.ndarray], chunk_size: int = STREAM_CHUNK
+):
+    """Embed with model, score and yield the records chunk_size sentences at a time."""
+    for start in range(0, len(sentences), chunk_size):
+        chunk = sentences[start:start + chunk_size]
+        emotion_scores = score_sentences(embed_sentences(model, [s["text"] for s in chunk]), vectors)
+        yield from build_sentence_records(chunk, emotion_scores)
+
+
+class SentenceScores:
+    """The columns of the sentence records that aggregation and the summary use.
+
+    Compact (no text), so the streaming path can keep them for the whole
+    corpus while the records themselves are written out.
+    """
+
+    def __init__(self, emotions: list[str]):
+        self.emotions = emotions
+        self.letter_ids = array("q")
+        self.formulaic = array("b")
+        self.values = array("d")
+
+    def __len__(self) -> int:
+        return len(self.letter_ids)
+
+    def collect(self, records):
+        """Yield the records, keeping their scores."""
+        for rec in records:
+            self.letter_ids.append(rec["letter_id"])
+            self.formulaic.append(rec["is_formulaic"])
+            self.values.extend(rec[emotion] for emotion in self.emotions)
+            yield rec
+
+    def matrix(self) -> np.ndarray:
+        """(num_sentences, num_emotions) scores, in record order."""
+        return np.frombuffer(self.values, dtype=np.float64).reshape(-1, len(self.emotions))
+
+
+def aggregate_letter_scores(scores: SentenceScores) -> dict:
     """Aggregate per-sentence scores to per-letter statistics."""
-    by_letter: dict[int, list[dict]] = defaultdict(list)
-    for rec in sentence_records:
-        by_letter[rec["letter_id"]].append(rec)
+    by_letter: dict[int, list[int]] = defaultdict(list)
+    for row, letter_id in enumerate(scores.letter_ids):
+        by_letter[letter_id].append(row)
 
     assert len(by_letter) >= 600, (
         f"Expected >= 600 letters, got {len(by_letter)}"
     )
 
+    matrix = scores.matrix()
     result = {}
-    for letter_id, sents in sorted(by_letter.items()):
-        substantive = [s for s in sents if not s["is_formulaic"]]
+    for letter_id, rows in sorted(by_letter.items()):
+        substantive = [r for r in rows if not scores.formulaic[r]]
         # Fall back to all sentences if every sentence is formulaic
-        pool = substantive if substantive else sents
+        pool = matrix[substantive if substantive else rows]
 
         entry = {}
-        for emotion in emotions:
-            scores = np.array([s[emotion] for s in pool])
-            entry[f"{emotion}_mean"] = round(float(np.mean(scores)), 4)
-            entry[f"{emotion}_p10"] = round(float(np.percentile(scores, 10)), 4)
-            entry[f"{emotion}_p90"] = round(float(np.percentile(scores, 90)), 4)
+        for j, emotion in enumerate(scores.emotions):
+            column = pool[:, j]
+            entry[f"{emotion}_mean"] = round(float(np.mean(column)), 4)
+            entry[f"{emotion}_p10"] = round(float(np.percentile(column, 10)), 4)
+            entry[f"{emotion}_p90"] = round(float(np.percentile(column, 90)), 4)
 
-        entry["sentence_count"] = len(sents)
+        entry["sentence_count"] = len(rows)
         entry["sentence_count_substantive"] = len(substantive)
 
         result[str(letter_id)] = entry
@@ -172,22 +229,19 @@ def aggregate_letter_scores(
     return result
 
 
-def print_summary(
-    sentence_records: list[dict],
-    letter_scores: dict,
-    emotions: list[str],
-) -> None:
+def print_summary(scores: SentenceScores, letter_scores: dict) -> None:
     print("\n--- Summary ---")
-    print(f"  Sentences:  {len(sentence_records)}")
+    print(f"  Sentences:  {len(scores)}")
     print(f"  Letters:    {len(letter_scores)}")
 
-    for emotion in emotions:
-        scores = np.array([r[emotion] for r in sentence_records])
+    matrix = scores.matrix()
+    for j, emotion in enumerate(scores.emotions):
+        column = matrix[:, j]
         print(f"\n  {emotion}:")
-        print(f"    Mean:  {scores.mean():.4f}")
-        print(f"    Std:   {scores.std():.4f}")
-        print(f"    Min:   {scores.min():.4f}")
-        print(f"    Max:   {scores.max():.4f}")
+        print(f"    Mean:  {column.mean():.4f}")
+        print(f"    Std:   {column.std():.4f}")
+        print(f"    Min:   {column.min():.4f}")
+        print(f"    Max:   {column.max():.4f}")
 
         # Most extreme letters
         sorted_letters = sorted(
@@ -218,9 +272,12 @@ def main() -> None:
         "--dry-run", action="store_true",
         help="Compute and print stats but do not write output",
     )
+    add_format_argument(parser)
+    add_memory_limit_argument(parser)
     args = parser.parse_args()
+    memory_limit = memory_limit_mb(args.memory_limit)
 
-    sentences_path = resolve("normalized-sentences.json")
+    sentences_path = resolve_records_path(resolve("normalized-sentences.json"))
     meta_path = resolve("emotion-meta.json")
     sentence_out = resolve("cvp-emotion-sentence-scores.json")
     letter_out = resolve("cvp-emotion-scores.json")
@@ -240,34 +297,38 @@ def main() -> None:
         print("Emotion scores up to date, skipping.")
         sys.exit(0)
 
-    # Load sentences
-    sentences = load_sentences(sentences_path)
-    texts = [s["text"] for s in sentences]
-
-    # Embed
-    embeddings = embed_sentences(texts)
-
-    # Score
-    emotion_scores = score_sentences(embeddings, vectors)
-
-    # Build per-sentence output
-    sentence_records = []
-    for i, sent in enumerate(sentences):
-        record = {
-            "letter_id": sent["letter_id"],
-            "index": sent["index"],
-            "text": sent["text"],
-            "is_formulaic": sent["is_formulaic"],
-        }
-        for emotion in EMOTIONS:
-            record[emotion] = round(float(emotion_scores[emotion][i]), 4)
-        sentence_records.append(record)
+    # Load sentences and the model
+    with phase("load"):
+        sentences = load_sentences(sentences_path)
+        model = sentence_encoder(MODEL_NAME)
+
+    # Embed and score: the whole corpus at once, or, over the soft memory
+    # limit, chunk by chunk while the sentence records are written
+    scores = SentenceScores(EMOTIONS)
+    streaming = over_memory_limit(memory_limit)
+    if streaming:
+        print(f"Over the {memory_limit:g} MB soft memory limit: "
+              f"streaming {STREAM_CHUNK} sentences at a time")
+        with phase("compute"):
+            records = scores.collect(stream_sentence_records(model, sentences, vectors))
+            if args.dry_run:
+                for _ in records:
+                    pass
+            else:
+                sentence_out = write_records(sentence_out, records, args.format)
+    else:
+        with phase("compute"):
+            embeddings = embed_sentences(model, [s["text"] for s in sentences])
+            emotion_scores = score_sentences(embeddings, vectors)
+            sentence_records = list(scores.collect(build_sentence_records(sentences, emotion_scores)))
+            del embeddings, emotion_scores
 
     # Aggregate per letter
-    letter_scores = aggregate_letter_scores(sentence_records, EMOTIONS)
+    with phase("aggregate"):
+        letter_scores = aggregate_letter_scores(scores)
 
     # Summary
-    print_summary(sentence_records, letter_scores, EMOTIONS)
+    print_summary(scores, letter_scores)
 
     if args.dry_run:
         print("Dry run -- no files written.")
@@ -275,24 +336,25 @@ def main() -> None:
 
     # Write outputs
     print("Writing output...")
-    with open(sentence_out, "w", encoding="utf-8") as f:
-        json.dump(sentence_records, f, ensure_ascii=False, indent=2)
+    with phase("write"):
+        if not streaming:
+            sentence_out = write_records(sentence_out, sentence_records, args.format)
 
-    with open(letter_out, "w", encoding="utf-8") as f:
-        json.dump(letter_scores, f, ensure_ascii=False, indent=2)
+        with open(letter_out, "w", encoding="utf-8") as f:
+            json.dump(letter_scores, f, ensure_ascii=False, indent=2)
 
     # Write skip-logic meta
     meta = {
         "generated": datetime.now(timezone.utc).isoformat(),
-        "sentences_hash": compute_file_hash(sentences_path),
-        "script_hash": compute_file_hash(__file__),
+        "sentences_hash": file_hash(sentences_path),
+        "script_hash": file_hash(__file__),
         "model": MODEL_NAME,
         "emotions": EMOTIONS,
         "letter_count": len(letter_scores),
-        "sentence_count": len(sentence_records),
+        "sentence_count": len(scores),
     }
     for emotion in EMOTIONS:
-        meta[f"vector_hash_{emotion}"] = compute_file_hash(
+        meta[f"vector_hash_{emotion}"] = file_hash(
             resolve(f"cvp-{emotion}-vector.csv")
         )
     with open(meta_path, "w", encoding="utf-8") as f:
@@ -33,6 +33,9 @@ from collections import defaultdict
 import numpy as np
 import pandas as pd
 
+from corpus import load_corpus
+from record_stream import iter_records, records_at, records_exist
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -99,27 +102,35 @@ def load_seeds(path: str) -> dict:
     return {"danish_pole": danish, "german_pole": german, "excluded": excluded}
 
 
-def load_sentences(path: str) -> list[dict]:
-    """Load sentence records from cvp-sentence-scores.json."""
-    with open(path, "r", encoding="utf-8") as f:
-        sentences = json.load(f)
-    return sentences
+def scan_sentences(
+    path: str, wanted: set[tuple[int, str]]
+) -> tuple[np.ndarray, dict[tuple[int, str], list[int]]]:
+    """Stream sentence records from cvp-sentence-scores.json.
+
+    Returns the letter ID of every sentence (aligned with the embedding
+    rows) and the embedding indices of each wanted (letter_id, text) key.
+    Sentence texts are not kept, so the records can be streamed.
+    """
+    letter_ids = []
+    positions: dict[tuple[int, str], list[int]] = defaultdict(list)
+    for i, sent in enumerate(iter_records(path)):
+        letter_ids.append(sent["letter_id"])
+        key = (sent["letter_id"], sent["text"])
+        if key in wanted:
+            positions[key].append(i)
+    return np.array(letter_ids, dtype=np.int32), positions
 
 
 def match_seeds_to_indices(
-    seeds: list[dict], sentences: list[dict]
+    seeds: list[dict], positions: dict[tuple[int, str], list[int]]
 ) -> list[int]:
     """Match each seed to its embedding index by letter_id and text."""
-    lookup: dict[tuple[int, str], int] = {}
-    for i, sent in enumerate(sentences):
-        lookup[(sent["letter_id"], sent["text"])] = i
-
     indices = []
     unmatched = []
     for seed in seeds:
-        idx = lookup.get((seed["letter_id"], seed["text"]))
-        if idx is not None:
-            indices.append(idx)
+        found = positions.get((seed["letter_id"], seed["text"]))
+        if found:
+            indices.append(found[-1])
         else:
             unmatched.append(seed)
 
@@ -212,12 +223,12 @@ def score_all_sentences(
 
 
 def aggregate_letter_scores(
-    sentences: list[dict], scores: np.ndarray
+    letter_ids: np.ndarray, scores: np.ndarray
 ) -> dict:
     """Aggregate per-sentence identity scores to per-letter statistics."""
     by_letter: dict[int, list[float]] = defaultdict(list)
-    for i, sent in enumerate(sentences):
-        by_letter[sent["letter_id"]].append(float(scores[i]))
+    for i, letter_id in enumerate(letter_ids.tolist()):
+        by_letter[letter_id].append(float(scores[i]))
 
     result = {}
     for letter_id, letter_scores in sorted(by_letter.items()):
@@ -235,18 +246,14 @@ def aggregate_letter_scores(
 # Temporal analysis
 # ---------------------------------------------------------------------------
 
-def load_letter_dates(path: str) -> dict[int, str]:
-    """Load letter dates from letters.csv.  Returns {letter_id: "YYYY"}."""
-    import csv as csv_mod
-    dates: dict[int, str] = {}
-    with open(path, "r", encoding="utf-8") as f:
-        reader = csv_mod.DictReader(f)
-        for row in reader:
-            lid = int(row["id"])
-            date_str = row.get("date", "")
-            if date_str:
-                dates[lid] = date_str[:4]
-    return dates
+def load_letter_dates() -> dict[int, str]:
+    """Load letter years from the corpus store.  Returns {letter_id: "YYYY"}."""
+    corpus = load_corpus()
+    return {
+        lid: date_str[:4]
+        for lid, date_str in zip(corpus.ids.tolist(), corpus.date_strings())
+        if date_str
+    }
 
 
 def print_temporal_analysis(
@@ -312,10 +319,14 @@ def print_seed_statistics(
 
 
 def print_extreme_sentences(
-    sentences: list[dict], scores: np.ndarray, n: int = 10
+    sentences_path: str, scores: np.ndarray, n: int = 10
 ) -> None:
     """Print top N most Danish-leaning and German-leaning sentences."""
     sorted_indices = np.argsort(scores)
+    sentences = records_at(
+        sentences_path,
+        [int(i) for i in sorted_indices[-n:]] + [int(i) for i in sorted_indices[:n]],
+    )
 
     print(f"\n--- Top {n} Most Danish-Leaning Sentences ---")
     for idx in sorted_indices[-n:][::-1]:
@@ -371,7 +382,7 @@ def main() -> None:
         ("Sentence scores", sentences_path),
         ("Letters", letters_path),
     ]:
-        if not os.path.exists(path):
+        if not records_exist(path):
             print(f"Error: {label} not found at {path}", file=sys.stderr)
             sys.exit(1)
 
@@ -389,22 +400,26 @@ def main() -> None:
     embeddings = np.load(embeddings_path).astype(np.float32)
     print(f"  Shape: {embeddings.shape}")
 
-    print("\nLoading sentence records...")
-    sentences = load_sentences(sentences_path)
-    print(f"  Loaded {len(sentences)} sentences")
+    print("\nScanning sentence records...")
+    wanted = {
+        (seed["letter_id"], seed["text"])
+        for seed in danish_seeds + german_seeds + excluded_seeds
+    }
+    letter_ids, positions = scan_sentences(sentences_path, wanted)
+    print(f"  Scanned {len(letter_ids)} sentences")
 
-    assert embeddings.shape[0] == len(sentences), (
+    assert embeddings.shape[0] == len(letter_ids), (
         f"Embedding count ({embeddings.shape[0]}) does not match "
-        f"sentence count ({len(sentences)})"
+        f"sentence count ({len(letter_ids)})"
     )
 
     # --- 2. Match seeds to embedding indices ---
     print("\nMatching Danish-pole seeds to embeddings...")
-    danish_indices = match_seeds_to_indices(danish_seeds, sentences)
+    danish_indices = match_seeds_to_indices(danish_seeds, positions)
     print(f"  Matched {len(danish_indices)} Danish-pole seeds")
 
     print("\nMatching German-pole seeds to embeddings...")
-    german_indices = match_seeds_to_indices(german_seeds, sentences)
+    german_indices = match_seeds_to_indices(german_seeds, positions)
     print(f"  Matched {len(german_indices)} German-pole seeds")
 
     # --- 3. Compute identity concept vector ---
@@ -440,27 +455,21 @@ def main() -> None:
     # Excluded (tension) sentences
     if excluded_seeds:
         print("\n--- Excluded (Tension) Sentence Scores ---")
-        excluded_indices = []
         for seed in excluded_seeds:
-            key = (seed["letter_id"], seed["text"])
-            for i, sent in enumerate(sentences):
-                if sent["letter_id"] == key[0] and sent["text"] == key[1]:
-                    excluded_indices.append(i)
-                    break
-        for idx in excluded_indices:
-            sent = sentences[idx]
-            print(f"  {scores[idx]:+.4f}  [letter {sent['letter_id']}] "
-                  f"{sent['text'][:100]}")
+            found = positions.get((seed["letter_id"], seed["text"]))
+            if found:
+                print(f"  {scores[found[0]]:+.4f}  [letter {seed['letter_id']}] "
+                      f"{seed['text'][:100]}")
 
     # Top extreme sentences from full corpus
-    print_extreme_sentences(sentences, scores)
+    print_extreme_sentences(sentences_path, scores)
 
     # Aggregate per letter
-    letter_scores = aggregate_letter_scores(sentences, scores)
+    letter_scores = aggregate_letter_scores(letter_ids, scores)
     print(f"\n  Aggregated scores for {len(letter_scores)} letters")
 
     # Temporal analysis
-    letter_dates = load_letter_dates(letters_path)
+    letter_dates = load_letter_dates()
     print_temporal_analysis(letter_scores, letter_dates)
 
     # --- 7. Write outputs ---
@@ -17,7 +17,6 @@ Outputs:
 """
 
 import argparse
-import hashlib
 import json
 import os
 import sys
@@ -26,6 +25,12 @@ from datetime import datetime, timezone
 import numpy as np
 import pandas as pd
 
+from fingerprint import file_hash, meta_is_current
+from model_worker import sentence_encoder
+from record_stream import (
+    add_format_argument, iter_records, resolve_records_path, write_records,
+)
+
 # ---------------------------------------------------------------------------
 # Paths
 # ---------------------------------------------------------------------------
@@ -43,21 +48,13 @@ def resolve(path: str) -> str:
 # Skip logic (ADR-029)
 # ---------------------------------------------------------------------------
 
-def compute_file_hash(path: str) -> str:
-    return hashlib.sha256(open(path, "rb").read()).hexdigest()
-
-
 def should_skip(sentences_path: str, vector_path: str, meta_path: str) -> bool:
     current = {
-        "sentences_hash": compute_file_hash(sentences_path),
-        "vector_hash": compute_file_hash(vector_path),
-        "script_hash": compute_file_hash(__file__),
+        "sentences_hash": file_hash(sentences_path),
+        "vector_hash": file_hash(vector_path),
+        "script_hash": file_hash(__file__),
     }
-    if not os.path.exists(meta_path):
-        return False
-    with open(meta_path, "r", encoding="utf-8") as f:
-        existing = json.load(f)
-    return all(existing.get(k) == v for k, v in current.items())
+    return meta_is_current(meta_path, current)
 
 
 # ---------------------------------------------------------------------------
@@ -73,8 +70,7 @@ def load_concept_vector(path: str) -> np.ndarray:
 
 
 def load_sentences(path: str) -> list[dict]:
-    with open(path, "r", encoding="utf-8") as f:
-        sentences = json.load(f)
+    sentences = list(iter_records(path))
     assert len(sentences) >= 5000, (
         f"Expected >= 5000 sentences, got {len(sentences)}"
     )
@@ -82,10 +78,7 @@ def load_sentences(path: str) -> list[dict]:
 
 
 def embed_sentences(texts: list[str]) -> np.ndarray:
-    from sentence_transformers import SentenceTransformer
-
-    print(f"Loading model {MODEL_NAME}...")
-    model = SentenceTransformer(MODEL_NAME)
+    model = sentence_encoder(MODEL_NAME)
     print(f"Embedding {len(texts)} sentences...")
     embeddings = model.encode(texts, batch_size=32, show_progress_bar=True)
     return embeddings.astype(np.float32)
@@ -171,9 +164,10 @@ def main() -> None:
         action="store_true",
         help="Compute and print stats but do not write output",
     )
+    add_format_argument(parser)
     args = parser.parse_args()
 
-    sentences_path = resolve("normalized-sentences.json")
+    sentences_path = resolve_records_path(resolve("normalized-sentences.json"))
     vector_path = os.path.abspath(args.concept_vector)
     meta_path = resolve("sentiment-meta.json")
     sentence_out = resolve("cvp-sentence-scores.json")
@@ -206,6 +200,7 @@ def main() -> None:
             {
                 "letter_id": sent["letter_id"],
                 "index": sent["index"],
+                "sentence_id": sent["sentence_id"],
                 "text": sent["text"],
                 "score": round(float(scores[i]), 4),
                 "is_formulaic": sent["is_formulaic"],
@@ -224,8 +219,7 @@ def main() -> None:
 
     # Write outputs
     print("Writing output...")
-    with open(sentence_out, "w", encoding="utf-8") as f:
-        json.dump(sentence_records, f, ensure_ascii=False, indent=2)
+    sentence_out = write_records(sentence_out, sentence_records, args.format)
 
     with open(letter_out, "w", encoding="utf-8") as f:
         json.dump(letter_scores, f, ensure_ascii=False, indent=2)
@@ -233,9 +227,9 @@ def main() -> None:
     # Write skip-logic meta
     meta = {
         "generated": datetime.now(timezone.utc).isoformat(),
-        "sentences_hash": compute_file_hash(sentences_path),
-        "vector_hash": compute_file_hash(vector_path),
-        "script_hash": compute_file_hash(__file__),
+        "sentences_hash": file_hash(sentences_path),
+        "vector_hash": file_hash(vector_path),
+        "script_hash": file_hash(__file__),
         "model": MODEL_NAME,
         "letter_count": len(letter_scores),
         "sentence_count": len(sentence_records),
@@ -0,0 +1,58 @@
+"""
+Atomic JSON output for the page builders.
+
+The dev site reads data/ and apps/website/public/data while the builders
+(and `rebuild-derived-data.py --watch`) rewrite them. Every file is written
+to a hidden sibling and renamed over the target, so a reader sees the old
+file or the new one, never half of one.
+
+Array outputs can be assembled from per-item text:
+
+    texts = {key: json_item(record) for key, record in records.items()}
+    write_text_atomic(path, json_array(texts[k] for k in order))
+
+which is byte-identical to json.dump(records, f, ensure_ascii=False,
+indent=2), so an incremental rebuild only re-serialises the items that
+changed.
+"""
+
+import json
+import os
+import shutil
+from pathlib import Path
+
+from file_lock import tmp_path
+
+
+def write_text_atomic(path: Path, text: str) -> None:
+    path = Path(path)
+    tmp = tmp_path(path)
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def write_json_atomic(path: Path, obj, **dump_kwargs) -> None:
+    """json.dump(obj) to path, atomically. dump_kwargs as for json.dump."""
+    write_text_atomic(path, json.dumps(obj, **dump_kwargs))
+
+
+def copy_atomic(src: Path, dst: Path) -> None:
+    """shutil.copy2, atomically."""
+    dst = Path(dst)
+    tmp = tmp_path(dst)
+    shutil.copy2(src, tmp)
+    os.replace(tmp, dst)
+
+
+def json_item(obj) -> str:
+    """obj as it appears inside an indent=2 JSON array."""
+    return "  " + json.dumps(obj, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+
+
+def json_array(item_texts) -> str:
+    """An indent=2 JSON array from json_item() texts."""
+    items = list(item_texts)
+    if not items:
+        return "[]"
+    return "[\n" + ",\n".join(items) + "\n]"
@@ -0,0 +1,382 @@
+"""
+Letter-to-image associations by place, person and date matching (ADR-046).
+
+build_letter_images() scores every candidate image for every letter and
+writes data/letter-images.json. The inputs it shares with the other page
+builders can be passed in already loaded (see derived_data.py); anything
+not passed is read from data/:
+
+  - data/image-registry.json
+  - data/corrected-letters.json
+  - data/mention-index.npz (entity mentions resolved to person IDs)
+  - data/place-image-lookup.json
+  - data/letter-image-overrides.json (optional)
+
+LetterImages keeps the result in memory, so `rebuild-derived-data.py
+--watch` re-scores only the letters an image registry edit can affect.
+The CLI is scripts/build-letter-images.py.
+"""
+
+import json
+from pathlib import Path
+from collections import defaultdict
+
+from json_output import json_array, json_item, write_text_atomic
+from mention_index import load_mention_index
+from place_resolver import PlaceResolver
+from profiling import counted
+from stage_trace import count_items
+from temporal_index import TemporalIndex, to_ordinal
+
+DATA = Path(__file__).resolve().parent.parent / "data"
+IMAGE_REG = DATA / "image-registry.json"
+LETTERS = DATA / "corrected-letters.json"
+PLACE_LOOKUP = DATA / "place-image-lookup.json"
+OVERRIDES = DATA / "letter-image-overrides.json"
+OUTPUT = DATA / "letter-images.json"
+
+MAX_PER_LETTER = 8
+MIN_SCORE = 0.2
+MAX_MAPS = 2
+MAX_HISTORICAL = 1
+MAX_RECIPIENT = 2  # ADR-050: cap recipient portraits to leave room for contextual images
+
+# Date proximity windows (days) for date_proximity_bonus()
+SAME_MONTH_DAYS = 31
+SAME_QUARTER_DAYS = 92
+SAME_YEAR_DAYS = 365
+
+# Recipient → person-registry ID
+RECIPIENT_MAP = {
+    "Trine Mærsk": "trine",
+    "Mor og far": None,  # Both parents — handled specially
+    "Peter Mærsk": "peter",
+    "Maren Mærsk": "mor",
+}
+
+# Danish reason labels for frontend
+REASON_DA = {
+    "place+person": "Sted og person i brevet",
+    "place": "Fra samme sted",
+    "person": "Person nævnt i brevet",
+    "recipient": "Brevets modtager",
+    "date": "Samme tidsperiode",
+    "context": "Baggrund",
+    "manual": "Udvalgt",
+}
+
+
+def date_proximity_bonus(letter_day, image_day):
+    """Score bonus for date proximity (arguments are ordinal day numbers)."""
+    if letter_day is None or image_day is None:
+        return 0.0
+    delta = abs(letter_day - image_day)
+    if delta <= SAME_MONTH_DAYS:
+        return 0.3   # Same month
+    elif delta <= SAME_QUARTER_DAYS:
+        return 0.2   # Same quarter
+    elif delta <= SAME_YEAR_DAYS:
+        return 0.1   # Same year
+    return 0.0
+
+
+def resolve_letter_persons(letter, mention_index):
+    """Get person IDs mentioned in a letter."""
+    # From NER entities, resolved to the first registry person with that alias
+    persons = set(mention_index.persons_in_letter(letter["id"], match="first"))
+
+    # Always add recipient
+    recipient = letter.get("recipient", "")
+    if recipient == "Mor og far":
+        persons.add("far")
+        persons.add("mor")
+    elif recipient in RECIPIENT_MAP and RECIPIENT_MAP[recipient]:
+        persons.add(RECIPIENT_MAP[recipient])
+
+    return persons
+
+
+@counted
+def score_image(image, letter_place_ids, letter_persons, letter_day, recipient_ids):
+    """Score an image's relevance to a letter. Returns (score, relevance, reason_da)."""
+    img_places = set(image.get("places", []))
+    img_persons = set(image.get("persons", []))
+    img_day = to_ordinal(image.get("date_sort", ""))
+    category = image.get("category", "")
+
+    place_match = bool(letter_place_ids & img_places)
+    person_match = bool(letter_persons & img_persons)
+    recipient_match = bool(recipient_ids & img_persons)
+    date_bonus = date_proximity_bonus(letter_day, img_day)
+
+    # Base scores by match type
+    score = 0.0
+    relevance = "context"
+
+    if place_match and (person_match or recipient_match):
+        score = 0.8 + date_bonus
+        relevance = "place+person"
+    elif place_match:
+        score = 0.7 + date_bonus
+        if category == "place":
+            score += 0.1
+        relevance = "place"
+    elif recipient_match:
+        # Recipient photos — always relevant
+        score = 0.5 + date_bonus
+        relevance = "recipient"
+    elif person_match:
+        score = 0.4 + date_bonus
+        relevance = "person"
+    elif date_bonus >= 0.2:
+        score = 0.1 + date_bonus
+        relevance = "date"
+
+    # Category adjustments
+    if category == "portrait" and not person_match and not recipient_match:
+        score = 0.0  # Portraits only matter if the person is relevant
+    elif category == "map":
+        if place_match:
+            score = min(score, 0.5)  # Maps cap lower
+        elif not place_match:
+            score = 0.0  # Maps without place match are irrelevant
+    elif category == "historical":
+        score = min(score, 0.3)
+    elif category == "document":
+        if not place_match and not person_match:
+            score = 0.0
+
+    # Peter downweight: he's in 78 photos, so matching him alone isn't very discriminating
+    if person_match and not place_match and not recipient_match:
+        matching_persons = letter_persons & img_persons
+        if matching_persons == {"peter"}:
+            score *= 0.1
+
+    # Floor
+    if score < MIN_SCORE:
+        score = 0.0
+
+    reason_da = REASON_DA.get(relevance, "")
+    return round(score, 3), relevance, reason_da
+
+
+class ImageIndex:
+    """Inverted indexes over the image registry (values are registry positions).
+
+    An image can only score above zero for a letter if it shares a place,
+    shares a person (mentioned or recipient), or is dated within
+    SAME_QUARTER_DAYS of the letter (the "date" relevance). candidates()
+    returns exactly those images, so score_image() never sees the rest.
+    """
+
+    def __init__(self, images):
+        self.by_place = defaultdict(list)
+        self.by_person = defaultdict(list)  # covers recipient matches too
+        for pos, img in enumerate(images):
+            for place_id in img.get("places", []):
+                self.by_place[place_id].append(pos)
+            for pid in img.get("persons", []):
+                self.by_person[pid].append(pos)
+        self.by_date = TemporalIndex(
+            range(len(images)), [img.get("date_sort", "") for img in images]
+        )
+        self.category = {}
+        for img in images:
+            self.category.setdefault(img["id"], img["category"])
+
+    def candidates(self, letter_place_ids, person_ids, letter_day):
+        """Registry positions of images that may match, in registry order."""
+        positions = set()
+        for place_id in letter_place_ids:
+            positions.update(self.by_place.get(place_id, ()))
+        for pid in person_ids:
+            positions.update(self.by_person.get(pid, ()))
+        if letter_day is not None:
+            positions.update(self.by_date.within(letter_day, SAME_QUARTER_DAYS))
+        return sorted(positions)
+
+
+def load_json(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def letter_context(letter, place_resolver, mention_index):
+    """(place IDs, mentioned persons, ordinal day, recipient IDs) of a letter."""
+    letter_day = to_ordinal(letter.get("date", ""))
+
+    # Resolve letter place to manifest place IDs
+    letter_place_ids = set()
+    place_name = place_resolver.resolve(letter.get("place", ""))
+    if place_name:
+        letter_place_ids.add(place_resolver.place_id(place_name))
+
+    # Resolve letter persons
+    letter_persons = resolve_letter_persons(letter, mention_index)
+
+    # Determine recipient person IDs for recipient-match scoring
+    recipient = letter.get("recipient", "")
+    recipient_ids = set()
+    if recipient == "Mor og far":
+        recipient_ids = {"far", "mor"}
+    elif recipient in RECIPIENT_MAP and RECIPIENT_MAP[recipient]:
+        recipient_ids.add(RECIPIENT_MAP[recipient])
+
+    return letter_place_ids, letter_persons, letter_day, recipient_ids
+
+
+def associate_images(context, images, image_index, letter_overrides):
+    """The images shown with one letter, best first, within the per-category limits."""
+    letter_place_ids, letter_persons, letter_day, recipient_ids = context
+
+    # Score only the images that can match this letter
+    candidates = []
+    for pos in image_index.candidates(
+        letter_place_ids, letter_persons | recipient_ids, letter_day
+    ):
+        img = images[pos]
+        score, relevance, reason_da = score_image(
+            img, letter_place_ids, letter_persons, letter_day, recipient_ids
+        )
+        if score > 0:
+            candidates.append({
+                "image_id": img["id"],
+                "relevance": relevance,
+                "score": score,
+                "reason_da": reason_da,
+            })
+
+    # Apply manual overrides
+    for ov in letter_overrides:
+        ov["relevance"] = "manual"
+        ov["reason_da"] = REASON_DA["manual"]
+        candidates.append(ov)
+
+    # Sort by score descending
+    candidates.sort(key=lambda x: -x["score"])
+
+    # Apply limits
+    map_count = 0
+    hist_count = 0
+    recipient_count = 0
+    filtered = []
+    for c in candidates:
+        # Look up category from image registry
+        cat = image_index.category.get(c["image_id"], "")
+
+        if c["relevance"] == "recipient":
+            if recipient_count >= MAX_RECIPIENT:
+                continue
+            recipient_count += 1
+        elif cat == "map":
+            if map_count >= MAX_MAPS:
+                continue
+            map_count += 1
+        elif cat == "historical":
+            if hist_count >= MAX_HISTORICAL:
+                continue
+            hist_count += 1
+
+        filtered.append(c)
+        if len(filtered) >= MAX_PER_LETTER:
+            break
+    return filtered
+
+
+class LetterImages:
+    """Every letter's image associations, kept in memory for incremental updates.
+
+    The per-letter contexts (places, persons, date) only depend on the
+    letters and the mention index, so an image registry edit re-scores just
+    the letters the changed images can match (update_images()).
+    """
+
+    def __init__(self, images, letters, mention_index):
+        place_lookup = load_json(PLACE_LOOKUP)
+        # Lookup keys are the places; spelling variants resolve by slug/fold key
+        place_resolver = PlaceResolver([(name, []) for name in place_lookup], place_lookup)
+
+        # Load manual overrides if they exist
+        self.overrides = {}
+        if OVERRIDES.exists():
+            self.overrides = load_json(OVERRIDES)
+
+        self.letter_count = len(letters)
+        self.contexts = {
+            letter["id"]: letter_context(letter, place_resolver, mention_index) for letter in letters
+        }
+        self.entries = {}  # letter ID -> json_item() text, letters with images only
+        self.associations = {}
+        self.set_images(images)
+
+    def _associate(self, letter_id) -> None:
+        filtered = associate_images(
+            self.contexts[letter_id], self.images, self.image_index,
+            self.overrides.get(str(letter_id), []),
+        )
+        if filtered:
+            self.associations[letter_id] = len(filtered)
+            self.entries[letter_id] = json_item({"letter_id": letter_id, "images": filtered})
+        else:
+            self.associations.pop(letter_id, None)
+            self.entries.pop(letter_id, None)
+
+    def set_images(self, images) -> None:
+        """Score every letter against a new image registry."""
+        self.images = images
+        self.image_index = ImageIndex(images)
+        for letter_id in self.contexts:
+            self._associate(letter_id)
+
+    def update_images(self, images, changed) -> list:
+        """Re-score the letters that ``changed`` images (old and new versions) score for.
+
+        A letter's associations only change if a changed image scores above
+        zero for it before or after the edit, or is one of its overrides.
+        The unchanged images must keep their relative order in ``images``.
+        Returns the re-scored letter IDs.
+        """
+        changed_index = ImageIndex(changed)
+        changed_ids = {img["id"] for img in changed}
+        affected = []
+        for letter_id, (place_ids, persons, day, recipient_ids) in self.contexts.items():
+            if any(ov.get("image_id") in changed_ids for ov in self.overrides.get(str(letter_id), [])) or any(
+                score_image(changed[pos], place_ids, persons, day, recipient_ids)[0] > 0
+                for pos in changed_index.candidates(place_ids, persons | recipient_ids, day)
+            ):
+                affected.append(letter_id)
+        self.images = images
+        self.image_index = ImageIndex(images)
+        for letter_id in affected:
+            self._associate(letter_id)
+        return affected
+
+    def write(self) -> None:
+        write_text_atomic(OUTPUT, json_array(self.entries[lid] for lid in self.contexts if lid in self.entries))
+
+    def print_stats(self) -> None:
+        total_associations = sum(self.associations.values())
+        letters_with_images = len(self.associations)
+        print(f"Built letter-image associations:")
+        print(f"  Letters with images: {letters_with_images}/{self.letter_count}")
+        print(f"  Total associations: {total_associations}")
+        print(f"  Avg images/letter: {total_associations/max(letters_with_images,1):.1f}")
+        print(f"Output: {OUTPUT}")
+
+
+def build_letter_images(images=None, letters=None, mention_index=None):
+    """Build and write data/letter-images.json.
+
+    images (image registry) and letters (corrected-letters.json records)
+    are only read, so callers may share them with other builders.
+    """
+    if images is None:
+        images = load_json(IMAGE_REG)
+    if letters is None:
+        letters = load_json(LETTERS)
+    if mention_index is None:
+        mention_index = load_mention_index()
+    result = LetterImages(images, letters, mention_index)
+    result.write()
+    count_items(len(result.contexts), "letters")
+    result.print_stats()
@@ -0,0 +1,243 @@
+"""
+Letter-sharded map executor for the per-letter stages.
+
+apply-corrections.py, audit-text-quality.py (tiers A and B),
+scan-epithets.py, analyze-psycholinguistics.py (the text metrics) and
+extract-sentences-normalized.py each compute something for one letter at
+a time, independently of the other letters, and then combine the results
+in letter order. map_letters() runs the per-letter function over a
+process pool:
+
+    from letter_map import add_workers_argument, map_letters
+
+    result = map_letters(split_letter, letters, workers=args.workers, desc="Splitting")
+    result.exit_on_failure()
+    for sentences in result.values():   # letter order, however the shards finished
+        ...
+
+- Letters are cut into contiguous shards, SHARDS_PER_WORKER per worker, so
+  the pool evens out long and short letters.
+- Results come back in input order. Reducing them gives the same output for
+  any worker count.
+- Failures are per letter. A letter whose function raises is recorded with
+  its ID and traceback, and the other letters still run. A letter that kills
+  its worker process (a crash or OOM kill) breaks the pool. The letters not
+  done yet are then rerun one at a time in a fresh single-worker pool, so the
+  culprit is named and the rest complete. exit_on_failure() reports every
+  failed letter and stops the stage before it writes anything.
+- Progress is printed every 10% of the letters or every PROGRESS_INTERVAL
+  seconds, whichever comes first, once the map has run for QUIET_SECONDS,
+  and a summary line at the end.
+
+The default worker count is $PIPELINE_WORKERS, else the CPU count. The
+pipeline runner sets it for each stage from the job slots and memory left,
+so concurrent stages don't each start a pool the size of the machine.
+
+workers=1 runs in this process, with the same failure handling. A
+``context`` (read-only input such as a lexicon) is sent to each worker
+once, not with every shard; the function is then called as fn(letter, context).
+"""
+
+import math
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable
+
+from profiling import counter_delta, counter_snapshot, merge_counters
+from stage_trace import count_items
+
+SHARDS_PER_WORKER = 4
+PROGRESS_INTERVAL = 5.0  # seconds
+QUIET_SECONDS = 1.0      # no intermediate progress for maps faster than this
+# The pool size the pipeline runner grants a stage (see pipeline.Stage.pool_mb)
+WORKERS_ENV = "PIPELINE_WORKERS"
+
+_NO_CONTEXT = object()
+
+
+@dataclass
+class LetterFailure:
+    index: int
+    key: Any
+    error: str
+    traceback: str = ""
+
+
+@dataclass
+class LetterMap:
+    """Per-letter results of map_letters(), in input order."""
+
+    results: list
+    failures: list[LetterFailure] = field(default_factory=list)
+    seconds: float = 0.0
+
+    def values(self) -> Iterable:
+        """Results of the letters that succeeded, in input order."""
+        failed = {f.index for f in self.failures}
+        return (r for i, r in enumerate(self.results) if i not in failed)
+
+    def report_failures(self) -> None:
+        for f in self.failures:
+            print(f"  Letter {f.key} failed: {f.error}", file=sys.stderr)
+            if f.traceback:
+                print("    " + f.traceback.rstrip().replace("\n", "\n    "), file=sys.stderr)
+
+    def exit_on_failure(self) -> None:
+        """Report every failed letter and exit 1, so no partial output is written."""
+        if self.failures:
+            self.report_failures()
+            print(f"ERROR: {len(self.failures)} of {len(self.results)} letters failed", file=sys.stderr)
+            sys.exit(1)
+
+
+def default_workers() -> int:
+    """$PIPELINE_WORKERS, which the pipeline runner sets per stage, else the CPU count."""
+    return int(os.environ.get(WORKERS_ENV) or os.cpu_count() or 1)
+
+
+def add_workers_argument(parser) -> None:
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=default_workers(),
+        help="Processes for the per-letter work (default: $PIPELINE_WORKERS, "
+             "else CPU count; 1 runs in-process)",
+    )
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+_FN: Callable | None = None
+_CONTEXT: Any = _NO_CONTEXT
+
+
+def _init_worker(fn: Callable, context: Any) -> None:
+    global _FN, _CONTEXT
+    _FN, _CONTEXT = fn, context
+
+
+def _run_one(fn: Callable, letter, context) -> tuple[bool, Any]:
+    try:
+        return True, fn(letter) if context is _NO_CONTEXT else fn(letter, context)
+    except Exception as e:  # isolated to this letter, reported by the parent
+        return False, (f"{type(e).__name__}: {e}", traceback.format_exc())
+
+
+def _run_shard(start: int, letters: list) -> tuple[int, list, dict]:
+    # The worker's hot-helper counts go back with the results (profiling.counted)
+    before = counter_snapshot()
+    outcomes = [_run_one(_FN, letter, _CONTEXT) for letter in letters]
+    return start, outcomes, counter_delta(before)
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+class _Progress:
+    def __init__(self, desc: str, total: int, workers: int):
+        self.desc = desc
+        self.total = total
+        self.workers = workers
+        self.done = 0
+        self.failed = 0
+        self.started = self.last = time.time()
+        self.step = max(1, math.ceil(total / 10))
+        self.next = self.step
+
+    def add(self, outcomes: list) -> None:
+        self.done += len(outcomes)
+        self.failed += sum(1 for ok, _ in outcomes if not ok)
+        now = time.time()
+        quiet = now - self.started < QUIET_SECONDS
+        if self.done < self.total and not quiet and (self.done >= self.next or now - self.last >= PROGRESS_INTERVAL):
+            print(f"  {self.desc}: {self.done}/{self.total} letters, {self.failed} failed "
+                  f"({now - self.started:.1f}s)", flush=True)
+            self.last = now
+            while self.next <= self.done:
+                self.next += self.step
+
+    def finish(self) -> float:
+        seconds = time.time() - self.started
+        print(f"  {self.desc}: {self.done}/{self.total} letters, {self.failed} failed "
+              f"in {seconds:.1f}s (workers={self.workers})", flush=True)
+        return seconds
+
+
+def _default_key(index: int, letter) -> Any:
+    if isinstance(letter, dict) and "id" in letter:
+        return letter["id"]
+    return index
+
+
+def map_letters(fn: Callable, letters: Iterable, *, workers: int | None = None, context: Any = _NO_CONTEXT,
+                key: Callable | None = None, desc: str = "Processing") -> LetterMap:
+    """fn applied to every letter over ``workers`` processes; see the module docstring.
+
+    ``fn`` must be a module-level function and the letters picklable.
+    ``key(letter)`` names a letter in failure reports (default: its "id").
+    """
+    letters = list(letters)
+    total = len(letters)
+    workers = max(1, min(workers or default_workers(), total))
+    progress = _Progress(desc, total, workers)
+    outcomes: list = [None] * total
+
+    if workers == 1:
+        for i, letter in enumerate(letters):
+            outcomes[i] = _run_one(fn, letter, context)
+            progress.add([outcomes[i]])
+    else:
+        size = max(1, math.ceil(total / (workers * SHARDS_PER_WORKER)))
+        try:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(fn, context)) as pool:
+                futures = [pool.submit(_run_shard, s, letters[s:s + size]) for s in range(0, total, size)]
+                for future in as_completed(futures):
+                    start, shard, counts = future.result()
+                    outcomes[start:start + len(shard)] = shard
+                    merge_counters(counts)
+                    progress.add(shard)
+        except BrokenProcessPool:
+            remaining = [i for i, o in enumerate(outcomes) if o is None]
+            print(f"  {desc}: a worker process died; rerunning {len(remaining)} letters one at a time",
+                  file=sys.stderr, flush=True)
+            _isolate(fn, context, letters, remaining, outcomes, progress)
+
+    seconds = progress.finish()
+    count_items(total, "letters")
+    results, failures = [], []
+    for i, (ok, value) in enumerate(outcomes):
+        if ok:
+            results.append(value)
+        else:
+            results.append(None)
+            failures.append(LetterFailure(i, (key or (lambda l: _default_key(i, l)))(letters[i]), *value))
+    return LetterMap(results, failures, seconds)
+
+
+def _isolate(fn, context, letters: list, indices: list[int], outcomes: list, progress: _Progress) -> None:
+    """Run letters one at a time in a single worker, replacing it whenever one kills it."""
+    pool = None
+    try:
+        for i in indices:
+            if pool is None:
+                pool = ProcessPoolExecutor(1, initializer=_init_worker, initargs=(fn, context))
+            try:
+                _, shard, counts = pool.submit(_run_shard, i, [letters[i]]).result()
+                outcomes[i] = shard[0]
+                merge_counters(counts)
+            except BrokenProcessPool:
+                outcomes[i] = (False, ("the worker process died on this letter", ""))
+                pool.shutdown(wait=True)
+                pool = None
+            progress.add([outcomes[i]])
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True)
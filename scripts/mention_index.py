@@ -0,0 +1,274 @@
+"""
+Entity mention index: persons and places → letters, with offsets and dates.
+
+Built once from data/letter-entities.json (DaCy NER, with character
+offsets) and the person registry, and saved as data/mention-index.npz:
+
+    from mention_index import load_mention_index
+
+    index = load_mention_index()
+    index.letters_of("trine")                 # sorted letter IDs (int array)
+    index.mentions_of("trine")                # (letter_ids, starts, ends, days)
+    index.persons_in_letter(42)               # person IDs, in order of first mention
+    index.surface_letters("Fårup", "LOC")     # letters where that text was tagged LOC
+    index.day(42)                             # ordinal day number, or None
+
+Every entity occurrence is one mention row (letter, start, end, type,
+surface text), sorted by letter and offset, so a letter's mentions are one
+slice. PER surfaces are resolved with the registry's AliasResolver, and
+each (person, mention) posting records how it matched:
+
+    match="any"     case-insensitive alias match; every candidate person
+                    (what build-person-pages-data.py uses)
+    match="first"   case-sensitive match to the first registry person with
+                    that alias (what build-letter-images.py uses)
+
+Places are indexed by surface text for now (type LOC).
+
+The artifact stores the SHA-256 of both sources and INDEX_VERSION.
+load_mention_index() rebuilds it when either source changes, so consumers
+never see a stale index; scripts/build-mention-index.py is the explicit
+pipeline stage. Concurrent stages rebuild it under a lock (file_lock.py).
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+
+from alias_resolver import AliasResolver, registry_aliases
+from file_lock import file_lock, tmp_path
+from temporal_index import to_ordinal
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DATA_DIR = SCRIPT_DIR.parent / "data"
+LETTER_ENTITIES = DATA_DIR / "letter-entities.json"
+PERSON_REGISTRY = DATA_DIR / "person-registry.json"
+MENTION_INDEX = DATA_DIR / "mention-index.npz"
+
+# Bump when the arrays stored in the artifact change.
+INDEX_VERSION = 1
+
+ENTITY_TYPES = ("PER", "LOC", "ORG")
+MATCH_MODES = ("any", "first")
+NO_DAY = -1
+
+
+def _sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _csr(keys: np.ndarray, n_keys: int) -> tuple[np.ndarray, np.ndarray]:
+    """(indptr, order): order groups positions by key, stably; indptr bounds each key."""
+    order = np.argsort(keys, kind="stable")
+    indptr = np.zeros(n_keys + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n_keys), out=indptr[1:])
+    return indptr, order
+
+
+class MentionIndex:
+    """Inverted and forward mention lookups over a fixed set of arrays."""
+
+    def __init__(self, arrays: dict, surfaces: list[str], persons: list[str], sources: dict):
+        self.arrays = arrays
+        self.surfaces = surfaces
+        self.persons = persons
+        self.sources = sources
+
+        a = arrays
+        self.letter_ids = a["letter_ids"]
+        self._row_of = {lid: r for r, lid in enumerate(self.letter_ids.tolist())}
+        self._person_code = {p: i for i, p in enumerate(persons)}
+        self._surface_code = {s: i for i, s in enumerate(surfaces)}
+        # Reverse lookups, derived from the stored arrays on load
+        self._surface_indptr, self._surface_order = _csr(a["mention_surface"], len(surfaces))
+        self._mention_indptr, self._mention_order = _csr(a["posting_mention"], len(a["mention_letter"]))
+
+    # -- building -------------------------------------------------------------
+
+    @classmethod
+    def build(cls, letter_entities: list[dict], registry: list[dict], sources: dict | None = None):
+        resolver = AliasResolver(registry_aliases(registry))
+        persons = [p["id"] for p in registry]
+        person_code = {p: i for i, p in enumerate(persons)}
+
+        entries = sorted(letter_entities, key=lambda e: e["letter_id"])
+        letter_ids = np.array([e["letter_id"] for e in entries], dtype=np.int32)
+        days = [to_ordinal(e.get("date")) for e in entries]
+        letter_days = np.array([NO_DAY if d is None else d for d in days], dtype=np.int32)
+
+        surfaces, surface_code = [], {}
+        m_letter, m_start, m_end, m_type, m_surface = [], [], [], [], []
+        p_person, p_mention, p_exact_rank = [], [], []
+        for row, entry in enumerate(entries):
+            for ent in sorted(entry.get("entities", []), key=lambda e: e["start"]):
+                if ent["type"] not in ENTITY_TYPES:
+                    continue
+                text = ent["text"]
+                if text not in surface_code:
+                    surface_code[text] = len(surfaces)
+                    surfaces.append(text)
+                mention = len(m_letter)
+                m_letter.append(row)
+                m_start.append(ent["start"])
+                m_end.append(ent["end"])
+                m_type.append(ENTITY_TYPES.index(ent["type"]))
+                m_surface.append(surface_code[text])
+                if ent["type"] != "PER":
+                    continue
+                exact = resolver.resolve(text)
+                for pid in resolver.resolve(text, ignore_case=True):
+                    p_person.append(person_code[pid])
+                    p_mention.append(mention)
+                    p_exact_rank.append(exact.index(pid) if pid in exact else -1)
+
+        # Postings grouped by person; mention rows are already in letter order
+        p_person = np.array(p_person, dtype=np.int32)
+        person_indptr, order = _csr(p_person, len(persons))
+        arrays = {
+            "letter_ids": letter_ids,
+            "letter_days": letter_days,
+            "mention_letter": np.array(m_letter, dtype=np.int32),
+            "mention_start": np.array(m_start, dtype=np.int32),
+            "mention_end": np.array(m_end, dtype=np.int32),
+            "mention_type": np.array(m_type, dtype=np.int8),
+            "mention_surface": np.array(m_surface, dtype=np.int32),
+            "person_indptr": person_indptr,
+            "posting_person": p_person[order],
+            "posting_mention": np.array(p_mention, dtype=np.int32)[order],
+            "posting_exact_rank": np.array(p_exact_rank, dtype=np.int8)[order],
+        }
+        letter_indptr = np.zeros(len(entries) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(arrays["mention_letter"], minlength=len(entries)), out=letter_indptr[1:])
+        arrays["letter_indptr"] = letter_indptr
+        return cls(arrays, surfaces, persons, sources or {})
+
+    # -- artifact -------------------------------------------------------------
+
+    def save(self, path: Path = MENTION_INDEX) -> None:
+        meta = {
+            "version": INDEX_VERSION,
+            "sources": self.sources,
+            "surfaces": self.surfaces,
+            "persons": self.persons,
+        }
+        tmp = tmp_path(path, ".npz")
+        np.savez_compressed(tmp, meta=np.array(json.dumps(meta, ensure_ascii=False)), **self.arrays)
+        tmp.replace(path)
+
+    @classmethod
+    def load(cls, path: Path = MENTION_INDEX) -> "MentionIndex | None":
+        """The saved index, or None if missing or written by another INDEX_VERSION."""
+        if not path.exists():
+            return None
+        with np.load(path) as z:
+            meta = json.loads(str(z["meta"]))
+            if meta.get("version") != INDEX_VERSION:
+                return None
+            arrays = {k: z[k] for k in z.files if k != "meta"}
+        return cls(arrays, meta["surfaces"], meta["persons"], meta["sources"])
+
+    def is_current(self, letter_entities_path: Path = LETTER_ENTITIES,
+                   registry_path: Path = PERSON_REGISTRY) -> bool:
+        """Whether the index was built from the sources as they are now."""
+        return self.sources == source_hashes(letter_entities_path, registry_path)
+
+    # -- queries --------------------------------------------------------------
+
+    def _postings(self, person, match: str) -> np.ndarray:
+        """Mention rows of a person's postings for the given match mode."""
+        if match not in MATCH_MODES:
+            raise ValueError(f"match must be one of {MATCH_MODES}, not {match!r}")
+        code = self._person_code.get(person)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        a = self.arrays
+        lo, hi = a["person_indptr"][code], a["person_indptr"][code + 1]
+        mentions = a["posting_mention"][lo:hi]
+        if match == "first":
+            mentions = mentions[a["posting_exact_rank"][lo:hi] == 0]
+        return mentions
+
+    def letters_of(self, person, match: str = "any") -> np.ndarray:
+        """Sorted IDs of the letters mentioning a person."""
+        rows = np.unique(self.arrays["mention_letter"][self._postings(person, match)])
+        return self.letter_ids[rows]
+
+    def mentions_of(self, person, match: str = "any"):
+        """(letter_ids, starts, ends, days) of every mention, in letter/offset order."""
+        a = self.arrays
+        m = self._postings(person, match)
+        rows = a["mention_letter"][m]
+        return self.letter_ids[rows], a["mention_start"][m], a["mention_end"][m], a["letter_days"][rows]
+
+    def persons_in_letter(self, letter_id, match: str = "any") -> list[str]:
+        """Person IDs mentioned in a letter, in order of first mention.
+
+        Several persons from one mention (an ambiguous alias) keep registry order.
+        """
+        row = self._row_of.get(letter_id)
+        if row is None:
+            return []
+        a = self.arrays
+        found = {}
+        for mention in range(a["letter_indptr"][row], a["letter_indptr"][row + 1]):
+            lo, hi = self._mention_indptr[mention], self._mention_indptr[mention + 1]
+            postings = self._mention_order[lo:hi]
+            for p in sorted(postings.tolist(), key=a["posting_person"].__getitem__):
+                if match == "first" and a["posting_exact_rank"][p] != 0:
+                    continue
+                found.setdefault(self.persons[a["posting_person"][p]], None)
+        return list(found)
+
+    def surface_letters(self, text: str, entity_type: str | None = None) -> np.ndarray:
+        """Sorted IDs of the letters where ``text`` was tagged (optionally as entity_type)."""
+        code = self._surface_code.get(text)
+        if code is None:
+            return np.empty(0, dtype=np.int32)
+        a = self.arrays
+        mentions = self._surface_order[self._surface_indptr[code]:self._surface_indptr[code + 1]]
+        if entity_type is not None:
+            mentions = mentions[a["mention_type"][mentions] == ENTITY_TYPES.index(entity_type)]
+        return self.letter_ids[np.unique(a["mention_letter"][mentions])]
+
+    def day(self, letter_id) -> int | None:
+        row = self._row_of.get(letter_id)
+        if row is None or self.arrays["letter_days"][row] == NO_DAY:
+            return None
+        return int(self.arrays["letter_days"][row])
+
+
+def source_hashes(letter_entities_path: Path, registry_path: Path) -> dict:
+    return {
+        "letter_entities": _sha256(letter_entities_path),
+        "person_registry": _sha256(registry_path),
+    }
+
+
+def build_mention_index(
+    letter_entities_path: Path = LETTER_ENTITIES,
+    registry_path: Path = PERSON_REGISTRY,
+) -> MentionIndex:
+    with open(letter_entities_path, encoding="utf-8") as f:
+        letter_entities = json.load(f)
+    with open(registry_path, encoding="utf-8") as f:
+        registry = json.load(f)
+    return MentionIndex.build(
+        letter_entities, registry, source_hashes(letter_entities_path, registry_path)
+    )
+
+
+def load_mention_index(path: Path = MENTION_INDEX) -> MentionIndex:
+    """The saved index, rebuilt and re-saved first if its sources changed."""
+    index = MentionIndex.load(path)
+    if index is not None and index.is_current():
+        return index
+    with file_lock(path):
+        # Another stage may have rebuilt it while we waited
+        index = MentionIndex.load(path)
+        if index is None or not index.is_current():
+            index = build_mention_index()
+            index.save(path)
+    return index
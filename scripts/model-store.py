@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Manage the local offline model store (scripts/model_store.py).
+
+Usage:
+    python scripts/model-store.py fetch                  # every model, at its pinned revision
+    python scripts/model-store.py fetch large            # one model (DaCy shorthands work)
+    python scripts/model-store.py fetch --update NAME    # move the pin to the current revision
+    python scripts/model-store.py list                   # stored models and their pins
+    python scripts/model-store.py verify                 # re-hash stored files against manifests
+    python scripts/model-store.py timings                # cold-start times per model and source
+
+fetch is the only command that needs the network. It writes the pins to
+models.lock.json. None is committed yet, so the pins are per machine until
+someone commits the file; then other checkouts fetch the same revisions.
+"""
+
+import argparse
+import statistics
+import sys
+from collections import defaultdict
+
+from model_store import (
+    MODELS, STORE_DIR, fetch, load_lock, load_timings, manifest, store_name, store_path, verify,
+)
+
+
+def dir_size_mb(path) -> float:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local offline model store")
+    parser.add_argument("command", choices=["fetch", "list", "verify", "timings"])
+    parser.add_argument("models", nargs="*", help="Model names (default: all)")
+    parser.add_argument("--update", action="store_true", help="Fetch the current revision and re-pin")
+    parser.add_argument("--last", type=int, default=20, help="timings: runs per model/source to summarise")
+    args = parser.parse_args()
+
+    names = [store_name(n) for n in args.models] or list(MODELS)
+    unknown = [n for n in names if n not in MODELS]
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)} (known: {', '.join(MODELS)})")
+
+    if args.command == "fetch":
+        failed = []
+        for name in names:
+            print(f"Fetching {name}...")
+            try:
+                meta = fetch(name, update=args.update)
+            except Exception as e:
+                print(f"  FAILED: {e}")
+                failed.append(name)
+                continue
+            print(f"  {meta['format']} @ {meta['revision']}, {len(meta['files'])} files, "
+                  f"{dir_size_mb(store_path(name)):.0f} MB")
+        sys.exit(1 if failed else 0)
+
+    if args.command == "list":
+        lock = load_lock()
+        print(f"Model store: {STORE_DIR}")
+        for name in names:
+            meta = manifest(name)
+            pin = lock.get(name, {}).get("revision", "-")
+            if meta is None:
+                print(f"  {name:40} not stored (pin {pin})")
+            else:
+                print(f"  {name:40} {meta['format']:11} {meta['revision'][:12]:12} "
+                      f"{dir_size_mb(store_path(name)):6.0f} MB  fetched {meta['fetched']}")
+        return
+
+    if args.command == "verify":
+        bad = 0
+        for name in names:
+            if manifest(name) is None:
+                continue
+            problems = verify(name)
+            print(f"  {name}: {'OK' if not problems else '; '.join(problems[:3])}")
+            bad += bool(problems)
+        sys.exit(1 if bad else 0)
+
+    # timings
+    runs = defaultdict(list)
+    for entry in load_timings():
+        if entry["model"] in names:
+            runs[(entry["model"], entry["source"])].append(entry)
+    if not runs:
+        print("No model loads recorded yet")
+        return
+    print(f"{'model':40} {'source':8} {'runs':>5} {'median':>8} {'last':>8}")
+    for (model, source), entries in sorted(runs.items()):
+        recent = [e["seconds"] for e in entries[-args.last:]]
+        print(f"{model:40} {source:8} {len(entries):5} {statistics.median(recent):7.1f}s "
+              f"{entries[-1]['seconds']:7.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Run, inspect or stop the warm model worker (scripts/model_worker.py).
+
+Usage:
+    python scripts/model-worker.py serve                 # load models on first request
+    python scripts/model-worker.py serve --encoder paraphrase-multilingual-mpnet-base-v2
+    python scripts/model-worker.py serve --idle-timeout 30   # exit after 30 idle minutes
+    python scripts/model-worker.py status
+    python scripts/model-worker.py stop
+
+While it runs, generate-sentiments-cvp.py, generate-emotions-cvp.py,
+generate-emotion-vectors.py and discover-embedding-dimensions.py send
+their encode work to it instead of loading the model themselves. The socket is data/.cache/model-worker.sock
+(override with MODEL_WORKER_SOCKET).
+"""
+
+import argparse
+import sys
+
+from model_worker import SOCKET_PATH, WorkerError, connect, ping, serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm model worker for the NLP scripts")
+    parser.add_argument("command", choices=["serve", "status", "stop"])
+    parser.add_argument("--encoder", action="append", default=[], metavar="MODEL",
+                        help="Sentence-transformer to load at startup (repeatable)")
+    parser.add_argument("--idle-timeout", type=float, metavar="MINUTES",
+                        help="Exit after this many minutes without requests")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(SOCKET_PATH, args.encoder,
+              idle_timeout=args.idle_timeout * 60 if args.idle_timeout else None)
+        return
+
+    status = ping()
+    if status is None:
+        print(f"No model worker on {SOCKET_PATH}")
+        sys.exit(1)
+
+    if args.command == "status":
+        print(f"Model worker {status['pid']} on {SOCKET_PATH}")
+        print(f"  Up {status['uptime']:.0f}s, {status['requests']} requests")
+        print(f"  Encoders: {', '.join(status['encoders']) or '-'}")
+        return
+
+    client = connect()
+    if client is None:
+        print(f"No model worker on {SOCKET_PATH}")
+        sys.exit(1)
+    try:
+        client.request({"op": "shutdown"})
+    except (WorkerError, OSError, EOFError) as e:
+        print(f"Stop failed: {e}")
+        sys.exit(1)
+    finally:
+        client.close()
+    print(f"Stopped model worker {status['pid']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+"""
+Local, offline model store with pinned versions (see scripts/model-store.py).
+
+The CVP scripts used to call SentenceTransformer(MODEL_NAME) and the DaCy
+scripts dacy.load("large"), which resolve the model against the Hugging
+Face hub cache (or download it) and deserialize pickled PyTorch weights on
+every start. `python scripts/model-store.py fetch` instead converts each
+model once into data/.cache/models/<name>/ (override with MODEL_STORE):
+
+  sentence-transformers  saved with safetensors weights, which transformers
+                         memory-maps on load instead of unpickling
+  DaCy / spaCy           the pipeline's own to_disk() directory, loaded with
+                         spacy.load(path) and no package or hub lookup
+
+The revision each model was fetched at is pinned in models.lock.json (the
+hub commit for sentence-transformers, the package version for DaCy). Later
+fetches reuse the pin, and loading from the store never touches the
+network. No models.lock.json is committed yet, so until one is, the pins
+only hold on the machine that ran fetch. Every load, from the store or not, is timed and appended to
+data/.cache/model-load-times.jsonl so startup regressions show up in
+`model-store.py timings`.
+
+    from model_store import load_sentence_transformer, load_spacy_model
+
+    model = load_sentence_transformer("paraphrase-multilingual-mpnet-base-v2")
+    nlp = load_spacy_model("large")
+
+A model that isn't in the store loads the old way, with a hint to fetch it.
+"""
+
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+from fingerprint import file_hash
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT = SCRIPT_DIR.parent
+STORE_DIR = Path(os.environ.get("MODEL_STORE", ROOT / "data" / ".cache" / "models"))
+LOCK_PATH = ROOT / "models.lock.json"
+TIMINGS_PATH = ROOT / "data" / ".cache" / "model-load-times.jsonl"
+MANIFEST = "store.json"
+
+# Store name -> how to fetch it. Names are the ones the scripts already use.
+MODELS = {
+    "paraphrase-multilingual-mpnet-base-v2": {
+        "kind": "sentence-transformer",
+        "source": "sentence-transformers/paraphrase-multilingual-mpnet-base-v2",
+    },
+    "da_dacy_large_trf-0.2.0": {"kind": "dacy", "source": "da_dacy_large_trf-0.2.0"},
+    "da_dacy_medium_trf-0.2.0": {"kind": "dacy", "source": "da_dacy_medium_trf-0.2.0"},
+    "da_dacy_small_trf-0.2.0": {"kind": "dacy", "source": "da_dacy_small_trf-0.2.0"},
+    "da_core_news_lg": {"kind": "spacy", "source": "da_core_news_lg"},
+}
+
+# dacy.load() shorthands used by the scripts
+ALIASES = {
+    "large": "da_dacy_large_trf-0.2.0",
+    "medium": "da_dacy_medium_trf-0.2.0",
+    "small": "da_dacy_small_trf-0.2.0",
+}
+
+
+def store_name(name: str) -> str:
+    return ALIASES.get(name, name)
+
+
+def store_path(name: str) -> Path:
+    return STORE_DIR / store_name(name)
+
+
+def manifest(name: str) -> dict | None:
+    """The stored model's manifest, or None if it isn't in the store."""
+    path = store_path(name) / MANIFEST
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_lock() -> dict:
+    if not LOCK_PATH.exists():
+        return {}
+    with open(LOCK_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_lock(lock: dict) -> None:
+    with open(LOCK_PATH, "w", encoding="utf-8") as f:
+        json.dump(lock, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+# ---------------------------------------------------------------------------
+# Load timing
+# ---------------------------------------------------------------------------
+
+def record_load(name: str, source: str, seconds: float) -> None:
+    """Print and log one model load ("store" or the fallback it used)."""
+    print(f"  Loaded {name} from {source} in {seconds:.1f}s")
+    TIMINGS_PATH.parent.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "model": store_name(name),
+        "source": source,
+        "seconds": round(seconds, 3),
+        "script": Path(sys.argv[0]).name,
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    with open(TIMINGS_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def load_timings() -> list[dict]:
+    if not TIMINGS_PATH.exists():
+        return []
+    with open(TIMINGS_PATH, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def load_sentence_transformer(model_name: str):
+    """A sentence-transformer from the store (mmap'd safetensors), else from the hub cache."""
+    t0 = time.time()
+    if manifest(model_name) is not None:
+        from sentence_transformers import SentenceTransformer
+
+        # Stored models are complete; only this load is kept off the hub, so a
+        # later model that isn't stored can still fall back to it
+        model = SentenceTransformer(str(store_path(model_name)), local_files_only=True)
+        record_load(model_name, "store", time.time() - t0)
+        return model
+
+    print(f"  {model_name} is not in the model store; run: python scripts/model-store.py fetch {model_name}")
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+    record_load(model_name, "hub", time.time() - t0)
+    return model
+
+
+def load_spacy_model(name: str):
+    """A DaCy/spaCy pipeline from the store, else an installed package or dacy.load()."""
+    import spacy
+
+    t0 = time.time()
+    if manifest(name) is not None:
+        # A to_disk() directory holds the whole pipeline, transformer weights
+        # and tokenizer included, so loading it needs no hub lookup
+        nlp = spacy.load(store_path(name))
+        record_load(name, "store", time.time() - t0)
+        return nlp
+
+    print(f"  {name} is not in the model store; run: python scripts/model-store.py fetch {store_name(name)}")
+    if spacy.util.is_package(name):
+        nlp = spacy.load(name)
+        record_load(name, "package", time.time() - t0)
+        return nlp
+    import dacy
+
+    nlp = dacy.load(name)
+    record_load(name, "dacy", time.time() - t0)
+    return nlp
+
+
+# ---------------------------------------------------------------------------
+# Fetching (the only step that uses the network)
+# ---------------------------------------------------------------------------
+
+def fetch(name: str, update: bool = False) -> dict:
+    """Convert a model into the store at its pinned revision; returns its manifest.
+
+    Without a pin (or with update), the current revision is fetched and pinned.
+    """
+    name = store_name(name)
+    spec = MODELS[name]
+    lock = load_lock()
+    pinned = None if update else lock.get(name, {}).get("revision")
+    target = store_path(name)
+    tmp = target.with_name(target.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    if spec["kind"] == "sentence-transformer":
+        from huggingface_hub import HfApi, snapshot_download
+        from sentence_transformers import SentenceTransformer
+
+        revision = pinned or HfApi().model_info(spec["source"]).sha
+        snapshot = snapshot_download(spec["source"], revision=revision)
+        model = SentenceTransformer(snapshot, device="cpu")
+        model.save(str(tmp), safe_serialization=True)
+        fmt = "safetensors"
+    else:
+        import spacy
+
+        if spec["kind"] == "dacy":
+            import dacy
+
+            nlp = dacy.load(spec["source"])
+        else:
+            nlp = spacy.load(spec["source"])
+        revision = nlp.meta.get("version", "")
+        if pinned and revision != pinned:
+            raise RuntimeError(f"{name}: installed version {revision} does not match the pin {pinned}; "
+                               f"install it or fetch with --update")
+        nlp.to_disk(tmp)
+        fmt = "spacy"
+
+    files = {p.relative_to(tmp).as_posix(): file_hash(p) for p in sorted(tmp.rglob("*")) if p.is_file()}
+    meta = {
+        "name": name,
+        "kind": spec["kind"],
+        "source": spec["source"],
+        "revision": revision,
+        "format": fmt,
+        "fetched": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": files,
+    }
+    with open(tmp / MANIFEST, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    if target.exists():
+        shutil.rmtree(target)
+    tmp.rename(target)
+    lock[name] = {"source": spec["source"], "revision": revision}
+    _save_lock(lock)
+    return meta
+
+
+def verify(name: str) -> list[str]:
+    """Problems with a stored model: missing, unpinned or changed files (empty if fine)."""
+    meta = manifest(name)
+    if meta is None:
+        return ["not in the store"]
+    problems = []
+    pin = load_lock().get(meta["name"], {}).get("revision")
+    if pin != meta["revision"]:
+        problems.append(f"stored revision {meta['revision']} but models.lock.json pins {pin}")
+    root = store_path(name)
+    for rel, digest in meta["files"].items():
+        path = root / rel
+        if not path.exists():
+            problems.append(f"missing {rel}")
+        elif file_hash(path) != digest:
+            problems.append(f"changed {rel}")
+    return problems
@@ -0,0 +1,258 @@
+"""
+Warm model worker: keeps the sentence-transformer models resident and
+serves encode requests over a Unix socket.
+
+Every CVP script otherwise pays the full model load (tens of seconds on
+CPU) before doing any work. Start the worker once:
+
+    python scripts/model-worker.py serve --encoder paraphrase-multilingual-mpnet-base-v2
+
+and the scripts use it when it is running, loading in-process otherwise:
+
+    from model_worker import sentence_encoder
+
+    model = sentence_encoder(MODEL_NAME)          # RemoteEncoder or SentenceTransformer
+    embeddings = model.encode(texts, batch_size=32)
+
+Requests carry the caller's batch size, so the worker runs exactly the
+batches the script would have run itself.
+
+Wire format, both ways: a 4-byte big-endian header length, a JSON header,
+then ``header["nbytes"]`` bytes of payload (float32 embeddings).
+"""
+
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from model_store import load_sentence_transformer
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+SOCKET_PATH = Path(os.environ.get("MODEL_WORKER_SOCKET",
+                                  SCRIPT_DIR.parent / "data" / ".cache" / "model-worker.sock"))
+
+CONNECT_TIMEOUT = 2.0
+
+
+class WorkerError(RuntimeError):
+    """The worker answered a request with an error."""
+
+
+# ---------------------------------------------------------------------------
+# Wire format
+# ---------------------------------------------------------------------------
+
+def _send(stream, header: dict, payload: bytes = b"") -> None:
+    blob = json.dumps({**header, "nbytes": len(payload)}).encode("utf-8")
+    stream.write(struct.pack(">I", len(blob)) + blob)
+    if payload:
+        stream.write(payload)
+    stream.flush()
+
+
+def _read_exact(stream, n: int) -> bytes:
+    data = stream.read(n)
+    if data is None or len(data) < n:
+        raise EOFError("connection closed")
+    return data
+
+
+def _recv(stream) -> tuple[dict, bytes]:
+    (size,) = struct.unpack(">I", _read_exact(stream, 4))
+    header = json.loads(_read_exact(stream, size))
+    payload = _read_exact(stream, header["nbytes"]) if header["nbytes"] else b""
+    return header, payload
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class ModelWorker:
+    """Loaded models plus the request handlers.
+
+    Connections are served on their own threads; model calls take a lock,
+    since each already uses every core.
+    """
+
+    def __init__(self):
+        self.encoders = {}
+        self.started = self.last_used = time.time()
+        self.requests = 0
+        self.active = 0
+        self.lock = threading.Lock()
+
+    def encoder(self, name: str):
+        if name not in self.encoders:
+            self.encoders[name] = load_sentence_transformer(name)
+        return self.encoders[name]
+
+    def handle(self, header: dict, payload: bytes) -> tuple[dict, bytes]:
+        op = header.get("op")
+        if op == "status":
+            return {"ok": True, "pid": os.getpid(), "uptime": round(time.time() - self.started, 1),
+                    "requests": self.requests, "encoders": sorted(self.encoders)}, b""
+        self.requests += 1
+        self.active += 1
+        try:
+            with self.lock:
+                return self._handle(op, header)
+        finally:
+            self.active -= 1
+            self.last_used = time.time()
+
+    def _handle(self, op: str, header: dict) -> tuple[dict, bytes]:
+        try:
+            if op == "load":
+                model = self.encoder(header["model"])
+                return {"ok": True, "dim": model.get_sentence_embedding_dimension()}, b""
+            if op == "encode":
+                model = self.encoder(header["model"])
+                emb = model.encode(header["texts"], batch_size=header["batch_size"], show_progress_bar=False)
+                emb = np.ascontiguousarray(emb, dtype=np.float32)
+                return {"ok": True, "shape": list(emb.shape)}, emb.tobytes()
+            if op == "shutdown":
+                return {"ok": True}, b""
+            return {"ok": False, "error": f"unknown op {op!r}"}, b""
+        except Exception as e:  # reported to the client, the worker keeps serving
+            return {"ok": False, "error": f"{type(e).__name__}: {e}"}, b""
+
+
+def serve(socket_path: Path = SOCKET_PATH, encoders=(), idle_timeout: float | None = None) -> None:
+    """Serve requests until a shutdown request or ``idle_timeout`` seconds unused."""
+    import socketserver
+
+    if ping(socket_path) is not None:
+        raise SystemExit(f"A model worker is already listening on {socket_path}")
+    socket_path.unlink(missing_ok=True)  # left over from a worker that died
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    worker = ModelWorker()
+    for name in encoders:
+        worker.encoder(name)
+
+    stopping = False
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            nonlocal stopping
+            while True:
+                try:
+                    header, payload = _recv(self.rfile)
+                    _send(self.wfile, *worker.handle(header, payload))
+                except (EOFError, ConnectionError):
+                    return  # client finished or went away
+                if header.get("op") == "shutdown":
+                    stopping = True
+                    return
+
+    server = socketserver.ThreadingUnixStreamServer(str(socket_path), Handler)
+    server.daemon_threads = True
+    server.timeout = 5.0
+    print(f"Model worker {os.getpid()} listening on {socket_path}", flush=True)
+    try:
+        while not stopping:
+            server.handle_request()
+            if idle_timeout and not worker.active and time.time() - worker.last_used > idle_timeout:
+                print(f"Idle for {idle_timeout:.0f}s, exiting")
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+    print(f"Model worker stopped after {worker.requests} requests")
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class WorkerClient:
+    """One connection to the worker; requests are answered in order."""
+
+    def __init__(self, sock: socket.socket, path: Path):
+        self.sock = sock
+        self.path = path
+        self.stream = sock.makefile("rwb")
+
+    def request(self, header: dict, payload: bytes = b"") -> tuple[dict, bytes]:
+        _send(self.stream, header, payload)
+        reply, data = _recv(self.stream)
+        if not reply.get("ok"):
+            raise WorkerError(reply.get("error", "unknown error"))
+        return reply, data
+
+    def close(self) -> None:
+        self.stream.close()
+        self.sock.close()
+
+
+def connect(socket_path: Path = SOCKET_PATH) -> WorkerClient | None:
+    """A connection to the running worker, or None if there is none."""
+    if not hasattr(socket, "AF_UNIX") or not socket_path.exists():
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(CONNECT_TIMEOUT)
+    try:
+        sock.connect(str(socket_path))
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)  # model loads and large batches take as long as they take
+    return WorkerClient(sock, socket_path)
+
+
+def ping(socket_path: Path = SOCKET_PATH) -> dict | None:
+    """The worker's status, or None if it isn't running."""
+    client = connect(socket_path)
+    if client is None:
+        return None
+    try:
+        return client.request({"op": "status"})[0]
+    except (OSError, EOFError):
+        return None
+    finally:
+        client.close()
+
+
+class RemoteEncoder:
+    """SentenceTransformer stand-in whose encode() runs on the worker."""
+
+    def __init__(self, client: WorkerClient, model_name: str, dim: int):
+        self.client = client
+        self.model_name = model_name
+        self.dim = dim
+
+    def encode(self, texts: list[str], batch_size: int = 32, show_progress_bar: bool = False, **_) -> np.ndarray:
+        texts = list(texts)
+        if show_progress_bar:
+            print(f"  Encoding {len(texts)} texts on the model worker...", flush=True)
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        # One request, so the worker batches exactly as a local encode() would
+        header, data = self.client.request(
+            {"op": "encode", "model": self.model_name, "texts": texts, "batch_size": batch_size})
+        return np.frombuffer(data, dtype=np.float32).reshape(header["shape"]).copy()
+
+
+def sentence_encoder(model_name: str):
+    """The worker's copy of a sentence-transformer if it is running, else a local load."""
+    client = connect()
+    if client is not None:
+        try:
+            header, _ = client.request({"op": "load", "model": model_name})
+            print(f"Using model worker for {model_name} ({client.path})")
+            return RemoteEncoder(client, model_name, header["dim"])
+        except (WorkerError, OSError, EOFError) as e:
+            print(f"  Model worker unavailable for {model_name}: {e}", file=sys.stderr)
+            client.close()
+    print(f"Loading model {model_name}...")
+    return load_sentence_transformer(model_name)
@@ -0,0 +1,176 @@
+"""
+Graph metrics on sparse adjacency matrices.
+
+The social-network builders work on scipy.sparse adjacency matrices (from
+cooccurrence.py) rather than networkx graphs. These functions compute the
+same metrics networkx does, with networkx's defaults and normalisation,
+directly on a symmetric weighted CSR matrix:
+
+    pagerank(A, x0=previous)   # power iteration, optionally warm-started
+    degree_centrality(A)
+    betweenness(A)             # Brandes; edge weight is used as distance
+
+A warm start (x0 = the scores of a similar, earlier graph) usually cuts
+the number of PageRank iterations sharply when consecutive graphs differ by
+a few edges, as sliding time windows do.
+"""
+
+import math
+import time
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse import csgraph
+
+
+def pagerank(
+    A: sparse.csr_matrix,
+    alpha: float = 0.85,
+    x0: np.ndarray | None = None,
+    tol: float = 1.0e-6,
+    max_iter: int = 100,
+) -> tuple[np.ndarray, int]:
+    """Weighted PageRank of a symmetric adjacency matrix.
+
+    Matches networkx.pagerank(G, weight="weight"): uniform teleport,
+    dangling nodes redistributed uniformly, convergence when the L1 change
+    is below n * tol. Returns (scores, iterations used).
+    """
+    n = A.shape[0]
+    if n == 0:
+        return np.zeros(0), 0
+    out_weight = np.asarray(A.sum(axis=1)).ravel()
+    dangling = out_weight == 0
+    inv = np.divide(1.0, out_weight, out=np.zeros(n), where=~dangling)
+    P = sparse.diags(inv) @ A  # row-stochastic except dangling rows
+
+    x = np.full(n, 1.0 / n) if x0 is None else np.asarray(x0, dtype=float) / np.sum(x0)
+    teleport = np.full(n, 1.0 / n)
+    for iteration in range(1, max_iter + 1):
+        x_last = x
+        x = alpha * (P.T @ x_last + x_last[dangling].sum() * teleport) + (1 - alpha) * teleport
+        if np.abs(x - x_last).sum() < n * tol:
+            return x, iteration
+    raise RuntimeError(f"PageRank did not converge in {max_iter} iterations")
+
+
+def degree_centrality(A: sparse.csr_matrix) -> np.ndarray:
+    """Fraction of the other nodes each node is connected to."""
+    n = A.shape[0]
+    if n <= 1:
+        return np.ones(n) if n else np.zeros(0)
+    return np.diff(A.indptr).astype(float) / (n - 1)
+
+
+def _dependencies(A: sparse.csr_matrix, edges, s: int) -> np.ndarray:
+    """Brandes' dependency of source s on every node, vectorised.
+
+    Shortest distances come from scipy's Dijkstra. The edges on shortest
+    paths from s form a DAG; positive weights mean an edge always leads to a
+    strictly farther node, so path counts (forward) and dependencies
+    (backward) can be accumulated one distance level at a time.
+    """
+    src, dst, weight = edges
+    n = A.shape[0]
+    dist = csgraph.dijkstra(A, directed=True, indices=s)
+    du = dist[src]
+    on_dag = np.isfinite(du) & (du + weight == dist[dst])
+    u, v = src[on_dag], dst[on_dag]
+    order = np.argsort(dist[v], kind="stable")
+    u, v = u[order], v[order]
+    cuts = np.flatnonzero(np.diff(dist[v])) + 1
+    levels = list(zip(np.r_[0, cuts].tolist(), np.r_[cuts, len(v)].tolist()))
+
+    sigma = np.zeros(n)
+    sigma[s] = 1.0
+    for a, b in levels:
+        np.add.at(sigma, v[a:b], sigma[u[a:b]])
+    delta = np.zeros(n)
+    for a, b in reversed(levels):
+        uu, vv = u[a:b], v[a:b]
+        np.add.at(delta, uu, sigma[uu] / sigma[vv] * (1.0 + delta[vv]))
+    delta[s] = 0.0
+    return delta
+
+
+def _edges(A: sparse.csr_matrix):
+    coo = A.tocoo()
+    return coo.row.astype(np.int64), coo.col.astype(np.int64), coo.data.astype(float)
+
+
+def _normalise(bc: np.ndarray, n: int) -> np.ndarray:
+    if n > 2:
+        bc *= 1.0 / ((n - 1) * (n - 2))
+    return bc
+
+
+def betweenness(A: sparse.csr_matrix) -> np.ndarray:
+    """Normalised weighted betweenness (networkx.betweenness_centrality(G, weight=...)).
+
+    Brandes' algorithm over every source; the edge weight is the distance.
+    """
+    n = A.shape[0]
+    edges = _edges(A)
+    bc = np.zeros(n)
+    for s in range(n):
+        bc += _dependencies(A, edges, s)
+    return _normalise(bc, n)
+
+
+def sample_size(n: int, epsilon: float, delta: float = 0.1) -> int:
+    """Sources to sample so every normalised score is within epsilon of the
+    exact one with probability at least 1 - delta.
+
+    Each source's dependency on a node, divided by n - 2, lies in [0, 1];
+    Hoeffding's inequality with a union bound over the n nodes gives
+    k >= ln(2n / delta) / (2 eps'^2), with eps' = epsilon * (n - 1) / n for
+    the (n - 1)(n - 2) normalisation. With two nodes or fewer every score
+    is 0, so all n sources (exact) are returned.
+    """
+    if n <= 2:
+        return n
+    eps = epsilon * (n - 1) / n
+    return math.ceil(math.log(2 * n / delta) / (2 * eps * eps))
+
+
+def error_bound(n: int, samples: int, delta: float = 0.1) -> float:
+    """The epsilon that sample_size() would need ``samples`` sources for."""
+    if samples >= n:
+        return 0.0
+    return n / (n - 1) * math.sqrt(math.log(2 * n / delta) / (2 * samples))
+
+
+def approximate_betweenness(
+    A: sparse.csr_matrix,
+    samples: int | None = None,
+    epsilon: float | None = None,
+    delta: float = 0.1,
+    time_budget: float | None = None,
+    seed: int = 0,
+) -> tuple[np.ndarray, int, float]:
+    """Betweenness estimated from k randomly sampled sources.
+
+    k is ``samples``, or sample_size(n, epsilon, delta) when epsilon is
+    given; with neither, every source is used (exact). Sampling stops early
+    once ``time_budget`` seconds have passed (after at least one source).
+    Dependencies are scaled by n / k as networkx does for its ``k``
+    argument. Returns (scores, sources used, error bound at 1 - delta).
+    """
+    n = A.shape[0]
+    if samples is None:
+        samples = n if epsilon is None else sample_size(n, epsilon, delta)
+    samples = min(samples, n)
+    sources = np.random.default_rng(seed).permutation(n)[:samples].tolist()
+
+    edges = _edges(A)
+    bc = np.zeros(n)
+    used = 0
+    start = time.perf_counter()
+    for s in sources:
+        bc += _dependencies(A, edges, s)
+        used += 1
+        if time_budget is not None and time.perf_counter() - start > time_budget:
+            break
+    if used:
+        bc *= n / used
+    return _normalise(bc, n), used, error_bound(n, used, delta)
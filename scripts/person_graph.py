@@ -0,0 +1,126 @@
+"""
+Person co-mention graph in CSR form, with k-hop neighbourhoods.
+
+Built once from a letters × persons IncidenceMatrix (cooccurrence.py):
+
+    A = Xᵀ X, diagonal removed     A[a, b] = letters mentioning both a and b
+
+A is kept as CSR (indptr / indices / weights per person), and X as CSC so
+each person's letters are one sorted slice. Neighbourhood queries are then
+array slices and sparse products rather than nested loops over letters:
+
+    graph = PersonGraph.from_incidence(inc)
+    graph.connections("trine", limit=10)         # [(person, weight)], heaviest first
+    graph.hops(2)                                # {person: {other: 1 or 2}}, all persons
+    graph.ego_network("trine", hops=2)           # nodes with hop distance + induced edges
+    graph.shared_letters("trine", "mor")         # letter keys mentioning both
+
+Ties in connection weight are broken by the first letter (in incidence row
+order) the two persons share, then by person ID.
+"""
+
+import numpy as np
+from scipy import sparse
+
+from cooccurrence import IncidenceMatrix
+
+
+class PersonGraph:
+    """Weighted, undirected co-mention graph over persons."""
+
+    def __init__(self, persons, letters, A: sparse.csr_matrix, X: sparse.csc_matrix,
+                 first: np.ndarray):
+        self.persons = list(persons)
+        self.letters = list(letters)
+        self.index = {p: i for i, p in enumerate(self.persons)}
+        self.A = A
+        self.X = X
+        self.first = first  # per stored entry of A: first shared letter row
+
+    @classmethod
+    def from_incidence(cls, inc: IncidenceMatrix) -> "PersonGraph":
+        A = (inc.X.T @ inc.X).tolil()
+        A.setdiag(0)
+        A = A.tocsr()
+        A.eliminate_zeros()
+        A.sort_indices()
+        X = inc.X.tocsc()
+        X.sort_indices()
+        rows = np.repeat(np.arange(A.shape[0]), np.diff(A.indptr))
+        lo, hi = np.minimum(rows, A.indices), np.maximum(rows, A.indices)
+        return cls(inc.columns, inc.row_keys, A, X, inc.first_rows(lo, hi))
+
+    # -- queries --------------------------------------------------------------
+
+    def connections(self, person, limit: int | None = None) -> list[tuple[str, int]]:
+        """[(other person, shared letters)], heaviest first."""
+        i = self.index[person]
+        lo, hi = self.A.indptr[i], self.A.indptr[i + 1]
+        ranked = sorted(
+            zip(
+                (-self.A.data[lo:hi]).tolist(),
+                self.first[lo:hi].tolist(),
+                (self.persons[c] for c in self.A.indices[lo:hi].tolist()),
+            )
+        )
+        return [(p, -w) for w, _, p in ranked[:limit]]
+
+    def hops(self, max_hops: int = 2) -> dict[str, dict[str, int]]:
+        """{person: {other: hop distance}} up to max_hops, for every person.
+
+        One boolean sparse product per hop over the whole graph.
+        """
+        n = len(self.persons)
+        step = (self.A > 0).astype(np.int32)
+        reached = sparse.identity(n, dtype=np.int32, format="csr")
+        frontier = reached
+        distance = sparse.csr_matrix((n, n), dtype=np.int32)
+        for hop in range(1, max_hops + 1):
+            frontier = ((frontier @ step) > 0).astype(np.int32)
+            frontier = (frontier - frontier.multiply(reached)).tocsr()
+            frontier.eliminate_zeros()
+            if not frontier.nnz:
+                break
+            reached = reached + frontier
+            distance = distance + frontier * hop
+        distance = distance.tocsr()
+        distance.sort_indices()
+        result = {}
+        for i, person in enumerate(self.persons):
+            lo, hi = distance.indptr[i], distance.indptr[i + 1]
+            result[person] = {
+                self.persons[c]: h
+                for c, h in zip(distance.indices[lo:hi].tolist(), distance.data[lo:hi].tolist())
+            }
+        return result
+
+    def ego_network(self, person, hops: int = 2, distances: dict | None = None) -> dict:
+        """{"nodes": [{"person_id", "hops"}], "edges": [{"source", "target", "weight"}]}.
+
+        Nodes are the person (hops 0) and everyone within ``hops``; edges
+        are all co-mention edges among them. Pass a precomputed hops() row
+        as ``distances`` to avoid recomputing it per person.
+        """
+        within = dict(distances if distances is not None else self.hops(hops)[person])
+        within[person] = 0
+        members = sorted(within, key=lambda p: (within[p], p))
+        cols = np.array([self.index[p] for p in members], dtype=np.int64)
+        sub = sparse.triu(self.A[cols][:, cols], k=1).tocoo()
+        edges = sorted(
+            (members[i], members[j], w)
+            for i, j, w in zip(sub.row.tolist(), sub.col.tolist(), sub.data.tolist())
+        )
+        return {
+            "nodes": [{"person_id": p, "hops": within[p]} for p in members],
+            "edges": [{"source": a, "target": b, "weight": w} for a, b, w in edges],
+        }
+
+    def letters_of(self, person) -> np.ndarray:
+        """Row numbers of the letters mentioning a person, ascending."""
+        i = self.index[person]
+        return self.X.indices[self.X.indptr[i]:self.X.indptr[i + 1]]
+
+    def shared_letters(self, a, b) -> list:
+        """Keys of the letters mentioning both a and b, in incidence order."""
+        rows = np.intersect1d(self.letters_of(a), self.letters_of(b), assume_unique=True)
+        return [self.letters[r] for r in rows.tolist()]
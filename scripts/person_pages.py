@@ -0,0 +1,422 @@
+"""
+Person detail page data (ADR-048).
+
+build_person_pages() matches letters to persons, computes the co-mention
+graph and writes the page files listed below. The inputs it shares with
+the other page builders can be passed in already loaded (see
+derived_data.py); anything not passed is read from data/:
+
+  data/person-registry.json   — 68 persons
+  data/image-registry.json    — 164 images
+  data/letter-entities.json   — 665 letter entity entries
+  data/mention-index.npz      — entity mentions resolved to person IDs
+  data/corrected-letters.json — 665 corrected letters
+
+Writes:
+  data/person-pages.json
+  data/person-pages/{person_id}.json — one shard per page: the page record
+      plus shared letters per connection and its 2-hop ego network
+  data/person-pages/index.json        — page summaries for listings
+  apps/website/public/data/person-pages.json and person-pages/  (copies)
+
+The person detail pages read their own shard; the index page reads
+person-pages.json.
+
+Qualification: letter_count >= 3 OR biographical field present.
+The CLI is scripts/build-person-pages-data.py.
+"""
+
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from cooccurrence import IncidenceMatrix
+from json_output import copy_atomic, json_array, json_item, write_text_atomic
+from mention_index import load_mention_index
+from person_graph import PersonGraph
+from profiling import phase
+from stage_trace import count_items
+
+# ---------------------------------------------------------------------------
+# Paths
+# ---------------------------------------------------------------------------
+ROOT = Path(__file__).resolve().parent.parent
+DATA = ROOT / "data"
+FRONTEND_DATA = ROOT / "apps" / "website" / "public" / "data"
+
+PERSON_REGISTRY = DATA / "person-registry.json"
+IMAGE_REGISTRY = DATA / "image-registry.json"
+LETTER_ENTITIES = DATA / "letter-entities.json"
+CORRECTED_LETTERS = DATA / "corrected-letters.json"
+OUTPUT = DATA / "person-pages.json"
+OUTPUT_FRONTEND = FRONTEND_DATA / "person-pages.json"
+SHARD_DIR = DATA / "person-pages"
+SHARD_DIR_FRONTEND = FRONTEND_DATA / "person-pages"
+
+MAX_CONNECTIONS = 10
+EGO_HOPS = 2
+
+# ---------------------------------------------------------------------------
+# Sender / recipient → person ID mapping
+# ---------------------------------------------------------------------------
+SENDER_MAP = {
+    "Peter Mærsk": ["peter"],
+}
+
+RECIPIENT_MAP = {
+    "Trine Mærsk": ["trine"],
+    "Mor og far": ["far", "mor"],
+    "Peter Mærsk": ["peter"],
+    "Maren Mærsk": ["mor"],
+}
+
+
+def strip_html(text: str) -> str:
+    """Remove HTML tags and return plain text."""
+    return re.sub(r"<[^>]+>", "", text or "")
+
+
+def display_name(person: dict) -> str:
+    return person.get("full_name") or person.get("canonical", person["id"])
+
+
+def excerpt(text: str, length: int = 100) -> str:
+    """Return first `length` chars of plain text, stripped of HTML."""
+    plain = strip_html(text).strip()
+    return plain[:length]
+
+
+def load_json(path: Path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---------------------------------------------------------------------------
+# Letters per person
+# ---------------------------------------------------------------------------
+
+def persons_in_letter(entity_entry: dict, mention_index) -> dict[str, str]:
+    """
+    Returns {person_id: role} for all persons appearing in this letter entry.
+    role is one of: 'sender', 'recipient', 'mentioned'
+    Later roles take precedence in the order: sender > recipient > mentioned,
+    but we keep all distinct roles per person. Here we track just the
+    'primary' role for the letter list display (highest priority).
+    """
+    roles: dict[str, set] = defaultdict(set)
+
+    sender = entity_entry.get("sender", "")
+    recipient = entity_entry.get("recipient", "")
+
+    # Sender / recipient mapping
+    for pid in SENDER_MAP.get(sender, []):
+        roles[pid].add("sender")
+    for pid in RECIPIENT_MAP.get(recipient, []):
+        roles[pid].add("recipient")
+
+    # Entity (PER) alias matching
+    for pid in mention_index.persons_in_letter(entity_entry["letter_id"]):
+        if pid not in roles:
+            roles[pid].add("mentioned")
+
+    # Collapse to single best role per person
+    def best_role(role_set: set) -> str:
+        if "sender" in role_set:
+            return "sender"
+        if "recipient" in role_set:
+            return "recipient"
+        return "mentioned"
+
+    return {pid: best_role(r) for pid, r in roles.items()}
+
+
+def match_letters(all_entities: list, all_letters: list, mention_index) -> dict[str, list]:
+    """person_id → [{letter_id, date, place, sender, recipient, role, excerpt}], by date."""
+    # We need letter text for excerpts — index by letter_id
+    letter_by_id = {str(l["id"]): l for l in all_letters}
+
+    person_letters: dict[str, list] = defaultdict(list)
+    for entity_entry in all_entities:
+        lid = str(entity_entry["letter_id"])
+        roles = persons_in_letter(entity_entry, mention_index)
+
+        letter_obj = letter_by_id.get(lid)
+        if not letter_obj:
+            continue
+
+        letter_excerpt = excerpt(letter_obj.get("text_corrected", ""))
+        letter_date = entity_entry.get("date") or letter_obj.get("date", "")
+        letter_place = letter_obj.get("place", "")
+        letter_sender = entity_entry.get("sender", "")
+        letter_recipient = entity_entry.get("recipient", "")
+
+        for pid, role in roles.items():
+            person_letters[pid].append({
+                "letter_id": entity_entry["letter_id"],
+                "date": letter_date,
+                "place": letter_place,
+                "sender": letter_sender,
+                "recipient": letter_recipient,
+                "role": role,
+                "excerpt": letter_excerpt,
+            })
+
+    # Sort each person's letter list by date
+    for pid in person_letters:
+        person_letters[pid].sort(key=lambda l: l["date"] or "")
+    return person_letters
+
+
+# ---------------------------------------------------------------------------
+# Build
+# ---------------------------------------------------------------------------
+
+class PersonPages:
+    """Every person page and shard, kept in memory for incremental updates.
+
+    Letter matching and the co-mention graph only depend on the letters,
+    the entities, the mention index and the registry's person IDs. A
+    registry or image edit therefore rebuilds just the pages that show the
+    changed persons or images (update()).
+    """
+
+    def __init__(self, all_persons, all_images, all_entities, all_letters, mention_index):
+        self.all_persons = all_persons
+        print(f"Qualified persons: {len(self._qualified())} of {len(all_persons)}")
+
+        print("Matching letters to persons...")
+        self.person_letters = match_letters(all_entities, all_letters, mention_index)
+
+        # -- Connections: persons co-occurring in the same letter ---------------
+        print("Computing connections...")
+
+        # Letters × persons incidence → CSR co-mention graph (saved for reuse)
+        self.letter_persons: dict = {}
+        for pid, letters in self.person_letters.items():
+            for letter in letters:
+                self.letter_persons.setdefault(letter["letter_id"], set()).add(pid)
+
+        self.pages: dict[str, dict] = {}
+        self.page_texts: dict[str, str] = {}
+        self.shard_texts: dict[str, str] = {}
+        self.set_persons(all_persons, all_images)
+
+    def _qualified(self) -> list[dict]:
+        return [
+            p for p in self.all_persons
+            if p.get("letter_count", 0) >= 3 or p.get("biographical")
+        ]
+
+    def _index_images(self, all_images) -> None:
+        self.all_images = all_images
+        # person_id → [image objects] sorted by date_sort
+        self.images_by_person: dict[str, list] = defaultdict(list)
+        for img in all_images:
+            for pid in img.get("persons", []):
+                self.images_by_person[pid].append(img)
+
+        for pid in self.images_by_person:
+            self.images_by_person[pid].sort(key=lambda i: i.get("date_sort") or "")
+
+    def set_persons(self, all_persons, all_images) -> None:
+        """Rebuild the graph and every page."""
+        self.all_persons = all_persons
+        self.person_ids = [p["id"] for p in all_persons]
+        self.person_by_id: dict = {p["id"]: p for p in all_persons}
+        self.graph = PersonGraph.from_incidence(
+            IncidenceMatrix(self.letter_persons, self.letter_persons.values(), self.person_ids)
+        )
+
+        # 1- and 2-hop neighbourhoods of every person, in one pass over the graph
+        self.hop_distances = self.graph.hops(EGO_HOPS)
+        self._index_images(all_images)
+
+        print("Building person page objects...")
+        self.pages.clear()
+        self.page_texts.clear()
+        self.shard_texts.clear()
+        for person in self._qualified():
+            self._build(person)
+
+    def update(self, all_persons=None, all_images=None, changed_persons=(), changed_images=()) -> set:
+        """Rebuild the pages showing ``changed_persons`` IDs or ``changed_images``.
+
+        A registry whose person IDs changed rebuilds the graph and every
+        page. The unchanged images must keep their relative order in
+        ``all_images``. Returns the IDs of pages rebuilt or dropped.
+        """
+        if all_persons is not None and [p["id"] for p in all_persons] != self.person_ids:
+            self.set_persons(all_persons, self.all_images if all_images is None else all_images)
+            return set(self.pages)
+
+        affected = set()
+        if all_persons is not None:
+            before = self.person_by_id
+            self.all_persons = all_persons
+            self.person_by_id = {p["id"]: p for p in all_persons}
+            for pid in changed_persons:
+                affected.add(pid)
+                # Names show up in the connection lists and ego networks within EGO_HOPS
+                if display_name(before[pid]) != display_name(self.person_by_id[pid]):
+                    affected.update(self.hop_distances.get(pid, ()))
+        if all_images is not None:
+            self._index_images(all_images)
+            for img in changed_images:
+                affected.update(img.get("persons", []))
+
+        qualified = {p["id"]: p for p in self._qualified()}
+        for pid in affected:
+            if pid in qualified:
+                self._build(qualified[pid])
+            else:
+                self.pages.pop(pid, None)
+                self.page_texts.pop(pid, None)
+                self.shard_texts.pop(pid, None)
+        return affected
+
+    def _build(self, person: dict) -> None:
+        pid = person["id"]
+        graph = self.graph
+
+        # Photos from image-registry (not from person-registry photos field)
+        photo_objs = []
+        for img in self.images_by_person.get(pid, []):
+            photo_objs.append({
+                "image_id": img["id"],
+                "path": img.get("path", ""),
+                "description_da": img.get("description_da", ""),
+                "description": img.get("description", ""),
+                "date_estimate": img.get("date_estimate", ""),
+                "category": img.get("category", ""),
+            })
+
+        # Letters
+        letters = self.person_letters.get(pid, [])
+
+        # Connections (top 10 by shared letters)
+        connections = []
+        for other_pid, weight in graph.connections(pid, limit=MAX_CONNECTIONS):
+            connections.append({
+                "person_id": other_pid,
+                "full_name": display_name(self.person_by_id[other_pid]),
+                "weight": weight,
+            })
+
+        page = {
+            "id": pid,
+            "full_name": display_name(person),
+            "canonical": person.get("canonical", ""),
+            "role": person.get("role", ""),
+            "category": person.get("category", ""),
+        }
+
+        # Optional biographical fields — only include if present
+        if person.get("birth_date"):
+            page["birth_date"] = person["birth_date"]
+        if person.get("death_date"):
+            page["death_date"] = person["death_date"]
+        if person.get("biographical"):
+            page["biographical"] = person["biographical"]
+
+        page["photos"] = photo_objs
+        page["letters"] = letters
+        page["connections"] = connections
+        page["letter_count"] = person.get("letter_count", 0)
+
+        if person.get("first_mention"):
+            page["first_mention"] = person["first_mention"]
+        if person.get("last_mention"):
+            page["last_mention"] = person["last_mention"]
+
+        # Shard: the page plus its neighbourhood, fetched on its own by the person page
+        ego = graph.ego_network(pid, EGO_HOPS, distances=self.hop_distances[pid])
+        for node in ego["nodes"]:
+            node["full_name"] = display_name(self.person_by_id[node["person_id"]])
+        shard = {
+            **page,
+            "connections": [
+                {**c, "shared_letters": graph.shared_letters(pid, c["person_id"])}
+                for c in connections
+            ],
+            "ego_network": ego,
+        }
+
+        self.pages[pid] = page
+        self.page_texts[pid] = json_item(page)
+        self.shard_texts[pid] = json.dumps(shard, ensure_ascii=False, separators=(",", ":"))
+
+    def output(self) -> list[dict]:
+        """Pages with primary persons first (letter_count desc), then alphabetically."""
+        order = [p["id"] for p in self.all_persons if p["id"] in self.pages]
+        return sorted((self.pages[pid] for pid in order), key=lambda p: (-p["letter_count"], p["full_name"]))
+
+    def write(self, changed=None) -> None:
+        """Write the page list, the index and the ``changed`` shards (default: all)."""
+        output = self.output()
+        print(f"Writing {OUTPUT} ...")
+        write_text_atomic(OUTPUT, json_array(self.page_texts[page["id"]] for page in output))
+
+        shards = self.shard_texts if changed is None else [pid for pid in changed if pid in self.shard_texts]
+        print(f"Writing {len(shards)} shards to {SHARD_DIR} ...")
+        print(f"Copying to {OUTPUT_FRONTEND} and {SHARD_DIR_FRONTEND} ...")
+        FRONTEND_DATA.mkdir(parents=True, exist_ok=True)
+        copy_atomic(OUTPUT, OUTPUT_FRONTEND)
+        # Index for listings: everything but letters, photos and neighbourhoods
+        index = json.dumps(
+            [
+                {k: v for k, v in page.items() if k not in ("letters", "photos", "connections")}
+                for page in output
+            ],
+            ensure_ascii=False, separators=(",", ":"),
+        )
+        for shard_dir in (SHARD_DIR, SHARD_DIR_FRONTEND):
+            shard_dir.mkdir(parents=True, exist_ok=True)
+            for pid in shards:
+                write_text_atomic(shard_dir / f"{pid}.json", self.shard_texts[pid])
+            write_text_atomic(shard_dir / "index.json", index)
+            for stale in shard_dir.glob("*.json"):
+                if stale.stem != "index" and stale.stem not in self.shard_texts:
+                    stale.unlink()
+
+    def print_stats(self) -> None:
+        output = self.output()
+        print()
+        print("=== Stats ===")
+        print(f"  Qualified persons:        {len(output)}")
+        print(f"  Total photos linked:      {sum(len(p['photos']) for p in output)}")
+        print(f"  Total letter references:  {sum(len(p['letters']) for p in output)}")
+        print(f"  Co-mention edges:         {self.graph.A.nnz // 2}")
+        print(f"  Output written to:        {OUTPUT}")
+        print(f"  Per-person shards:        {SHARD_DIR}/")
+        print(f"  Frontend copy:            {OUTPUT_FRONTEND}")
+
+
+def build_person_pages(all_persons=None, all_images=None, all_entities=None, all_letters=None,
+                       mention_index=None) -> None:
+    """Build and write the person page files.
+
+    The registries, entities and letters are only read, so callers may
+    share them with other builders.
+    """
+    print("Loading data files...")
+    with phase("load"):
+        if all_persons is None:
+            all_persons = load_json(PERSON_REGISTRY)
+        if all_images is None:
+            all_images = load_json(IMAGE_REGISTRY)
+        if all_entities is None:
+            all_entities = load_json(LETTER_ENTITIES)
+        if all_letters is None:
+            all_letters = load_json(CORRECTED_LETTERS)
+        # Entity mentions resolved to person IDs (shared artifact, see mention_index.py).
+        # An alias is matched case-insensitively and exactly as a whole entity
+        if mention_index is None:
+            mention_index = load_mention_index()
+
+    with phase("compute"):
+        pages = PersonPages(all_persons, all_images, all_entities, all_letters, mention_index)
+    with phase("write"):
+        pages.write()
+    count_items(len(pages.shard_texts), "persons")
+    pages.print_stats()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Show and compare pipeline runs from the run log (scripts/stage_trace.py).
+
+Usage:
+    python scripts/pipeline-runs.py list                 # recent runs, one line each
+    python scripts/pipeline-runs.py show                 # the last run: critical path and stage traces
+    python scripts/pipeline-runs.py show --run -2        # the run before it
+    python scripts/pipeline-runs.py compare              # last run vs the median of the 5 before it
+    python scripts/pipeline-runs.py compare --last 10 --threshold 1.5
+
+compare exits 1 if any stage regressed, so it can gate CI. Runs are read
+from data/.cache/pipeline-runs.jsonl, which run-pipeline.py and
+rebuild-derived-data.py append to.
+"""
+
+import argparse
+import statistics
+import sys
+
+from stage_trace import BASELINE_RUNS, THRESHOLD, comparable, format_regression, load_runs, regressions
+
+
+def fmt(value, spec: str) -> str:
+    return "-" if value is None else format(value, spec)
+
+
+def print_stages(stages: list[dict]) -> None:
+    print(f"  {'stage':28} {'status':7} {'wall':>7} {'CPU':>7} {'peak MB':>8} {'read MB':>8} "
+          f"{'written MB':>10}  items")
+    for s in sorted(stages, key=lambda s: -s["wall_s"]):
+        items = ", ".join(f"{n} {unit} ({s['per_second'].get(unit, 0):g}/s)" for unit, n in s["items"].items())
+        print(f"  {s['stage']:28} {s['status']:7} {s['wall_s']:6.1f}s {fmt(s['cpu_s'], '6.1f')}s "
+              f"{fmt(s['peak_rss_mb'], '8.0f')} {fmt(s['read_mb'], '8.1f')} {fmt(s['written_mb'], '10.1f')}  {items}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipeline run log")
+    parser.add_argument("command", choices=["list", "show", "compare"])
+    parser.add_argument("--run", type=int, default=-1, help="show/compare: which run (-1 = last)")
+    parser.add_argument("--last", type=int, default=BASELINE_RUNS,
+                        help="list: runs to show; compare: earlier runs per stage to take the median of")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="compare: flag a metric above this multiple of its median")
+    args = parser.parse_args()
+
+    runs = load_runs()
+    if not runs:
+        print("No pipeline runs logged yet")
+        return
+
+    if args.command == "list":
+        for i, run in enumerate(runs[-args.last:], start=len(runs) - min(args.last, len(runs))):
+            ran = sum(1 for s in run["stages"] if s["status"] == "ran")
+            failed = len(run["stages"]) - ran
+            print(f"  {i - len(runs):4} {run['started']}  {run['wall_s']:7.1f}s  {ran} ran"
+                  f"{f', {failed} failed' if failed else ''}  critical path {run['critical_path_s']:.1f}s")
+        return
+
+    try:
+        run = runs[args.run]
+    except IndexError:
+        parser.error(f"--run {args.run}: only {len(runs)} runs logged")
+    previous = runs[:len(runs) + args.run] if args.run < 0 else runs[:args.run]
+
+    if args.command == "show":
+        profile = f", profiled ({run['profile']})" if run.get("profile") else ""
+        print(f"Run {run['started']}: {run['wall_s']:.1f}s, jobs={run['jobs']}{profile}")
+        walls = {s["stage"]: s["wall_s"] for s in run["stages"]}
+        path = " -> ".join(f"{name} ({walls.get(name, 0):.1f}s)" for name in run["critical_path"])
+        print(f"  Critical path {run['critical_path_s']:.1f}s: {path}\n")
+        print_stages(run["stages"])
+        calls = [(s["stage"], name, c) for s in run["stages"] for name, c in s.get("calls", {}).items()]
+        if calls:
+            print("\n  Hot helper calls (profiling.counted):")
+            for stage, name, c in sorted(calls, key=lambda x: -x[2]["seconds"]):
+                print(f"  {stage:28} {name:24} {c['calls']:>10} calls {c['seconds']:8.2f}s")
+        return
+
+    # compare
+    print(f"Run {run['started']} against up to {args.last} earlier runs of each stage")
+    print(f"  {'stage':28} {'wall':>7} {'median':>7} {'change':>7}")
+    for s in sorted(run["stages"], key=lambda s: -s["wall_s"]):
+        history = [p["wall_s"] for r in previous for p in r["stages"]
+                   if p["stage"] == s["stage"] and p["status"] == "ran" and comparable(p, s)][-args.last:]
+        if not history:
+            print(f"  {s['stage']:28} {s['wall_s']:6.1f}s {'-':>7} {'new':>7}")
+            continue
+        median = statistics.median(history)
+        change = f"{(s['wall_s'] - median) / median:+.0%}" if median else "-"
+        print(f"  {s['stage']:28} {s['wall_s']:6.1f}s {median:6.1f}s {change:>7}")
+    found = regressions(run, previous, last=args.last, threshold=args.threshold)
+    if not found:
+        print("\nNo regressions")
+        return
+    print(f"\n{len(found)} regression(s):")
+    for r in found:
+        print(f"  {format_regression(r)}")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
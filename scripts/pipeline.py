@@ -0,0 +1,786 @@
+"""
+Declarative data pipeline: stages, fingerprints and incremental rebuilds.
+
+Every stage of the data pipeline is declared once, in STAGES below, with the
+command it runs, the files it reads and writes, and any code it depends on
+beyond its own script (local modules it imports are found automatically).
+The dependency graph follows from the declarations: a stage depends on the
+stage that last wrote each of its inputs.
+
+    python scripts/run-pipeline.py                   # bring everything up to date
+    python scripts/run-pipeline.py place-pages       # one stage plus what it needs
+    python scripts/run-pipeline.py --dry-run         # what would run, and why
+    python scripts/run-pipeline.py --force sentiment
+
+A stage's fingerprint is the SHA-256 of its command and of the content of
+its inputs and code. After a successful run the fingerprint, and the
+per-file hashes behind it, are stored in data/.cache/pipeline-state.json.
+A stage runs again only when its fingerprint changed or an output is
+missing, in topological order, so an upstream stage that rewrites an
+identical file does not trigger its consumers. Stages that update a file
+in place (analyze-disappearances.py on social-network.json) record the
+file as they left it.
+
+Stages marked ``manual`` (model-heavy experiments outside data:all) run
+only when named; their outputs still count as inputs for everyone else.
+
+Independent stages run concurrently, up to ``jobs`` at a time and within a
+memory budget (each stage declares a rough ``memory_mb``). A stage that
+shards letters over a letter_map pool holds one job slot, and ``pool_mb``
+of the budget, per worker: it gets the slots and memory left when it
+starts ($PIPELINE_WORKERS), at least one. Stages that load
+a transformer or spaCy/DaCy model are ``exclusive``: they run alone, since
+each already uses every core. A stage also waits for earlier stages that
+read or write its outputs, so declaration order still decides who sees
+which version of a file. Each stage's output goes to its own log in
+data/.cache/pipeline-logs/; the summary compares the critical path with
+the total CPU time the stages used.
+
+Every stage run is traced (wall and CPU time, peak RSS, bytes read and
+written, items and throughput; see stage_trace.py). Each run is appended
+to data/.cache/pipeline-runs.jsonl, and stages slower or larger than
+their recent runs are flagged in the summary.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from file_lock import tmp_path
+from fingerprint import MISSING, HashCache
+from letter_map import WORKERS_ENV
+from profiling import PROFILE_DIR, Profiler, counter_delta, counter_snapshot, profile_mode, trace_counters
+from stage_trace import (
+    ITEMS_ENV, RUN_LOG, InProcessMeter, append_run, format_regression, format_trace, load_runs, proc_io,
+    read_counts, regressions, trace_record, usage_resources,
+)
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT = SCRIPT_DIR.parent
+STATE_PATH = ROOT / "data" / ".cache" / "pipeline-state.json"
+LOG_DIR = ROOT / "data" / ".cache" / "pipeline-logs"
+
+# Bump when the fingerprint recipe changes, to invalidate recorded state
+STATE_VERSION = 1
+
+# Directories searched for local imports when collecting a stage's code
+CODE_DIRS = (SCRIPT_DIR, ROOT / "webapp" / "api")
+
+PUBLIC_DATA = "apps/website/public/data"
+EMOTIONS = ["fear", "grief", "hope", "love", "anger", "gratitude", "pride", "remorse", "relief", "desire"]
+EMOTION_VECTORS = [f"data/cvp-{e}-vector.csv" for e in EMOTIONS]
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One pipeline step. Paths are relative to the repository root."""
+
+    name: str
+    script: str
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    args: tuple[str, ...] = ()
+    code: tuple[str, ...] = ()      # extra code/config files beyond the script's imports
+    after: tuple[str, ...] = ()     # ordering-only dependencies (e.g. a validation gate)
+    manual: bool = False
+    memory_mb: int = 500            # rough peak, for the scheduler's memory budget
+    pool_mb: int = 0                # rough peak per letter_map pool worker; 0 without a pool
+    exclusive: bool = False         # runs alone (multi-threaded model inference)
+
+    @property
+    def command(self) -> list[str]:
+        runner = "node" if self.script.endswith((".mjs", ".js")) else sys.executable
+        return [runner, self.script, *self.args]
+
+
+def _stage(name, script, inputs=(), outputs=(), **kwargs) -> Stage:
+    return Stage(name, f"scripts/{script}", tuple(inputs), tuple(outputs), **kwargs)
+
+
+# Sentence-transformers / DaCy / transformers.js stages
+MODEL = {"exclusive": True, "memory_mb": 3000}
+# Stages that shard letters over a letter_map pool
+POOL = {"pool_mb": 150}
+
+
+# ---------------------------------------------------------------------------
+# Stage declarations (docs/data-pipeline.md, steps 1-20)
+# ---------------------------------------------------------------------------
+
+STAGES = [
+    # 1-4: text quality (ADR-028 Makefile targets)
+    _stage("audit", "audit-text-quality.py",
+           ["data/letters.csv"], ["data/quality-audit/error-inventory.json"], **POOL),
+    _stage("correct", "apply-corrections.py",
+           ["data/letters.csv", "data/abbreviation-lexicon.json"], ["data/corrected-letters.json"], **POOL),
+    _stage("validate", "validate-text-quality.py",
+           ["data/corrected-letters.json"]),
+    _stage("normalize", "normalize-danish.mjs",
+           ["data/corrected-letters.json", "data/letters.csv"], ["data/normalized-letters.json"],
+           after=("validate",)),
+    # 5-12: sentences, concept-vector scoring and analyses
+    _stage("sentences", "extract-sentences-normalized.py",
+           ["data/normalized-letters.json"],
+           ["data/normalized-sentences.json", "data/normalized-sentence-offsets.json"], **POOL),
+    _stage("sentiment", "generate-sentiments-cvp.py",
+           ["data/normalized-sentences.json", "data/cvp-concept-vector.csv"],
+           ["data/cvp-sentence-scores.json", "data/cvp-letter-scores.json", "data/sentiment-meta.json"],
+           **MODEL),
+    _stage("emotion-vectors", "generate-emotion-vectors.py",
+           [], EMOTION_VECTORS, **MODEL),
+    _stage("emotions", "generate-emotions-cvp.py",
+           ["data/normalized-sentences.json", *EMOTION_VECTORS],
+           ["data/cvp-emotion-scores.json", "data/cvp-emotion-sentence-scores.json",
+            "data/emotion-meta.json"],
+           **MODEL),
+    _stage("psycholinguistics", "analyze-psycholinguistics.py",
+           ["data/normalized-letters.json", "data/cvp-sentence-scores.json", "data/letters.csv"],
+           ["data/letter-psycholinguistics.json", "data/psycholinguistics-meta.json"],
+           memory_mb=1500, pool_mb=400),
+    _stage("audience", "analyze-audience-divergence.py",
+           ["data/letters.csv", "data/cvp-letter-scores.json", "data/letter-psycholinguistics.json"],
+           ["data/letter-audience-divergence.json", "data/audience-divergence-meta.json"]),
+    _stage("arcs", "analyze-narrative-arcs.py",
+           ["data/cvp-sentence-scores.json", "data/cvp-letter-scores.json", "data/letters.csv"],
+           ["data/letter-narrative-arcs.json"]),
+    _stage("semantic-shifts", "detect-semantic-shifts.py",
+           ["data/cvp-sentence-scores.json", "data/letters.csv"],
+           ["data/semantic-shifts.json"]),
+    _stage("pca", "discover-embedding-dimensions.py",
+           ["data/normalized-sentences.json", "data/cvp-concept-vector.csv"],
+           ["data/pca-dimensions.json", "data/.cache/sentence-embeddings.npy"],
+           manual=True, **MODEL),
+    _stage("identity", "generate-identity-vector.py",
+           ["data/identity-seeds.json", "data/.cache/sentence-embeddings.npy",
+            "data/cvp-sentence-scores.json", "data/cvp-concept-vector.csv", "data/letters.csv",
+            *EMOTION_VECTORS],
+           ["data/cvp-identity-vector.csv", "data/cvp-identity-scores.json"],
+           manual=True, **MODEL),
+    # 13: places
+    _stage("enrich-places", "enrich-places-wikidata.py",
+           ["data/places.geojson"], ["data/places-enriched.json"]),
+    # 14: social network (ADR-016)
+    _stage("ner", "extract-entities-dacy.py",
+           ["data/normalized-letters.json", "data/letters.csv"], ["data/letter-entities.json"],
+           exclusive=True, memory_mb=4000),
+    _stage("entity-audit", "audit-entities.py",
+           ["data/NER_entities_grouped.csv"], ["data/entity-audit.json"]),
+    _stage("disambiguate", "disambiguate-persons.py",
+           ["data/letter-entities-draft.json", "data/letters.csv"],
+           ["data/disambiguation-evidence.json"]),
+    _stage("epithets-scan", "scan-epithets.py",
+           ["data/corrected-letters.json"], ["data/epithet-inventory.json"], **POOL),
+    _stage("epithets-resolve", "resolve-epithets.py",
+           ["data/epithet-inventory.json", "data/letter-entities-draft.json"],
+           ["data/epithet-resolutions.json"]),
+    _stage("person-registry", "build-person-registry.py",
+           ["data/entity-audit.json", "data/letter-entities-draft.json", "data/letters.csv",
+            "data/epithet-resolutions.json", "data/person-registry-enrichments.json"],
+           ["data/person-registry-computed.json"]),
+    _stage("person-registry-merge", "merge-person-registry.py",
+           ["data/person-registry-computed.json", "data/person-registry-enrichments.json"],
+           ["data/person-registry.json"]),
+    _stage("mention-index", "build-mention-index.py",
+           ["data/letter-entities.json", "data/person-registry.json"],
+           ["data/mention-index.npz"]),
+    _stage("social-network", "build-social-network.py",
+           ["data/person-registry.json", "data/letter-entities-draft.json", "data/letters.csv"],
+           ["data/social-network.json", "data/social-network-timeline.json"]),
+    _stage("disappearance", "analyze-disappearances.py",
+           ["data/social-network.json", "data/letters.csv"],
+           ["data/social-network.json"]),
+    _stage("research-queue", "build-research-queue.py",
+           ["data/person-registry.json", "data/social-network.json"],
+           ["data/external-records/research-queue.json"]),
+    # 20: image pipeline (ADR-045-050)
+    _stage("letter-images", "build-letter-images.py",
+           ["data/image-registry.json", "data/corrected-letters.json", "data/mention-index.npz",
+            "data/place-image-lookup.json", "data/letter-image-overrides.json"],
+           ["data/letter-images.json"]),
+    _stage("person-pages", "build-person-pages-data.py",
+           ["data/person-registry.json", "data/image-registry.json", "data/letter-entities.json",
+            "data/mention-index.npz", "data/corrected-letters.json", "data/letters.csv"],
+           ["data/person-pages.json", "data/person-pages",
+            f"{PUBLIC_DATA}/person-pages.json", f"{PUBLIC_DATA}/person-pages"]),
+    _stage("place-pages", "build-place-pages-data.py",
+           ["data/places.geojson", "data/places-enriched.json", "data/place-photo-links.json",
+            "data/image-registry.json", "data/corrected-letters.json", "data/letters.csv"],
+           ["data/place-pages.json", f"{PUBLIC_DATA}/place-pages.json"]),
+    _stage("copy-images", "copy-images-to-frontend.py",
+           ["data/image-registry.json", "data/images", "data/letter-images.json"],
+           ["apps/website/public/images/letters",
+            f"{PUBLIC_DATA}/letter-images.json", f"{PUBLIC_DATA}/image-registry.json"]),
+    # 15-19: website data
+    _stage("build", "build-data.mjs",
+           ["data/letters.csv", "data/places.geojson", "data/sentiment_scored_letters.csv",
+            "data/cvp-letter-scores.json", "data/cvp-sentence-scores.json",
+            "data/places-enriched.json", "data/normalized-letters.json",
+            "apps/admin/data/modernized-letters.json",
+            "data/letter-psycholinguistics.json", "data/cvp-emotion-scores.json",
+            "data/cvp-identity-scores.json", "data/letter-audience-divergence.json",
+            "data/letter-narrative-arcs.json", "data/semantic-shifts.json",
+            "data/pca-dimensions.json", "data/social-network.json",
+            "data/social-network-timeline.json", "data/person-registry.json"],
+           [f"{PUBLIC_DATA}/letters.json", f"{PUBLIC_DATA}/letter-summaries.json",
+            f"{PUBLIC_DATA}/places.json", f"{PUBLIC_DATA}/search-corpus.json",
+            f"{PUBLIC_DATA}/letter-sentiments.json", f"{PUBLIC_DATA}/search-snippets.json"]),
+    _stage("battles", "generate-battle-data.mjs",
+           ["historical_data/Battles_WW1.csv", f"{PUBLIC_DATA}/letter-sentiments.json",
+            f"{PUBLIC_DATA}/letter-summaries.json", f"{PUBLIC_DATA}/places.json"],
+           [f"{PUBLIC_DATA}/battles.json"]),
+    _stage("reindex", "generate-embeddings.mjs",
+           [f"{PUBLIC_DATA}/search-corpus.json"],
+           [f"{PUBLIC_DATA}/embeddings.bin", f"{PUBLIC_DATA}/embedding-index.json",
+            f"{PUBLIC_DATA}/embedding-meta.json", f"{PUBLIC_DATA}/related-letters.json",
+            f"{PUBLIC_DATA}/embeddings-2d.json", f"{PUBLIC_DATA}/embeddings-3d.json"],
+           args=("--force",), **MODEL),
+    _stage("clusters", "generate-clusters.mjs",
+           [f"{PUBLIC_DATA}/embedding-index.json", f"{PUBLIC_DATA}/embeddings.bin",
+            f"{PUBLIC_DATA}/letter-summaries.json", f"{PUBLIC_DATA}/letter-sentiments.json"],
+           [f"{PUBLIC_DATA}/topic-clusters.json"]),
+    _stage("borders", "build-historical-borders.mjs",
+           ["maps/1914/1914.geojson", "maps/1914/1918.geojson"],
+           [f"{PUBLIC_DATA}/borders-1914.json", f"{PUBLIC_DATA}/borders-1918.json"]),
+]
+
+
+# ---------------------------------------------------------------------------
+# Code dependencies
+# ---------------------------------------------------------------------------
+
+PY_IMPORT = re.compile(r"^\s*(?:from\s+([\w.]+)\s+import|import\s+([\w.]+))", re.MULTILINE)
+JS_IMPORT = re.compile(r"""(?:from|import)\s*\(?\s*['"](\.{1,2}/[^'"]+)['"]""")
+
+
+def _local_module(name: str) -> Path | None:
+    parts = name.split(".")
+    for base in CODE_DIRS:
+        for candidate in (base.joinpath(*parts).with_suffix(".py"), base.joinpath(*parts, "__init__.py")):
+            if candidate.is_file():
+                return candidate
+    return None
+
+
+def code_files(script: Path) -> list[Path]:
+    """The script plus every local module it imports, transitively."""
+    seen, pending = [], [script]
+    while pending:
+        path = pending.pop()
+        if path in seen or not path.is_file():
+            continue
+        seen.append(path)
+        text = path.read_text(encoding="utf-8", errors="replace")
+        if path.suffix == ".py":
+            for match in PY_IMPORT.finditer(text):
+                module = _local_module(match.group(1) or match.group(2))
+                if module is not None:
+                    pending.append(module)
+        else:
+            for match in JS_IMPORT.finditer(text):
+                pending.append((path.parent / match.group(1)).resolve())
+    return sorted(seen)
+
+
+# ---------------------------------------------------------------------------
+# Graph and runner
+# ---------------------------------------------------------------------------
+
+class Pipeline:
+    """The stage graph, its recorded state and an incremental runner."""
+
+    def __init__(self, stages: list[Stage] = STAGES, root: Path = ROOT, state_path: Path = STATE_PATH,
+                 log_dir: Path = LOG_DIR, run_log: Path = RUN_LOG):
+        self.stages = {s.name: s for s in stages}
+        assert len(self.stages) == len(stages), "duplicate stage names"
+        self.order = [s.name for s in stages]
+        self.root = root
+        self.state_path = state_path
+        self.log_dir = log_dir
+        self.run_log = run_log
+        self.profile = None  # profiling mode of the current run()
+
+        # A stage depends on the last earlier stage writing each of its inputs
+        self.deps = {}
+        writer = {}
+        for s in stages:
+            deps = [writer[p] for p in s.inputs if p in writer]
+            deps += [a for a in s.after if a in self.stages]
+            self.deps[s.name] = list(dict.fromkeys(deps))
+            for p in s.outputs:
+                writer[p] = s.name
+        self.producer = writer
+
+        # When running concurrently, a stage also waits for earlier stages
+        # that read or write its outputs (write-after-read/-write). Caches
+        # that stages rebuild as a side effect (the corpus store, mention
+        # index, alias resolver) aren't outputs: their writers lock them
+        # (file_lock.py) so concurrent stages build them once
+        self.waits = {}
+        for i, s in enumerate(stages):
+            earlier = [t.name for t in stages[:i] if set(s.outputs) & set(t.inputs + t.outputs)]
+            self.waits[s.name] = list(dict.fromkeys(self.deps[s.name] + earlier))
+
+        state = self._load_state()
+        self.hashes = HashCache(state.get("hashes"))
+        self.records = state.get("stages", {})
+        self._code = {}
+
+    # -- state ----------------------------------------------------------------
+
+    def _load_state(self) -> dict:
+        if not self.state_path.exists():
+            return {}
+        with open(self.state_path, encoding="utf-8") as f:
+            state = json.load(f)
+        return state if state.get("version") == STATE_VERSION else {}
+
+    def save_state(self) -> None:
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        state = {"version": STATE_VERSION, "stages": self.records, "hashes": self.hashes.entries}
+        tmp = tmp_path(self.state_path)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        tmp.replace(self.state_path)
+
+    # -- fingerprints ---------------------------------------------------------
+
+    def code_of(self, stage: Stage) -> list[str]:
+        if stage.name not in self._code:
+            files = code_files(self.root / stage.script) + [self.root / c for c in stage.code]
+            self._code[stage.name] = sorted({self._rel(p) for p in files})
+        return self._code[stage.name]
+
+    def snapshot(self, stage: Stage) -> dict:
+        """Current hashes of everything a stage's result depends on."""
+        return {
+            "command": " ".join(stage.command[1:]),
+            "inputs": {p: self.hashes.path(self.root / p) for p in stage.inputs},
+            "code": {p: self.hashes.file(self.root / p) for p in self.code_of(stage)},
+        }
+
+    @staticmethod
+    def fingerprint(snapshot: dict) -> str:
+        blob = json.dumps(snapshot, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def reasons(self, stage: Stage) -> list[str]:
+        """Why a stage is out of date (empty if it is current)."""
+        record = self.records.get(stage.name)
+        if record is None:
+            return ["never run"]
+        missing = [p for p in stage.outputs if not (self.root / p).exists()]
+        if missing:
+            return [f"missing output {p}" for p in missing]
+        current = self.snapshot(stage)
+        if self.fingerprint(current) == record["fingerprint"]:
+            return []
+        out = []
+        if current["command"] != record["snapshot"]["command"]:
+            out.append("command changed")
+        for kind in ("inputs", "code"):
+            before = record["snapshot"][kind]
+            for p, h in current[kind].items():
+                if before.get(p) != h:
+                    out.append(f"{'input' if kind == 'inputs' else 'code'} changed: {p}"
+                               + (" (missing)" if h == MISSING else ""))
+            out += [f"no longer depends on {p}" for p in before if p not in current[kind]]
+        return out or ["fingerprint changed"]
+
+    def record(self, stage: Stage, seconds: float, cpu_seconds: float | None = None) -> None:
+        snapshot = self.snapshot(stage)
+        self.records[stage.name] = {
+            "fingerprint": self.fingerprint(snapshot),
+            "snapshot": snapshot,
+            "seconds": round(seconds, 2),
+            "cpu_seconds": None if cpu_seconds is None else round(cpu_seconds, 2),
+            "finished": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    # -- selection ------------------------------------------------------------
+
+    def select(self, targets: list[str] | None = None, upstream: bool = True) -> list[Stage]:
+        """Stages to consider, in topological (declaration) order.
+
+        With no targets, every non-manual stage. With targets, those stages
+        plus (if upstream) the non-manual stages they transitively need.
+        """
+        unknown = [t for t in targets or [] if t not in self.stages]
+        if unknown:
+            raise KeyError(f"unknown stage(s): {', '.join(unknown)}")
+        if not targets:
+            return [self.stages[n] for n in self.order if not self.stages[n].manual]
+        wanted = set(targets)
+        if upstream:
+            pending = list(targets)
+            while pending:
+                for dep in self.deps[pending.pop()]:
+                    if dep not in wanted and not self.stages[dep].manual:
+                        wanted.add(dep)
+                        pending.append(dep)
+        return [self.stages[n] for n in self.order if n in wanted]
+
+    # -- running --------------------------------------------------------------
+
+    def run(self, stages: list[Stage], force: set[str] = frozenset(), dry_run: bool = False,
+            jobs: int | None = None, memory_mb: int | None = None,
+            builders: dict[str, Callable[[], None]] | None = None, profile: str | None = None) -> bool:
+        """Run out-of-date stages, concurrently where the graph allows.
+
+        At most ``jobs`` stages (default: one per CPU) run at once, within
+        ``memory_mb`` (default: the memory available now). Stages with an
+        entry in ``builders`` are run by calling it in this process instead
+        of starting their script (see derived_data.py). ``profile``
+        ("cprofile", "sample" or "memory", default $PIPELINE_PROFILE) profiles every
+        stage run (see profiling.py). Returns False if any stage failed;
+        stages downstream of a failure are skipped, independent ones
+        continue.
+        """
+        if dry_run:
+            return self._plan(stages, force)
+        self.profile = profile_mode(profile)
+        jobs = jobs or os.cpu_count() or 1
+        memory_mb = memory_mb or available_memory_mb()
+        builders = builders or {}
+        names = {s.name for s in stages}
+        waiting = list(stages)
+        ready = []        # (stage, reasons), in declaration order
+        running = {}      # pid -> _Job
+        status = {}       # name -> "ran" | "current" | "failed" | "blocked"
+        timings = {}      # name -> (wall seconds, cpu seconds or None), in finishing order
+        in_process = []   # builders run, in order; they run one after another
+        traces = []       # stage_trace records, in finishing order
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        start = time.time()
+
+        try:
+            while waiting or ready or running:
+                # Settle every stage whose predecessors have all finished
+                for stage in list(waiting):
+                    waits = [w for w in self.waits[stage.name] if w in names]
+                    if any(w not in status for w in waits):
+                        continue
+                    waiting.remove(stage)
+                    if any(status[d] in ("failed", "blocked") for d in self.deps[stage.name] if d in names):
+                        status[stage.name] = "blocked"
+                        print(f"  [blocked] {stage.name}")
+                        continue
+                    why = ["forced"] if stage.name in force else self.reasons(stage)
+                    if not why:
+                        status[stage.name] = "current"
+                        print(f"  [current] {stage.name}")
+                        continue
+                    ready.append((stage, why))
+
+                # Start what fits; a waiting exclusive stage holds back later ones
+                for stage, why in list(ready):
+                    if not self._fits(stage, running, jobs, memory_mb):
+                        if stage.exclusive:
+                            break
+                        continue
+                    ready.remove((stage, why))
+                    more = f" (+{len(why) - 3} more)" if len(why) > 3 else ""
+                    print(f"  [run] {stage.name}: {'; '.join(why[:3])}{more}", flush=True)
+                    echo = jobs == 1 or stage.exclusive
+                    if stage.name in builders:
+                        code, wall, resources, log = self._call(stage, builders[stage.name], echo)
+                        trace = self._trace(stage, code, "in-process", wall, resources)
+                        status[stage.name] = self._finish(stage, code, trace, log, echo)
+                        timings[stage.name] = (wall, trace["cpu_s"])
+                        in_process.append(stage.name)
+                        traces.append(trace)
+                        continue
+                    job = self._start(stage, echo, self._workers(stage, running, jobs, memory_mb))
+                    running[job.proc.pid] = job
+
+                if not running:
+                    continue
+                job, code, resources = self._wait(running)
+                wall = time.time() - job.started
+                trace = self._trace(job.stage, code, "script", wall, resources)
+                status[job.stage.name] = self._finish(job.stage, code, trace, job.log, job.echo)
+                timings[job.stage.name] = (wall, trace["cpu_s"])
+                traces.append(trace)
+        finally:
+            for job in running.values():
+                job.proc.terminate()
+
+        self.save_state()
+        counts = {k: sum(1 for v in status.values() if v == k) for k in ("ran", "current", "failed", "blocked")}
+        failed = [n for n in self.order if status.get(n) == "failed"]
+        print(f"\n{'=' * 60}")
+        print(f"  {counts['ran']} ran, {counts['current']} current, {counts['failed']} failed, "
+              f"{counts['blocked']} blocked — {time.time() - start:.1f}s")
+        if timings:
+            path, length = self.critical_path(timings, in_process)
+            cpu_total = sum(c for _, c in timings.values() if c is not None)
+            print(f"  Critical path {length:.1f}s: {' -> '.join(path)}")
+            print(f"  Stage CPU {cpu_total:.1f}s, stage wall {sum(w for w, _ in timings.values()):.1f}s "
+                  f"(jobs={jobs}, memory budget {memory_mb or 'unlimited'} MB)")
+            self._log_run(start, traces, path, length, jobs)
+        if failed:
+            print(f"  Failed: {', '.join(failed)}")
+        print(f"{'=' * 60}")
+        return not failed
+
+    def _plan(self, stages: list[Stage], force: set[str]) -> bool:
+        """Dry run: report what would run, and why, in declaration order."""
+        pending = set()
+        for stage in stages:
+            if stage.name in force:
+                why = ["forced"]
+            else:
+                # Consumers of stale stages would run afterwards
+                why = [f"after {d}" for d in self.deps[stage.name] if d in pending] or self.reasons(stage)
+            if not why:
+                print(f"  [current] {stage.name}")
+                continue
+            more = f" (+{len(why) - 3} more)" if len(why) > 3 else ""
+            print(f"  [stale] {stage.name}: {'; '.join(why[:3])}{more}")
+            pending.add(stage.name)
+        return True
+
+    def _finish(self, stage: Stage, code: int, trace: dict, log: Path, echo: bool) -> str:
+        """Report a finished stage and record it if it succeeded; returns its status."""
+        if code != 0:
+            print(f"  FAILED: {stage.name} (exit code {code}) — log: {self._rel(log)}")
+            if not echo:
+                for line in _tail(log):
+                    print(f"    | {line}")
+            return "failed"
+        print(f"  [done] {stage.name}: {format_trace(trace)}", flush=True)
+        self.record(stage, trace["wall_s"], trace["cpu_s"])
+        self.save_state()
+        return "ran"
+
+    def _items_path(self, stage: Stage) -> Path:
+        return self.log_dir / f"{stage.name}.items"
+
+    def _trace(self, stage: Stage, code: int, mode: str, wall: float, resources: dict) -> dict:
+        items, calls = read_counts(self._items_path(stage))
+        return trace_record(stage.name, "ran" if code == 0 else "failed", mode, wall, resources, items, calls,
+                            self.profile)
+
+    def _log_run(self, start: float, traces: list[dict], path: list[str], length: float, jobs: int) -> None:
+        """Append this run to the run log and flag stages that regressed against earlier runs."""
+        previous = load_runs(self.run_log)
+        run = {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(start)),
+            "wall_s": round(time.time() - start, 2),
+            "jobs": jobs,
+            "profile": self.profile,
+            "critical_path": path,
+            "critical_path_s": round(length, 2),
+            "stages": traces,
+        }
+        append_run(run, self.run_log)
+        found = regressions(run, previous)
+        if found:
+            print("  Regressions against recent runs (python scripts/pipeline-runs.py compare):")
+            for r in found:
+                print(f"    {format_regression(r)}")
+
+    @staticmethod
+    def _fits(stage: Stage, running: dict, jobs: int, memory_mb: int | None) -> bool:
+        if not running:
+            return True  # anything may run alone, even over budget
+        if stage.exclusive or any(job.stage.exclusive for job in running.values()):
+            return False
+        slots = sum(job.workers for job in running.values())
+        used = sum(job.memory_mb for job in running.values())
+        return slots < jobs and (memory_mb is None or used + stage.memory_mb + stage.pool_mb <= memory_mb)
+
+    @staticmethod
+    def _workers(stage: Stage, running: dict, jobs: int, memory_mb: int | None) -> int:
+        """Pool workers for a letter_map stage: the job slots and memory left, at least one."""
+        if not stage.pool_mb:
+            return 1
+        free = jobs - sum(job.workers for job in running.values())
+        if memory_mb is not None:
+            left = memory_mb - sum(job.memory_mb for job in running.values()) - stage.memory_mb
+            free = min(free, left // stage.pool_mb)
+        return max(1, free)
+
+    def _start(self, stage: Stage, echo: bool, workers: int = 1) -> "_Job":
+        """Launch a stage with its output teed to its log (and the terminal, if echo)."""
+        log = self.log_dir / f"{stage.name}.log"
+        if echo:
+            print(f"\n{'=' * 60}\n  {stage.name}: {' '.join(stage.command[1:])}\n{'=' * 60}", flush=True)
+        items = self._items_path(stage)
+        items.unlink(missing_ok=True)
+        env = {**os.environ, "PYTHONUNBUFFERED": "1", ITEMS_ENV: str(items)}
+        if stage.pool_mb:
+            env[WORKERS_ENV] = str(workers)
+        proc = subprocess.Popen(self._launch_command(stage), cwd=self.root, env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        thread = threading.Thread(target=_copy_output, args=(proc.stdout, log, echo), daemon=True)
+        thread.start()
+        return _Job(stage, proc, log, thread, echo, time.time(), workers)
+
+    def _launch_command(self, stage: Stage) -> list[str]:
+        """stage.command, under the profiler if this run is profiled (the fingerprint keeps stage.command)."""
+        if not self.profile:
+            return stage.command
+        runner, *rest = stage.command
+        if runner == "node":
+            PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+            kind = "heap" if self.profile == "memory" else "cpu"
+            name = f"{stage.name}-{time.strftime('%Y%m%d-%H%M%S')}.{kind}profile"
+            return [runner, f"--{kind}-prof", f"--{kind}-prof-dir={PROFILE_DIR}", f"--{kind}-prof-name={name}",
+                    *rest]
+        return [runner, "scripts/profile-script.py", "--mode", self.profile, "--name", stage.name, *rest]
+
+    def _call(self, stage: Stage, builder: Callable[[], None], echo: bool):
+        """Run an in-process builder with its output teed to the stage log."""
+        log = self.log_dir / f"{stage.name}.log"
+        if echo:
+            print(f"\n{'=' * 60}\n  {stage.name}: in-process\n{'=' * 60}", flush=True)
+        items = self._items_path(stage)
+        items.unlink(missing_ok=True)
+        meter = InProcessMeter()
+        t0 = time.time()
+        meter.start()
+        previous, os.environ[ITEMS_ENV] = os.environ.get(ITEMS_ENV), str(items)
+        counters = counter_snapshot()
+        profiler = Profiler(self.profile, stage.name) if self.profile else contextlib.nullcontext()
+        with open(log, "w", encoding="utf-8") as f, contextlib.redirect_stdout(_Tee(f, echo)):
+            try:
+                with profiler:
+                    builder()
+                code = 0
+            except Exception:
+                traceback.print_exc(file=sys.stdout)
+                code = 1
+            finally:
+                trace_counters(counter_delta(counters))
+                if previous is None:
+                    del os.environ[ITEMS_ENV]
+                else:
+                    os.environ[ITEMS_ENV] = previous
+        return code, time.time() - t0, meter.stop(), log
+
+    @staticmethod
+    def _wait(running: dict) -> tuple["_Job", int, dict]:
+        """Block until any running stage exits: (job, exit code, resources it used)."""
+        if hasattr(os, "wait4"):
+            pid = -1
+            io = None
+            if hasattr(os, "WNOWAIT"):
+                # Read the exited stage's I/O counters before reaping it
+                pid = os.waitid(os.P_ALL, 0, os.WEXITED | os.WNOWAIT).si_pid
+                io = proc_io(pid)
+            pid, wait_status, usage = os.wait4(pid, 0)
+            job = running.pop(pid)
+            code = job.proc.returncode = os.waitstatus_to_exitcode(wait_status)
+            resources = usage_resources(usage, io)
+        else:
+            while not (done := [pid for pid, j in running.items() if j.proc.poll() is not None]):
+                time.sleep(0.2)
+            job = running.pop(done[0])
+            code, resources = job.proc.returncode, {}
+        job.thread.join()
+        return job, code, resources
+
+    def critical_path(self, timings: dict, in_process: list[str] = ()) -> tuple[list[str], float]:
+        """Longest chain of stages run, by wall time, through their ordering constraints.
+
+        ``timings`` is in finishing order. In-process builders run one after
+        another on the runner's thread, so each also follows the previous
+        one in ``in_process``.
+        """
+        after = dict(zip(in_process[1:], in_process))
+        best = {}  # name -> (length, path)
+        for name in timings:
+            before = [w for w in self.waits[name] if w in best]
+            if name in after:
+                before.append(after[name])
+            prev = max((best[w] for w in before), default=(0.0, []))
+            best[name] = (prev[0] + timings[name][0], prev[1] + [name])
+        length, path = max(best.values())
+        return path, length
+
+    def _rel(self, path: Path) -> str:
+        return path.relative_to(self.root).as_posix() if path.is_relative_to(self.root) else str(path)
+
+    def mark_current(self, stages: list[Stage]) -> list[str]:
+        """Record stages whose outputs all exist as up to date, without running them."""
+        marked = []
+        for stage in stages:
+            if all((self.root / p).exists() for p in stage.outputs):
+                self.record(stage, 0.0)
+                marked.append(stage.name)
+        self.save_state()
+        return marked
+
+
+
+# ---------------------------------------------------------------------------
+# Process helpers
+# ---------------------------------------------------------------------------
+
+@dataclass
+class _Job:
+    stage: Stage
+    proc: subprocess.Popen
+    log: Path
+    thread: threading.Thread
+    echo: bool
+    started: float
+    workers: int = 1  # job slots held: a letter_map stage's pool size
+
+    @property
+    def memory_mb(self) -> int:
+        return self.stage.memory_mb + self.workers * self.stage.pool_mb
+
+
+def _copy_output(stream, log: Path, echo: bool) -> None:
+    with stream, open(log, "wb") as out:
+        for chunk in iter(lambda: stream.read1(1 << 16), b""):
+            out.write(chunk)
+            if echo:
+                sys.stdout.buffer.write(chunk)
+                sys.stdout.buffer.flush()
+
+
+class _Tee:
+    """stdout replacement writing to a log file and, if echo, the terminal."""
+
+    def __init__(self, log, echo: bool):
+        self.log, self.terminal = log, sys.stdout if echo else None
+
+    def write(self, text: str) -> int:
+        self.log.write(text)
+        if self.terminal:
+            self.terminal.write(text)
+        return len(text)
+
+    def flush(self) -> None:
+        self.log.flush()
+        if self.terminal:
+            self.terminal.flush()
+
+
+def _tail(log: Path, lines: int = 15) -> list[str]:
+    text = log.read_text(encoding="utf-8", errors="replace")
+    return text.rstrip().splitlines()[-lines:]
+
+
+def available_memory_mb() -> int | None:
+    """MemAvailable from /proc/meminfo, or None where that isn't available."""
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return None
@@ -0,0 +1,447 @@
+"""
+Place detail page data (ADR-049).
+
+build_place_pages() writes place-pages.json. The inputs it shares with the
+other page builders can be passed in already loaded (see derived_data.py);
+anything not passed is read from data/:
+
+  data/places.geojson
+  data/places-enriched.json
+  data/images/pdf-presentation/place-photo-links.json
+  data/image-registry.json
+  data/corrected-letters.json (via the corpus store, scripts/corpus.py)
+
+Writes:
+  data/place-pages.json
+  apps/website/public/data/place-pages.json  (copy)
+
+PlacePages keeps the pages in memory for `rebuild-derived-data.py --watch`.
+
+The CLI is scripts/build-place-pages-data.py.
+"""
+
+import json
+from pathlib import Path
+
+from corpus import load_corpus
+from json_output import copy_atomic, json_array, json_item, write_json_atomic, write_text_atomic
+from place_resolver import PlaceResolver, is_named_location
+from stage_trace import count_items
+
+# ---------------------------------------------------------------------------
+# Paths
+# ---------------------------------------------------------------------------
+
+BASE = Path(__file__).resolve().parent.parent
+DATA = BASE / "data"
+GEOJSON_PATH = DATA / "places.geojson"
+ENRICHED_PATH = DATA / "places-enriched.json"
+PHOTO_LINKS_PATH = DATA / "place-photo-links.json"
+IMAGE_REGISTRY_PATH = DATA / "image-registry.json"
+OUTPUT_PATH = DATA / "place-pages.json"
+FRONTEND_OUTPUT = BASE / "apps" / "website" / "public" / "data" / "place-pages.json"
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def make_excerpt(text: str, max_chars: int = 200) -> str:
+    """Return the first sentence or up to max_chars of text."""
+    if not text:
+        return ""
+    # Take the first non-empty line
+    first_line = next((l.strip() for l in text.splitlines() if l.strip()), "")
+    if not first_line:
+        return ""
+    if len(first_line) <= max_chars:
+        return first_line
+    return first_line[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+# ---------------------------------------------------------------------------
+# Step 1: Ensure Ravnholt and Kongeåen are in places.geojson
+# ---------------------------------------------------------------------------
+
+def ensure_places_in_geojson():
+    """Add Ravnholt and Kongeåen to places.geojson if not already present."""
+    with open(GEOJSON_PATH, encoding="utf-8") as f:
+        geojson = json.load(f)
+
+    existing_names = {
+        feat["properties"].get("place", "").strip().lower()
+        for feat in geojson["features"]
+    }
+
+    places_to_add = [
+        {
+            "name": "Ravnholt",
+            "lat": 55.18,
+            "lng": 8.85,
+            "place_id": 76,
+        },
+        {
+            "name": "Kongeåen",
+            "lat": 55.43,
+            "lng": 9.28,
+            "place_id": 77,
+        },
+    ]
+
+    added = []
+    for entry in places_to_add:
+        if entry["name"].lower() not in existing_names:
+            feature = {
+                "type": "Feature",
+                "properties": {
+                    "place_id": entry["place_id"],
+                    "place": entry["name"],
+                },
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [entry["lng"], entry["lat"]],
+                },
+            }
+            geojson["features"].append(feature)
+            added.append(entry["name"])
+            print(f"  Added to places.geojson: {entry['name']}")
+
+    if added:
+        write_json_atomic(GEOJSON_PATH, geojson, ensure_ascii=False, indent=2)
+        print(f"  Saved updated places.geojson ({len(geojson['features'])} features)")
+    else:
+        print("  Ravnholt and Kongeåen already present in places.geojson")
+
+    return geojson
+
+
+# ---------------------------------------------------------------------------
+# Step 2: Load all source data
+# ---------------------------------------------------------------------------
+
+def load_place_mapping():
+    with open(PHOTO_LINKS_PATH, encoding="utf-8") as f:
+        photo_links_raw = json.load(f)
+    return photo_links_raw.get("place_mapping", photo_links_raw)
+
+
+def load_data(image_registry=None, letters=None):
+    with open(ENRICHED_PATH, encoding="utf-8") as f:
+        enriched = json.load(f)
+
+    place_mapping = load_place_mapping()
+
+    if image_registry is None:
+        with open(IMAGE_REGISTRY_PATH, encoding="utf-8") as f:
+            image_registry = json.load(f)
+
+    if letters is None:
+        letters = load_corpus().letters("corrected")
+
+    return enriched, place_mapping, image_registry, letters
+
+
+# ---------------------------------------------------------------------------
+# Step 3: Build place-id mapping from photo-links keys
+# ---------------------------------------------------------------------------
+
+def build_place_id_map(geojson_features, resolver):
+    """Return a dict mapping geojson place name -> short place ID.
+
+    Priority:
+    1. place_mapping entries that:
+       - have a geojson_key matching this feature, AND
+       - are primary place entries (NOT named locations with aliases+letter_references)
+    2. Slugified geojson name, which also covers place_mapping short keys
+       equal to the slug (e.g. kongeaaen, whose geojson_key is null)
+    """
+    place_id_map = {}  # geojson name -> short id
+    for feat in geojson_features:
+        name = feat["properties"].get("place", "").strip()
+        place_id_map[name] = resolver.place_id(name)
+    return place_id_map
+
+
+def index_place_mapping(place_mapping):
+    """Return (by_geojson_key, by_short_key) over (position, short_key, entry) rows.
+
+    by_geojson_key lists the entries sharing a geojson_key in mapping order,
+    so per-place lookups don't rescan place_mapping.
+    """
+    by_geojson_key = {}
+    by_short_key = {}
+    for position, (short_key, entry) in enumerate(place_mapping.items()):
+        row = (position, short_key, entry)
+        gk = (entry.get("geojson_key") or "").strip()
+        by_geojson_key.setdefault(gk, []).append(row)
+        by_short_key[short_key] = row
+    return by_geojson_key, by_short_key
+
+
+# ---------------------------------------------------------------------------
+# Step 4: Build image lookup by place short-id
+# ---------------------------------------------------------------------------
+
+def build_image_lookup(image_registry):
+    """Return dict: place_short_id -> list of image objects."""
+    lookup = {}
+    for img in image_registry:
+        for place_id in img.get("places", []):
+            lookup.setdefault(place_id, []).append(img)
+    return lookup
+
+
+# ---------------------------------------------------------------------------
+# Step 5: Build letter lookup by geojson place name
+# ---------------------------------------------------------------------------
+
+def build_letter_lookup(letters, resolver):
+    """Return dict: geojson place name -> list of letters placed there.
+
+    A letter place matches a geojson place by exact name, by alias, or by
+    slug (to handle minor spelling differences, e.g. Gizycko vs Giżycko).
+    Each distinct letter place is resolved once, in order of first use.
+    """
+    by_place = {}
+    for letter in letters:
+        place = (letter.place or "").strip()
+        if place:
+            by_place.setdefault(place, []).append(letter)
+
+    lookup = {}
+    for place, place_letters in by_place.items():
+        for name in resolver.matches(place, ("exact", "alias", "slug")):
+            lookup.setdefault(name, []).extend(place_letters)
+    return lookup
+
+
+# ---------------------------------------------------------------------------
+# Step 6: Find named locations (sub-entries in place_mapping)
+# ---------------------------------------------------------------------------
+
+def build_named_locations(mapping_entries):
+    """Return list of named_location objects for the place_mapping entries
+    sharing a geojson_key that have both aliases and letter_references
+    (i.e. named locations within the place, not the primary place entry).
+    """
+    named_locations = []
+    for _, short_key, entry in mapping_entries:
+        if not is_named_location(entry):
+            continue
+        loc = {
+            "name": short_key.replace("_", " ").title(),
+            "aliases": entry.get("aliases", []),
+            "description": entry.get("description", ""),
+            "date_range": entry.get("date_range", ""),
+        }
+        # Use a nicer name from description or keep slug-derived
+        named_locations.append(loc)
+    return named_locations
+
+
+# ---------------------------------------------------------------------------
+# Step 7: Build a single place page object
+# ---------------------------------------------------------------------------
+
+def build_place_page(feat, place_id, enriched, mapping_index, image_lookup, letter_lookup):
+    name = feat["properties"].get("place", "").strip()
+    coords = feat["geometry"]["coordinates"]
+    lng, lat = coords[0], coords[1]
+
+    # Enrichment data (keyed by geojson name)
+    enrich = enriched.get(name, {})
+    by_geojson_key, by_short_key = mapping_index
+    mapping_entries = by_geojson_key.get(name, [])
+
+    # Description: prefer place_mapping description over enriched
+    # Find the first primary place_mapping entry for this place (not a
+    # named-location sub-entry), matched by geojson_key or by the short key
+    # equaling the place_id
+    candidates = list(mapping_entries)
+    if place_id in by_short_key:
+        candidates.append(by_short_key[place_id])
+    primary = [row for row in candidates if not is_named_location(row[2])]
+    description = min(primary, key=lambda row: row[0])[2].get("description", "") if primary else ""
+
+    # Collect photos from image registry using this place's short ID and the
+    # IDs of any named-location sub-entries that share the same geojson_key
+    photo_ids_to_check = {place_id}
+    for _, short_key, _ in mapping_entries:
+        photo_ids_to_check.add(short_key)
+
+    seen_img_ids = set()
+    photos = []
+    for pid in photo_ids_to_check:
+        for img in image_lookup.get(pid, []):
+            if img.get("id") not in seen_img_ids:
+                seen_img_ids.add(img.get("id"))
+                photo = {
+                    "image_id": img.get("id", ""),
+                    "path": img.get("path", ""),
+                    "description_da": img.get("description_da", ""),
+                    "description": img.get("description", ""),
+                    "date_estimate": img.get("date_estimate", ""),
+                    "category": img.get("category", ""),
+                }
+                photos.append(photo)
+
+    # Letters matching this geojson name (uses slug-normalized matching + aliases)
+    matched_letters = list(letter_lookup.get(name, []))
+    # Sort by date for stable output
+    matched_letters.sort(key=lambda l: l.date.isoformat() if l.date else "")
+    letter_summaries = []
+    for letter in matched_letters:
+        summary = {
+            "letter_id": letter.id,
+            "date": letter.date.isoformat() if letter.date else "",
+            "sender": letter.sender,
+            "recipient": letter.recipient,
+            "excerpt": make_excerpt(letter.text),
+        }
+        letter_summaries.append(summary)
+
+    # Named locations (sub-places like Villa Vinterhistorie)
+    named_locations = build_named_locations(mapping_entries)
+
+    page = {
+        "id": place_id,
+        "name": name,
+        "modern_name": enrich.get("modern_name", ""),
+        "country": enrich.get("country", ""),
+        "lat": round(lat, 6),
+        "lng": round(lng, 6),
+        "wikidata_id": enrich.get("wikidata_id", ""),
+        "wikipedia_url": enrich.get("wikipedia_url", enrich.get("wikipedia_da_url", "")),
+        "description": description,
+        "letter_count": len(matched_letters),
+        "photos": photos,
+        "letters": letter_summaries,
+        "named_locations": named_locations,
+    }
+
+    return page
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+
+class PlacePages:
+    """Every place page, kept in memory for incremental updates.
+
+    An image registry edit rebuilds only the places whose photo IDs the
+    changed images carry (update_images()). A place-photo-links edit can
+    move letters and IDs between places, so set_place_mapping() re-resolves
+    every place, which is cheap, and re-serialises only the pages that
+    differ.
+    """
+
+    def __init__(self, geojson, enriched, place_mapping, image_registry, letters):
+        self.features = geojson["features"]
+        self.enriched = enriched
+        self.letters = letters
+        self.image_lookup = build_image_lookup(image_registry)
+        self.pages: dict[int, dict] = {}  # feature position -> page
+        self.texts: dict[int, str] = {}
+        self.set_place_mapping(place_mapping)
+
+    def set_place_mapping(self, place_mapping) -> list[str]:
+        """Re-resolve every place against a new mapping; returns the names of changed pages."""
+        self.resolver = PlaceResolver.from_geojson(self.features, place_mapping)
+        self.place_id_map = build_place_id_map(self.features, self.resolver)
+        self.letter_lookup = build_letter_lookup(self.letters, self.resolver)
+        self.mapping_index = index_place_mapping(place_mapping)
+        return self._rebuild(range(len(self.features)))
+
+    def update_images(self, image_registry, changed) -> list[str]:
+        """Rebuild the places ``changed`` images (old and new versions) are filed under."""
+        self.image_lookup = build_image_lookup(image_registry)
+        changed_ids = {place_id for img in changed for place_id in img.get("places", [])}
+        by_geojson_key = self.mapping_index[0]
+        affected = []
+        for pos, feat in enumerate(self.features):
+            name = feat["properties"].get("place", "").strip()
+            photo_ids = {self._place_id(name)} | {key for _, key, _ in by_geojson_key.get(name, [])}
+            if photo_ids & changed_ids:
+                affected.append(pos)
+        return self._rebuild(affected)
+
+    def _place_id(self, name: str) -> str:
+        return self.place_id_map.get(name) or self.resolver.place_id(name)
+
+    def _rebuild(self, positions) -> list[str]:
+        changed = []
+        for pos in positions:
+            feat = self.features[pos]
+            page = build_place_page(
+                feat,
+                self._place_id(feat["properties"].get("place", "").strip()),
+                self.enriched,
+                self.mapping_index,
+                self.image_lookup,
+                self.letter_lookup,
+            )
+            if page != self.pages.get(pos):
+                self.pages[pos] = page
+                self.texts[pos] = json_item(page)
+                changed.append(page["name"])
+        return changed
+
+    def order(self) -> list[int]:
+        # Sort by name for stable output
+        return sorted(self.pages, key=lambda pos: self.pages[pos]["name"].lower())
+
+    def write(self) -> None:
+        write_text_atomic(OUTPUT_PATH, json_array(self.texts[pos] for pos in self.order()))
+
+        # Copy to frontend
+        if FRONTEND_OUTPUT.parent.exists():
+            copy_atomic(OUTPUT_PATH, FRONTEND_OUTPUT)
+            print(f"  Copied to {FRONTEND_OUTPUT}")
+        else:
+            print(f"  WARNING: Frontend output directory not found: {FRONTEND_OUTPUT.parent}")
+
+    def print_stats(self) -> None:
+        place_pages = list(self.pages.values())
+        total = len(place_pages)
+        with_photos = sum(1 for p in place_pages if p["photos"])
+        with_letters = sum(1 for p in place_pages if p["letters"])
+        total_letter_refs = sum(p["letter_count"] for p in place_pages)
+
+        print("\n=== Stats ===")
+        print(f"  Total places:           {total}")
+        print(f"  Places with photos:     {with_photos}")
+        print(f"  Places with letters:    {with_letters}")
+        print(f"  Total letter references:{total_letter_refs}")
+
+
+def build_place_pages(image_registry=None, letters=None):
+    """Build and write place-pages.json.
+
+    image_registry and letters (corpus Letter records) are only read, so
+    callers may share them with other builders.
+    """
+    print("=== build-place-pages-data.py ===")
+
+    # Step 1: ensure geojson has Ravnholt and Kongeåen
+    print("\n[1] Checking places.geojson for required entries...")
+    geojson = ensure_places_in_geojson()
+
+    # Step 2: load source data
+    print("\n[2] Loading source data...")
+    enriched, place_mapping, image_registry, letters = load_data(image_registry, letters)
+    print(f"  Enriched places: {len(enriched)}")
+    print(f"  Photo-link entries: {len(place_mapping)}")
+    print(f"  Images: {len(image_registry)}")
+    print(f"  Letters: {len(letters)}")
+
+    # Steps 3-5: ID map, lookups and pages
+    print("\n[3] Building place ID map and place pages...")
+    pages = PlacePages(geojson, enriched, place_mapping, image_registry, letters)
+
+    # Step 6: write output
+    print(f"\n[4] Writing {len(pages.pages)} place pages to {OUTPUT_PATH}...")
+    pages.write()
+    count_items(len(pages.pages), "places")
+
+    # Step 7: print stats
+    pages.print_stats()
@@ -0,0 +1,187 @@
+"""
+Place resolution: letter place strings and name variants → geojson places.
+
+Built once from the places.geojson features (and, optionally, the
+photo-link place_mapping for short IDs). Every key form of every place sits
+in a hash map, so resolving N strings costs N lookups rather than N × places
+slugify() calls:
+
+    resolver = PlaceResolver.from_geojson(features, place_mapping)
+    resolver.resolve("Løtzen (Giżycko)")       # "Løtzen (Gizycko)"
+    resolver.matches("Feldburg", ("alias",))   # every place keyed that way
+    resolver.place_id("Løtzen (Gizycko)")      # "loetzen"
+
+Key kinds, in the order resolve() tries them:
+
+    exact    the stripped geojson name
+    alias    a stripped geojson alias, or an extra key passed in
+    slug     slugify() of the name                   (Gizycko == Giżycko)
+    folded   fold() of the name and aliases (special characters and
+             diacritics stripped, parenthetical dropped, lowercased:
+             "Lyk (Ełk)" → "lyk", "Løtzen" → "lotzen")
+
+A key can map to several places (two places slugifying alike); matches()
+returns all of them in geojson order and resolve() the first. There is no
+fuzzy fallback: a near miss would attribute one place's letters or images
+to another.
+"""
+
+import re
+import unicodedata
+
+from profiling import counted
+
+KEY_KINDS = ("exact", "alias", "slug", "folded")
+
+SPECIAL_CHAR_MAP = {
+    "ø": "o",
+    "Ø": "O",
+    "æ": "ae",
+    "Æ": "Ae",
+    "å": "aa",
+    "Å": "Aa",
+    "ö": "o",
+    "Ö": "O",
+    "ä": "a",
+    "Ä": "A",
+    "ü": "u",
+    "Ü": "U",
+    "ß": "ss",
+}
+
+
+def strip_diacritics(text: str) -> str:
+    """Replace known special characters and strip remaining diacritics."""
+    for ch, replacement in SPECIAL_CHAR_MAP.items():
+        text = text.replace(ch, replacement)
+    # Strip any remaining combining diacritical marks
+    normalized = unicodedata.normalize("NFD", text)
+    stripped = "".join(c for c in normalized if unicodedata.category(c) != "Mn")
+    return stripped
+
+
+@counted
+def slugify(name: str) -> str:
+    """Slugify a place name to a URL-safe ID.
+
+    - Strip diacritics and special characters
+    - Lowercase
+    - Replace spaces, parentheses, commas, slashes and similar with underscores
+    - Collapse repeated underscores
+    - Strip leading/trailing underscores
+    """
+    s = strip_diacritics(name.strip())
+    s = s.lower()
+    # Replace non-alphanumeric characters (except underscores) with underscore
+    s = re.sub(r"[^a-z0-9]+", "_", s)
+    s = re.sub(r"_+", "_", s)
+    s = s.strip("_")
+    return s
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a place name for fuzzy comparison.
+
+    Strips diacritics, lowercases, and removes parenthetical suffixes.
+    """
+    # Remove parenthetical parts e.g. "Arys (Orzysz)" -> "arys"
+    base = name.split("(")[0].strip()
+    # Strip diacritics
+    nfkd = unicodedata.normalize("NFKD", base)
+    ascii_name = "".join(c for c in nfkd if not unicodedata.combining(c))
+    return ascii_name.lower().strip()
+
+
+def fold(name: str) -> str:
+    """normalize_name() after strip_diacritics(), so ø/æ/å fold as well."""
+    return normalize_name(strip_diacritics(name))
+
+
+def is_named_location(entry: dict) -> bool:
+    """place_mapping sub-entries (named locations) carry aliases and letter_references."""
+    return "aliases" in entry and "letter_references" in entry
+
+
+def primary_place_ids(place_mapping: dict) -> dict[str, str]:
+    """geojson name → photo-link short key, for primary (non named-location) entries."""
+    ids = {}
+    for short_key, entry in place_mapping.items():
+        if is_named_location(entry):
+            continue
+        gk = entry.get("geojson_key")
+        if gk:
+            ids[gk.strip()] = short_key
+    return ids
+
+
+class PlaceResolver:
+    """Hash-map lookups from any key form of a place name to geojson places."""
+
+    def __init__(self, places: list[tuple[str, list[str]]], place_ids: dict | None = None):
+        """places: [(name, aliases)] in geojson order; place_ids: name → short ID."""
+        self.names = [name.strip() for name, _ in places]
+        self._order = {name: i for i, name in reversed(list(enumerate(self.names)))}
+        self._keys = {kind: {} for kind in KEY_KINDS}
+        for name, aliases in places:
+            name = name.strip()
+            aliases = [a.strip() for a in aliases]
+            self._add("exact", name, name)
+            self._add("slug", slugify(name), name)
+            self._add("folded", fold(name), name)
+            for alias in aliases:
+                self._add("alias", alias, name)
+                self._add("folded", fold(alias), name)
+
+        place_ids = place_ids or {}
+        self._place_ids = {name: place_ids.get(name) or slugify(name) for name in self.names}
+
+    def _add(self, kind: str, key: str, name: str) -> None:
+        if not key:
+            return
+        bucket = self._keys[kind].setdefault(key, [])
+        if name not in bucket:
+            bucket.append(name)
+
+    @classmethod
+    def from_geojson(cls, features: list[dict], place_mapping: dict | None = None) -> "PlaceResolver":
+        places = [
+            (feat["properties"].get("place", ""), feat["properties"].get("aliases") or [])
+            for feat in features
+        ]
+        return cls(places, primary_place_ids(place_mapping or {}))
+
+    # -- queries --------------------------------------------------------------
+
+    @staticmethod
+    def key(kind: str, text: str) -> str:
+        """The ``kind`` key of a query string."""
+        if kind == "slug":
+            return slugify(text)
+        if kind == "folded":
+            return fold(text)
+        return text.strip()
+
+    def matches(self, text: str, kinds: tuple[str, ...] = KEY_KINDS) -> list[str]:
+        """Every place any of ``kinds`` maps text to, in geojson order."""
+        found = {}
+        for kind in kinds:
+            for name in self._keys[kind].get(self.key(kind, text), ()):
+                found[name] = None
+        if len(found) < 2:
+            return list(found)
+        return sorted(found, key=lambda n: self._order.get(n, len(self._order)))
+
+    def resolve(self, text: str) -> str | None:
+        """The place text refers to: the first hit in KEY_KINDS order, or None."""
+        if not text or not text.strip():
+            return None
+        for kind in KEY_KINDS:
+            hits = self._keys[kind].get(self.key(kind, text))
+            if hits:
+                return hits[0]
+        return None
+
+    def place_id(self, name: str) -> str:
+        """Short place ID: the photo-link key for the place, else its slug."""
+        name = name.strip()
+        return self._place_ids.get(name) or slugify(name)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Run any scripts/ entry point under a profiler (scripts/profiling.py).
+
+Usage:
+    python scripts/profile-script.py scripts/audit-text-quality.py               # cProfile
+    python scripts/profile-script.py --mode sample scripts/build-letter-images.py
+    python scripts/profile-script.py --top 40 scripts/apply-corrections.py --workers 1
+    python scripts/profile-script.py --mode memory scripts/build-person-pages-data.py
+
+Everything after the script path is passed to the script. The script runs
+as __main__, exactly as `python <script>` would run it, and its exit code
+is kept. The mode defaults to $PIPELINE_PROFILE, else cprofile.
+run-pipeline.py --profile launches its Python stages through this wrapper.
+"""
+
+import argparse
+import os
+import runpy
+import sys
+from pathlib import Path
+
+from profiling import MODES, TOP, Profiler, profile_mode
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile a pipeline script")
+    parser.add_argument("--mode", choices=MODES, help="cprofile (default), sample or memory")
+    parser.add_argument("--top", type=int, default=TOP, help="Functions in the report")
+    parser.add_argument("--interval", type=float, metavar="MS", help="sample: milliseconds between samples")
+    parser.add_argument("--name", help="Name for the output files (default: the script's)")
+    parser.add_argument("script", help="Script to run")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the script")
+    args = parser.parse_args()
+
+    script = os.path.abspath(args.script)
+    if not os.path.exists(script):
+        parser.error(f"no such script: {args.script}")
+    mode = profile_mode(args.mode) or "cprofile"
+
+    # As `python script args`: argv and the script's directory on sys.path
+    sys.argv = [args.script, *args.args]
+    sys.path[0] = os.path.dirname(script)
+    code = 0
+    with Profiler(mode, args.name or Path(script).stem, root_file=script, top=args.top,
+                  interval_ms=args.interval):
+        try:
+            runpy.run_path(script, run_name="__main__")
+        except SystemExit as e:
+            code = e.code
+    sys.exit(code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,542 @@
+"""
+Opt-in profiling for any script, and always-on call counters for hot helpers.
+
+Profiling is switched on per run, for any scripts/ entry point, with
+profile-script.py or, for pipeline stages, PIPELINE_PROFILE / --profile:
+
+    python scripts/profile-script.py scripts/audit-text-quality.py
+    python scripts/profile-script.py --mode sample scripts/scan-epithets.py --workers 1
+    PIPELINE_PROFILE=sample python scripts/rebuild-derived-data.py --force
+    python scripts/run-pipeline.py --profile cprofile --force --only sentences
+
+Each profiled run writes to data/.cache/profiles/<script>-<time>.*:
+
+  cprofile   .prof, the full pstats dump (python -m pstats, snakeviz)
+  sample     .collapsed.txt, folded stacks (flamegraph.pl, inferno,
+             speedscope), and .speedscope.json for https://www.speedscope.app
+  memory     .memory.json, peak memory and allocation sites per phase
+
+and prints the top functions by own and cumulative time, or for memory,
+the phase table. The sampler is
+stdlib-only: a thread that records the main thread's stack every
+PIPELINE_PROFILE_INTERVAL milliseconds (default 5). It has lower overhead
+than cProfile on call-heavy code, but misses anything shorter than the
+interval. Neither sees inside letter_map worker processes; profile
+per-letter work with --workers 1. Node stages run under --cpu-prof,
+which writes a .cpuprofile (speedscope opens it too), or --heap-prof in
+memory mode.
+
+The memory mode traces allocations with tracemalloc. A script marks its
+phases, which do nothing unless the memory mode is on:
+
+    with phase("load"):
+        sentences = load_sentences(path)
+
+At the end of each phase it records the phase's peak traced memory, what
+is still allocated and the resident size, and snapshots the allocations
+to find the sites that grew the most. A site is the innermost line of
+this repo's code on the allocating stack, so memory a library allocates
+on a script's behalf is charged to the script's call. Phases don't nest.
+
+Long-running stages can also take a soft memory limit (--memory-limit or
+PIPELINE_MEMORY_LIMIT_MB) and check it with over_memory_limit() at a
+phase boundary, falling back to a streaming path once over it (see
+generate-emotions-cvp.py).
+
+Known hot helpers carry @counted, which counts calls and their time
+whether or not a profiler runs:
+
+    @counted
+    def levenshtein(a, b): ...
+
+Time is measured on the outermost call only, so recursive helpers aren't
+counted twice. The counts are printed with the profile report and added to
+the stage's trace in a pipeline run (stage_trace.py). letter_map.py sends
+the counts back from its worker processes.
+"""
+
+import atexit
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import linecache
+import multiprocessing
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from stage_trace import count_calls, current_rss_mb
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT = SCRIPT_DIR.parent
+PROFILE_DIR = ROOT / "data" / ".cache" / "profiles"
+
+PROFILE_ENV = "PIPELINE_PROFILE"
+INTERVAL_ENV = "PIPELINE_PROFILE_INTERVAL"
+MEMORY_LIMIT_ENV = "PIPELINE_MEMORY_LIMIT_MB"
+MODES = ("cprofile", "sample", "memory")
+TOP = 25
+INTERVAL_MS = 5.0
+# memory: stack frames kept per allocation, and sites reported per phase
+MEMORY_FRAMES = 8
+MEMORY_SITES = 10
+
+
+# ---------------------------------------------------------------------------
+# Always-on counters
+# ---------------------------------------------------------------------------
+
+class _CallCounter:
+    __slots__ = ("calls", "seconds", "depth")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.depth = 0
+
+
+COUNTERS: dict[str, _CallCounter] = {}
+
+
+def counted(fn):
+    """Count calls of fn and the time spent in its outermost calls."""
+    counter = COUNTERS.setdefault(fn.__name__, _CallCounter())
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        counter.calls += 1
+        if counter.depth:
+            return fn(*args, **kwargs)
+        counter.depth += 1
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            counter.seconds += time.perf_counter() - t0
+            counter.depth -= 1
+
+    return wrapper
+
+
+def counter_snapshot() -> dict[str, tuple[int, float]]:
+    return {name: (c.calls, c.seconds) for name, c in COUNTERS.items() if c.calls}
+
+
+def counter_delta(before: dict[str, tuple[int, float]]) -> dict[str, tuple[int, float]]:
+    """Counts since ``before`` (a counter_snapshot())."""
+    delta = {}
+    for name, (calls, seconds) in counter_snapshot().items():
+        calls0, seconds0 = before.get(name, (0, 0.0))
+        if calls > calls0:
+            delta[name] = (calls - calls0, seconds - seconds0)
+    return delta
+
+
+def merge_counters(delta: dict[str, tuple[int, float]]) -> None:
+    """Add counts made elsewhere (a worker process) to this process's counters."""
+    for name, (calls, seconds) in delta.items():
+        counter = COUNTERS.setdefault(name, _CallCounter())
+        counter.calls += calls
+        counter.seconds += seconds
+
+
+def format_counters(counts: dict[str, tuple[int, float]]) -> list[str]:
+    return [f"  {name:32} {calls:>10} calls {seconds:9.2f}s {seconds / calls * 1e6:9.1f} us/call"
+            for name, (calls, seconds) in sorted(counts.items(), key=lambda kv: -kv[1][1])]
+
+
+def trace_counters(counts: dict[str, tuple[int, float]]) -> None:
+    """Add counts to the current stage's trace (a no-op outside a pipeline run)."""
+    for name, (calls, seconds) in counts.items():
+        count_calls(name, calls, seconds)
+
+
+def _trace_at_exit() -> None:
+    # Pool workers' counts are merged by letter_map instead
+    if multiprocessing.parent_process() is None:
+        trace_counters(counter_snapshot())
+
+
+# A stage's own process reports its counts as it exits
+atexit.register(_trace_at_exit)
+
+
+# ---------------------------------------------------------------------------
+# Profilers
+# ---------------------------------------------------------------------------
+
+def _where(filename: str) -> str:
+    """A source file, relative to the repo or as its last two path parts."""
+    path = Path(filename)
+    if path.is_absolute() and path.is_relative_to(ROOT):
+        return path.relative_to(ROOT).as_posix()
+    return "/".join(path.parts[-2:])
+
+
+def _label(filename: str, name: str, line: int) -> str:
+    if filename == "~":  # cProfile's file for built-ins
+        return name.replace(";", ",")
+    return f"{name} ({_where(filename)}:{line})".replace(";", ",")
+
+
+class _Sampler:
+    """Samples the main thread's stack from a background thread."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._main = threading.main_thread().ident
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._main)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append((code.co_filename, code.co_name, code.co_firstlineno))
+                frame = frame.f_back
+            self.stacks[tuple(reversed(stack))] += 1
+
+
+_ROOT_PREFIX = str(ROOT) + os.sep
+
+
+def _site(frames: tuple[tuple[str, int], ...]) -> tuple[str, int] | None:
+    """The innermost frame of this repo's code on an allocation's stack, else its innermost frame.
+
+    None for the memory mode's own allocations (snapshots and their sites).
+    """
+    site = None
+    for frame in frames:  # innermost frame first
+        if frame[0] == __file__ or frame[0] == tracemalloc.__file__:
+            return None
+        if site is None and frame[0].startswith(_ROOT_PREFIX):
+            site = frame
+    return site or frames[0]
+
+
+def _sites() -> dict[tuple[str, int], list[int]]:
+    """{site: [bytes, blocks]} allocated now, from a snapshot (which is dropped)."""
+    sites: dict[tuple[str, int], list[int]] = {}
+    for frames, size, blocks in _stacks(tracemalloc.take_snapshot()):
+        key = _site(frames)
+        if key is not None:
+            site = sites.setdefault(key, [0, 0])
+            site[0] += size
+            site[1] += blocks
+    return sites
+
+
+def _stacks(snapshot: tracemalloc.Snapshot):
+    """(frames innermost first, bytes, blocks) per distinct allocation stack.
+
+    Snapshot.statistics("traceback") makes an object per trace, and
+    everything allocated here is traced too: on Python 3.11.7, 2.8M traces
+    took 45s that way against 11s grouping the snapshot's raw (domain,
+    size, frames, total) tuples, a private attribute of Snapshot.traces.
+    The public API is the fallback where that attribute is missing.
+    """
+    raw = getattr(snapshot.traces, "_traces", None)
+    if raw is None:
+        for stat in snapshot.statistics("traceback"):
+            frames = tuple((f.filename, f.lineno) for f in reversed(stat.traceback))
+            yield frames, stat.size, stat.count
+        return
+    by_stack: dict[tuple, list[int]] = {}
+    for trace in raw:
+        stack = by_stack.get(trace[2])
+        if stack is None:
+            stack = by_stack[trace[2]] = [0, 0]
+        stack[0] += trace[1]
+        stack[1] += 1
+    for frames, (size, blocks) in by_stack.items():
+        yield frames, size, blocks
+
+
+class _MemoryTracer:
+    """The memory mode's per-phase records (see phase())."""
+
+    def __init__(self):
+        self.phases: list[dict] = []
+        self.peak = 0
+        self.current: str | None = None
+
+    def start(self) -> None:
+        tracemalloc.start(MEMORY_FRAMES)
+
+    def stop(self) -> None:
+        self.peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    def begin(self, name: str) -> None:
+        self.current = name
+        self.before = _sites()
+        # The snapshot is gone by now, so it doesn't count towards the phase's peak
+        start, peak = tracemalloc.get_traced_memory()
+        self.peak = max(self.peak, peak)
+        tracemalloc.reset_peak()
+        self.start_bytes = start
+        self.started = time.time()
+
+    def end(self) -> None:
+        seconds = time.time() - self.started
+        current, peak = tracemalloc.get_traced_memory()
+        rss = current_rss_mb()
+        after = _sites()
+        growth = []
+        for site, (size, blocks) in after.items():
+            size0, blocks0 = self.before.get(site, (0, 0))
+            if size > size0:
+                growth.append((size - size0, blocks - blocks0, site))
+        growth.sort(reverse=True)
+        self.phases.append({
+            "phase": self.current,
+            "seconds": round(seconds, 2),
+            "start_mb": round(self.start_bytes / 1e6, 1),
+            "peak_mb": round(peak / 1e6, 1),
+            "end_mb": round(current / 1e6, 1),
+            "rss_mb": None if rss is None else round(rss, 1),
+            "sites": [{"site": f"{_where(filename)}:{line}", "code": linecache.getline(filename, line).strip(),
+                       "size_mb": round(size / 1e6, 2), "blocks": blocks}
+                      for size, blocks, (filename, line) in growth[:MEMORY_SITES]],
+        })
+        self.peak = max(self.peak, peak)
+        self.current = None
+        del self.before
+
+
+_MEMORY: _MemoryTracer | None = None
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """Mark a phase of a script for the memory mode; a no-op in other runs."""
+    tracer = _MEMORY
+    if tracer is None or tracer.current is not None:
+        yield
+        return
+    tracer.begin(name)
+    try:
+        yield
+    finally:
+        tracer.end()
+
+
+class Profiler:
+    """Profile a block; on exit, write the outputs and print the report.
+
+        with Profiler("sample", "scan-epithets", root_file=script):
+            ...
+
+    ``root_file`` trims the frames above that file's code (runpy and the
+    wrapper) from the sampled stacks.
+    """
+
+    def __init__(self, mode: str, name: str, root_file: str | None = None, top: int = TOP,
+                 interval_ms: float | None = None, out_dir: Path = PROFILE_DIR):
+        if mode not in MODES:
+            raise ValueError(f"unknown profile mode {mode!r} (expected one of {', '.join(MODES)})")
+        self.mode = mode
+        self.name = name
+        self.root_file = os.path.abspath(root_file) if root_file else None
+        self.top = top
+        self.interval = (interval_ms or float(os.environ.get(INTERVAL_ENV, INTERVAL_MS))) / 1000
+        self.out_dir = out_dir
+        self.paths: list[Path] = []
+
+    def __enter__(self):
+        global _MEMORY
+        self.counters = counter_snapshot()
+        self.started = time.time()
+        if self.mode == "cprofile":
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        elif self.mode == "memory":
+            self.memory = _MEMORY = _MemoryTracer()
+            self.memory.start()
+        else:
+            self.sampler = _Sampler(self.interval)
+            self.sampler.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        global _MEMORY
+        if self.mode == "cprofile":
+            self.profile.disable()
+        elif self.mode == "memory":
+            self.memory.stop()
+            _MEMORY = None
+        else:
+            self.sampler.stop()
+        self.seconds = time.time() - self.started
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.out_dir / f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}"
+        if self.mode == "cprofile":
+            lines = self._write_cprofile(stem)
+        elif self.mode == "memory":
+            lines = self._write_memory(stem)
+        else:
+            lines = self._write_samples(stem)
+        counts = counter_delta(self.counters)
+        report = [f"\n=== Profile ({self.mode}) of {self.name}: {self.seconds:.1f}s ===", *lines]
+        if counts:
+            report += ["Hot helper calls:", *format_counters(counts)]
+        report += [f"Wrote {p.relative_to(ROOT) if p.is_relative_to(ROOT) else p}" for p in self.paths]
+        print("\n".join(report), flush=True)
+
+    # -- cProfile -------------------------------------------------------------
+
+    def _write_cprofile(self, stem: Path) -> list[str]:
+        path = stem.with_suffix(".prof")
+        self.profile.dump_stats(path)
+        self.paths.append(path)
+        stats = pstats.Stats(self.profile, stream=io.StringIO())
+        rows = [(_label(f, n, l), cc, nc, tt, ct) for (f, l, n), (cc, nc, tt, ct, _) in stats.stats.items()]
+        lines = []
+        for title, key in (("own time", 3), ("cumulative time", 4)):
+            lines.append(f"Top {self.top} by {title}:")
+            lines.append(f"  {'own':>8} {'cumul':>8} {'calls':>10}  function")
+            for label, cc, nc, tt, ct in sorted(rows, key=lambda r: -r[key])[:self.top]:
+                lines.append(f"  {tt:7.2f}s {ct:7.2f}s {nc:>10}  {label}")
+        return lines
+
+    # -- sampling -------------------------------------------------------------
+
+    def _trimmed(self) -> Counter:
+        """Sampled stacks, without the frames above root_file."""
+        if not self.root_file:
+            return self.sampler.stacks
+        trimmed: Counter = Counter()
+        for stack, n in self.sampler.stacks.items():
+            start = next((i for i, frame in enumerate(stack) if frame[0] == self.root_file), 0)
+            trimmed[stack[start:]] += n
+        return trimmed
+
+    def _write_samples(self, stem: Path) -> list[str]:
+        stacks = self._trimmed()
+        labels = {frame: _label(*frame) for stack in stacks for frame in stack}
+
+        collapsed = stem.with_suffix(".collapsed.txt")
+        with open(collapsed, "w", encoding="utf-8") as f:
+            for stack, n in sorted(stacks.items(), key=lambda kv: [labels[fr] for fr in kv[0]]):
+                f.write(";".join(labels[frame] for frame in stack) + f" {n}\n")
+
+        frames = list(labels)
+        index = {frame: i for i, frame in enumerate(frames)}
+        speedscope = stem.with_suffix(".speedscope.json")
+        doc = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "scripts/profiling.py",
+            "shared": {"frames": [{"name": labels[fr], "file": fr[0], "line": fr[2]} for fr in frames]},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"{self.name} (main thread)",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(stacks.values()) * self.interval,
+                "samples": [[index[frame] for frame in stack] for stack in stacks],
+                "weights": [n * self.interval for n in stacks.values()],
+            }],
+        }
+        with open(speedscope, "w", encoding="utf-8") as f:
+            json.dump(doc, f)
+        self.paths += [collapsed, speedscope]
+
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, n in stacks.items():
+            if stack:
+                own[stack[-1]] += n
+            for frame in set(stack):
+                total[frame] += n
+        count = sum(stacks.values())
+        lines = [f"{count} samples every {self.interval * 1000:g} ms"]
+        for title, counter in (("own time", own), ("cumulative time", total)):
+            lines.append(f"Top {self.top} by {title}:")
+            for frame, n in counter.most_common(self.top):
+                lines.append(f"  {n * self.interval:7.2f}s {n / count:6.1%}  {labels[frame]}")
+        return lines
+
+
+    # -- memory ---------------------------------------------------------------
+
+    def _write_memory(self, stem: Path) -> list[str]:
+        phases = self.memory.phases
+        path = stem.with_suffix(".memory.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"name": self.name, "peak_mb": round(self.memory.peak / 1e6, 1), "phases": phases},
+                      f, ensure_ascii=False, indent=2)
+        self.paths.append(path)
+
+        lines = [f"Traced peak {self.memory.peak / 1e6:.1f} MB"]
+        if not phases:
+            return lines + ["No phases marked (profiling.phase())"]
+        lines.append(f"  {'phase':20} {'time':>7} {'start MB':>9} {'peak MB':>9} {'end MB':>9} {'RSS MB':>8}")
+        for p in phases:
+            rss = "-" if p["rss_mb"] is None else f"{p['rss_mb']:.0f}"
+            lines.append(f"  {p['phase']:20} {p['seconds']:6.1f}s {p['start_mb']:9.1f} {p['peak_mb']:9.1f} "
+                         f"{p['end_mb']:9.1f} {rss:>8}")
+        lines.append("Top allocation sites by growth, still allocated at the end of the phase:")
+        for p in phases:
+            lines.append(f"  {p['phase']}:")
+            for site in p["sites"]:
+                lines.append(f"    {site['size_mb']:+9.2f} MB {site['blocks']:>+9} blocks  "
+                             f"{site['site']}  {site['code'][:60]}")
+        return lines
+
+
+# ---------------------------------------------------------------------------
+# Soft memory limit
+# ---------------------------------------------------------------------------
+
+def memory_limit_mb(limit_mb: float | None = None) -> float | None:
+    """The soft memory limit: ``limit_mb`` if given, else $PIPELINE_MEMORY_LIMIT_MB (None if unset)."""
+    if limit_mb is not None:
+        return limit_mb
+    value = os.environ.get(MEMORY_LIMIT_ENV)
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{MEMORY_LIMIT_ENV}={value!r}: expected megabytes") from None
+
+
+def over_memory_limit(limit_mb: float | None) -> bool:
+    """Whether this process's resident memory is above the soft limit (never, without one)."""
+    if limit_mb is None:
+        return False
+    rss = current_rss_mb()
+    return rss is not None and rss > limit_mb
+
+
+def add_memory_limit_argument(parser) -> None:
+    parser.add_argument(
+        "--memory-limit", type=float, metavar="MB",
+        help=f"Soft memory limit: once over it, stream the rest of the run (default: ${MEMORY_LIMIT_ENV})",
+    )
+
+
+def profile_mode(mode: str | None = None) -> str | None:
+    """The profile mode to use: ``mode`` if given, else $PIPELINE_PROFILE (None if off)."""
+    mode = mode or os.environ.get(PROFILE_ENV) or None
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"{PROFILE_ENV}={mode!r}: expected one of {', '.join(MODES)}")
+    return mode
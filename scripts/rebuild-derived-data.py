@@ -3,63 +3,57 @@
 Usage:
     python scripts/rebuild-derived-data.py          # Rebuild everything
     python scripts/rebuild-derived-data.py --quick   # Skip image copy (data only)
+    python scripts/rebuild-derived-data.py --force   # Rebuild even if up to date
+    python scripts/rebuild-derived-data.py --jobs 1  # One step at a time
+    python scripts/rebuild-derived-data.py --in-process  # Shared inputs loaded once
+    python scripts/rebuild-derived-data.py --watch   # Then rebuild on every registry edit
 
 Run this after editing:
   - data/image-registry.json
   - data/place-photo-links.json
   - data/person-registry.json
+
+These are pipeline steps 20a-20d (scripts/pipeline.py). Each one runs only
+if its inputs or code changed since it last ran; upstream stages are left
+alone (use scripts/run-pipeline.py for those). The three data steps don't
+read each other's output, so they run side by side; logs are written to
+data/.cache/pipeline-logs/. With --in-process they run as function calls
+in this interpreter instead, sharing the registries, letters and mention
+index loaded once (scripts/derived_data.py).
+
+--watch (implies --in-process) keeps running after the rebuild. It polls
+the inputs and, a moment after each edit, rebuilds only the affected
+letters, persons and places, replacing the outputs in data/ and
+apps/website/public/data atomically (scripts/derived_watch.py).
 """
 
-import subprocess
 import sys
-import time
-from pathlib import Path
-
-PYTHON = sys.executable
-SCRIPTS = [
-    ("Letter-image links", "scripts/build-letter-images.py"),
-    ("Person pages", "scripts/build-person-pages-data.py"),
-    ("Place pages", "scripts/build-place-pages-data.py"),
-]
-COPY_SCRIPT = ("Copy to frontend", "scripts/copy-images-to-frontend.py")
 
+from pipeline import Pipeline
 
-def run(label, script):
-    print(f"\n{'='*50}")
-    print(f"  {label}")
-    print(f"{'='*50}")
-    result = subprocess.run(
-        [PYTHON, script],
-        capture_output=False,
-        text=True,
-    )
-    if result.returncode != 0:
-        print(f"  FAILED (exit code {result.returncode})")
-        return False
-    return True
+DATA_STAGES = ["letter-images", "person-pages", "place-pages"]
+COPY_STAGE = "copy-images"
 
 
 def main():
     quick = "--quick" in sys.argv
-    start = time.time()
-    failed = []
-
-    for label, script in SCRIPTS:
-        if not run(label, script):
-            failed.append(label)
-
-    if not quick:
-        if not run(*COPY_SCRIPT):
-            failed.append(COPY_SCRIPT[0])
-
-    elapsed = time.time() - start
-    print(f"\n{'='*50}")
-    if failed:
-        print(f"  DONE with errors: {', '.join(failed)}")
-    else:
-        steps = len(SCRIPTS) + (0 if quick else 1)
-        print(f"  ALL DONE — {steps} steps in {elapsed:.1f}s")
-    print(f"{'='*50}")
+    targets = DATA_STAGES + ([] if quick else [COPY_STAGE])
+
+    pipeline = Pipeline()
+    stages = pipeline.select(targets, upstream=False)
+    force = set(targets) if "--force" in sys.argv else set()
+    jobs = int(sys.argv[sys.argv.index("--jobs") + 1]) if "--jobs" in sys.argv else None
+    watch = "--watch" in sys.argv
+    builders = shared = None
+    if "--in-process" in sys.argv or watch:
+        from derived_data import SharedInputs, in_process_builders
+        shared = SharedInputs()
+        builders = in_process_builders(shared)
+    ok = pipeline.run(stages, force=force, jobs=jobs, builders=builders)
+    if ok and watch:
+        from derived_watch import DerivedDataWatcher
+        DerivedDataWatcher(shared).run()
+    sys.exit(0 if ok else 1)
 
 
 if __name__ == "__main__":
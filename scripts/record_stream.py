@@ -0,0 +1,260 @@
+"""
+Streaming record I/O for the large sentence-level artifacts.
+
+normalized-sentences.json, cvp-sentence-scores.json and
+cvp-emotion-sentence-scores.json are single JSON arrays of flat records.
+Producers can alternatively write a JSONL sibling (same name, ``.jsonl``
+suffix, one record per line) with ``--format jsonl``. Consumers read
+either variant through ``iter_records()``, which yields one record at a
+time, so peak memory is one record plus whatever the consumer aggregates.
+``write_records()`` writes either variant one record at a time, too, so a
+producer can pass a generator. The ``.json`` variant is written to a temp
+sibling and renamed over the old file once complete, so a producer that
+fails part-way leaves the previous file in place.
+
+A JSONL file is written to a temp sibling that is renamed into place once
+complete; meanwhile a ``<file>.writing`` marker next to it names the temp
+file. ``iter_records(path, follow=True)`` tails that file until the marker
+disappears, so a downstream stage can start consuming before the upstream
+stage has finished writing. If the writer fails, its temp file is deleted
+and the follower raises instead of ending early. Readers that don't follow
+only ever see complete files.
+"""
+
+import json
+import os
+import time
+
+from file_lock import tmp_path
+from json_output import json_item, write_text_atomic
+from stage_trace import count_items
+
+JSON_SUFFIX = ".json"
+JSONL_SUFFIX = ".jsonl"
+WRITING_SUFFIX = ".writing"
+FORMATS = ("json", "jsonl")
+
+_CHUNK_SIZE = 1 << 16
+_FLUSH_EVERY = 256
+
+
+def json_path(path: str) -> str:
+    return os.path.splitext(path)[0] + JSON_SUFFIX
+
+
+def jsonl_path(path: str) -> str:
+    return os.path.splitext(path)[0] + JSONL_SUFFIX
+
+
+def resolve_records_path(path: str, follow: bool = False) -> str:
+    """Return the variant of an artifact that should be read.
+
+    When following, a JSONL file that is still being written wins;
+    otherwise the newer of the ``.json`` and ``.jsonl`` variants. Returns
+    ``path`` unchanged if neither exists, so callers report the path they
+    asked for.
+    """
+    array_path, lines_path = json_path(path), jsonl_path(path)
+    if follow and os.path.exists(lines_path + WRITING_SUFFIX):
+        return lines_path
+    candidates = [p for p in (array_path, lines_path) if os.path.exists(p)]
+    if not candidates:
+        return path
+    return max(candidates, key=os.path.getmtime)
+
+
+def records_exist(path: str, follow: bool = False) -> bool:
+    path = resolve_records_path(path, follow)
+    return os.path.exists(path) or (follow and os.path.exists(path + WRITING_SUFFIX))
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def iter_records(path: str, follow: bool = False, poll_interval: float = 0.5):
+    """Yield records one at a time from the JSON or JSONL variant of path."""
+    path = resolve_records_path(path, follow)
+    if path.endswith(JSONL_SUFFIX):
+        yield from _iter_jsonl(path, follow, poll_interval)
+    else:
+        yield from _iter_json_array(path)
+
+
+def records_at(path: str, positions) -> dict[int, dict]:
+    """Return {position: record} for the given record positions (one pass)."""
+    wanted = set(positions)
+    found = {}
+    for i, rec in enumerate(iter_records(path)):
+        if i in wanted:
+            found[i] = rec
+            if len(found) == len(wanted):
+                break
+    return found
+
+
+def _iter_jsonl(path: str, follow: bool, poll_interval: float):
+    marker = path + WRITING_SUFFIX
+    f = _open_jsonl(path, marker if follow else None)
+    with f:
+        partial = ""
+        while True:
+            # Check the marker before reading: if it was already gone, the
+            # writer has flushed everything and EOF really is the end.
+            writing = follow and os.path.exists(marker)
+            line = f.readline()
+            if line.endswith("\n"):
+                line, partial = partial + line, ""
+                if line.strip():
+                    yield json.loads(line)
+                continue
+            partial += line
+            if writing:
+                time.sleep(poll_interval)
+                continue
+            if follow and not _published(f, path):
+                raise RuntimeError(f"The writer of {path} failed before finishing it")
+            if partial.strip():
+                yield json.loads(partial)
+            return
+
+
+def _open_jsonl(path: str, marker: str | None):
+    """The file being written, per marker (if given and present), else path."""
+    if marker is not None:
+        try:
+            with open(marker, "r", encoding="utf-8") as m:
+                tmp = os.path.join(os.path.dirname(path), m.read())
+            return open(tmp, "r", encoding="utf-8")
+        except FileNotFoundError:
+            pass  # not being written, or already renamed into place
+    return open(path, "r", encoding="utf-8")
+
+
+def _published(f, path: str) -> bool:
+    """Whether the open file f is (now) the file at path."""
+    try:
+        return os.path.samestat(os.fstat(f.fileno()), os.stat(path))
+    except FileNotFoundError:
+        return False
+
+
+def _iter_json_array(path: str):
+    """Incrementally decode the elements of a top-level JSON array."""
+    decoder = json.JSONDecoder()
+    with open(path, "r", encoding="utf-8") as f:
+        buf = f.read(_CHUNK_SIZE)
+        eof = not buf
+        pos = _skip_separators(buf, 0, "")
+        if buf[pos:pos + 1] != "[":
+            raise ValueError(f"Expected a JSON array in {path}")
+        pos += 1
+        while True:
+            pos = _skip_separators(buf, pos, ",")
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            if pos < len(buf):
+                try:
+                    obj, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                else:
+                    # A value ending exactly at the buffer edge may be a
+                    # truncated scalar; only trust it once more data is in.
+                    if end < len(buf) or eof:
+                        yield obj
+                        pos = end
+                        continue
+            elif eof:
+                raise ValueError(f"Unterminated JSON array in {path}")
+            more = f.read(_CHUNK_SIZE)
+            eof = not more
+            buf, pos = buf[pos:] + more, 0
+
+
+def _skip_separators(buf: str, pos: int, extra: str) -> int:
+    while pos < len(buf) and (buf[pos].isspace() or buf[pos] in extra):
+        pos += 1
+    return pos
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+class JsonlWriter:
+    """Write records as JSONL to a temp file, renamed into place once complete.
+
+    The marker names the temp file while it is being written, so that
+    followers can tail it. If writing fails, the temp file is deleted and
+    the previous file, if any, stays in place.
+    """
+
+    def __init__(self, path: str):
+        self.path = jsonl_path(path)
+        self.marker = self.path + WRITING_SUFFIX
+        self.tmp = str(tmp_path(self.path))
+        self.count = 0
+        self._f = None
+
+    def __enter__(self):
+        self._f = open(self.tmp, "w", encoding="utf-8")
+        write_text_atomic(self.marker, os.path.basename(self.tmp))
+        return self
+
+    def write(self, record: dict) -> None:
+        self._f.write(json.dumps(record, ensure_ascii=False))
+        self._f.write("\n")
+        self.count += 1
+        if self.count % _FLUSH_EVERY == 0:
+            self._f.flush()
+
+    def __exit__(self, exc_type, *_):
+        self._f.close()
+        if exc_type is None:
+            os.replace(self.tmp, self.path)
+        else:
+            os.remove(self.tmp)
+        os.remove(self.marker)
+        return False
+
+
+def write_records(path: str, records, fmt: str = "json") -> str:
+    """Write records in the requested format; return the path written."""
+    if fmt == "jsonl":
+        count = 0
+        with JsonlWriter(path) as writer:
+            for rec in records:
+                writer.write(rec)
+                count += 1
+        count_items(count, "records")
+        return writer.path
+    # As json.dump(list(records), indent=2) would write it, one record at a
+    # time, to a temp sibling that replaces the old file once complete
+    out = json_path(path)
+    tmp = tmp_path(out)
+    count = 0
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            for rec in records:
+                f.write(",\n" if count else "[\n")
+                f.write(json_item(rec))
+                count += 1
+            f.write("\n]" if count else "[]")
+        os.replace(tmp, out)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    count_items(count, "records")
+    return out
+
+
+def add_format_argument(parser) -> None:
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="json",
+        help="Per-sentence output format: a JSON array (default) or "
+             "streamable JSONL written next to it",
+    )
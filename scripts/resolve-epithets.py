@@ -6,57 +6,28 @@ Resolves epithet references to known persons in the person-registry.
 Uses co-occurrence analysis, context classification, temporal patterns,
 and grammatical gender clues to determine who each epithet refers to.
 
+Context type, gender and "Far in text" come from the features
+scan-epithets.py stores with each match (epithet_context.py), so letter
+texts are not re-read here.
+
 Reads:
   - data/epithet-inventory.json (from scan-epithets.py)
   - data/letter-entities-draft.json (per-letter NER entities)
-  - data/person-registry.json (canonical persons)
-  - data/corrected-letters.json (full letter texts for deeper analysis)
 
 Outputs:
   - data/epithet-resolutions.json
 """
 
 import json
-import re
 import sys
 from pathlib import Path
 from collections import defaultdict, Counter
 
+from epithet_context import classify_context, detect_gender
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 
-# ---------------------------------------------------------------------------
-# Gender signal patterns (Danish)
-# ---------------------------------------------------------------------------
-MALE_PRONOUNS = re.compile(
-    r"\b(han|ham|hans|sin\s+mand|sin\s+far|sin\s+fader)\b", re.IGNORECASE
-)
-FEMALE_PRONOUNS = re.compile(
-    r"\b(hun|hende|hendes|sin\s+kone|sin\s+mor|sin\s+moder)\b", re.IGNORECASE
-)
-
-# ---------------------------------------------------------------------------
-# Context classification keywords
-# ---------------------------------------------------------------------------
-FAMILY_KEYWORDS = re.compile(
-    r"\b(far|faer|mor|moer|moder|fader|hjem|hjemme|hus|gaard|gård|"
-    r"børn|barn|familie|søster|broder|bror|søndag|"
-    r"trine|musse|signe|bodil|roagger|obling)\b",
-    re.IGNORECASE,
-)
-MILITARY_KEYWORDS = re.compile(
-    r"\b(soldat|regiment|regt|kompagni|kaserne|feldt|felt|"
-    r"kommando|løjtnant|leutn|hauptm|feldw|feldv|oberstl|"
-    r"krig|front|skyttegrav|gevær|kanon|batteri|"
-    r"konow|poulsen|petersen|madsen|braunsberg)\b",
-    re.IGNORECASE,
-)
-COMMUNITY_KEYWORDS = re.compile(
-    r"\b(nabo|kirke|præst|marked|marked|fest|bryllup|"
-    r"begravelse|mejeri|skole|forening|møde)\b",
-    re.IGNORECASE,
-)
-
 # Aliases for "Far" that we check for co-occurrence
 FAR_ALIASES = {"Far", "Faer", "Fader"}
 
@@ -69,15 +40,6 @@ def load_json(filename):
         return json.load(f)
 
 
-def get_letter_text_map(letters):
-    """Build a map of letter_id -> full text for context lookups."""
-    text_map = {}
-    for letter in letters:
-        text = letter.get("text_corrected") or letter.get("text_source") or ""
-        text_map[letter["id"]] = text
-    return text_map
-
-
 def check_far_cooccurrence(letter_id, letter_entities):
     """Check whether 'Far' or 'Faer' appears as NER entity in the same letter."""
     lid = str(letter_id)
@@ -87,50 +49,7 @@ def check_far_cooccurrence(letter_id, letter_entities):
     return bool(FAR_ALIASES & set(persons))
 
 
-def check_far_in_text(letter_id, text_map):
-    """Check whether Far/Faer appears in the letter text (not just NER)."""
-    text = text_map.get(letter_id, "")
-    return bool(re.search(r"\b(Far|Faer)\b", text))
-
-
-def classify_context(full_context):
-    """Classify a match context as family/military/community/ambiguous."""
-    family_score = len(FAMILY_KEYWORDS.findall(full_context))
-    military_score = len(MILITARY_KEYWORDS.findall(full_context))
-    community_score = len(COMMUNITY_KEYWORDS.findall(full_context))
-
-    if family_score > military_score and family_score > community_score:
-        return "family"
-    if military_score > family_score and military_score > community_score:
-        return "military"
-    if community_score > family_score and community_score > military_score:
-        return "community"
-    return "ambiguous"
-
-
-def detect_gender(full_context):
-    """Detect grammatical gender clues in the context around a match."""
-    male_count = len(MALE_PRONOUNS.findall(full_context))
-    female_count = len(FEMALE_PRONOUNS.findall(full_context))
-
-    if male_count > female_count:
-        return "male"
-    if female_count > male_count:
-        return "female"
-    return "unknown"
-
-
-def get_wider_context(letter_id, position, text_map, window=300):
-    """Get a wider context window from the full letter text."""
-    text = text_map.get(letter_id, "")
-    if not text:
-        return ""
-    start = max(0, position - window)
-    end = min(len(text), position + window)
-    return text[start:end]
-
-
-def resolve_den_gamle(pattern_data, letter_entities, text_map):
+def resolve_den_gamle(pattern_data, letter_entities):
     """
     Resolve 'den gamle' — the most complex epithet.
 
@@ -163,19 +82,16 @@ def resolve_den_gamle(pattern_data, letter_entities, text_map):
     for match in matches:
         lid = match["letter_id"]
         date = match["date"]
-        position = match["position"]
-
-        wider_ctx = get_wider_context(lid, position, text_map)
+        features = match["context_features"]
         narrow_ctx = match["full_context"]
 
         far_in_ner = check_far_cooccurrence(lid, letter_entities)
-        far_in_text = check_far_in_text(lid, text_map)
-        has_cooccurrence = far_in_ner or far_in_text
+        has_cooccurrence = far_in_ner or match["far_in_text"]
 
-        context_type = classify_context(wider_ctx)
+        context_type = classify_context(features)
         context_breakdown[context_type] += 1
 
-        gender = detect_gender(wider_ctx)
+        gender = detect_gender(features)
         gender_breakdown[gender] += 1
 
         signals = []
@@ -290,7 +206,7 @@ def resolve_den_gamle(pattern_data, letter_entities, text_map):
     }
 
 
-def resolve_generic_epithet(label, pattern_data, letter_entities, text_map,
+def resolve_generic_epithet(label, pattern_data, letter_entities,
                             epithet_type="generic"):
     """
     Resolve kinship, adjective, or other epithets.
@@ -303,11 +219,10 @@ def resolve_generic_epithet(label, pattern_data, letter_entities, text_map,
 
     for match in matches:
         lid = match["letter_id"]
-        position = match["position"]
-        wider_ctx = get_wider_context(lid, position, text_map)
-        context_type = classify_context(wider_ctx)
+        features = match["context_features"]
+        context_type = classify_context(features)
         context_breakdown[context_type] += 1
-        gender = detect_gender(wider_ctx)
+        gender = detect_gender(features)
         gender_breakdown[gender] += 1
         signals = [context_type + " context"]
         if gender != "unknown":
@@ -364,13 +279,19 @@ def main():
     # Load data
     inventory = load_json("epithet-inventory.json")
     letter_entities = load_json("letter-entities-draft.json")
-    letters = load_json("corrected-letters.json")
-
-    text_map = get_letter_text_map(letters)
 
     print(f"Loaded epithet inventory: {inventory['metadata']['total_matches']} matches")
     print(f"Loaded {len(letter_entities)} letter entity records")
-    print(f"Loaded {len(letters)} letter texts")
+
+    missing = [
+        label for label, data in inventory["patterns"].items()
+        if any("context_features" not in m for m in data["matches"])
+    ]
+    if missing:
+        sys.exit(
+            "epithet-inventory.json has matches without context features "
+            f"({', '.join(missing)}); re-run scripts/scan-epithets.py"
+        )
 
     patterns = inventory["patterns"]
     resolutions = []
@@ -393,16 +314,14 @@ def main():
         print(f"\nProcessing: {label} ({total} mentions)")
 
         if label == "den gamle":
-            resolution = resolve_den_gamle(
-                pattern_data, letter_entities, text_map
-            )
+            resolution = resolve_den_gamle(pattern_data, letter_entities)
         else:
             if total < MIN_MENTIONS_FOR_RESOLUTION:
                 print(f"  Skipping (only {total} mentions, threshold={MIN_MENTIONS_FOR_RESOLUTION})")
                 continue
             etype = "kinship" if label in kinship_labels else "adjective"
             resolution = resolve_generic_epithet(
-                label, pattern_data, letter_entities, text_map, etype
+                label, pattern_data, letter_entities, etype
             )
 
         resolutions.append(resolution)
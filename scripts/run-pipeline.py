@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Bring the data pipeline's artifacts up to date, re-running only what changed.
+
+Usage:
+    python scripts/run-pipeline.py                       # every stage, as needed
+    python scripts/run-pipeline.py person-pages          # a stage and its upstream
+    python scripts/run-pipeline.py letter-images --only  # just that stage, if stale
+    python scripts/run-pipeline.py --dry-run             # what would run, and why
+    python scripts/run-pipeline.py --force sentiment     # re-run regardless
+    python scripts/run-pipeline.py --jobs 1              # one stage at a time, output live
+    python scripts/run-pipeline.py --in-process          # page builders as function calls
+    python scripts/run-pipeline.py --profile sample      # profile every stage run (see profiling.py)
+    python scripts/run-pipeline.py --list                # stages and dependencies
+    python scripts/run-pipeline.py --mark-current        # adopt existing outputs
+
+Stages, their inputs/outputs and the fingerprinting rules live in
+scripts/pipeline.py; state is kept in data/.cache/pipeline-state.json.
+On a fresh checkout, --mark-current records the committed artifacts as
+up to date so the first run doesn't redo the model stages.
+
+Independent stages run concurrently (one per CPU by default, within the
+memory currently available); model stages run alone. Each stage's output
+is written to data/.cache/pipeline-logs/<stage>.log.
+"""
+
+import argparse
+import sys
+
+from pipeline import Pipeline
+from profiling import MODES
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental data pipeline runner")
+    parser.add_argument("stages", nargs="*", help="Target stages (default: all non-manual stages)")
+    parser.add_argument("--only", action="store_true", help="Don't include upstream stages")
+    parser.add_argument("--force", action="store_true", help="Run the selected stages even if current")
+    parser.add_argument("--dry-run", action="store_true", help="Report stale stages without running")
+    parser.add_argument("--jobs", "-j", type=int, help="Stages to run at once (default: CPU count)")
+    parser.add_argument("--memory", type=int, metavar="MB",
+                        help="Memory budget for concurrent stages (default: available memory)")
+    parser.add_argument("--in-process", action="store_true",
+                        help="Run the page builders (steps 20a-20c) in this process, sharing loaded inputs")
+    parser.add_argument("--profile", choices=MODES,
+                        help="Profile each stage run with cProfile, the sampler or tracemalloc "
+                             "(default: $PIPELINE_PROFILE)")
+    parser.add_argument("--list", action="store_true", help="List stages and their dependencies")
+    parser.add_argument("--mark-current", action="store_true",
+                        help="Record the selected stages as up to date without running them")
+    args = parser.parse_args()
+
+    pipeline = Pipeline()
+    try:
+        stages = pipeline.select(args.stages, upstream=not args.only)
+    except KeyError as e:
+        parser.error(e.args[0])
+
+    if args.list:
+        for stage in stages:
+            deps = ", ".join(pipeline.deps[stage.name]) or "-"
+            flag = " (manual)" if stage.manual else ""
+            flag += " (exclusive)" if stage.exclusive else ""
+            print(f"{stage.name:24} {stage.script:44} <- {deps}{flag}")
+        return
+
+    if args.mark_current:
+        marked = pipeline.mark_current(stages)
+        print(f"Marked {len(marked)} of {len(stages)} stages current "
+              f"({pipeline.hashes.hashed} files hashed)")
+        unmarked = [s.name for s in stages if s.name not in marked]
+        if unmarked:
+            print(f"  Missing outputs, not marked: {', '.join(unmarked)}")
+        return
+
+    force = {s.name for s in stages} if args.force else set()
+    print(f"Pipeline: {len(stages)} stages{' (dry run)' if args.dry_run else ''}")
+    builders = None
+    if args.in_process:
+        from derived_data import in_process_builders
+        builders = in_process_builders()
+    ok = pipeline.run(stages, force=force, dry_run=args.dry_run, jobs=args.jobs, memory_mb=args.memory,
+                      builders=builders, profile=args.profile)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,11 @@ ADR-043: Epithet Scanner
 Scans letter texts for epithet and pronoun-like person references that the
 NER pipeline misses (e.g. "den gamle", "Bedstefar", "Onkel").
 
+All patterns are combined into one regex, so each letter is scanned in a
+single pass, and letters are sharded over a process pool (--workers, see
+letter_map.py). Each match carries the context-window features (see
+epithet_context.py) that resolve-epithets.py classifies it by.
+
 Reads:
   - data/corrected-letters.json (letter texts)
 
@@ -12,12 +17,16 @@ Outputs:
   - data/epithet-inventory.json (all matches grouped by pattern)
 """
 
+import argparse
 import json
 import re
 import sys
 from pathlib import Path
 from collections import defaultdict
 
+from epithet_context import FAR_IN_TEXT, context_features
+from letter_map import add_workers_argument, map_letters
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 
@@ -52,6 +61,20 @@ EPITHET_PATTERNS = [
     ("Stakkel", r"\bstakkels?\b", "poor one"),
 ]
 
+# One alternation of all patterns, scanned once per letter. Every pattern
+# starts with \b and a literal letter, so the \b is shared and a lookahead on
+# those first letters skips most positions without trying any branch. The
+# named group that matched (p0, p1, ...) identifies the pattern; no two
+# patterns can match overlapping text.
+assert all(regex.startswith(r"\b") for _, regex, _ in EPITHET_PATTERNS)
+COMBINED_PATTERN = re.compile(
+    r"\b(?=[%s])(?:%s)" % (
+        "".join(sorted({regex[2].lower() for _, regex, _ in EPITHET_PATTERNS})),
+        "|".join(f"(?P<p{i}>{regex[2:]})" for i, (_, regex, _) in enumerate(EPITHET_PATTERNS)),
+    ),
+    re.IGNORECASE,
+)
+
 CONTEXT_CHARS = 100  # characters of context on each side
 
 # Patterns that need standalone-vs-adjective classification.
@@ -161,37 +184,56 @@ def classify_usage(label, text, match_end):
     return "ambiguous"
 
 
-def scan_letter(letter, compiled_patterns):
-    """Scan a single letter for all epithet patterns. Returns list of matches."""
-    text = letter.get("text_corrected") or letter.get("text_source") or ""
+def scan_letter(letter):
+    """Scan one (letter_id, date, text) for all epithet patterns in one pass.
+
+    Returns the matches in text order, each with its context features.
+    """
+    letter_id, date, text = letter
     if not text:
         return []
 
-    letter_id = letter["id"]
-    date = letter.get("date", "")
+    far_in_text = bool(FAR_IN_TEXT.search(text))
     matches = []
-
-    for label, pattern, description in compiled_patterns:
-        for m in pattern.finditer(text):
-            ctx = extract_context(text, m.start(), m.end())
-            usage = classify_usage(label, text, m.end())
-            matches.append({
-                "pattern": label,
-                "description": description,
-                "letter_id": letter_id,
-                "date": date,
-                "matched_text": m.group(),
-                "position": m.start(),
-                "usage": usage,
-                "context_before": ctx["before"],
-                "context_after": ctx["after"],
-                "full_context": ctx["full_context"],
-            })
+    for m in COMBINED_PATTERN.finditer(text):
+        label, _, description = EPITHET_PATTERNS[int(m.lastgroup[1:])]
+        ctx = extract_context(text, m.start(), m.end())
+        usage = classify_usage(label, text, m.end())
+        matches.append({
+            "pattern": label,
+            "description": description,
+            "letter_id": letter_id,
+            "date": date,
+            "matched_text": m.group(),
+            "position": m.start(),
+            "usage": usage,
+            "context_before": ctx["before"],
+            "context_after": ctx["after"],
+            "full_context": ctx["full_context"],
+            "context_features": context_features(text, m.start()),
+            "far_in_text": far_in_text,
+        })
 
     return matches
 
 
+def scan_letters(letters, workers):
+    """Scan every letter, over a process pool when workers > 1; letter order is kept."""
+    jobs = [
+        (letter["id"], letter.get("date", ""),
+         letter.get("text_corrected") or letter.get("text_source") or "")
+        for letter in letters
+    ]
+    mapped = map_letters(scan_letter, jobs, workers=workers, key=lambda job: job[0], desc="Scanning")
+    mapped.exit_on_failure()
+    return [match for matches in mapped.values() for match in matches]
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Scan letters for epithets (ADR-043)")
+    add_workers_argument(parser)
+    args = parser.parse_args()
+
     print("=" * 60)
     print("ADR-043: Epithet Scanner")
     print("=" * 60)
@@ -200,16 +242,8 @@ def main():
     letters = load_letters()
     print(f"Loaded {len(letters)} letters from corrected-letters.json")
 
-    # Compile patterns
-    compiled_patterns = [
-        (label, re.compile(regex, re.IGNORECASE), desc)
-        for label, regex, desc in EPITHET_PATTERNS
-    ]
-
     # Scan all letters
-    all_matches = []
-    for letter in letters:
-        all_matches.extend(scan_letter(letter, compiled_patterns))
+    all_matches = scan_letters(letters, args.workers)
 
     print(f"Found {len(all_matches)} total epithet matches")
 
@@ -0,0 +1,110 @@
+"""
+Stable sentence IDs and the compact sentence offset index.
+
+Sentence IDs are content-addressed: letter ID plus a short SHA-256 of the
+sentence text. Re-splitting a letter only changes the IDs of sentences whose
+text actually changed, so downstream caches (CVP scores, embeddings,
+psycholinguistic sentence links) can be keyed on them instead of on the
+sentence's position within the letter.
+
+The offset index (data/normalized-sentence-offsets.json) stores, per letter,
+the sentence IDs and [start, end) character offsets into the letter's
+``text_normalized``. Consumers that already hold the letter text can slice
+sentences from it without loading normalized-sentences.json.
+
+    index = load_offset_index(path)
+    for sentence_id, text in iter_letter_sentences(index, letter_id, letter_text):
+        ...
+"""
+
+import hashlib
+import json
+import re
+
+OFFSET_INDEX_VERSION = 1
+HASH_LENGTH = 10
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def sentence_hash(text: str) -> str:
+    """Short content hash of a sentence's (whitespace-normalized) text."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+
+
+def assign_sentence_ids(letter_id: int, texts: list[str]) -> list[str]:
+    """Return a stable ID for each sentence of one letter.
+
+    IDs have the form ``{letter_id}-{hash}``. A sentence whose exact text
+    already occurred earlier in the same letter (e.g. a repeated "Hilsen")
+    gets a ``.{n}`` suffix, so IDs stay unique within the letter.
+    """
+    seen: dict[str, int] = {}
+    ids = []
+    for text in texts:
+        base = f"{letter_id}-{sentence_hash(text)}"
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        ids.append(base if n == 0 else f"{base}.{n + 1}")
+    return ids
+
+
+def normalize_span(text: str) -> str:
+    """Collapse whitespace the same way the sentence splitter does."""
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def slice_sentence(letter_text: str, start: int, end: int) -> str:
+    """Recover a sentence's text from its offsets into the letter text."""
+    return normalize_span(letter_text[start:end])
+
+
+# ---------------------------------------------------------------------------
+# Offset index I/O
+# ---------------------------------------------------------------------------
+
+def build_offset_index(records: list[dict], source_hash: str) -> dict:
+    """Build the compact offset index from sentence records.
+
+    Offsets are stored as one flat ``[start0, end0, start1, end1, ...]``
+    list per letter, in sentence order.
+    """
+    letters: dict[str, dict] = {}
+    for rec in records:
+        entry = letters.setdefault(str(rec["letter_id"]), {"ids": [], "offsets": []})
+        entry["ids"].append(rec["sentence_id"])
+        entry["offsets"].extend((rec["start"], rec["end"]))
+    return {
+        "version": OFFSET_INDEX_VERSION,
+        "source": "normalized-letters.json",
+        "text_field": "text_normalized",
+        "source_hash": source_hash,
+        "letters": letters,
+    }
+
+
+def write_offset_index(path, index: dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_offset_index(path) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        index = json.load(f)
+    if index.get("version") != OFFSET_INDEX_VERSION:
+        raise ValueError(
+            f"Unsupported offset index version {index.get('version')!r} in {path}"
+        )
+    return index
+
+
+def iter_letter_sentences(index: dict, letter_id: int, letter_text: str):
+    """Yield (sentence_id, text) for one letter, sliced from letter_text."""
+    entry = index["letters"].get(str(letter_id))
+    if entry is None:
+        return
+    offsets = entry["offsets"]
+    for i, sentence_id in enumerate(entry["ids"]):
+        yield sentence_id, slice_sentence(
+            letter_text, offsets[2 * i], offsets[2 * i + 1]
+        )
@@ -0,0 +1,238 @@
+"""
+Per-stage resource traces and the pipeline run log.
+
+Pipeline.run() traces every stage it runs, script or in-process builder,
+without the stage doing anything:
+
+  wall_s        wall-clock seconds
+  cpu_s         user + system CPU seconds, including the stage's worker processes
+  peak_rss_mb   peak resident memory of the stage or its largest worker
+  read_mb       bytes the stage read and wrote through system calls
+  written_mb    (rchar/wchar in /proc/<pid>/io, so page-cache hits count)
+
+A stage can add item counts, and so throughput, by calling count_items().
+letter_map.map_letters(), record_stream.write_records() and the page
+builders already do:
+
+    from stage_trace import count_items
+
+    count_items(len(sentences), "sentences")
+
+The call counters of profiling.py's hot helpers arrive the same way
+(count_calls()). Outside a pipeline run, both do nothing. Each run is appended as
+one JSON line to data/.cache/pipeline-runs.jsonl: its stages' traces, the
+critical path and the total wall time. At the end of a run, the runner
+flags stages that are slower or larger than the median of their previous
+runs (regressions()). Profiled runs are logged too, but only compared with runs
+under the same profiler. scripts/pipeline-runs.py shows and compares past
+runs.
+
+Peak RSS, CPU and I/O come from wait4() and /proc, so on systems without
+them those fields are null. In-process builders share the runner's
+process: their peak RSS is the runner's peak so far.
+"""
+
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+ROOT = SCRIPT_DIR.parent
+RUN_LOG = ROOT / "data" / ".cache" / "pipeline-runs.jsonl"
+
+# The file a stage's count_items() appends to, set by the runner
+ITEMS_ENV = "PIPELINE_TRACE_ITEMS"
+
+METRICS = ("wall_s", "cpu_s", "peak_rss_mb", "read_mb", "written_mb")
+# A stage regresses when a metric exceeds THRESHOLD x its median over the
+# previous runs, and by more than the metric's floor (noise on short stages)
+THRESHOLD = 1.25
+FLOORS = {"wall_s": 1.0, "cpu_s": 1.0, "peak_rss_mb": 50.0, "read_mb": 10.0, "written_mb": 10.0}
+BASELINE_RUNS = 5
+
+
+def count_items(count: int, unit: str) -> None:
+    """Record that the current stage processed ``count`` items of ``unit``."""
+    path = os.environ.get(ITEMS_ENV)
+    if not path:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"unit": unit, "count": count}) + "\n")
+
+
+def count_calls(function: str, calls: int, seconds: float) -> None:
+    """Record calls of a counted helper (see profiling.counted) in the current stage."""
+    path = os.environ.get(ITEMS_ENV)
+    if not path:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"function": function, "calls": calls, "seconds": seconds}) + "\n")
+
+
+def read_counts(path: Path) -> tuple[dict[str, int], dict[str, dict]]:
+    """(items per unit, {function: {"calls", "seconds"}}) a stage counted."""
+    items: dict[str, int] = {}
+    calls: dict[str, dict] = {}
+    if not path.exists():
+        return items, calls
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "unit" in entry:
+                items[entry["unit"]] = items.get(entry["unit"], 0) + entry["count"]
+            else:
+                c = calls.setdefault(entry["function"], {"calls": 0, "seconds": 0.0})
+                c["calls"] += entry["calls"]
+                c["seconds"] = round(c["seconds"] + entry["seconds"], 3)
+    return items, calls
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def proc_io(pid="self") -> tuple[int, int] | None:
+    """(bytes read, bytes written) by a process and its reaped children, or None."""
+    try:
+        with open(f"/proc/{pid}/io", encoding="ascii") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+    except (OSError, ValueError):
+        return None
+    return int(fields["rchar"]), int(fields["wchar"])
+
+
+def current_rss_mb(pid="self") -> float | None:
+    """A process's resident memory now (from /proc/<pid>/statm), or None."""
+    try:
+        with open(f"/proc/{pid}/statm", encoding="ascii") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1 << 20)
+
+
+def rss_mb(maxrss: int) -> float:
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    return maxrss / (1 << 20) if sys.platform == "darwin" else maxrss / 1024
+
+
+def usage_resources(usage, io: tuple[int, int] | None) -> dict:
+    """Resource fields from a wait4() rusage and the stage's proc_io()."""
+    return {
+        "cpu_s": usage.ru_utime + usage.ru_stime,
+        "peak_rss_mb": rss_mb(usage.ru_maxrss),
+        "read_mb": None if io is None else io[0] / 1e6,
+        "written_mb": None if io is None else io[1] / 1e6,
+    }
+
+
+class InProcessMeter:
+    """Resources used in this process between start() and stop(), for in-process builders."""
+
+    def start(self) -> None:
+        self.cpu = time.process_time()
+        self.io = proc_io()
+
+    def stop(self) -> dict:
+        io = proc_io()
+        delta = None if io is None or self.io is None else (io[0] - self.io[0], io[1] - self.io[1])
+        return {
+            "cpu_s": time.process_time() - self.cpu,
+            "peak_rss_mb": None if resource is None else rss_mb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss),
+            "read_mb": None if delta is None else delta[0] / 1e6,
+            "written_mb": None if delta is None else delta[1] / 1e6,
+        }
+
+
+def trace_record(name: str, status: str, mode: str, wall: float, resources: dict, items: dict[str, int],
+                 calls: dict[str, dict] | None = None, profile: str | None = None) -> dict:
+    """A stage's trace; mode is "script" or "in-process", profile the profiling mode it ran under, if any."""
+    record = {"stage": name, "status": status, "mode": mode, "profile": profile, "wall_s": round(wall, 2)}
+    for key in METRICS[1:]:
+        value = resources.get(key)
+        record[key] = None if value is None else round(value, 2)
+    record["items"] = items
+    record["per_second"] = {unit: round(n / wall, 1) for unit, n in items.items()} if wall > 0 else {}
+    record["calls"] = calls or {}
+    return record
+
+
+def format_trace(record: dict) -> str:
+    """One-line summary: "1.2s, 1.0s CPU, 210 MB peak, 12.3/4.5 MB read/written, 665 letters (554/s)"."""
+    parts = [f"{record['wall_s']:.1f}s"]
+    if record["cpu_s"] is not None:
+        parts.append(f"{record['cpu_s']:.1f}s CPU")
+    if record["peak_rss_mb"] is not None:
+        parts.append(f"{record['peak_rss_mb']:.0f} MB peak")
+    if record["read_mb"] is not None:
+        parts.append(f"{record['read_mb']:.1f}/{record['written_mb']:.1f} MB read/written")
+    for unit, n in record["items"].items():
+        rate = record["per_second"].get(unit)
+        parts.append(f"{n} {unit}" + (f" ({rate:g}/s)" if rate is not None else ""))
+    return ", ".join(parts)
+
+
+# ---------------------------------------------------------------------------
+# Run log
+# ---------------------------------------------------------------------------
+
+def append_run(run: dict, path: Path = RUN_LOG) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(run, ensure_ascii=False) + "\n")
+
+
+def load_runs(path: Path = RUN_LOG) -> list[dict]:
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def regressions(run: dict, previous: list[dict], last: int = BASELINE_RUNS,
+                threshold: float = THRESHOLD) -> list[dict]:
+    """Metrics of ``run``'s stages that exceed the median of their ``last`` previous runs.
+
+    Only successful runs of a stage count, on either side, and only
+    comparable() ones.
+    """
+    found = []
+    for stage in run["stages"]:
+        if stage["status"] != "ran":
+            continue
+        history = [s for r in previous for s in r["stages"] if s["stage"] == stage["stage"]
+                   and s["status"] == "ran" and comparable(s, stage)]
+        history = history[-last:]
+        for metric in METRICS:
+            values = [s[metric] for s in history if s.get(metric) is not None]
+            value = stage.get(metric)
+            if value is None or not values:
+                continue
+            median = statistics.median(values)
+            if value > median * threshold and value - median > FLOORS[metric]:
+                found.append({"stage": stage["stage"], "metric": metric, "value": value,
+                              "median": median, "runs": len(values)})
+    return found
+
+
+def comparable(a: dict, b: dict) -> bool:
+    """Whether two traces of a stage ran alike: in the same mode (an in-process
+    builder's peak RSS is the runner's) and under the same profiler, if any."""
+    return a.get("mode") == b.get("mode") and a.get("profile") == b.get("profile")
+
+
+def format_regression(r: dict) -> str:
+    unit = "s" if r["metric"].endswith("_s") else " MB"
+    ratio = f"x{r['value'] / r['median']:.2f}" if r["median"] else "new"
+    return (f"{r['stage']} {r['metric']} {r['value']:g}{unit} vs median {r['median']:g}{unit} "
+            f"of {r['runs']} runs ({ratio})")
@@ -0,0 +1,199 @@
+"""
+Sorted date index over letters (or any dated items) for range, nearest-date
+and calendar-bucket queries.
+
+Dates are converted once to proleptic ordinal day numbers and kept sorted,
+so range and nearest-date lookups are bisections and each year, quarter,
+month or ISO-week bucket is a contiguous slice of the sorted keys:
+
+    from temporal_index import TemporalIndex
+
+    index = TemporalIndex.from_corpus()           # keyed by int letter ID
+    index.range("1914-08-01", "1914-08-31")       # letter IDs, chronological
+    index.nearest("1915-03-02")                   # (distance_days, [ids])
+    index.bucket("quarter", "1914-Q3")            # letter IDs in that quarter
+    for label, ids in index.buckets("year"): ...  # "1911", "1912", ...
+    index.label("month", 42)                      # "1914-08"
+
+Undated items are accepted and kept in ``index.undated``; they never
+appear in range, nearest or bucket results. Keys need not be unique (e.g.
+one entry per mention); only day() and label() assume they are.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+
+LEVELS = ("year", "quarter", "month", "week")
+
+# datetime64[D] counts days from 1970-01-01; ordinals count from 0001-01-01.
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=None)
+def _parse_iso(value: str) -> int | None:
+    try:
+        return datetime.strptime(value[:10], "%Y-%m-%d").toordinal()
+    except ValueError:
+        return None
+
+
+def to_ordinal(value) -> int | None:
+    """Day number of an ISO date string, date or ordinal; None if missing/invalid."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str):
+        return _parse_iso(value)
+    return None
+
+
+@lru_cache(maxsize=None)
+def bucket_label(level: str, day: int) -> str:
+    """Calendar bucket label of a day: "1914", "1914-Q3", "1914-08" or "1914-W31"."""
+    d = date.fromordinal(day)
+    if level == "year":
+        return str(d.year)
+    if level == "quarter":
+        return f"{d.year}-Q{(d.month - 1) // 3 + 1}"
+    if level == "month":
+        return f"{d.year}-{d.month:02d}"
+    if level == "week":
+        iso_year, week, _ = d.isocalendar()
+        return f"{iso_year}-W{week:02d}"
+    raise KeyError(f"Unknown bucket level {level!r}; expected one of {LEVELS}")
+
+
+def label_range(level: str, start, end) -> list[str]:
+    """Every bucket label from start to end inclusive, empty buckets too."""
+    labels: list[str] = []
+    for day in range(to_ordinal(start), to_ordinal(end) + 1):
+        label = bucket_label(level, day)
+        if not labels or labels[-1] != label:
+            labels.append(label)
+    return labels
+
+
+class TemporalIndex:
+    """Keys sorted by day number, with calendar buckets as slices."""
+
+    def __init__(self, keys, dates):
+        dated, self.undated = [], []
+        for seq, (key, value) in enumerate(zip(keys, dates)):
+            day = to_ordinal(value)
+            if day is None:
+                self.undated.append(key)
+            else:
+                dated.append((day, seq, key))
+        dated.sort()
+        self.days = [d for d, _, _ in dated]
+        self.keys = [k for _, _, k in dated]
+        self._seq = [s for _, s, _ in dated]
+        self._day_of = {k: d for d, _, k in dated}
+        self._buckets: dict[str, dict[str, tuple[int, int]]] = {}
+
+    @classmethod
+    def from_corpus(cls, corpus=None) -> "TemporalIndex":
+        """Index every letter of the corpus store by its int ID."""
+        if corpus is None:
+            from corpus import load_corpus
+            corpus = load_corpus()
+        days = corpus.dates.astype(np.int64) + _EPOCH_ORDINAL
+        missing = np.isnat(corpus.dates)
+        dates = [None if m else int(d) for d, m in zip(days.tolist(), missing.tolist())]
+        return cls(corpus.ids.tolist(), dates)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key) -> bool:
+        return key in self._day_of
+
+    # -- per-key lookups ------------------------------------------------------
+
+    def day(self, key) -> int | None:
+        return self._day_of.get(key)
+
+    def label(self, level: str, key) -> str | None:
+        day = self._day_of.get(key)
+        return None if day is None else bucket_label(level, day)
+
+    def labels(self, level: str) -> dict:
+        """{key: bucket label} for every dated key."""
+        return {k: bucket_label(level, d) for k, d in zip(self.keys, self.days)}
+
+    # -- queries --------------------------------------------------------------
+
+    def range(self, start, end) -> list:
+        """Keys dated start <= day <= end (inclusive), in date order."""
+        lo = bisect_left(self.days, to_ordinal(start))
+        hi = bisect_right(self.days, to_ordinal(end))
+        return self.keys[lo:hi]
+
+    def within(self, target, days: int) -> list:
+        """Keys dated at most ``days`` days from target, in date order."""
+        t = to_ordinal(target)
+        return self.range(t - days, t + days)
+
+    def nearest(self, target, max_distance: int | None = None) -> tuple[int | None, list]:
+        """(distance in days, keys at that distance) for the closest dated keys.
+
+        All keys tied at the minimum distance (before and after target) are
+        returned in the order they were given to the index. Returns
+        (None, []) when nothing is dated or nothing is within max_distance.
+        """
+        t = to_ordinal(target)
+        if t is None or not self.days:
+            return None, []
+        i = bisect_left(self.days, t)
+        distances = []
+        if i < len(self.days):
+            distances.append(self.days[i] - t)
+        if i > 0:
+            distances.append(t - self.days[i - 1])
+        best = min(distances)
+        if max_distance is not None and best > max_distance:
+            return None, []
+        hits = []
+        for day in {t - best, t + best}:
+            lo, hi = bisect_left(self.days, day), bisect_right(self.days, day)
+            hits.extend(range(lo, hi))
+        hits.sort(key=self._seq.__getitem__)
+        return best, [self.keys[h] for h in hits]
+
+    # -- calendar buckets -----------------------------------------------------
+
+    def _bucket_bounds(self, level: str) -> dict[str, tuple[int, int]]:
+        if level not in self._buckets:
+            bounds: dict[str, tuple[int, int]] = {}
+            start, current = 0, None
+            for pos, day in enumerate(self.days):
+                label = bucket_label(level, day)
+                if label != current:
+                    if current is not None:
+                        bounds[current] = (start, pos)
+                    start, current = pos, label
+            if current is not None:
+                bounds[current] = (start, len(self.days))
+            self._buckets[level] = bounds
+        return self._buckets[level]
+
+    def bucket(self, level: str, label: str) -> list:
+        """Keys in one calendar bucket (empty if the bucket has no items)."""
+        start, stop = self._bucket_bounds(level).get(label, (0, 0))
+        return self.keys[start:stop]
+
+    def buckets(self, level: str) -> list[tuple[str, list]]:
+        """[(label, keys)] for every non-empty bucket, chronologically."""
+        return [
+            (label, self.keys[start:stop])
+            for label, (start, stop) in self._bucket_bounds(level).items()
+        ]
+
+    def bucket_labels(self, level: str) -> list[str]:
+        return list(self._bucket_bounds(level))
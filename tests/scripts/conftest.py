@@ -0,0 +1,29 @@
+"""
+Pytest fixtures for the pipeline scripts' tests.
+"""
+import pytest
+import sys
+from pathlib import Path
+
+# Add scripts directory to path
+scripts_dir = Path(__file__).parent.parent.parent / "scripts"
+sys.path.insert(0, str(scripts_dir))
+
+from pipeline import Pipeline
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    """An empty project root for stub stages, outside any profiled run."""
+    monkeypatch.delenv("PIPELINE_PROFILE", raising=False)
+    return tmp_path
+
+
+@pytest.fixture
+def make_pipeline(root):
+    """Pipeline over stub stages, with its state, logs and run log under root."""
+    def make(stages):
+        cache = root / ".cache"
+        return Pipeline(stages, root=root, state_path=cache / "state.json",
+                        log_dir=cache / "logs", run_log=cache / "runs.jsonl")
+    return make
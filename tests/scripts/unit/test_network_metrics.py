@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import networkx as nx
+import numpy as np
+import pytest
+from scipy import sparse
+
+scripts_dir = Path(__file__).parent.parent.parent.parent / "scripts"
+sys.path.insert(0, str(scripts_dir))
+
+from network_metrics import approximate_betweenness, betweenness, sample_size
+
+
+def adjacency(G):
+    return sparse.csr_matrix(nx.to_scipy_sparse_array(G, nodelist=sorted(G), weight="weight", dtype=float))
+
+
+class TestSampleSize:
+    @pytest.mark.parametrize("n", [0, 1, 2])
+    def test_tiny_graphs_use_every_source(self, n):
+        assert sample_size(n, epsilon=0.05) == n
+
+    def test_smaller_epsilon_needs_more_sources(self):
+        assert sample_size(100, epsilon=0.05) > sample_size(100, epsilon=0.1)
+
+
+class TestApproximateBetweenness:
+    @pytest.mark.parametrize("n", [0, 1, 2])
+    def test_tiny_graphs_with_epsilon(self, n):
+        A = sparse.csr_matrix(np.eye(n, k=1) + np.eye(n, k=-1))  # a path
+
+        scores, used, bound = approximate_betweenness(A, epsilon=0.05)
+
+        assert scores.tolist() == [0.0] * n
+        assert used == n
+        assert bound == 0.0
+
+    def test_all_sources_is_exact(self):
+        G = nx.les_miserables_graph()
+        A = adjacency(G)
+        expected = nx.betweenness_centrality(G, weight="weight")
+
+        scores, used, bound = approximate_betweenness(A)
+
+        assert used == A.shape[0] and bound == 0.0
+        assert np.allclose(scores, [expected[p] for p in sorted(G)])
+        assert np.allclose(scores, betweenness(A))
@@ -0,0 +1,304 @@
+import json
+import pytest
+import sys
+import time
+from pathlib import Path
+
+scripts_dir = Path(__file__).parent.parent.parent.parent / "scripts"
+sys.path.insert(0, str(scripts_dir))
+
+from pipeline import Stage, _Job
+from stage_trace import load_runs
+
+# Stub stage: write.py OUT LABEL [INPUT ...] writes LABEL plus its inputs'
+# content to OUT (which may be one of its inputs) and logs LABEL to ran.log
+WRITE_STAGE = """
+import sys
+from pathlib import Path
+
+out, label, *inputs = sys.argv[1:]
+text = "".join(Path(p).read_text() for p in inputs)
+Path(out).write_text(label + "\\n" + text)
+with open("ran.log", "a") as f:
+    f.write(label + "\\n")
+"""
+
+# Stub stage: load the resolver through the shared alias-resolver cache
+# (redirected into the stub root) and write what it resolves. Counts the
+# builds in builds.log, and builds slowly so the other stages arrive meanwhile.
+RESOLVER_STAGE = f"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, {str(scripts_dir)!r})
+import alias_resolver
+
+alias_resolver.CACHE_PATH = Path("cache/alias-resolver.pickle").resolve()
+build = alias_resolver.registry_aliases
+
+
+def counted(persons):
+    with open("builds.log", "a") as f:
+        f.write("build\\n")
+    time.sleep(0.5)
+    return build(persons)
+
+
+alias_resolver.registry_aliases = counted
+resolver = alias_resolver.load_registry_resolver(Path("registry.json"))
+Path(sys.argv[1]).write_text(" ".join(resolver.ids_in_text("Kaere Trine og Peter")))
+"""
+
+
+class TestSharedCache:
+    def test_concurrent_stages_build_shared_cache_once(self, root, make_pipeline):
+        registry = [
+            {"id": "trine", "canonical": "Trine Dalager", "aliases": ["Trine"]},
+            {"id": "peter", "canonical": "Peter Dalager", "aliases": ["Peter"]},
+        ]
+        (root / "registry.json").write_text(json.dumps(registry))
+        (root / "resolve.py").write_text(RESOLVER_STAGE)
+        stages = [
+            Stage(f"resolve-{i}", "resolve.py", inputs=("registry.json",),
+                  outputs=(f"out-{i}.txt",), args=(f"out-{i}.txt",))
+            for i in range(4)
+        ]
+        pipeline = make_pipeline(stages)
+
+        assert pipeline.run(stages, jobs=4, memory_mb=None)
+
+        for i in range(4):
+            assert (root / f"out-{i}.txt").read_text() == "trine peter"
+        assert (root / "builds.log").read_text().splitlines() == ["build"]
+        assert [p.name for p in (root / "cache").iterdir() if ".tmp" in p.name] == []
+
+
+def write_stage(name, out, inputs=(), **kwargs):
+    """A write.py stage labelled with its name."""
+    return Stage(name, "write.py", inputs=tuple(inputs), outputs=(out,),
+                 args=(out, name, *inputs), **kwargs)
+
+
+def ran(root):
+    log = root / "ran.log"
+    lines = log.read_text().splitlines() if log.exists() else []
+    log.unlink(missing_ok=True)
+    return lines
+
+
+@pytest.fixture
+def stub(root):
+    (root / "write.py").write_text(WRITE_STAGE)
+    (root / "fail.py").write_text("raise SystemExit(1)\n")
+    (root / "src.txt").write_text("source\n")
+    return root
+
+
+class TestInPlaceWriter:
+    """social-network -> disappearance (updates social-network.json) -> research-queue."""
+
+    @pytest.fixture
+    def stages(self):
+        return [
+            write_stage("network", "network.txt", ["src.txt"]),
+            write_stage("disappearance", "network.txt", ["network.txt"]),
+            write_stage("queue", "queue.txt", ["network.txt"]),
+        ]
+
+    def test_consumers_depend_on_the_last_writer(self, stub, make_pipeline, stages):
+        pipeline = make_pipeline(stages)
+
+        assert pipeline.deps["disappearance"] == ["network"]
+        assert pipeline.deps["queue"] == ["disappearance"]
+        assert pipeline.producer["network.txt"] == "disappearance"
+
+    def test_consumer_reads_the_updated_file(self, stub, make_pipeline, stages):
+        assert make_pipeline(stages).run(stages, jobs=3, memory_mb=None)
+
+        assert ran(stub) == ["network", "disappearance", "queue"]
+        assert (stub / "queue.txt").read_text() == "queue\ndisappearance\nnetwork\nsource\n"
+
+    def test_in_place_update_stays_current(self, stub, make_pipeline, stages):
+        assert make_pipeline(stages).run(stages, jobs=1, memory_mb=None)
+        ran(stub)
+
+        pipeline = make_pipeline(stages)
+        assert [pipeline.reasons(s) for s in stages] == [[], [], []]
+        assert pipeline.run(stages, jobs=1, memory_mb=None)
+        assert ran(stub) == []
+
+    def test_rerun_upstream_reapplies_update(self, stub, make_pipeline, stages):
+        assert make_pipeline(stages).run(stages, jobs=1, memory_mb=None)
+        ran(stub)
+        (stub / "src.txt").write_text("changed source\n")
+
+        assert make_pipeline(stages).run(stages, jobs=1, memory_mb=None)
+
+        assert ran(stub) == ["network", "disappearance", "queue"]
+        assert (stub / "network.txt").read_text() == "disappearance\nnetwork\nchanged source\n"
+
+
+class TestSelect:
+    @pytest.fixture
+    def pipeline(self, stub, make_pipeline):
+        return make_pipeline([
+            write_stage("a", "a.txt", ["src.txt"]),
+            write_stage("experiment", "x.txt", ["src.txt"], manual=True),
+            write_stage("b", "b.txt", ["a.txt", "x.txt"]),
+            write_stage("c", "c.txt", ["b.txt"]),
+            write_stage("other", "o.txt", ["src.txt"]),
+        ])
+
+    @staticmethod
+    def names(stages):
+        return [s.name for s in stages]
+
+    def test_no_targets_selects_every_non_manual_stage(self, pipeline):
+        assert self.names(pipeline.select()) == ["a", "b", "c", "other"]
+
+    def test_target_includes_upstream_in_order(self, pipeline):
+        assert self.names(pipeline.select(["c"])) == ["a", "b", "c"]
+
+    def test_upstream_skips_manual_stages(self, pipeline):
+        assert "experiment" not in self.names(pipeline.select(["b"]))
+
+    def test_manual_stage_runs_when_named(self, pipeline):
+        assert self.names(pipeline.select(["experiment", "b"])) == ["a", "experiment", "b"]
+
+    def test_only_selects_just_the_targets(self, pipeline):
+        assert self.names(pipeline.select(["c", "a"], upstream=False)) == ["a", "c"]
+
+    def test_unknown_target(self, pipeline):
+        with pytest.raises(KeyError, match="nope"):
+            pipeline.select(["nope"])
+
+    def test_only_runs_just_the_targets(self, pipeline, stub):
+        assert pipeline.run(pipeline.select(["other", "a"], upstream=False), jobs=1, memory_mb=None)
+
+        assert ran(stub) == ["a", "other"]
+        assert set(pipeline.records) == {"a", "other"}
+
+
+class TestFailure:
+    def test_failed_stage_blocks_downstream_only(self, stub, make_pipeline):
+        stages = [
+            Stage("broken", "fail.py", inputs=("src.txt",), outputs=("a.txt",)),
+            write_stage("downstream", "b.txt", ["a.txt"]),
+            write_stage("independent", "c.txt", ["src.txt"]),
+        ]
+        pipeline = make_pipeline(stages)
+
+        assert pipeline.run(stages, jobs=2, memory_mb=None) is False
+
+        assert ran(stub) == ["independent"]
+        assert not (stub / "b.txt").exists()
+        assert set(pipeline.records) == {"independent"}
+
+    def test_failed_stage_runs_again(self, stub, make_pipeline):
+        stages = [Stage("broken", "fail.py", outputs=("a.txt",))]
+        make_pipeline(stages).run(stages, jobs=1, memory_mb=None)
+
+        assert make_pipeline(stages).reasons(stages[0]) == ["never run"]
+
+
+class TestUnchangedRewrite:
+    @pytest.fixture
+    def stages(self):
+        # "a" reads src.txt but writes the same a.txt whatever it contains
+        return [
+            Stage("a", "write.py", inputs=("src.txt",), outputs=("a.txt",), args=("a.txt", "a")),
+            write_stage("b", "b.txt", ["a.txt"]),
+        ]
+
+    def test_identical_output_does_not_trigger_consumers(self, stub, make_pipeline, stages):
+        assert make_pipeline(stages).run(stages, jobs=1, memory_mb=None)
+        ran(stub)
+        (stub / "src.txt").write_text("a different source\n")
+
+        pipeline = make_pipeline(stages)
+        assert pipeline.reasons(stages[0]) == ["input changed: src.txt"]
+        assert pipeline.run(stages, jobs=1, memory_mb=None)
+
+        assert ran(stub) == ["a"]
+        assert pipeline.reasons(stages[1]) == []
+
+    def test_forced_rewrite_does_not_trigger_consumers(self, stub, make_pipeline, stages):
+        assert make_pipeline(stages).run(stages, jobs=1, memory_mb=None)
+        ran(stub)
+
+        assert make_pipeline(stages).run(stages, force={"a"}, jobs=1, memory_mb=None)
+
+        assert ran(stub) == ["a"]
+
+    def test_changed_output_triggers_consumers(self, stub, make_pipeline):
+        stages = [write_stage("a", "a.txt", ["src.txt"]), write_stage("b", "b.txt", ["a.txt"])]
+        assert make_pipeline(stages).run(stages, jobs=1, memory_mb=None)
+        ran(stub)
+        (stub / "src.txt").write_text("a different source\n")
+
+        assert make_pipeline(stages).run(stages, jobs=1, memory_mb=None)
+
+        assert ran(stub) == ["a", "b"]
+
+
+class TestCriticalPath:
+    def test_in_process_builders_run_in_series(self, root, make_pipeline):
+        stages = [Stage(name, "unused.py", outputs=(f"{name}.txt",)) for name in ("a", "b", "c")]
+
+        def builder(name, seconds):
+            def build():
+                time.sleep(seconds)
+                (root / f"{name}.txt").write_text(name)
+            return build
+
+        pipeline = make_pipeline(stages)
+        builders = {"a": builder("a", 0.2), "b": builder("b", 0.3), "c": builder("c", 0.1)}
+        assert pipeline.run(stages, jobs=3, memory_mb=None, builders=builders)
+
+        run = load_runs(root / ".cache" / "runs.jsonl")[-1]
+        assert run["critical_path"] == ["a", "b", "c"]
+        assert run["critical_path_s"] >= 0.6
+
+    def test_independent_scripts_overlap(self, make_pipeline):
+        stages = [Stage(name, "unused.py") for name in ("a", "b")]
+        timings = {"a": (2.0, None), "b": (3.0, None)}
+
+        assert make_pipeline(stages).critical_path(timings) == (["b"], 3.0)
+
+
+class TestPoolWorkers:
+    @pytest.fixture
+    def stages(self, root):
+        (root / "workers.py").write_text(
+            "import os, sys\nopen(sys.argv[1], 'w').write(os.environ.get('PIPELINE_WORKERS', '-'))\n")
+        return [
+            Stage("pool", "workers.py", outputs=("pool.txt",), args=("pool.txt",), memory_mb=200, pool_mb=100),
+            Stage("plain", "workers.py", outputs=("plain.txt",), args=("plain.txt",), memory_mb=200),
+        ]
+
+    def test_pool_gets_the_free_job_slots(self, root, make_pipeline, stages):
+        assert make_pipeline(stages).run(stages[:1], jobs=3, memory_mb=10_000)
+
+        assert (root / "pool.txt").read_text() == "3"
+
+    def test_pool_is_limited_by_memory(self, root, make_pipeline, stages):
+        assert make_pipeline(stages).run(stages[:1], jobs=8, memory_mb=450)
+
+        assert (root / "pool.txt").read_text() == "2"
+
+    def test_stage_without_pool_gets_no_worker_count(self, root, make_pipeline, stages):
+        assert make_pipeline(stages).run(stages[1:], jobs=3, memory_mb=10_000)
+
+        assert (root / "plain.txt").read_text() == "-"
+
+    def test_pool_workers_hold_job_slots(self, make_pipeline, stages):
+        pipeline = make_pipeline(stages)
+        job = _Job(stages[0], None, None, None, False, 0.0, workers=2)
+
+        assert job.memory_mb == 400
+
+        assert pipeline._workers(stages[0], {1: job}, 3, None) == 1
+        assert not pipeline._fits(stages[1], {1: job}, 2, None)
+        assert pipeline._fits(stages[1], {1: job}, 3, None)
+        assert not pipeline._fits(stages[1], {1: job}, 3, 550)
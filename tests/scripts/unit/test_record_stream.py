@@ -0,0 +1,83 @@
+import pytest
+import sys
+import threading
+import time
+from pathlib import Path
+
+scripts_dir = Path(__file__).parent.parent.parent.parent / "scripts"
+sys.path.insert(0, str(scripts_dir))
+
+from record_stream import iter_records, write_records
+
+
+def records(count, fail_at=None, pause_every=None):
+    for i in range(count):
+        if pause_every and i % pause_every == 0:
+            time.sleep(0.1)
+        if i == fail_at:
+            raise ValueError("producer failed")
+        yield {"i": i}
+
+
+def leftovers(directory):
+    return sorted(p.name for p in directory.iterdir() if p.name.startswith("."))
+
+
+@pytest.mark.parametrize("fmt", ["json", "jsonl"])
+class TestWriteRecords:
+    def test_round_trip(self, tmp_path, fmt):
+        path = write_records(str(tmp_path / "out.json"), records(3), fmt)
+
+        assert list(iter_records(path)) == [{"i": 0}, {"i": 1}, {"i": 2}]
+        assert leftovers(tmp_path) == []
+
+    def test_failure_keeps_previous_file(self, tmp_path, fmt):
+        path = write_records(str(tmp_path / "out.json"), records(3), fmt)
+
+        with pytest.raises(ValueError):
+            write_records(str(tmp_path / "out.json"), records(10, fail_at=5), fmt)
+
+        assert len(list(iter_records(path))) == 3
+        assert leftovers(tmp_path) == []
+
+
+class TestFollow:
+    def follow(self, path, found):
+        try:
+            for rec in iter_records(path, follow=True, poll_interval=0.02):
+                found.append(rec)
+        except RuntimeError as e:
+            found.append(e)
+
+    def run(self, tmp_path, **kwargs):
+        path = str(tmp_path / "out.json")
+        started = threading.Event()
+
+        def produce():
+            def gen():
+                started.set()
+                yield from records(200, pause_every=50, **kwargs)
+            try:
+                write_records(path, gen(), "jsonl")
+            except ValueError:
+                pass
+
+        writer = threading.Thread(target=produce)
+        writer.start()
+        started.wait()
+        found = []
+        self.follow(path, found)
+        writer.join()
+        return found
+
+    def test_follower_reads_everything(self, tmp_path):
+        found = self.run(tmp_path)
+
+        assert found == [{"i": i} for i in range(200)]
+
+    def test_follower_raises_when_writer_fails(self, tmp_path):
+        found = self.run(tmp_path, fail_at=120)
+
+        assert isinstance(found[-1], RuntimeError)
+        assert len(found) - 1 <= 120
+        assert not (tmp_path / "out.jsonl").exists()
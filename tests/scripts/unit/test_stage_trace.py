@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+scripts_dir = Path(__file__).parent.parent.parent.parent / "scripts"
+sys.path.insert(0, str(scripts_dir))
+
+from stage_trace import regressions, trace_record
+
+
+def run(wall, mode="script", profile=None):
+    resources = {"cpu_s": wall, "peak_rss_mb": 100.0, "read_mb": 1.0, "written_mb": 1.0}
+    return {"stages": [trace_record("audit", "ran", mode, wall, resources, {}, profile=profile)]}
+
+
+class TestRegressions:
+    def test_slower_run_regresses(self):
+        found = regressions(run(20.0), [run(10.0)] * 3)
+
+        assert {r["metric"] for r in found} == {"wall_s", "cpu_s"}
+
+    def test_profiled_runs_are_not_a_baseline(self):
+        previous = [run(10.0)] * 3 + [run(40.0, profile="cprofile")] * 5
+
+        assert regressions(run(10.0), previous) == []
+        assert len(regressions(run(20.0), previous)) == 2
+
+    def test_profiled_run_compares_with_profiled_runs(self):
+        previous = [run(10.0)] * 3 + [run(40.0, profile="cprofile")] * 3
+
+        assert regressions(run(40.0, profile="cprofile"), previous) == []
+        assert regressions(run(40.0, profile="sample"), previous) == []
+
+    def test_in_process_runs_compare_separately(self):
+        assert regressions(run(20.0, mode="in-process"), [run(10.0)] * 3) == []
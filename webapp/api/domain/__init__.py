@@ -0,0 +1,37 @@
+"""Domain records and error types shared by the API and the data pipeline."""
+
+from .exceptions import (
+    ConfigurationError,
+    DataLoadError,
+    InvalidLetterIdError,
+    JernkorsetAPIError,
+    LetterNotFoundError,
+    ModernizationError,
+    PlaceNotFoundError,
+)
+from .models import (
+    ErrorResponse,
+    Letter,
+    LetterSummary,
+    Person,
+    Place,
+    ProofreadResponse,
+    Sentence,
+)
+
+__all__ = [
+    "ConfigurationError",
+    "DataLoadError",
+    "ErrorResponse",
+    "InvalidLetterIdError",
+    "JernkorsetAPIError",
+    "Letter",
+    "LetterNotFoundError",
+    "LetterSummary",
+    "ModernizationError",
+    "Person",
+    "Place",
+    "PlaceNotFoundError",
+    "ProofreadResponse",
+    "Sentence",
+]
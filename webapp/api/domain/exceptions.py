@@ -0,0 +1,60 @@
+"""
+API error types. Each carries a stable error code and HTTP status so the
+API can turn it into an ``ErrorResponse`` without per-route handling.
+"""
+
+from pathlib import Path
+
+
+class JernkorsetAPIError(Exception):
+    def __init__(self, error_code: str, message: str, detail: str | None = None,
+                 status_code: int = 500):
+        super().__init__(message)
+        self.error_code = error_code
+        self.message = message
+        self.detail = detail
+        self.status_code = status_code
+
+
+class LetterNotFoundError(JernkorsetAPIError):
+    def __init__(self, letter_id: int, max_id: int):
+        super().__init__(
+            "LETTER_NOT_FOUND",
+            f"Letter {letter_id} not found",
+            f"Valid letter IDs are 1-{max_id}",
+            404,
+        )
+
+
+class InvalidLetterIdError(JernkorsetAPIError):
+    def __init__(self, letter_id: int):
+        super().__init__(
+            "INVALID_LETTER_ID",
+            f"Invalid letter ID: {letter_id}",
+            "Letter ID must be a positive integer",
+            400,
+        )
+
+
+class PlaceNotFoundError(JernkorsetAPIError):
+    def __init__(self, place_id):
+        super().__init__("PLACE_NOT_FOUND", f"Place {place_id} not found", None, 404)
+
+
+class DataLoadError(JernkorsetAPIError):
+    def __init__(self, path: str, detail: str | None = None):
+        super().__init__(
+            "DATA_LOAD_ERROR", f"Failed to load data from {Path(path).name}", detail, 500
+        )
+
+
+class ModernizationError(JernkorsetAPIError):
+    def __init__(self, detail: str | None = None):
+        super().__init__("MODERNIZATION_ERROR", "Failed to modernize letter text", detail, 502)
+
+
+class ConfigurationError(JernkorsetAPIError):
+    def __init__(self, key: str):
+        super().__init__(
+            "CONFIGURATION_ERROR", f"Missing required configuration: {key}", None, 500
+        )
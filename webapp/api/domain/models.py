@@ -0,0 +1,181 @@
+"""
+Domain records for letters, sentences, persons and places.
+
+All records are frozen dataclasses with ``__slots__``: no per-instance
+``__dict__``, hashable, and safe to share between caches. Categorical
+fields (sender, recipient, place, year) are interned on construction, so
+665 letters from "Peter" to "Trine" hold one "Peter" and one "Trine"
+string between them rather than 665 copies of each.
+
+The pipeline builds these from the columnar corpus store
+(``scripts/corpus.py``: ``Corpus.letter_summaries()`` / ``Corpus.letters()``);
+the API serialises them with ``to_dict()``.
+"""
+
+import sys
+from dataclasses import dataclass, field, fields
+from datetime import date as Date
+
+# Year values are plain ints above CPython's small-int cache, so every
+# ``d.year`` would otherwise be a fresh object.
+_YEARS: dict[int, int] = {}
+
+
+def intern_str(value: str | None) -> str | None:
+    return sys.intern(value) if value else value
+
+
+def intern_year(value: int | None) -> int | None:
+    if value is None:
+        return None
+    return _YEARS.setdefault(value, value)
+
+
+def _require_positive_id(name: str, value: int) -> None:
+    if value < 1:
+        raise ValueError(f"{name} must be >= 1, got {value}")
+
+
+def _serialise(value):
+    if isinstance(value, Date):
+        return value.isoformat()
+    if isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+class _Record:
+    """Shared helpers for the slotted records below."""
+
+    __slots__ = ()
+
+    def to_dict(self) -> dict:
+        """JSON-ready dict of the record's fields (dates as ISO strings)."""
+        return {f.name: _serialise(getattr(self, f.name)) for f in fields(self)}
+
+
+# ---------------------------------------------------------------------------
+# Letters
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True, slots=True)
+class LetterSummary(_Record):
+    """A letter's metadata without its text."""
+
+    id: int
+    date: Date | None
+    place: str | None
+    sender: str
+    recipient: str
+    year: int | None = field(init=False, compare=False, repr=False)
+
+    def __post_init__(self):
+        _require_positive_id("Letter id", self.id)
+        object.__setattr__(self, "place", intern_str(self.place))
+        object.__setattr__(self, "sender", intern_str(self.sender))
+        object.__setattr__(self, "recipient", intern_str(self.recipient))
+        object.__setattr__(self, "year", intern_year(self.date.year if self.date else None))
+
+
+@dataclass(frozen=True, slots=True)
+class Letter(LetterSummary):
+    """A letter with one text layer (source, corrected or normalized)."""
+
+    text: str
+
+    def summary(self) -> LetterSummary:
+        return LetterSummary(self.id, self.date, self.place, self.sender, self.recipient)
+
+
+# ---------------------------------------------------------------------------
+# Sentences
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True, slots=True)
+class Sentence(_Record):
+    """One sentence of a normalized letter, located by character offsets."""
+
+    id: str
+    letter_id: int
+    index: int
+    text: str
+    start: int
+    end: int
+    is_formulaic: bool = False
+
+    def __post_init__(self):
+        _require_positive_id("Sentence letter_id", self.letter_id)
+
+    @classmethod
+    def from_record(cls, rec: dict) -> "Sentence":
+        """Build from a normalized-sentences.json record."""
+        return cls(
+            rec["sentence_id"], rec["letter_id"], rec["index"], rec["text"],
+            rec["start"], rec["end"], rec.get("is_formulaic", False),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Persons and places
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True, slots=True)
+class Person(_Record):
+    """A person-registry entry (identity fields only)."""
+
+    id: str
+    canonical: str
+    aliases: tuple[str, ...] = ()
+    category: str = ""
+    role: str = ""
+
+    def __post_init__(self):
+        object.__setattr__(self, "aliases", tuple(intern_str(a) for a in self.aliases))
+        object.__setattr__(self, "category", intern_str(self.category))
+
+    @classmethod
+    def from_registry(cls, entry: dict) -> "Person":
+        """Build from a person-registry.json entry."""
+        return cls(
+            entry["id"],
+            entry.get("canonical", ""),
+            tuple(entry.get("aliases", ())),
+            entry.get("category", ""),
+            entry.get("role", ""),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class Place(_Record):
+    """A place with an optional WKT geometry."""
+
+    id: int | str
+    name: str
+    geometry: str | None = None
+
+    def __post_init__(self):
+        object.__setattr__(self, "name", intern_str(self.name))
+
+
+# ---------------------------------------------------------------------------
+# API responses
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True, slots=True)
+class ProofreadResponse(_Record):
+    text: str
+    tps: float
+    original_letter_id: int
+
+    def __post_init__(self):
+        if self.tps < 0:
+            raise ValueError(f"tps must be >= 0, got {self.tps}")
+        _require_positive_id("original_letter_id", self.original_letter_id)
+
+
+@dataclass(frozen=True, slots=True)
+class ErrorResponse(_Record):
+    error_code: str
+    message: str
+    detail: str | None = None
+    request_id: str | None = None